@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Periodo, DiaFeriado
+from .configuracion_usuario import invalidar_configuracion
 
 
 @admin.register(Periodo)
@@ -48,7 +49,11 @@ class PeriodoAdmin(admin.ModelAdmin):
     activar_periodos.short_description = 'Activar períodos seleccionados'
     
     def desactivar_periodos(self, request, queryset):
+        usuarios = set(queryset.values_list('usuario_id', flat=True))
         queryset.update(activo=False)
+        # update() no dispara signals
+        for usuario_id in usuarios:
+            invalidar_configuracion(usuario_id)
         self.message_user(request, f'{queryset.count()} período(s) desactivado(s)')
     desactivar_periodos.short_description = 'Desactivar períodos seleccionados'
 
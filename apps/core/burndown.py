@@ -0,0 +1,109 @@
+"""
+Serie de avance (burn-down) de un período.
+
+Las horas se obtienen con una sola consulta agrupada por fecha; el
+acumulado se calcula con `accumulate` y cada día laborable toma el valor
+acumulado con una búsqueda binaria sobre las fechas con registros.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .versionado import clave_versionada, TIMEOUT_DERIVADOS
+
+
+def _dias_laborables(periodo):
+    """Fechas laborables del período en orden"""
+    calendario = periodo.calendario_laboral
+    dias = (periodo.fecha_fin - periodo.fecha_inicio).days + 1
+    return [
+        fecha for fecha in (periodo.fecha_inicio + timedelta(days=i) for i in range(dias))
+        if calendario.es_laborable(fecha)
+    ]
+
+
+def calcular_burndown(periodo, hoy=None):
+    """Serie acumulada real, línea ideal y proyección al ritmo actual"""
+    from apps.horas.models import RegistroHora
+
+    hoy = hoy or date.today()
+    filas = list(
+        RegistroHora.objects.filter(periodo=periodo)
+        .values_list('fecha')
+        .annotate(total=Sum('horas'))
+        .order_by('fecha')
+    )
+    fechas_registro = [fecha for fecha, _ in filas]
+    acumulado_registro = list(accumulate(float(total) for _, total in filas))
+
+    dias = _dias_laborables(periodo)
+    total_dias = len(dias)
+    objetivo = float(periodo.horas_objetivo)
+
+    # Acumulado real al cierre de cada día laborable hasta hoy
+    transcurridos = bisect_right(dias, hoy)
+    reales = []
+    for fecha in dias[:transcurridos]:
+        indice = bisect_right(fechas_registro, fecha)
+        reales.append(acumulado_registro[indice - 1] if indice else 0.0)
+
+    total_horas = acumulado_registro[-1] if acumulado_registro else 0.0
+    ritmo = total_horas / transcurridos if transcurridos else 0.0
+
+    serie = []
+    for indice, fecha in enumerate(dias):
+        punto = {
+            'fecha': fecha.isoformat(),
+            'ideal': round(objetivo * (indice + 1) / total_dias, 2),
+            'real': None,
+            'proyectado': None,
+        }
+        if indice < transcurridos:
+            punto['real'] = round(reales[indice], 2)
+        else:
+            punto['proyectado'] = round(total_horas + ritmo * (indice + 1 - transcurridos), 2)
+        serie.append(punto)
+
+    # Día en que se alcanzó el objetivo, o en que se alcanzaría al ritmo actual
+    fecha_objetivo = None
+    alcanzado = bisect_left(reales, objetivo)
+    if alcanzado < len(reales):
+        fecha_objetivo = dias[alcanzado].isoformat()
+    elif ritmo > 0:
+        indice = max(math.ceil((objetivo - total_horas) / ritmo), 1) + transcurridos - 1
+        if indice < total_dias:
+            fecha_objetivo = dias[indice].isoformat()
+
+    return {
+        'periodo': {
+            'id': periodo.id,
+            'nombre': periodo.nombre,
+            'fecha_inicio': periodo.fecha_inicio.isoformat(),
+            'fecha_fin': periodo.fecha_fin.isoformat(),
+            'horas_objetivo': periodo.horas_objetivo,
+            'dias_laborables': total_dias,
+            'dias_laborables_transcurridos': transcurridos,
+        },
+        'total_horas': round(total_horas, 2),
+        'ritmo_diario': round(ritmo, 2),
+        'horas_proyectadas': round(total_horas + ritmo * (total_dias - transcurridos), 2),
+        'fecha_proyectada_objetivo': fecha_objetivo,
+        'serie': serie,
+    }
+
+
+def obtener_burndown(periodo, hoy=None):
+    """Versión cacheada; se invalida con cada registro de horas del período"""
+    hoy = hoy or date.today()
+    clave = clave_versionada(
+        'burndown', ('periodo', periodo.pk), ('feriados', periodo.usuario_id), extra=hoy.isoformat()
+    )
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular_burndown(periodo, hoy)
+        cache.set(clave, datos, TIMEOUT_DERIVADOS)
+    return datos
@@ -0,0 +1,66 @@
+"""
+Chequeos de sistema del core (`python manage.py check`).
+
+Se registran desde CoreConfig.ready().
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.utils.module_loading import import_string
+
+# Backends que guardan los datos en la memoria de cada proceso
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+# Backends compartidos con add/incr atómicos entre procesos
+CACHES_ATOMICOS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django_redis.cache.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+@register()
+def cache_compartido(app_configs, **kwargs):
+    """Las versiones de datos y los eventos requieren un cache común a todos los procesos"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in CACHES_POR_PROCESO:
+        return [Warning(
+            'El cache por defecto es local a cada proceso.',
+            hint=(
+                'Con varios workers o comandos de manage.py los contadores de '
+                'versión (apps.core.versionado) y el bus de eventos no se '
+                'comparten y se sirven datos desactualizados. Configurar '
+                'CACHE_BACKEND con FileBasedCache o Redis.'
+            ),
+            id='core.W001',
+        )]
+    return []
+
+
+@register()
+def bus_eventos(app_configs, **kwargs):
+    """El bus de eventos tiene que llegar a todos los workers"""
+    from .eventos import CACHES_CON_LOCK, BusCache, BusLocal
+
+    bus = import_string(settings.EVENTOS_BUS)
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if issubclass(bus, BusCache) and backend not in CACHES_ATOMICOS + CACHES_CON_LOCK:
+        return [Error(
+            'EVENTOS_BUS usa el cache, pero el backend del cache no es atómico entre procesos.',
+            hint=(
+                'Los eventos publicados en un worker no llegarían a los streams '
+                'abiertos en otro, o dos eventos tomarían el mismo número. '
+                'Configurar CACHE_BACKEND con Redis o Memcached (o FileBasedCache '
+                'en un solo servidor).'
+            ),
+            id='core.E001',
+        )]
+    if issubclass(bus, BusLocal):
+        return [Warning(
+            'EVENTOS_BUS=BusLocal solo funciona con un proceso.',
+            hint='Con varios workers de gunicorn usar apps.core.eventos.BusCache.',
+            id='core.W002',
+        )]
+    return []
@@ -0,0 +1,190 @@
+"""
+Configuración efectiva de un usuario, resuelta una vez por petición.
+
+Reúne en un objeto inmutable el perfil (incrementos y límites de horas),
+el período activo, los valores por defecto de `ConfiguracionSistema` y la
+configuración de reportes. Se arma con una sola consulta (el período activo
+y la configuración del sistema van como subconsultas) y se cachea con
+versión: cualquier cambio en esos modelos invalida la entrada (ver
+`apps.core.signals`).
+
+`ConfiguracionUsuarioMiddleware` la expone como `request.configuracion`
+(resuelta una vez por petición) para mostrar valores. Las validaciones
+(límite diario, período activo) usan `configuracion_vigente(user)`, que la
+lee de la base: la entrada cacheada puede no reflejar todavía un cambio.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .versionado import clave_versionada, incrementar_version, TIMEOUT_DERIVADOS
+
+
+# Valores usados si no existen el perfil o la configuración del sistema
+INCREMENTO_DEFECTO = Decimal('0.5')
+HORAS_MINIMAS_DEFECTO = Decimal('0.5')
+HORAS_MAXIMAS_DEFECTO = Decimal('12')
+HORAS_MAX_DIA_DEFECTO = Decimal('8')
+FORMATO_FECHA_DEFECTO = '%d/%m/%Y'
+COLUMNAS_REPORTE_DEFECTO = ('fecha', 'proyecto', 'horas')
+
+CAMPOS_PERIODO = ('id', 'nombre', 'fecha_inicio', 'fecha_fin', 'horas_max_dia')
+CAMPOS_SISTEMA = (
+    'incremento_horas_default', 'horas_minimas_default', 'horas_maximas_default',
+    'horas_max_dia_default', 'formato_fecha_default', 'permitir_fines_semana', 'validar_feriados',
+)
+
+
+@dataclass(frozen=True)
+class PeriodoActivo:
+    id: int
+    nombre: str
+    fecha_inicio: date
+    fecha_fin: date
+    horas_max_dia: Decimal
+
+    def contiene(self, fecha):
+        return self.fecha_inicio <= fecha <= self.fecha_fin
+
+
+@dataclass(frozen=True)
+class ConfiguracionReporteUsuario:
+    formato_exportacion: str = 'csv'
+    separador_csv: str = ','
+    separador_decimal: str = '.'
+    incluir_encabezados: bool = True
+    solo_activos: bool = True
+    periodo_defecto_id: Optional[int] = None
+    columnas: tuple = COLUMNAS_REPORTE_DEFECTO
+
+
+@dataclass(frozen=True)
+class ConfiguracionUsuario:
+    usuario_id: Optional[int] = None
+    incremento_horas: Decimal = INCREMENTO_DEFECTO
+    horas_minimas: Decimal = HORAS_MINIMAS_DEFECTO
+    horas_maximas: Decimal = HORAS_MAXIMAS_DEFECTO
+    horas_max_dia_perfil: Decimal = HORAS_MAX_DIA_DEFECTO
+    formato_fecha: str = FORMATO_FECHA_DEFECTO
+    tema: str = 'light'
+    zona_horaria: str = ''
+    permitir_fines_semana: bool = False
+    validar_feriados: bool = True
+    periodo_activo: Optional[PeriodoActivo] = None
+    reportes: ConfiguracionReporteUsuario = ConfiguracionReporteUsuario()
+
+    @property
+    def limite_diario(self):
+        """Máximo de horas por día: el del período activo o, si no hay, el del perfil"""
+        if self.periodo_activo:
+            return self.periodo_activo.horas_max_dia
+        return self.horas_max_dia_perfil
+
+    def contexto_horas(self):
+        """Valores numéricos que usan los templates de registro de horas"""
+        return {
+            'incremento_horas': float(self.incremento_horas),
+            'horas_minimas': float(self.horas_minimas),
+            'horas_maximas': float(self.horas_maximas),
+            'limite_diario': float(self.limite_diario),
+        }
+
+
+def _decimal(valor, defecto):
+    return Decimal(str(valor)) if valor is not None else defecto
+
+
+def _consultar(usuario_id):
+    """Arma la configuración con una única consulta"""
+    from apps.core.models import ConfiguracionSistema, Periodo
+
+    activo = Periodo.objects.filter(usuario=OuterRef('pk'), activo=True).order_by('-fecha_inicio')
+    sistema = ConfiguracionSistema.objects.order_by('pk')
+    anotaciones = {f'periodo_{campo}': Subquery(activo.values(campo)[:1]) for campo in CAMPOS_PERIODO}
+    anotaciones.update({f'sistema_{campo}': Subquery(sistema.values(campo)[:1]) for campo in CAMPOS_SISTEMA})
+
+    usuario = (
+        User.objects.filter(pk=usuario_id)
+        .select_related('profile', 'config_reportes')
+        .annotate(**anotaciones)
+        .first()
+    )
+    if usuario is None:
+        return ConfiguracionUsuario()
+
+    defectos = ConfiguracionUsuario(
+        incremento_horas=_decimal(usuario.sistema_incremento_horas_default, INCREMENTO_DEFECTO),
+        horas_minimas=_decimal(usuario.sistema_horas_minimas_default, HORAS_MINIMAS_DEFECTO),
+        horas_maximas=_decimal(usuario.sistema_horas_maximas_default, HORAS_MAXIMAS_DEFECTO),
+        horas_max_dia_perfil=_decimal(usuario.sistema_horas_max_dia_default, HORAS_MAX_DIA_DEFECTO),
+        formato_fecha=usuario.sistema_formato_fecha_default or FORMATO_FECHA_DEFECTO,
+    )
+
+    # Los OneToOne inexistentes lanzan una subclase de AttributeError
+    perfil = getattr(usuario, 'profile', None)
+    reportes = getattr(usuario, 'config_reportes', None)
+
+    periodo = None
+    if usuario.periodo_id is not None:
+        periodo = PeriodoActivo(
+            id=usuario.periodo_id,
+            nombre=usuario.periodo_nombre,
+            fecha_inicio=usuario.periodo_fecha_inicio,
+            fecha_fin=usuario.periodo_fecha_fin,
+            horas_max_dia=_decimal(usuario.periodo_horas_max_dia, defectos.horas_max_dia_perfil),
+        )
+
+    return ConfiguracionUsuario(
+        usuario_id=usuario.pk,
+        incremento_horas=_decimal(perfil.incremento_horas, defectos.incremento_horas) if perfil else defectos.incremento_horas,
+        horas_minimas=_decimal(perfil.horas_minimas, defectos.horas_minimas) if perfil else defectos.horas_minimas,
+        horas_maximas=_decimal(perfil.horas_maximas, defectos.horas_maximas) if perfil else defectos.horas_maximas,
+        horas_max_dia_perfil=_decimal(perfil.horas_max_dia, defectos.horas_max_dia_perfil) if perfil else defectos.horas_max_dia_perfil,
+        formato_fecha=perfil.formato_fecha if perfil else defectos.formato_fecha,
+        tema=perfil.tema if perfil else 'light',
+        zona_horaria=perfil.timezone if perfil else '',
+        permitir_fines_semana=bool(usuario.sistema_permitir_fines_semana),
+        validar_feriados=usuario.sistema_validar_feriados is not False,
+        periodo_activo=periodo,
+        reportes=ConfiguracionReporteUsuario(
+            formato_exportacion=reportes.formato_exportacion,
+            separador_csv=reportes.separador_csv,
+            separador_decimal=reportes.separador_decimal,
+            incluir_encabezados=reportes.incluir_encabezados,
+            solo_activos=reportes.solo_activos,
+            periodo_defecto_id=reportes.periodo_defecto_id,
+            columnas=tuple(reportes.get_columnas_exportacion()),
+        ) if reportes else ConfiguracionReporteUsuario(),
+    )
+
+
+def obtener_configuracion(usuario):
+    """Configuración del usuario; sin consultas mientras siga vigente en el cache"""
+    if usuario is None or not usuario.is_authenticated:
+        return ConfiguracionUsuario()
+
+    clave = clave_versionada(
+        'configuracion_usuario', ('configuracion', usuario.pk), ('configuracion', 'sistema')
+    )
+    configuracion = cache.get(clave)
+    if configuracion is None:
+        configuracion = _consultar(usuario.pk)
+        cache.set(clave, configuracion, TIMEOUT_DERIVADOS)
+    return configuracion
+
+
+def configuracion_vigente(usuario):
+    """Configuración leída de la base (una consulta), para validar"""
+    if usuario is None or not usuario.is_authenticated:
+        return ConfiguracionUsuario()
+    return _consultar(usuario.pk)
+
+
+def invalidar_configuracion(usuario_id=None):
+    """Sin `usuario_id` invalida la de todos (cambió la configuración del sistema)"""
+    incrementar_version('configuracion', 'sistema' if usuario_id is None else usuario_id)
@@ -0,0 +1,317 @@
+"""
+Paquetes de archivos estáticos: agrupado, minificado y precompresión.
+
+`construir_paquete` concatena y minifica los CSS/JS listados en
+`ESTATICOS_PAQUETES` dentro de `ESTATICOS_DIR_PAQUETES` (un directorio de
+STATICFILES_DIRS). Luego `collectstatic` los copia con `AlmacenamientoEstaticos`,
+que agrega el hash del contenido al nombre (ManifestStaticFilesStorage) y deja
+junto a cada archivo sus variantes `.gz` y `.br` para que
+`EstaticosMiddleware` las sirva sin comprimir en cada petición.
+
+Los minificadores son conservadores: quitan comentarios y espacios sin
+reescribir código, respetando strings, template literals y expresiones
+regulares.
+"""
+import gzip
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+TAMAÑO_MINIMO_COMPRESION = 256
+
+# Nombre con hash de ManifestStaticFilesStorage: app.3f2a9c1b7d4e.js
+NOMBRE_VERSIONADO = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+
+def es_nombre_versionado(ruta):
+    return NOMBRE_VERSIONADO.search(ruta) is not None
+
+
+# ---------------------------------------------------------------------------
+# CSS
+# ---------------------------------------------------------------------------
+
+_CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/''', re.S)
+_CSS_STRINGS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_CSS_ESPACIOS = re.compile(r'\s+')
+_CSS_ALREDEDOR = re.compile(r'\s*([{};,>])\s*')
+_CSS_DOS_PUNTOS = re.compile(r':\s+')
+
+
+def _minificar_fragmento_css(texto):
+    texto = _CSS_ESPACIOS.sub(' ', texto)
+    texto = _CSS_ALREDEDOR.sub(r'\1', texto)
+    return _CSS_DOS_PUNTOS.sub(':', texto)
+
+
+def minificar_css(codigo):
+    """Quita comentarios y espacios innecesarios (no toca el contenido de los strings)"""
+    sin_comentarios = _CSS_TOKENS.sub(lambda coincidencia: coincidencia.group(1) or ' ', codigo)
+    # Con el grupo de captura, las posiciones impares son los strings
+    partes = _CSS_STRINGS.split(sin_comentarios)
+    for indice in range(0, len(partes), 2):
+        partes[indice] = _minificar_fragmento_css(partes[indice])
+    return ''.join(partes).replace(';}', '}').strip()
+
+
+# ---------------------------------------------------------------------------
+# JavaScript
+# ---------------------------------------------------------------------------
+
+_ESPACIOS_JS = ' \t\r\n\f\v ﻿'
+# Tras estos caracteres un salto de línea nunca termina una sentencia
+_SIN_SALTO_DESPUES = set('{;,([:=')
+_SIN_SALTO_ANTES = set('}),];')
+_PALABRAS_ANTES_DE_REGEX = {
+    'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of',
+    'new', 'delete', 'void', 'throw', 'yield', 'await',
+}
+_PALABRA_FINAL = re.compile(r'[\w$]+$')
+
+
+def _es_palabra(caracter):
+    return caracter.isalnum() or caracter in '_$\\' or ord(caracter) > 127
+
+
+def _fin_string(codigo, inicio):
+    """Índice siguiente al cierre del string que abre en `inicio`"""
+    comilla = codigo[inicio]
+    i = inicio + 1
+    while i < len(codigo):
+        caracter = codigo[i]
+        if caracter == '\\':
+            i += 2
+            continue
+        if caracter == comilla or (caracter == '\n' and comilla != '`'):
+            return i + 1
+        if comilla == '`' and codigo.startswith('${', i):
+            i = _fin_expresion(codigo, i + 2)
+            continue
+        i += 1
+    return i
+
+
+def _fin_expresion(codigo, inicio):
+    """Índice siguiente a la `}` que cierra una expresión `${...}` de un template literal"""
+    profundidad = 1
+    i = inicio
+    while i < len(codigo):
+        caracter = codigo[i]
+        if caracter in '\'"`':
+            i = _fin_string(codigo, i)
+            continue
+        if caracter == '{':
+            profundidad += 1
+        elif caracter == '}':
+            profundidad -= 1
+            if profundidad == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _fin_regex(codigo, inicio):
+    i = inicio + 1
+    en_clase = False
+    while i < len(codigo):
+        caracter = codigo[i]
+        if caracter == '\\':
+            i += 2
+            continue
+        if caracter == '\n':
+            break
+        if caracter == '[':
+            en_clase = True
+        elif caracter == ']':
+            en_clase = False
+        elif caracter == '/' and not en_clase:
+            i += 1
+            break
+        i += 1
+    while i < len(codigo) and _es_palabra(codigo[i]):
+        i += 1
+    return i
+
+
+def _admite_regex(salida):
+    """Si una `/` en esta posición abre una expresión regular (y no es una división)"""
+    previo = ''.join(salida[-3:]).rstrip()
+    if not previo:
+        return True
+    ultimo = previo[-1]
+    if ultimo in ')]':
+        return False
+    if _es_palabra(ultimo):
+        palabra = _PALABRA_FINAL.search(''.join(salida[-20:]))
+        return palabra is not None and palabra.group() in _PALABRAS_ANTES_DE_REGEX
+    return True
+
+
+def minificar_js(codigo):
+    """
+    Quita comentarios, sangría y líneas vacías.
+
+    Los saltos de línea entre sentencias se conservan (salvo donde nunca
+    pueden terminar una sentencia) para no depender de la inserción
+    automática de punto y coma.
+    """
+    salida = []
+    pendiente = ''
+    ultimo = ''
+    i = 0
+    n = len(codigo)
+    while i < n:
+        caracter = codigo[i]
+
+        if caracter in _ESPACIOS_JS:
+            if caracter == '\n':
+                pendiente = '\n'
+            elif not pendiente:
+                pendiente = ' '
+            i += 1
+            continue
+        if caracter == '/' and codigo.startswith('//', i):
+            fin = codigo.find('\n', i)
+            i = n if fin == -1 else fin
+            continue
+        if caracter == '/' and codigo.startswith('/*', i):
+            fin = codigo.find('*/', i + 2)
+            fin = n if fin == -1 else fin + 2
+            if '\n' in codigo[i:fin]:
+                pendiente = '\n'
+            elif not pendiente:
+                pendiente = ' '
+            i = fin
+            continue
+
+        if pendiente and ultimo:
+            if pendiente == '\n':
+                if ultimo not in _SIN_SALTO_DESPUES and caracter not in _SIN_SALTO_ANTES:
+                    salida.append('\n')
+                elif _es_palabra(ultimo) and _es_palabra(caracter):
+                    salida.append(' ')
+            elif (_es_palabra(ultimo) and _es_palabra(caracter)) or (ultimo in '+-' and caracter == ultimo):
+                salida.append(' ')
+        pendiente = ''
+
+        if caracter in '\'"`':
+            fin = _fin_string(codigo, i)
+        elif caracter == '/' and _admite_regex(salida):
+            fin = _fin_regex(codigo, i)
+        else:
+            fin = i + 1
+        salida.append(codigo[i:fin])
+        ultimo = codigo[fin - 1]
+        i = fin
+
+    return ''.join(salida)
+
+
+MINIFICADORES = {'.css': minificar_css, '.js': minificar_js}
+
+
+# ---------------------------------------------------------------------------
+# Construcción y compresión
+# ---------------------------------------------------------------------------
+
+def construir_paquete(nombre, fuentes, destino):
+    """
+    Escribe `destino/nombre` con las fuentes concatenadas y minificadas.
+
+    Las fuentes son rutas relativas de archivos estáticos (se buscan con los
+    finders de staticfiles). Retorna `(bytes_originales, bytes_paquete)`.
+    """
+    extension = Path(nombre).suffix
+    minificar = MINIFICADORES[extension]
+    partes = []
+    total_original = 0
+    for fuente in fuentes:
+        ruta = finders.find(fuente)
+        if ruta is None:
+            raise FileNotFoundError(f'No se encontró el archivo estático {fuente!r} del paquete {nombre!r}')
+        contenido = Path(ruta).read_text(encoding='utf-8')
+        total_original += len(contenido.encode('utf-8'))
+        partes.append(minificar(contenido))
+
+    # El `;` evita que dos scripts concatenados se unan en una sola expresión
+    separador = '\n;\n' if extension == '.js' else '\n'
+    paquete = separador.join(partes) + '\n'
+
+    salida = Path(destino) / nombre
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    datos = paquete.encode('utf-8')
+    if not salida.exists() or salida.read_bytes() != datos:
+        salida.write_bytes(datos)
+    return total_original, len(datos)
+
+
+def _escribir_si_menor(ruta, datos, original):
+    if len(datos) < len(original):
+        ruta.write_bytes(datos)
+        return True
+    return False
+
+
+def comprimir_archivo(ruta):
+    """Crea `ruta.gz` (y `ruta.br` si brotli está instalado); retorna las variantes escritas"""
+    ruta = Path(ruta)
+    original = ruta.read_bytes()
+    escritas = []
+    if _escribir_si_menor(ruta.with_name(ruta.name + '.gz'), gzip.compress(original, 9, mtime=0), original):
+        escritas.append('gzip')
+    if brotli is not None:
+        if _escribir_si_menor(ruta.with_name(ruta.name + '.br'), brotli.compress(original, quality=11), original):
+            escritas.append('br')
+    return escritas
+
+
+def comprimir_directorio(raiz):
+    """Precomprime los archivos de texto de `raiz` que cambiaron desde la última vez"""
+    comprimidos = 0
+    for directorio, _, archivos in os.walk(raiz):
+        for archivo in archivos:
+            if not archivo.endswith(EXTENSIONES_COMPRIMIBLES):
+                continue
+            ruta = Path(directorio) / archivo
+            estado = ruta.stat()
+            if estado.st_size < TAMAÑO_MINIMO_COMPRESION:
+                continue
+            gz = ruta.with_name(archivo + '.gz')
+            if gz.exists() and gz.stat().st_mtime >= estado.st_mtime:
+                continue
+            if comprimir_archivo(ruta):
+                comprimidos += 1
+    return comprimidos
+
+
+class AlmacenamientoEstaticos(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage que además precomprime lo recolectado.
+
+    Sin manifiesto (desarrollo o pruebas sin `collectstatic`) resuelve las
+    URLs con el nombre original en lugar de fallar.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if not dry_run and getattr(settings, 'ESTATICOS_PRECOMPRIMIR', True):
+            comprimir_directorio(self.location)
@@ -0,0 +1,311 @@
+"""
+Eventos de cambios por usuario para el stream SSE (`/api/eventos/`).
+
+Los signals publican eventos pequeños (horas creadas, editadas o borradas,
+período activado, feriado modificado) al confirmarse la transacción; el
+stream los envía a las pestañas abiertas del usuario, que actualizan el
+calendario en lugar de volver a descargar el mes.
+
+El bus se elige con EVENTOS_BUS:
+
+- `BusCache` (por defecto): a través del cache de Django, que debe ser
+  compartido por todos los workers y tener add/incr atómicos: Redis o
+  Memcached, o FileBasedCache, con el que el bus serializa esas
+  operaciones con un lock de archivo (`_exclusion`). El chequeo core.E001
+  impide arrancar con cualquier otro backend.
+- `BusLocal`: en memoria del proceso. Solo sirve con un proceso (runserver
+  o gunicorn con un worker); gunicorn.conf.py no arranca con más.
+
+Ambos guardan los últimos eventos de cada usuario para reenviar lo perdido
+al reconectar (`Last-Event-ID`); si ya no están, envían `resincronizar`.
+
+Cada stream ocupa un hilo del servidor mientras está abierto, así que cada
+usuario puede tener a lo sumo EVENTOS_MAX_CONEXIONES_USUARIO a la vez (en
+el cache, para contar las de todos los workers); las demás reciben 429.
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: solo desarrollo con un proceso
+    fcntl = None
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+RESINCRONIZAR = 'resincronizar'
+
+# Backends donde add/incr son una lectura seguida de una escritura: el bus
+# los serializa con un lock de archivo en el directorio del cache
+CACHES_CON_LOCK = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+@contextmanager
+def _exclusion():
+    """
+    Exclusión entre procesos e hilos para los add/incr del bus. Redis y
+    Memcached ya son atómicos; con FileBasedCache dos workers podrían tomar
+    el mismo número de evento (y uno pisaría al otro) o la misma ranura de
+    conexión.
+    """
+    configuracion = settings.CACHES.get('default', {})
+    if fcntl is None or configuracion.get('BACKEND') not in CACHES_CON_LOCK:
+        yield
+        return
+    directorio = configuracion['LOCATION']
+    os.makedirs(directorio, exist_ok=True)
+    # Cada apertura es una descripción de archivo propia: flock excluye
+    # también entre hilos del mismo proceso. clear() del cache solo borra
+    # los *.djcache, así que el lock no se pierde.
+    with open(os.path.join(directorio, 'eventos.lock'), 'a') as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def _evento(identificador, tipo, datos):
+    return {'id': identificador, 'tipo': tipo, 'datos': datos}
+
+
+class _Suscripcion:
+    def __init__(self, bus, usuario_id, posicion, pendientes=()):
+        self.bus = bus
+        self.usuario_id = usuario_id
+        # Último evento conocido al suscribirse (se envía como `id:` inicial)
+        self.posicion = posicion
+        self.pendientes = list(pendientes)
+
+    def esperar(self, timeout):
+        """Eventos nuevos (lista vacía si no llegó ninguno en `timeout` segundos)"""
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+
+class _SuscripcionLocal(_Suscripcion):
+    def __init__(self, bus, usuario_id, posicion, pendientes=()):
+        super().__init__(bus, usuario_id, posicion, pendientes)
+        self.cola = queue.Queue(maxsize=settings.EVENTOS_MAX_PENDIENTES)
+        self.desbordada = False
+
+    def esperar(self, timeout):
+        if self.pendientes:
+            eventos, self.pendientes = self.pendientes, []
+            return eventos
+        if self.desbordada:
+            # Cliente lento: se descartaron eventos, que vuelva a cargar todo
+            self.desbordada = False
+            self.cola = queue.Queue(maxsize=settings.EVENTOS_MAX_PENDIENTES)
+            return [_evento(self.bus._ultimos.get(self.usuario_id), RESINCRONIZAR, {})]
+        try:
+            eventos = [self.cola.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                eventos.append(self.cola.get_nowait())
+            except queue.Empty:
+                return eventos
+
+    def cerrar(self):
+        self.bus._cancelar(self)
+
+
+class BusLocal:
+    """
+    Pub/sub en memoria del proceso. La secuencia de cada usuario arranca en
+    el instante de inicio del proceso, así un `Last-Event-ID` de antes de un
+    reinicio queda fuera de los recientes y provoca `resincronizar`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inicio = int(time.time() * 1000)
+        self._suscripciones = defaultdict(set)
+        self._ultimos = {}
+        self._recientes = defaultdict(lambda: deque(maxlen=settings.EVENTOS_MAX_PENDIENTES))
+
+    def publicar(self, usuario_id, tipo, datos):
+        with self._lock:
+            numero = self._ultimos.get(usuario_id, self._inicio) + 1
+            self._ultimos[usuario_id] = numero
+            evento = _evento(numero, tipo, datos)
+            self._recientes[usuario_id].append(evento)
+            suscripciones = list(self._suscripciones.get(usuario_id, ()))
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.cola.put_nowait(evento)
+            except queue.Full:
+                suscripcion.desbordada = True
+
+    def suscribir(self, usuario_id, desde=None):
+        with self._lock:
+            ultimo = self._ultimos.get(usuario_id, self._inicio)
+            pendientes = []
+            if desde is not None and desde != ultimo:
+                recientes = [evento for evento in self._recientes.get(usuario_id, ()) if evento['id'] > desde]
+                if desde > ultimo or not recientes or recientes[0]['id'] != desde + 1:
+                    pendientes = [_evento(ultimo, RESINCRONIZAR, {})]
+                else:
+                    pendientes = recientes
+            suscripcion = _SuscripcionLocal(self, usuario_id, ultimo, pendientes)
+            self._suscripciones[usuario_id].add(suscripcion)
+        return suscripcion
+
+    def _cancelar(self, suscripcion):
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.usuario_id)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._suscripciones[suscripcion.usuario_id]
+
+
+class _SuscripcionCache(_Suscripcion):
+    def esperar(self, timeout):
+        if self.pendientes:
+            eventos, self.pendientes = self.pendientes, []
+            return eventos
+        limite = time.monotonic() + timeout
+        while True:
+            ultimo = self.bus._ultimo(self.usuario_id)
+            if ultimo > self.posicion:
+                eventos = self.bus._leer(self.usuario_id, self.posicion, ultimo)
+                self.posicion = ultimo
+                return eventos
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return []
+            time.sleep(min(settings.EVENTOS_INTERVALO_CACHE, restante))
+
+
+class BusCache:
+    """
+    Pub/sub sobre el cache de Django: cada evento se guarda con un número
+    de secuencia por usuario y los suscriptores consultan cada
+    EVENTOS_INTERVALO_CACHE segundos si hay nuevos.
+    """
+
+    def _clave(self, usuario_id, sufijo):
+        return f'eventos:{usuario_id}:{sufijo}'
+
+    def _ultimo(self, usuario_id):
+        return cache.get(self._clave(usuario_id, 'ultimo'), 0)
+
+    def _leer(self, usuario_id, posicion, ultimo):
+        if ultimo - posicion > settings.EVENTOS_MAX_PENDIENTES:
+            return [_evento(ultimo, RESINCRONIZAR, {})]
+        claves = [self._clave(usuario_id, numero) for numero in range(posicion + 1, ultimo + 1)]
+        encontrados = cache.get_many(claves)
+        if len(encontrados) < len(claves):
+            # Eventos vencidos o desalojados del cache
+            return [_evento(ultimo, RESINCRONIZAR, {})]
+        return [encontrados[clave] for clave in claves]
+
+    def publicar(self, usuario_id, tipo, datos):
+        clave = self._clave(usuario_id, 'ultimo')
+        with _exclusion():
+            cache.add(clave, 0, None)
+            try:
+                numero = cache.incr(clave)
+            except ValueError:
+                cache.add(clave, 1, None)
+                numero = 1
+        cache.set(self._clave(usuario_id, numero), _evento(numero, tipo, datos), settings.EVENTOS_RETENCION)
+
+    def suscribir(self, usuario_id, desde=None):
+        ultimo = self._ultimo(usuario_id)
+        pendientes = []
+        if desde is not None and desde > ultimo:
+            # Secuencia reiniciada (cache vaciado): no se sabe qué se perdió
+            pendientes = [_evento(ultimo, RESINCRONIZAR, {})]
+        elif desde is not None and desde < ultimo:
+            pendientes = self._leer(usuario_id, desde, ultimo)
+        return _SuscripcionCache(self, usuario_id, ultimo, pendientes)
+
+
+@lru_cache(maxsize=None)
+def _bus(ruta):
+    return import_string(ruta)()
+
+
+def obtener_bus():
+    return _bus(settings.EVENTOS_BUS)
+
+
+def publicar(usuario_id, tipo, datos=None, al_confirmar=True):
+    """
+    Publica un evento para las pestañas del usuario; por defecto cuando se
+    confirma la transacción actual (para no anunciar cambios revertidos).
+    `datos` puede ser una función, que se evalúa recién al publicar.
+    """
+    def enviar():
+        obtener_bus().publicar(usuario_id, tipo, datos() if callable(datos) else (datos or {}))
+
+    if al_confirmar:
+        transaction.on_commit(enviar)
+    else:
+        enviar()
+
+
+def reservar_conexion(usuario_id):
+    """
+    Clave de la ranura de conexión tomada para el usuario, o None si ya usa
+    EVENTOS_MAX_CONEXIONES_USUARIO. Las ranuras vencen poco después de
+    EVENTOS_DURACION_MAX por si un worker termina sin liberarlas.
+    """
+    vencimiento = settings.EVENTOS_DURACION_MAX + settings.EVENTOS_KEEPALIVE
+    with _exclusion():
+        for numero in range(settings.EVENTOS_MAX_CONEXIONES_USUARIO):
+            clave = f'eventos:{usuario_id}:conexion:{numero}'
+            if cache.add(clave, True, vencimiento):
+                return clave
+    return None
+
+
+def liberar_conexion(clave):
+    cache.delete(clave)
+
+
+def flujo_sse(suscripcion, ranura=None):
+    """
+    Genera el texto SSE de una suscripción hasta EVENTOS_DURACION_MAX
+    segundos; al terminar libera la `ranura` de `reservar_conexion`.
+    """
+    # El stream no consulta la base: se libera la conexión mientras dura
+    if not connection.in_atomic_block:
+        connection.close()
+    limite = time.monotonic() + settings.EVENTOS_DURACION_MAX
+    try:
+        # El navegador reconecta solo al cerrarse el stream
+        # `id:` sin datos solo fija el Last-Event-ID de la reconexión
+        yield f'retry: {settings.EVENTOS_REINTENTO_MS}\nid: {suscripcion.posicion}\n\n'
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            eventos = suscripcion.esperar(min(settings.EVENTOS_KEEPALIVE, restante))
+            if not eventos:
+                yield ': ping\n\n'
+                continue
+            for evento in eventos:
+                yield f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento['datos'])}\n\n"
+    finally:
+        suscripcion.cerrar()
+        if ranura is not None:
+            liberar_conexion(ranura)
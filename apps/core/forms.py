@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date, timedelta
 from .models import Periodo, DiaFeriado
+from .laborables import CalendarioLaboral
 
 
 class PeriodoForm(forms.ModelForm):
@@ -65,6 +66,7 @@ class PeriodoForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         
         # Asegurar que las fechas se muestren correctamente en edición
@@ -101,10 +103,12 @@ class PeriodoForm(forms.ModelForm):
         horas_max_dia = self.cleaned_data.get('horas_max_dia', 8)
         
         if horas_objetivo and fecha_inicio and fecha_fin:
-            dias_periodo = (fecha_fin - fecha_inicio).days + 1
-            # Calcular días laborables (excluyendo fines de semana)
-            dias_laborables = sum(1 for i in range(dias_periodo) 
-                                if (fecha_inicio + timedelta(days=i)).weekday() < 5)
+            # Días laborables: sin fines de semana ni feriados del usuario
+            if self.user is not None:
+                calendario = CalendarioLaboral.para_usuario(self.user.pk)
+            else:
+                calendario = CalendarioLaboral()
+            dias_laborables = calendario.dias_laborables(fecha_inicio, fecha_fin)
             
             horas_maximas_teoricas = dias_laborables * horas_max_dia
             
@@ -0,0 +1,52 @@
+"""
+Cache de fragmentos de template por usuario.
+
+`{% fragmento 'nombre' parametro ... %}...{% endfragmento %}` guarda el HTML
+renderizado bajo una clave con las versiones de datos del usuario
+(`ambitos_usuario`) y los parámetros indicados. Los signals de horas,
+proyectos, períodos, feriados y configuración incrementan esas versiones,
+así que cualquier cambio invalida los fragmentos sin borrarlos uno a uno.
+
+Para que un acierto evite también las consultas, las vistas entregan los
+datos de los fragmentos con `contexto_perezoso`: solo se calculan si el
+fragmento se renderiza.
+"""
+import hashlib
+import operator
+from functools import partial
+
+from django.utils.functional import SimpleLazyObject, new_method_proxy
+
+from .versionado import clave_versionada
+
+
+def ambitos_usuario(usuario_id):
+    """Versiones de las que depende todo lo que se muestra de un usuario"""
+    return (
+        ('usuario', usuario_id),
+        ('configuracion', usuario_id),
+        ('configuracion', 'sistema'),
+        ('feriados', usuario_id),
+    )
+
+
+def clave_fragmento(nombre, usuario_id, parametros=()):
+    huella = hashlib.md5('\x1f'.join(map(str, parametros)).encode()).hexdigest()
+    return clave_versionada(f'fragmento:{nombre}', *ambitos_usuario(usuario_id), extra=huella)
+
+
+class _ValorPerezoso(SimpleLazyObject):
+    """SimpleLazyObject que también delega `format()`, usado al localizar números"""
+
+    __format__ = new_method_proxy(format)
+
+
+def contexto_perezoso(calcular, claves):
+    """
+    Entradas de contexto que se resuelven con una única llamada a `calcular`.
+
+    `calcular` retorna un dict; se invoca la primera vez que el template usa
+    alguna de las `claves` y nunca si todos los fragmentos estaban en cache.
+    """
+    resultado = SimpleLazyObject(calcular)
+    return {clave: _ValorPerezoso(partial(operator.getitem, resultado, clave)) for clave in claves}
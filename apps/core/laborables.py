@@ -0,0 +1,77 @@
+"""
+Cálculo de días laborables.
+
+Los días hábiles (lunes a viernes) entre dos fechas se obtienen con
+aritmética cerrada sobre semanas completas y el resto; los feriados del
+usuario se descuentan con `bisect` sobre un arreglo ordenado de ordinales,
+por lo que cada consulta es O(log F) sin iterar día por día.
+"""
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+
+from .versionado import clave_versionada, incrementar_version, TIMEOUT_DERIVADOS
+
+
+DIAS_HABILES_SEMANA = 5
+
+
+def contar_dias_habiles(inicio, fin):
+    """Cantidad de días de lunes a viernes en [inicio, fin]"""
+    if not inicio or not fin or fin < inicio:
+        return 0
+    semanas, resto = divmod((fin - inicio).days + 1, 7)
+    dia_semana = inicio.weekday()
+    # Días restantes desde `dia_semana`; pueden cruzar al lunes siguiente (7..)
+    primer_tramo = max(0, min(dia_semana + resto, DIAS_HABILES_SEMANA) - dia_semana)
+    segundo_tramo = min(max(0, dia_semana + resto - 7), DIAS_HABILES_SEMANA)
+    return semanas * DIAS_HABILES_SEMANA + primer_tramo + segundo_tramo
+
+
+class CalendarioLaboral:
+    """Días hábiles menos los feriados (que caen en día hábil) de un usuario"""
+
+    def __init__(self, feriados=()):
+        self.feriados = sorted({
+            fecha.toordinal() for fecha in feriados if fecha.weekday() < DIAS_HABILES_SEMANA
+        })
+
+    @classmethod
+    def para_usuario(cls, usuario_id):
+        """Calendario del usuario; los ordinales se cachean hasta que cambie un feriado"""
+        from .models import DiaFeriado
+
+        clave = clave_versionada('calendario_laboral', ('feriados', usuario_id))
+        ordinales = cache.get(clave)
+        if ordinales is None:
+            fechas = DiaFeriado.objects.filter(usuario_id=usuario_id).values_list('fecha', flat=True)
+            ordinales = cls(fechas).feriados
+            cache.set(clave, ordinales, TIMEOUT_DERIVADOS)
+        calendario = cls()
+        calendario.feriados = ordinales
+        return calendario
+
+    @staticmethod
+    def invalidar(usuario_id):
+        incrementar_version('feriados', usuario_id)
+
+    def feriados_entre(self, inicio, fin):
+        """Cantidad de feriados hábiles en [inicio, fin]"""
+        if not inicio or not fin or fin < inicio:
+            return 0
+        return (
+            bisect_right(self.feriados, fin.toordinal())
+            - bisect_left(self.feriados, inicio.toordinal())
+        )
+
+    def es_feriado(self, fecha):
+        ordinal = fecha.toordinal()
+        indice = bisect_left(self.feriados, ordinal)
+        return indice < len(self.feriados) and self.feriados[indice] == ordinal
+
+    def es_laborable(self, fecha):
+        return fecha.weekday() < DIAS_HABILES_SEMANA and not self.es_feriado(fecha)
+
+    def dias_laborables(self, inicio, fin):
+        """Días hábiles en [inicio, fin] descontando feriados"""
+        return contar_dias_habiles(inicio, fin) - self.feriados_entre(inicio, fin)
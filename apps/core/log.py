@@ -0,0 +1,160 @@
+"""
+Pipeline de logging no bloqueante.
+
+Los registros se encolan en el hilo de la petición (`ColaHandler`) y un hilo
+de fondo por proceso los escribe en disco como líneas JSON. El hilo se
+inicia de forma perezosa en cada worker, por lo que funciona con
+`preload_app = True` de gunicorn (los hilos no sobreviven al fork).
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+_contexto_peticion = ContextVar('contexto_peticion', default=None)
+
+_FORMATEADOR = logging.Formatter()
+
+
+def iniciar_contexto(request, request_id):
+    """Asocia la petición actual a los registros emitidos en este contexto"""
+    return _contexto_peticion.set({
+        'request': request,
+        'request_id': request_id,
+        'inicio': time.perf_counter(),
+    })
+
+
+def limpiar_contexto(token):
+    _contexto_peticion.reset(token)
+
+
+class ContextoPeticionFilter(logging.Filter):
+    """Agrega request_id, user_id y duración transcurrida a cada registro"""
+
+    def filter(self, record):
+        contexto = _contexto_peticion.get()
+        if contexto is None:
+            record.request_id = None
+            record.user_id = None
+            record.duration_ms = None
+            return True
+
+        record.request_id = contexto['request_id']
+        record.duration_ms = round((time.perf_counter() - contexto['inicio']) * 1000, 2)
+
+        user = getattr(contexto['request'], 'user', None)
+        record.user_id = user.pk if user is not None and user.is_authenticated else None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'request_id': getattr(record, 'request_id', None),
+            'user_id': getattr(record, 'user_id', None),
+            'duration_ms': getattr(record, 'duration_ms', None),
+        }
+        if record.exc_info:
+            datos['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Traceback ya formateado al encolar (ver ColaHandler.prepare)
+            datos['exc'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ColaHandler(QueueHandler):
+    """
+    Handler que solo encola; la escritura la hace un `QueueListener`.
+
+    `filename` admite el marcador `{pid}` para que cada worker escriba su
+    propio archivo y la rotación no compita entre procesos.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, consola=True):
+        super().__init__(queue.SimpleQueue())
+        self.filename = str(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.consola = consola
+        self._oyente = None
+        self._pid = None
+        self._lock_inicio = threading.Lock()
+        atexit.register(self.detener)
+
+    def _crear_destinos(self):
+        archivo = RotatingFileHandler(
+            self.filename.format(pid=os.getpid()),
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding='utf-8',
+            delay=True,
+        )
+        archivo.setFormatter(JSONFormatter())
+        destinos = [archivo]
+
+        if self.consola:
+            consola = logging.StreamHandler()
+            consola.setFormatter(logging.Formatter('%(levelname)s %(name)s: %(message)s'))
+            destinos.append(consola)
+        return destinos
+
+    def _asegurar_oyente(self):
+        """Inicia el hilo de escritura si no existe en el proceso actual"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock_inicio:
+            if self._pid == pid:
+                return
+            # Tras un fork la cola heredada puede contener registros del padre
+            self.queue = queue.SimpleQueue()
+            self._oyente = QueueListener(self.queue, *self._crear_destinos())
+            self._oyente.start()
+            self._pid = pid
+
+    def prepare(self, record):
+        """
+        Copia del registro para encolar. A diferencia de QueueHandler.prepare,
+        el traceback no se une al mensaje: queda en `exc_text`.
+        """
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _FORMATEADOR.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        self._asegurar_oyente()
+        super().emit(record)
+
+    def detener(self):
+        """Vacía la cola y detiene el hilo de escritura"""
+        if self._oyente is not None and self._pid == os.getpid():
+            self._oyente.stop()
+            for destino in self._oyente.handlers:
+                destino.close()
+            self._oyente = None
+            self._pid = None
+
+    def close(self):
+        self.detener()
+        super().close()
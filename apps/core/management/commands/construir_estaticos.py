@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.estaticos import construir_paquete
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrupa y minifica los paquetes de ESTATICOS_PAQUETES y ejecuta collectstatic '
+        '(nombres con hash y variantes .gz/.br)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-paquetes',
+            action='store_true',
+            help='Solo construye los paquetes, sin ejecutar collectstatic',
+        )
+
+    def handle(self, *args, **options):
+        destino = settings.ESTATICOS_DIR_PAQUETES
+        self.stdout.write(f'📦 Construyendo paquetes en {destino}...')
+        for nombre, fuentes in settings.ESTATICOS_PAQUETES.items():
+            try:
+                original, final = construir_paquete(nombre, fuentes, destino)
+            except FileNotFoundError as error:
+                raise CommandError(str(error))
+            self.stdout.write(f'   {nombre}: {len(fuentes)} archivo(s), {original} → {final} bytes')
+
+        if options['solo_paquetes']:
+            return
+
+        self.stdout.write('📤 Recolectando y comprimiendo archivos estáticos...')
+        call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+        self.stdout.write(self.style.SUCCESS('✅ Archivos estáticos listos'))
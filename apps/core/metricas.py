@@ -0,0 +1,118 @@
+"""
+Registro de métricas de peticiones en memoria del proceso.
+
+Cada worker de gunicorn mantiene su propio registro; Prometheus agrega las
+series de todos los workers si se exponen con la etiqueta `pid`.
+"""
+import os
+import threading
+from bisect import bisect_left
+
+
+# Límites (en segundos) de los buckets del histograma de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _SerieRuta:
+    """Acumuladores de una combinación ruta/método/estado"""
+
+    __slots__ = ('buckets', 'cantidad', 'suma_duracion', 'consultas_sql',
+                 'tiempo_sql', 'bytes_respuesta')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_LATENCIA)
+        self.cantidad = 0
+        self.suma_duracion = 0.0
+        self.consultas_sql = 0
+        self.tiempo_sql = 0.0
+        self.bytes_respuesta = 0
+
+
+class RegistroMetricas:
+    """Agrega latencia, consultas SQL y tamaño de respuesta por ruta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observar(self, ruta, metodo, estado, duracion, consultas_sql=0, tiempo_sql=0.0,
+                 bytes_respuesta=0):
+        """Registra una petición finalizada"""
+        clave = (ruta, metodo, str(estado))
+        indice = bisect_left(BUCKETS_LATENCIA, duracion)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = _SerieRuta()
+            if indice < len(BUCKETS_LATENCIA):
+                serie.buckets[indice] += 1
+            serie.cantidad += 1
+            serie.suma_duracion += duracion
+            serie.consultas_sql += consultas_sql
+            serie.tiempo_sql += tiempo_sql
+            serie.bytes_respuesta += bytes_respuesta
+
+    def reiniciar(self):
+        """Descarta todas las series acumuladas"""
+        with self._lock:
+            self._series.clear()
+
+    def exportar_prometheus(self):
+        """Retorna las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            series = sorted(
+                (clave, list(s.buckets), s.cantidad, s.suma_duracion,
+                 s.consultas_sql, s.tiempo_sql, s.bytes_respuesta)
+                for clave, s in self._series.items()
+            )
+
+        pid = os.getpid()
+        lineas = [
+            '# HELP sis_horas_request_duration_seconds Latencia de las peticiones HTTP',
+            '# TYPE sis_horas_request_duration_seconds histogram',
+        ]
+        contadores = {
+            'sis_horas_requests_total': ('counter', 'Total de peticiones HTTP', []),
+            'sis_horas_sql_queries_total': ('counter', 'Consultas SQL ejecutadas', []),
+            'sis_horas_sql_duration_seconds_total': ('counter', 'Tiempo acumulado en SQL', []),
+            'sis_horas_response_bytes_total': ('counter', 'Bytes enviados en respuestas', []),
+        }
+
+        for (ruta, metodo, estado), buckets, cantidad, suma, consultas, tiempo_sql, bytes_resp in series:
+            etiquetas = (
+                f'route="{_escapar(ruta)}",method="{metodo}",status="{estado}",pid="{pid}"'
+            )
+            acumulado = 0
+            for limite, valor in zip(BUCKETS_LATENCIA, buckets):
+                acumulado += valor
+                lineas.append(
+                    f'sis_horas_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+                )
+            lineas.append(
+                f'sis_horas_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {cantidad}'
+            )
+            lineas.append(f'sis_horas_request_duration_seconds_sum{{{etiquetas}}} {suma:.6f}')
+            lineas.append(f'sis_horas_request_duration_seconds_count{{{etiquetas}}} {cantidad}')
+
+            contadores['sis_horas_requests_total'][2].append(f'{{{etiquetas}}} {cantidad}')
+            contadores['sis_horas_sql_queries_total'][2].append(f'{{{etiquetas}}} {consultas}')
+            contadores['sis_horas_sql_duration_seconds_total'][2].append(
+                f'{{{etiquetas}}} {tiempo_sql:.6f}'
+            )
+            contadores['sis_horas_response_bytes_total'][2].append(f'{{{etiquetas}}} {bytes_resp}')
+
+        for nombre, (tipo, ayuda, valores) in contadores.items():
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.extend(f'{nombre}{valor}' for valor in valores)
+
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor):
+    """Escapa un valor de etiqueta según el formato de Prometheus"""
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Registro único por proceso
+registro = RegistroMetricas()
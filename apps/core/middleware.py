@@ -0,0 +1,301 @@
+"""
+Middlewares transversales del sistema
+"""
+import logging
+import mimetypes
+import os
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+from django.utils.functional import SimpleLazyObject
+
+from .configuracion_usuario import obtener_configuracion
+from .estaticos import es_nombre_versionado
+from .log import iniciar_contexto, limpiar_contexto
+from .metricas import registro
+
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+
+logger = logging.getLogger('apps.core.metricas')
+
+REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class ContextoPeticionMiddleware:
+    """
+    Asigna un identificador a cada petición y lo expone a los logs.
+
+    Respeta el encabezado `X-Request-ID` entrante (por ejemplo, del proxy)
+    y lo devuelve en la respuesta. Va antes de MetricasMiddleware para que el
+    aviso de petición lenta lleve el identificador; el usuario se lee recién
+    al emitir cada registro, cuando AuthenticationMiddleware ya lo asignó.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_VALIDO.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        token = iniciar_contexto(request, request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            limpiar_contexto(token)
+
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class ConfiguracionUsuarioMiddleware:
+    """
+    Expone `request.configuracion`: la configuración efectiva del usuario.
+
+    Se resuelve de forma perezosa la primera vez que se usa y luego se
+    reutiliza durante toda la petición. Debe ir después de
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.configuracion = SimpleLazyObject(lambda: obtener_configuracion(request.user))
+        return self.get_response(request)
+
+
+class CompresionMiddleware:
+    """
+    Comprime respuestas JSON y CSV con brotli (si está instalado) o gzip.
+
+    Solo actúa si el cliente lo acepta en `Accept-Encoding` y el contenido
+    supera `COMPRESION_UMBRAL_BYTES`; las respuestas en streaming (CSV
+    grandes) se comprimen por partes. Como en GZipMiddleware de Django, el
+    gzip agrega bytes aleatorios para mitigar ataques tipo BREACH.
+    """
+
+    TIPOS_COMPRIMIBLES = ('application/json', 'text/csv')
+    MAX_BYTES_ALEATORIOS = 100
+    ACEPTA_BROTLI = _lazy_re_compile(r'\bbr\b')
+    ACEPTA_GZIP = _lazy_re_compile(r'\bgzip\b')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.umbral = getattr(settings, 'COMPRESION_UMBRAL_BYTES', 1024)
+        self.calidad_brotli = getattr(settings, 'COMPRESION_BROTLI_CALIDAD', 5)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not self._es_comprimible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and self.ACEPTA_BROTLI.search(aceptadas):
+            codificacion = 'br'
+        elif self.ACEPTA_GZIP.search(aceptadas):
+            codificacion = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = self._comprimir_partes(response.streaming_content, codificacion)
+            del response['Content-Length']
+        else:
+            if len(response.content) < self.umbral:
+                return response
+            comprimido = self._comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        # El contenido cambió: un ETag fuerte ya no es válido
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacion
+        return response
+
+    def _es_comprimible(self, response):
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return response.status_code == 200 and tipo in self.TIPOS_COMPRIMIBLES
+
+    def _comprimir(self, contenido, codificacion):
+        if codificacion == 'br':
+            return brotli.compress(contenido, quality=self.calidad_brotli)
+        return compress_string(contenido, max_random_bytes=self.MAX_BYTES_ALEATORIOS)
+
+    def _comprimir_partes(self, partes, codificacion):
+        if codificacion == 'gzip':
+            yield from compress_sequence(partes, max_random_bytes=self.MAX_BYTES_ALEATORIOS)
+            return
+        compresor = brotli.Compressor(quality=self.calidad_brotli)
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode()
+            salida = compresor.process(parte) + compresor.flush()
+            if salida:
+                yield salida
+        yield compresor.finish()
+
+
+class EstaticosMiddleware:
+    """
+    Sirve los archivos de STATIC_ROOT sin pasar por las vistas (estilo WhiteNoise).
+
+    Si el cliente acepta brotli o gzip y `collectstatic` dejó la variante
+    precomprimida (`.br` / `.gz`), se envía esa. Los nombres versionados
+    por ManifestStaticFilesStorage llevan `Cache-Control: immutable` por un
+    año; el resto, `ESTATICOS_MAX_AGE_SIN_VERSION`. Responde 304 a las
+    peticiones condicionales. Debe ir primero en MIDDLEWARE.
+    """
+
+    MAX_AGE_VERSIONADOS = 31536000
+    VARIANTES = (('br', '.br', CompresionMiddleware.ACEPTA_BROTLI), ('gzip', '.gz', CompresionMiddleware.ACEPTA_GZIP))
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        prefijo = settings.STATIC_URL or ''
+        # Con un STATIC_URL absoluto (CDN) los archivos no pasan por aquí
+        self.prefijo = prefijo if prefijo.startswith('/') else None
+        self.raiz = os.fspath(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+        self.max_age_sin_version = getattr(settings, 'ESTATICOS_MAX_AGE_SIN_VERSION', 60)
+
+    def __call__(self, request):
+        if (self.prefijo and self.raiz and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefijo)):
+            response = self._servir(request, request.path_info[len(self.prefijo):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def _servir(self, request, relativa):
+        try:
+            ruta = safe_join(self.raiz, relativa)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not relativa or not os.path.isfile(ruta):
+            return None
+
+        codificacion, servida = None, ruta
+        aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for nombre, extension, acepta in self.VARIANTES:
+            if acepta.search(aceptadas) and os.path.isfile(ruta + extension):
+                codificacion, servida = nombre, ruta + extension
+                break
+
+        estado = os.stat(servida)
+        etag = f'"{estado.st_size:x}-{int(estado.st_mtime):x}{"-" + codificacion if codificacion else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(estado.st_mtime))
+        if response is None:
+            tipo, _ = mimetypes.guess_type(ruta)
+            response = FileResponse(open(servida, 'rb'), content_type=tipo or 'application/octet-stream')
+            # FileResponse agrega el nombre del archivo, innecesario para recursos estáticos
+            del response['Content-Disposition']
+            if codificacion:
+                response['Content-Encoding'] = codificacion
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(estado.st_mtime)
+        if es_nombre_versionado(relativa):
+            response['Cache-Control'] = f'public, max-age={self.MAX_AGE_VERSIONADOS}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={self.max_age_sin_version}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class MetricasMiddleware:
+    """
+    Mide latencia, consultas SQL y tamaño de respuesta de cada petición.
+
+    Las consultas se cuentan con `connection.execute_wrapper`, por lo que no
+    depende de DEBUG ni de `connection.queries`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.umbral_lento = getattr(settings, 'METRICAS_UMBRAL_LENTO_MS', 1000) / 1000
+
+    def __call__(self, request):
+        contador = _ContadorSQL()
+        inicio = time.perf_counter()
+
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+
+        duracion = time.perf_counter() - inicio
+        ruta = self._obtener_ruta(request)
+
+        if response.streaming:
+            bytes_respuesta = int(response.get('Content-Length') or 0)
+        else:
+            bytes_respuesta = len(response.content)
+
+        registro.observar(
+            ruta,
+            request.method,
+            response.status_code,
+            duracion,
+            consultas_sql=contador.cantidad,
+            tiempo_sql=contador.tiempo,
+            bytes_respuesta=bytes_respuesta,
+        )
+
+        if duracion >= self.umbral_lento:
+            logger.warning(
+                'Petición lenta: %s %s (%s) %.0f ms, %d consultas SQL en %.0f ms, %d bytes',
+                request.method,
+                request.path,
+                ruta,
+                duracion * 1000,
+                contador.cantidad,
+                contador.tiempo * 1000,
+                bytes_respuesta,
+            )
+
+        return response
+
+    def _obtener_ruta(self, request):
+        """Usa el patrón de URL (no la ruta concreta) para limitar la cardinalidad"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<sin_ruta>'
+        return '/' + match.route if match.route else match.view_name
+
+
+class _ContadorSQL:
+    """Wrapper de ejecución que acumula cantidad y tiempo de consultas"""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.cantidad += 1
+            self.tiempo += time.perf_counter() - inicio
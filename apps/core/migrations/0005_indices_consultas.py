@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_configuracionsistema'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diaferiado',
+            index=models.Index(fields=['usuario', 'fecha'], name='feriado_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodo',
+            index=models.Index(fields=['usuario', '-fecha_inicio'], name='periodo_usuario_inicio_idx'),
+        ),
+    ]
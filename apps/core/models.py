@@ -3,6 +3,10 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from datetime import datetime
+from decimal import Decimal
+from functools import cached_property
+
+from .laborables import CalendarioLaboral
 
 
 class ConfiguracionSistema(models.Model):
@@ -135,6 +139,10 @@ class Periodo(models.Model):
                 name='unique_active_period_per_user'
             )
         ]
+        # El período activo ya se busca por el índice parcial de la restricción única
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_inicio'], name='periodo_usuario_inicio_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.fecha_inicio} - {self.fecha_fin})"
@@ -175,9 +183,32 @@ class Periodo(models.Model):
             return (self.fecha_fin - self.fecha_inicio).days + 1
         return 0
 
+    @cached_property
+    def calendario_laboral(self):
+        """Calendario con los feriados del usuario del período"""
+        return CalendarioLaboral.para_usuario(self.usuario_id)
+
+    @property
+    def dias_laborables(self):
+        """Días hábiles del período descontando feriados"""
+        return self.calendario_laboral.dias_laborables(self.fecha_inicio, self.fecha_fin)
+
+    @property
+    def dias_laborables_transcurridos(self):
+        """Días hábiles desde el inicio hasta hoy (inclusive), sin pasar del fin"""
+        if not self.fecha_inicio or not self.fecha_fin:
+            return 0
+        hasta = min(datetime.now().date(), self.fecha_fin)
+        return self.calendario_laboral.dias_laborables(self.fecha_inicio, hasta)
+
+    @property
+    def horas_capacidad(self):
+        """Horas máximas registrables: días laborables por máximo diario"""
+        return self.dias_laborables * Decimal(str(self.horas_max_dia))
+
     @property
     def progreso_temporal(self):
-        """Retorna el progreso temporal del período (0-100)"""
+        """Retorna el progreso del período en días laborables (0-100)"""
         if not self.fecha_inicio or not self.fecha_fin:
             return 0
         
@@ -187,9 +218,12 @@ class Periodo(models.Model):
         elif hoy > self.fecha_fin:
             return 100
         
-        total_dias = (self.fecha_fin - self.fecha_inicio).days
-        dias_transcurridos = (hoy - self.fecha_inicio).days
-        return min(100, (dias_transcurridos / total_dias) * 100)
+        dias_laborables = self.dias_laborables
+        if dias_laborables == 0:
+            total_dias = (self.fecha_fin - self.fecha_inicio).days
+            dias_transcurridos = (hoy - self.fecha_inicio).days
+            return min(100, (dias_transcurridos / total_dias) * 100) if total_dias else 100
+        return min(100, (self.dias_laborables_transcurridos / dias_laborables) * 100)
 
 
 class DiaFeriado(models.Model):
@@ -211,6 +245,10 @@ class DiaFeriado(models.Model):
                 name='unique_holiday_per_user_date'
             )
         ]
+        # La restricción única empieza por fecha; el calendario laboral lee por usuario
+        indexes = [
+            models.Index(fields=['usuario', 'fecha'], name='feriado_usuario_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.fecha.strftime('%d/%m/%Y')}"
@@ -0,0 +1,156 @@
+"""
+Paginación por cursor (keyset) para listas largas.
+
+En lugar de `OFFSET`, cada página continúa desde los valores de orden de la
+última fila mostrada: `WHERE fecha > ? OR (fecha = ? AND id > ?) ORDER BY
+fecha, id LIMIT n`. Con un índice que coincida con el orden (por ejemplo
+`(usuario, fecha)` para las horas de un usuario) la página N cuesta lo mismo
+que la primera. El último campo del orden debe ser único (normalmente `pk`).
+
+El cursor es la lista de valores de orden en JSON codificado en base64; un
+cursor inválido se trata como ausente (primera página).
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {'t': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {'n': str(valor)}
+    return valor
+
+
+def _de_json(valor):
+    if isinstance(valor, dict):
+        if 't' in valor:
+            return datetime.fromisoformat(valor['t'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+        if 'n' in valor:
+            return Decimal(valor['n'])
+        raise ValueError('Cursor inválido')
+    return valor
+
+
+def codificar_cursor(valores):
+    datos = json.dumps([_a_json(valor) for valor in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, cantidad):
+    """Valores del cursor, o None si no es válido para un orden de `cantidad` campos"""
+    if not cursor:
+        return None
+    try:
+        datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = [_de_json(valor) for valor in json.loads(datos)]
+    except (binascii.Error, ValueError, TypeError, InvalidOperation):
+        return None
+    if len(valores) != cantidad:
+        return None
+    return valores
+
+
+class PaginaCursor:
+    """Filas de una página y los cursores para moverse a las vecinas"""
+
+    def __init__(self, filas, cursor_anterior=None, cursor_siguiente=None):
+        self.object_list = filas
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+
+    @property
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+
+class PaginadorCursor:
+    """
+    Pagina un queryset según `orden` (nombres como en `order_by`, con `-`
+    para descendente y `__` para relaciones incluidas con select_related).
+    """
+
+    def __init__(self, orden, por_pagina):
+        self.orden = tuple(orden)
+        self.campos = [(campo.lstrip('-'), campo.startswith('-')) for campo in self.orden]
+        self.por_pagina = por_pagina
+
+    def _valores(self, fila):
+        valores = []
+        for campo, _ in self.campos:
+            valor = fila
+            for parte in campo.split('__'):
+                valor = getattr(valor, parte)
+            valores.append(valor)
+        return valores
+
+    def _condicion(self, valores, adelante):
+        """Filas posteriores (o anteriores) a `valores` en el orden del paginador"""
+        condicion = Q()
+        iguales = Q()
+        for (campo, descendente), valor in zip(self.campos, valores):
+            operador = 'gt' if descendente != adelante else 'lt'
+            condicion |= iguales & Q(**{f'{campo}__{operador}': valor})
+            iguales &= Q(**{campo: valor})
+
+        # Cota redundante sobre el primer campo: permite recorrer el índice
+        # desde el cursor en lugar de evaluar el OR sobre todas las filas
+        campo, descendente = self.campos[0]
+        cota = 'gte' if descendente != adelante else 'lte'
+        return Q(**{f'{campo}__{cota}': valores[0]}) & condicion
+
+    def _invertido(self):
+        return [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in self.orden]
+
+    def paginar(self, queryset, despues=None, antes=None):
+        """Página que sigue al cursor `despues`, la que precede a `antes` o la primera"""
+        cantidad = len(self.campos)
+        valores_despues = decodificar_cursor(despues, cantidad)
+        valores_antes = None if valores_despues else decodificar_cursor(antes, cantidad)
+
+        if valores_antes is not None:
+            consulta = queryset.filter(self._condicion(valores_antes, adelante=False)).order_by(*self._invertido())
+            filas = list(consulta[:self.por_pagina + 1])
+            hay_anterior = len(filas) > self.por_pagina
+            filas = filas[:self.por_pagina][::-1]
+            hay_siguiente = True
+        else:
+            if valores_despues is not None:
+                queryset = queryset.filter(self._condicion(valores_despues, adelante=True))
+            filas = list(queryset.order_by(*self.orden)[:self.por_pagina + 1])
+            hay_siguiente = len(filas) > self.por_pagina
+            filas = filas[:self.por_pagina]
+            hay_anterior = valores_despues is not None
+
+        if not filas:
+            return PaginaCursor(filas)
+        return PaginaCursor(
+            filas,
+            cursor_anterior=codificar_cursor(self._valores(filas[0])) if hay_anterior else None,
+            cursor_siguiente=codificar_cursor(self._valores(filas[-1])) if hay_siguiente else None,
+        )
@@ -0,0 +1,32 @@
+"""
+Runner de pruebas del proyecto.
+
+El cache por defecto persiste en disco y es compartido con el servidor de
+desarrollo: sus contadores de versión podrían coincidir con los de la base
+de pruebas y devolver derivados de otra ejecución. Las pruebas usan un
+directorio temporal que se borra al terminar.
+"""
+import shutil
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class PruebasRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directorio_cache = tempfile.mkdtemp(prefix='sis-horas-cache-')
+        self._cache_pruebas = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self._directorio_cache,
+            }
+        })
+        self._cache_pruebas.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_pruebas.disable()
+        shutil.rmtree(self._directorio_cache, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,109 @@
+"""
+Renderer JSON para DRF basado en orjson (opcional).
+
+orjson serializa `date`/`datetime`/`UUID` de forma nativa y mucho más rápido
+que el módulo estándar; `Decimal` se convierte a número. Si orjson no está
+instalado se usa `json` con un encoder equivalente, de modo que la salida es
+la misma con o sin la dependencia: las vistas pueden devolver `Decimal` y
+fechas directamente en lugar de convertir cada fila con `float()`/`strftime()`.
+
+El formato es el del `JSONRenderer` de DRF: datetimes ISO 8601 con sus
+microsegundos y `Z` en lugar de `+00:00` para UTC. Ambos caminos aceptan
+claves de diccionario no textuales (números, fechas, UUID) como
+`OPT_NON_STR_KEYS`.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.db.models.query import QuerySet
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _por_defecto(obj):
+    """Tipos que ninguno de los dos serializadores maneja de forma nativa"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, (QuerySet, set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Tipo no serializable: {type(obj).__name__}')
+
+
+def _iso(obj):
+    """ISO 8601 como el encoder de DRF (`Z` para UTC)"""
+    representacion = obj.isoformat()
+    if isinstance(obj, datetime.datetime) and representacion.endswith('+00:00'):
+        representacion = representacion[:-6] + 'Z'
+    return representacion
+
+
+class _EncoderEstandar(json.JSONEncoder):
+    """Misma salida que orjson para fechas, UUID y Decimal"""
+
+    def default(self, obj):
+        if isinstance(obj, (datetime.date, datetime.time)):
+            return _iso(obj)
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        return _por_defecto(obj)
+
+
+def _clave(clave):
+    if clave is None or isinstance(clave, (str, int, float)):
+        return clave
+    if isinstance(clave, (datetime.date, datetime.time)):
+        return _iso(clave)
+    if isinstance(clave, uuid.UUID):
+        return str(clave)
+    raise TypeError(f'Clave no serializable: {type(clave).__name__}')
+
+
+def _claves_texto(obj):
+    """Copia de `obj` con las claves que `json` no acepta convertidas como en orjson"""
+    if isinstance(obj, dict):
+        return {_clave(clave): _claves_texto(valor) for clave, valor in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_claves_texto(valor) for valor in obj]
+    return obj
+
+
+def _dumps_estandar(datos):
+    return json.dumps(datos, cls=_EncoderEstandar, ensure_ascii=False, separators=(',', ':'))
+
+
+def serializar_json(datos):
+    """Bytes UTF-8 del JSON compacto de `datos`"""
+    if orjson is not None:
+        return orjson.dumps(
+            datos, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        )
+    try:
+        texto = _dumps_estandar(datos)
+    except TypeError:
+        # Claves de fecha o UUID: se convierten solo cuando aparecen
+        texto = _dumps_estandar(_claves_texto(datos))
+    return texto.encode('utf-8')
+
+
+class JSONRapidoRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return serializar_json(data)
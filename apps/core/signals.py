@@ -0,0 +1,78 @@
+"""
+Signals del core.
+
+Se registran desde CoreConfig.ready().
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ConfiguracionSistema, DiaFeriado, Periodo
+from .configuracion_usuario import invalidar_configuracion
+from .eventos import publicar
+from .laborables import CalendarioLaboral
+from .versionado import incrementar_version
+
+
+@receiver(post_save, sender=DiaFeriado)
+@receiver(post_delete, sender=DiaFeriado)
+def invalidar_calendario_laboral(sender, instance, **kwargs):
+    """Descarta los feriados cacheados del usuario"""
+    CalendarioLaboral.invalidar(instance.usuario_id)
+
+
+@receiver(post_save, sender=Periodo)
+@receiver(post_delete, sender=Periodo)
+def invalidar_periodo(sender, instance, **kwargs):
+    """Fechas u objetivo cambiados: descarta los cálculos del período"""
+    incrementar_version('periodo', instance.pk)
+    invalidar_configuracion(instance.usuario_id)
+
+
+@receiver(post_save, sender='authentication.UserProfile')
+@receiver(post_delete, sender='authentication.UserProfile')
+@receiver(post_save, sender='reportes.ConfiguracionReporte')
+@receiver(post_delete, sender='reportes.ConfiguracionReporte')
+def invalidar_configuracion_usuario(sender, instance, **kwargs):
+    """Perfil o configuración de reportes modificados"""
+    invalidar_configuracion(instance.user_id if hasattr(instance, 'user_id') else instance.usuario_id)
+
+
+@receiver(post_save, sender=ConfiguracionSistema)
+def invalidar_configuracion_sistema(sender, instance, **kwargs):
+    """Los valores por defecto forman parte de la configuración de todos los usuarios"""
+    invalidar_configuracion()
+
+
+@receiver(post_save, sender=Periodo)
+def publicar_periodo(sender, instance, **kwargs):
+    """Avisa a las pestañas abiertas del usuario (stream SSE)"""
+    publicar(instance.usuario_id, 'periodo_actualizado', {'id': instance.pk, 'activo': instance.activo})
+
+
+@receiver(post_delete, sender=Periodo)
+def publicar_periodo_eliminado(sender, instance, **kwargs):
+    publicar(instance.usuario_id, 'periodo_eliminado', {'id': instance.pk})
+
+
+@receiver(pre_save, sender=DiaFeriado)
+def recordar_fecha_feriado(sender, instance, **kwargs):
+    """Fecha previa a una edición, para quitarla del calendario"""
+    instance._fecha_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._fecha_anterior = DiaFeriado.objects.filter(pk=instance.pk).values_list('fecha', flat=True).first()
+
+
+@receiver(post_save, sender=DiaFeriado)
+def publicar_feriado(sender, instance, **kwargs):
+    anterior = getattr(instance, '_fecha_anterior', None)
+    publicar(instance.usuario_id, 'feriado_actualizado', {
+        'id': instance.pk,
+        'fecha': instance.fecha.isoformat(),
+        'fecha_anterior': anterior.isoformat() if anterior and anterior != instance.fecha else None,
+        'nombre': instance.nombre,
+    })
+
+
+@receiver(post_delete, sender=DiaFeriado)
+def publicar_feriado_eliminado(sender, instance, **kwargs):
+    publicar(instance.usuario_id, 'feriado_eliminado', {'id': instance.pk, 'fecha': instance.fecha.isoformat()})
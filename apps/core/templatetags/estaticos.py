@@ -0,0 +1,39 @@
+"""
+Etiqueta `{% paquete %}` para incluir los paquetes de ESTATICOS_PAQUETES
+"""
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+DIRECTORIO_PAQUETES = 'paquetes'
+
+
+@lru_cache(maxsize=None)
+def _paquete_disponible(ruta):
+    """El paquete fue construido y recolectado (se verifica una vez por proceso)"""
+    return staticfiles_storage.exists(ruta)
+
+
+@register.simple_tag
+def paquete(nombre):
+    """
+    `<script>`/`<link>` del paquete `nombre`.
+
+    Con ESTATICOS_USAR_PAQUETES (y el paquete ya construido) emite una sola
+    etiqueta al archivo minificado y versionado; si no, una por cada fuente,
+    lo que permite editar los archivos en desarrollo sin reconstruir.
+    """
+    fuentes = settings.ESTATICOS_PAQUETES[nombre]
+    ruta = f'{DIRECTORIO_PAQUETES}/{nombre}'
+    if getattr(settings, 'ESTATICOS_USAR_PAQUETES', False) and _paquete_disponible(ruta):
+        fuentes = [ruta]
+
+    if nombre.endswith('.js'):
+        return format_html_join('\n', '<script src="{}"></script>', ((static(fuente),) for fuente in fuentes))
+    return format_html_join('\n', '<link href="{}" rel="stylesheet">', ((static(fuente),) for fuente in fuentes))
@@ -0,0 +1,56 @@
+"""
+Etiqueta `{% fragmento %}`: cache de bloques de template por usuario y versión de datos
+"""
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.fragmentos import clave_fragmento
+from apps.core.versionado import TIMEOUT_DERIVADOS
+
+register = template.Library()
+
+
+class FragmentoNode(template.Node):
+    def __init__(self, nodelist, nombre, parametros):
+        self.nodelist = nodelist
+        self.nombre = nombre
+        self.parametros = parametros
+
+    def render(self, context):
+        request = context.get('request')
+        usuario = getattr(request, 'user', None)
+        timeout = getattr(settings, 'FRAGMENTOS_TIMEOUT', TIMEOUT_DERIVADOS)
+        if usuario is None or not usuario.is_authenticated or not timeout:
+            return self.nodelist.render(context)
+
+        clave = clave_fragmento(
+            self.nombre.resolve(context),
+            usuario.pk,
+            [parametro.resolve(context) for parametro in self.parametros],
+        )
+        html = cache.get(clave)
+        if html is None:
+            html = self.nodelist.render(context)
+            cache.set(clave, html, timeout)
+        return html
+
+
+@register.tag
+def fragmento(parser, token):
+    """
+    {% fragmento 'nombre' [parametro ...] %} ... {% endfragmento %}
+
+    Los parámetros distinguen variantes del mismo bloque (filtros, página,
+    fecha del día); el usuario y sus versiones de datos se agregan solos.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError("'fragmento' requiere al menos el nombre del bloque")
+    nodelist = parser.parse(('endfragmento',))
+    parser.delete_first_token()
+    return FragmentoNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,9 +1,12 @@
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from datetime import date, datetime, timedelta
 from .models import Periodo, DiaFeriado
+from apps.horas.models import RegistroHora
+from apps.proyectos.models import Proyecto
 
 
 class PeriodoModelTest(TestCase):
@@ -382,3 +385,833 @@ class FeriadoViewsTest(TestCase):
         # La vista de eliminación redirige después de eliminar
         self.assertEqual(response.status_code, 302)
         self.assertFalse(DiaFeriado.objects.filter(pk=feriado.pk).exists())
+
+
+class DiasLaborablesTest(TestCase):
+    """Pruebas para el cálculo de días laborables"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Agosto',
+            fecha_inicio=date(2025, 8, 1),
+            fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160,
+            horas_max_dia=8,
+            usuario=self.user
+        )
+
+    def test_contar_dias_habiles_coincide_con_recorrido(self):
+        """La fórmula cerrada coincide con contar día por día"""
+        from datetime import timedelta
+        from .laborables import contar_dias_habiles
+
+        inicio = date(2025, 1, 1)
+        for desplazamiento in range(7):
+            desde = inicio + timedelta(days=desplazamiento)
+            for largo in range(0, 40):
+                hasta = desde + timedelta(days=largo)
+                esperado = sum(
+                    1 for i in range(largo + 1) if (desde + timedelta(days=i)).weekday() < 5
+                )
+                self.assertEqual(contar_dias_habiles(desde, hasta), esperado)
+        self.assertEqual(contar_dias_habiles(date(2025, 1, 2), date(2025, 1, 1)), 0)
+
+    def test_periodo_descuenta_feriados(self):
+        """Los feriados en día hábil se descuentan; los de fin de semana no"""
+        self.assertEqual(self.periodo.dias_laborables, 21)
+
+        DiaFeriado.objects.create(fecha=date(2025, 8, 15), nombre='Feriado', usuario=self.user)
+        DiaFeriado.objects.create(fecha=date(2025, 8, 16), nombre='Sábado', usuario=self.user)
+        periodo = Periodo.objects.get(pk=self.periodo.pk)
+        self.assertEqual(periodo.dias_laborables, 20)
+        self.assertEqual(periodo.horas_capacidad, 160)
+        self.assertEqual(periodo.dias_laborables_transcurridos, 20)
+
+    def test_form_valida_contra_capacidad_con_feriados(self):
+        """El formulario usa los feriados del usuario para el máximo teórico"""
+        from .forms import PeriodoForm
+
+        DiaFeriado.objects.create(fecha=date(2025, 8, 15), nombre='Feriado', usuario=self.user)
+        datos = {
+            'nombre': 'Agosto',
+            'fecha_inicio': '2025-08-01',
+            'fecha_fin': '2025-08-31',
+            'horas_objetivo': 168,
+            'horas_max_dia': 8,
+        }
+        self.assertTrue(PeriodoForm(datos).is_valid())
+        form = PeriodoForm(datos, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('horas_objetivo', form.errors)
+
+
+class BurndownTest(TestCase):
+    """Pruebas para la API de avance del período"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Semana',
+            fecha_inicio=date(2025, 8, 4),
+            fecha_fin=date(2025, 8, 10),
+            horas_objetivo=40,
+            usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto', usuario=self.user)
+        for dia, horas in [(4, 8), (5, 6), (5, 2), (6, 4)]:
+            RegistroHora.objects.create(
+                fecha=date(2025, 8, dia), horas=horas, proyecto=self.proyecto,
+                periodo=self.periodo, usuario=self.user
+            )
+
+    def test_serie_acumulada_y_proyeccion(self):
+        """Acumulado real hasta hoy, ideal lineal y proyección al ritmo actual"""
+        from .burndown import calcular_burndown
+
+        datos = calcular_burndown(self.periodo, hoy=date(2025, 8, 6))
+        serie = datos['serie']
+        self.assertEqual(len(serie), 5)
+        self.assertEqual([p['real'] for p in serie[:3]], [8.0, 16.0, 20.0])
+        self.assertEqual([p['ideal'] for p in serie], [8.0, 16.0, 24.0, 32.0, 40.0])
+        self.assertEqual(datos['ritmo_diario'], 6.67)
+        self.assertEqual(serie[4]['proyectado'], 33.33)
+        self.assertIsNone(datos['fecha_proyectada_objetivo'])
+
+    def test_cache_se_invalida_con_nuevo_registro(self):
+        """La respuesta cacheada cambia al registrar horas en el período"""
+        from unittest import mock
+
+        self.client.login(username='testuser', password='testpass123')
+        url = f'/api/periodos/{self.periodo.pk}/burndown/'
+        with mock.patch('apps.core.burndown.date') as fecha_mock:
+            fecha_mock.today.return_value = date(2025, 8, 8)
+            self.assertEqual(self.client.get(url).json()['total_horas'], 20.0)
+            RegistroHora.objects.create(
+                fecha=date(2025, 8, 7), horas=5, proyecto=self.proyecto,
+                periodo=self.periodo, usuario=self.user
+            )
+            self.assertEqual(self.client.get(url).json()['total_horas'], 25.0)
+
+    def test_cache_se_invalida_al_mover_registro_de_periodo(self):
+        """Mover un registro a otro período invalida también el anterior"""
+        from .burndown import obtener_burndown
+        otro = Periodo.objects.create(
+            nombre='Semana siguiente', fecha_inicio=date(2025, 8, 11), fecha_fin=date(2025, 8, 17),
+            horas_objetivo=40, usuario=self.user
+        )
+        self.assertEqual(obtener_burndown(self.periodo)['total_horas'], 20.0)
+        
+        registro = RegistroHora.objects.get(fecha=date(2025, 8, 6))
+        registro.fecha = date(2025, 8, 11)
+        registro.periodo = otro
+        registro.save()
+        self.assertEqual(obtener_burndown(self.periodo)['total_horas'], 16.0)
+    
+    def test_cache_compartido_entre_procesos(self):
+        """El cache configurado no es local al proceso (chequeo core.W001)"""
+        from django.conf import settings
+        from django.test import override_settings
+        from .checks import cache_compartido
+        self.assertNotIn('LocMemCache', settings.CACHES['default']['BACKEND'])
+        self.assertEqual(cache_compartido(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([aviso.id for aviso in cache_compartido(None)], ['core.W001'])
+
+    def test_periodo_de_otro_usuario(self):
+        """No se expone el avance de períodos ajenos"""
+        User.objects.create_user(username='otro', password='testpass123')
+        self.client.login(username='otro', password='testpass123')
+        response = self.client.get(f'/api/periodos/{self.periodo.pk}/burndown/')
+        self.assertEqual(response.status_code, 404)
+
+
+class MetricasTest(TestCase):
+    """Pruebas para el middleware de métricas y el endpoint /metrics/"""
+    
+    def setUp(self):
+        from .metricas import registro
+        registro.reiniciar()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='adminpass123',
+            is_staff=True
+        )
+    
+    def test_metricas_requiere_staff(self):
+        """Prueba que solo los administradores pueden ver las métricas"""
+        response = self.client.get(reverse('metricas'))
+        self.assertEqual(response.status_code, 403)
+        
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('metricas'))
+        self.assertEqual(response.status_code, 403)
+    
+    def test_metricas_formato_prometheus(self):
+        """Prueba que se registran latencia, consultas SQL y bytes por ruta"""
+        self.client.login(username='admin', password='adminpass123')
+        self.client.get('/api/periodos/')
+        
+        response = self.client.get(reverse('metricas'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        
+        contenido = response.content.decode()
+        self.assertIn('sis_horas_request_duration_seconds_bucket{route="/api/periodos/"', contenido)
+        self.assertIn('sis_horas_sql_queries_total{route="/api/periodos/"', contenido)
+        self.assertIn('sis_horas_response_bytes_total{route="/api/periodos/"', contenido)
+    
+    def test_registro_histograma_acumulado(self):
+        """Prueba que los buckets del histograma son acumulativos"""
+        from .metricas import RegistroMetricas
+        metricas = RegistroMetricas()
+        metricas.observar('/x/', 'GET', 200, 0.003, consultas_sql=2)
+        metricas.observar('/x/', 'GET', 200, 0.3, consultas_sql=1)
+        
+        contenido = metricas.exportar_prometheus()
+        self.assertRegex(contenido, r'_bucket\{route="/x/".*le="0.005"\} 1\n')
+        self.assertRegex(contenido, r'_bucket\{route="/x/".*le="0.5"\} 2\n')
+        self.assertRegex(contenido, r'sis_horas_sql_queries_total\{route="/x/".*\} 3\n')
+    
+    def test_peticion_lenta_con_contexto(self):
+        """El aviso de petición lenta lleva request_id y usuario"""
+        import logging
+        from django.test import override_settings
+        from .log import ContextoPeticionFilter
+        
+        registros = []
+        handler = logging.Handler()
+        handler.addFilter(ContextoPeticionFilter())
+        handler.emit = registros.append
+        logger = logging.getLogger('apps.core.metricas')
+        logger.addHandler(handler)
+        try:
+            with override_settings(METRICAS_UMBRAL_LENTO_MS=0):
+                self.client.login(username='testuser', password='testpass123')
+                self.client.get('/api/periodos/', HTTP_X_REQUEST_ID='lenta-1')
+        finally:
+            logger.removeHandler(handler)
+        
+        lentas = [registro for registro in registros if registro.getMessage().startswith('Petición lenta: GET /api/periodos/')]
+        self.assertEqual(len(lentas), 1)
+        self.assertEqual(lentas[0].request_id, 'lenta-1')
+        self.assertEqual(lentas[0].user_id, self.user.pk)
+
+
+class LogPipelineTest(TestCase):
+    """Pruebas para el pipeline de logging con cola"""
+    
+    def test_request_id_en_respuesta(self):
+        """Prueba que se genera o respeta el encabezado X-Request-ID"""
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+        
+        response = self.client.get(reverse('core:dashboard'), HTTP_X_REQUEST_ID='abc-123')
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+    
+    def test_cola_handler_escribe_json(self):
+        """Prueba que el handler escribe líneas JSON en segundo plano"""
+        import json
+        import logging
+        import os
+        import tempfile
+        from .log import ColaHandler, ContextoPeticionFilter, iniciar_contexto, limpiar_contexto
+        
+        with tempfile.TemporaryDirectory() as directorio:
+            handler = ColaHandler(os.path.join(directorio, 'app-{pid}.log'), consola=False)
+            handler.addFilter(ContextoPeticionFilter())
+            logger = logging.getLogger('apps.tests.cola')
+            logger.addHandler(handler)
+            logger.propagate = False
+            
+            request = Client().get('/auth/login/').wsgi_request
+            token = iniciar_contexto(request, 'req-1')
+            try:
+                logger.warning('hola %s', 'mundo')
+            finally:
+                limpiar_contexto(token)
+                logger.removeHandler(handler)
+                handler.close()
+            
+            with open(os.path.join(directorio, f'app-{os.getpid()}.log'), encoding='utf-8') as archivo:
+                linea = json.loads(archivo.readline())
+        
+        self.assertEqual(linea['message'], 'hola mundo')
+        self.assertEqual(linea['request_id'], 'req-1')
+        self.assertIsNone(linea['user_id'])
+        self.assertIsNotNone(linea['duration_ms'])
+    
+    def test_cola_handler_conserva_traceback(self):
+        """El traceback llega en el campo `exc`, separado del mensaje"""
+        import json
+        import logging
+        import os
+        import tempfile
+        from .log import ColaHandler
+        
+        with tempfile.TemporaryDirectory() as directorio:
+            handler = ColaHandler(os.path.join(directorio, 'app.log'), consola=False)
+            logger = logging.getLogger('apps.tests.cola_exc')
+            logger.addHandler(handler)
+            logger.propagate = False
+            try:
+                try:
+                    raise ValueError('dato inválido')
+                except ValueError:
+                    logger.exception('fallo al importar %s', 'horas.csv')
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+            
+            with open(os.path.join(directorio, 'app.log'), encoding='utf-8') as archivo:
+                linea = json.loads(archivo.readline())
+        
+        self.assertEqual(linea['message'], 'fallo al importar horas.csv')
+        self.assertTrue(linea['exc'].startswith('Traceback'))
+        self.assertIn('ValueError: dato inválido', linea['exc'])
+
+
+class ConfiguracionUsuarioTest(TestCase):
+    """Pruebas para la configuración efectiva del usuario"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+    
+    def test_valores_del_perfil_y_periodo(self):
+        """Toma el perfil y el período activo, con el límite diario del período"""
+        from decimal import Decimal
+        from .configuracion_usuario import obtener_configuracion
+        
+        configuracion = obtener_configuracion(self.user)
+        self.assertIsNone(configuracion.periodo_activo)
+        self.assertEqual(configuracion.limite_diario, Decimal('8'))
+        
+        perfil = self.user.profile
+        perfil.incremento_horas = Decimal('0.25')
+        perfil.save()
+        Periodo.objects.create(
+            nombre='Activo', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30),
+            horas_objetivo=100, horas_max_dia=Decimal('7.5'), activo=True, usuario=self.user
+        )
+        
+        configuracion = obtener_configuracion(self.user)
+        self.assertEqual(configuracion.incremento_horas, Decimal('0.25'))
+        self.assertEqual(configuracion.periodo_activo.nombre, 'Activo')
+        self.assertEqual(configuracion.limite_diario, Decimal('7.5'))
+        self.assertEqual(configuracion.reportes.columnas, ('fecha', 'proyecto', 'horas'))
+    
+    def test_una_consulta_y_luego_cache(self):
+        """Se arma con una consulta y luego se lee del cache"""
+        from .configuracion_usuario import obtener_configuracion
+        
+        with self.assertNumQueries(1):
+            obtener_configuracion(self.user)
+        with self.assertNumQueries(0):
+            obtener_configuracion(self.user)
+    
+    def test_invalidacion_por_configuracion_del_sistema(self):
+        """Los valores por defecto del sistema invalidan a todos los usuarios"""
+        from decimal import Decimal
+        from .configuracion_usuario import obtener_configuracion
+        from .models import ConfiguracionSistema
+        
+        self.user.profile.delete()
+        self.assertEqual(obtener_configuracion(self.user).horas_maximas, Decimal('12'))
+        
+        config = ConfiguracionSistema.get_config()
+        config.horas_maximas_default = Decimal('10')
+        config.save()
+        self.assertEqual(obtener_configuracion(self.user).horas_maximas, Decimal('10'))
+    
+    def test_validacion_lee_la_base(self):
+        """Los formularios validan con la configuración de la base, no con la cacheada"""
+        from decimal import Decimal
+        from apps.horas.forms import RegistroHoraForm
+        from .configuracion_usuario import obtener_configuracion
+        
+        fecha = date.today() - timedelta(days=7)
+        fecha -= timedelta(days=max(fecha.weekday() - 4, 0))
+        periodo = Periodo.objects.create(
+            nombre='Activo', fecha_inicio=fecha - timedelta(days=30), fecha_fin=fecha + timedelta(days=30),
+            horas_objetivo=100, horas_max_dia=Decimal('8'), activo=True, usuario=self.user
+        )
+        proyecto = Proyecto.objects.create(nombre='Proyecto', usuario=self.user)
+        self.assertEqual(obtener_configuracion(self.user).limite_diario, Decimal('8'))
+        
+        # Cambio hecho por otro proceso cuyo aviso todavía no llegó al cache
+        Periodo.objects.filter(pk=periodo.pk).update(horas_max_dia=Decimal('2'))
+        self.assertEqual(obtener_configuracion(self.user).limite_diario, Decimal('8'))
+        
+        form = RegistroHoraForm({
+            'fecha': fecha.isoformat(), 'proyecto': proyecto.pk, 'horas': '4',
+            'descripcion': 'Trabajo', 'tipo_tarea': 'tarea',
+        }, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('Excede el máximo de 2', str(form.non_field_errors()))
+    
+    def test_middleware(self):
+        """La configuración se expone en la petición"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('horas:hora_create'))
+        self.assertEqual(response.wsgi_request.configuracion.usuario_id, self.user.pk)
+        self.assertEqual(response.context['incremento_horas'], 0.5)
+        self.assertEqual(response.context['limite_diario'], 8.0)
+
+
+class CompresionRespuestasTest(TestCase):
+    """Pruebas para la compresión de respuestas y el renderer JSON"""
+    
+    def setUp(self):
+        from decimal import Decimal
+        
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        periodo = Periodo.objects.create(
+            nombre='P', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=100, usuario=self.user
+        )
+        proyecto = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        for dia in range(6, 11):
+            RegistroHora.objects.create(
+                fecha=date(2025, 1, dia), horas=Decimal('1.5'), proyecto=proyecto, periodo=periodo,
+                descripcion='Detalle de la tarea realizada ' * 10, usuario=self.user
+            )
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_gzip_para_json_grande(self):
+        """Las respuestas JSON grandes se comprimen si el cliente acepta gzip"""
+        import gzip
+        import json
+        
+        response = self.client.get('/api/horas/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0]['horas'], 1.5)
+        self.assertEqual(data[0]['fecha'], '2025-01-06')
+        self.assertEqual(data[0]['tipo_tarea_display'], 'Tarea')
+    
+    def test_sin_compresion(self):
+        """Sin Accept-Encoding o bajo el umbral la respuesta queda igual"""
+        response = self.client.get('/api/horas/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()), 5)
+        
+        response = self.client.get('/api/horas/', {'fecha_inicio': '2030-01-01'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_serializacion_equivalente(self):
+        """orjson y la librería estándar producen el mismo JSON"""
+        import json
+        from datetime import datetime, timezone as tz
+        from decimal import Decimal
+        from unittest import mock
+        from . import renderers
+        
+        datos = {'horas': Decimal('1.5'), 'fecha': date(2025, 1, 6),
+                 'creado': datetime(2025, 1, 6, 10, 30, 0, 123456, tzinfo=tz.utc), 'texto': 'Reunión'}
+        rapido = renderers.serializar_json(datos)
+        with mock.patch.object(renderers, 'orjson', None):
+            estandar = renderers.serializar_json(datos)
+        self.assertEqual(json.loads(rapido), json.loads(estandar))
+        self.assertEqual(json.loads(estandar)['creado'], '2025-01-06T10:30:00.123456Z')
+
+    def test_formato_de_drf(self):
+        """Fechas como el JSONRenderer de DRF y claves no textuales en ambos caminos"""
+        import json
+        import uuid
+        from datetime import datetime, time, timedelta, timezone as tz
+        from unittest import mock
+        from rest_framework.utils.encoders import JSONEncoder
+        from . import renderers
+
+        fechas = {
+            'utc': datetime(2025, 1, 6, 10, 30, 0, 123456, tzinfo=tz.utc),
+            'exacta': datetime(2025, 1, 6, 10, 30, tzinfo=tz.utc),
+            'local': datetime(2025, 1, 6, 10, 30, 0, 500, tzinfo=tz(timedelta(hours=-3))),
+            'ingenua': datetime(2025, 1, 6, 10, 30),
+            'hora': time(8, 15, 30, 250000),
+        }
+        drf = json.loads(json.dumps(fechas, cls=JSONEncoder))
+        claves = {date(2025, 1, 6): 1, 2: [{uuid.UUID(int=1): 'x'}], None: 3, 1.5: 4}
+        rapido = renderers.serializar_json(fechas), renderers.serializar_json(claves)
+        with mock.patch.object(renderers, 'orjson', None):
+            estandar = renderers.serializar_json(fechas), renderers.serializar_json(claves)
+        for resultado in (rapido, estandar):
+            self.assertEqual(json.loads(resultado[0]), drf)
+            self.assertEqual(json.loads(resultado[1]), {
+                '2025-01-06': 1, '2': [{'00000000-0000-0000-0000-000000000001': 'x'}], 'null': 3, '1.5': 4,
+            })
+
+
+class EstaticosTest(TestCase):
+    """Pruebas para los paquetes de estáticos, su compresión y el middleware que los sirve"""
+    
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from django.conf import settings
+        from django.test import override_settings
+        from apps.core.templatetags.estaticos import _paquete_disponible
+        
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.raiz = Path(temporal.name) / 'staticfiles'
+        paquetes = Path(temporal.name) / 'build' / 'paquetes'
+        
+        ajustes = override_settings(
+            STATIC_ROOT=self.raiz,
+            STATICFILES_DIRS=[settings.BASE_DIR / 'static', paquetes.parent],
+            ESTATICOS_DIR_PAQUETES=paquetes,
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        _paquete_disponible.cache_clear()
+        self.addCleanup(_paquete_disponible.cache_clear)
+    
+    def _construir(self):
+        import io
+        import json
+        from django.core.management import call_command
+        
+        call_command('construir_estaticos', stdout=io.StringIO(), verbosity=0)
+        return json.loads((self.raiz / 'staticfiles.json').read_text())['paths']
+    
+    def test_minificar_js(self):
+        """Se quitan comentarios y sangría sin tocar strings, template literals ni regex"""
+        from apps.core.estaticos import minificar_js
+        
+        codigo = (
+            "// comentario\n"
+            "function f(a) {\n"
+            "    /* bloque */\n"
+            "    const url = 'http://x/*no*/';\n"
+            "    const html = `<b>${a ? `${a}` : '//'}</b>`;\n"
+            "    return /\\/\\/[a-z]+/g.test(url) ? a / 2 : a\n"
+            "}\n"
+        )
+        self.assertEqual(
+            minificar_js(codigo),
+            "function f(a){const url='http://x/*no*/';"
+            "const html=`<b>${a ? `${a}` : '//'}</b>`;"
+            "return/\\/\\/[a-z]+/g.test(url)?a/2:a}"
+        )
+    
+    def test_minificar_css(self):
+        """El CSS minificado conserva los strings (por ejemplo, data URLs)"""
+        from apps.core.estaticos import minificar_css
+        
+        codigo = "/* x */\n.a > .b {\n    color: red;\n    background: url('data:a b');\n}\n"
+        self.assertEqual(minificar_css(codigo), ".a>.b{color:red;background:url('data:a b')}")
+    
+    def test_construir_y_servir_paquetes(self):
+        """Los paquetes quedan versionados, precomprimidos y se sirven con cache inmutable"""
+        import gzip
+        
+        rutas = self._construir()
+        versionado = rutas['paquetes/base.js']
+        self.assertNotEqual(versionado, 'paquetes/base.js')
+        self.assertTrue((self.raiz / (versionado + '.gz')).exists())
+        
+        contenido = (self.raiz / versionado).read_bytes()
+        response = self.client.get(f'/static/{versionado}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), contenido)
+        
+        response = self.client.get(f'/static/{versionado}', HTTP_IF_NONE_MATCH=response['ETag'],
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+        
+        # Sin versión: cache corto y sin compresión si el cliente no la acepta
+        response = self.client.get('/static/paquetes/base.js')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_etiqueta_paquete(self):
+        """Sin paquetes se incluye cada fuente; con ellos, un único archivo versionado"""
+        from django.template import Context, Template
+        from django.test import override_settings
+        from apps.core.templatetags.estaticos import _paquete_disponible
+        
+        plantilla = Template("{% load estaticos %}{% paquete 'base.js' %}")
+        with override_settings(ESTATICOS_USAR_PAQUETES=False):
+            html = plantilla.render(Context())
+        self.assertIn('/static/js/app.js', html)
+        self.assertIn('/static/js/form-widgets.js', html)
+        
+        rutas = self._construir()
+        _paquete_disponible.cache_clear()
+        with override_settings(ESTATICOS_USAR_PAQUETES=True):
+            html = plantilla.render(Context())
+        self.assertEqual(html, f'<script src="/static/{rutas["paquetes/base.js"]}"></script>')
+
+
+class FragmentosCacheTest(TestCase):
+    """Pruebas para la cache de fragmentos por usuario y versión de datos"""
+    
+    def setUp(self):
+        from decimal import Decimal
+        
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Periodo Fragmentos', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=100, activo=True, usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto Cacheado', usuario=self.user)
+        RegistroHora.objects.create(
+            fecha=date(2025, 1, 6), horas=Decimal('4'), proyecto=self.proyecto,
+            periodo=self.periodo, descripcion='Primer registro', usuario=self.user
+        )
+        self.client.login(username='testuser', password='testpass123')
+    
+    def _consultas(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, ' '.join(consulta['sql'] for consulta in consultas.captured_queries)
+    
+    def test_acierto_evita_consultas_de_datos(self):
+        """Con los fragmentos en cache no se consultan horas ni proyectos"""
+        paginas = (
+            (reverse('core:dashboard'), '4,0h de 100h objetivo'),
+            (reverse('horas:hora_list'), 'Primer registro'),
+            (reverse('proyectos:proyecto_list'), 'Proyecto Cacheado'),
+        )
+        for url, texto in paginas:
+            _, sql = self._consultas(url)
+            self.assertIn('horas_registrohora', sql)
+            
+            response, sql = self._consultas(url)
+            self.assertNotIn('horas_registrohora', sql)
+            self.assertNotIn('proyectos_proyecto', sql)
+            self.assertContains(response, texto)
+    
+    def test_cambios_invalidan_fragmentos(self):
+        """Crear registros, editar proyectos o períodos descarta los fragmentos del usuario"""
+        from decimal import Decimal
+        
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertContains(response, '4,0h de 100h objetivo')
+        self.client.get(reverse('horas:hora_list'))
+        
+        RegistroHora.objects.create(
+            fecha=date(2025, 1, 7), horas=Decimal('2.5'), proyecto=self.proyecto,
+            periodo=self.periodo, descripcion='Segundo registro', usuario=self.user
+        )
+        self.assertContains(self.client.get(reverse('core:dashboard')), '6,5h de 100h objetivo')
+        self.assertContains(self.client.get(reverse('horas:hora_list')), 'Segundo registro')
+        
+        self.proyecto.nombre = 'Proyecto Renombrado'
+        self.proyecto.save()
+        self.assertContains(self.client.get(reverse('proyectos:proyecto_list')), 'Proyecto Renombrado')
+        
+        self.periodo.horas_objetivo = 200
+        self.periodo.save()
+        self.assertContains(self.client.get(reverse('core:dashboard')), '6,5h de 200h objetivo')
+    
+    def test_parametros_y_usuarios_separan_entradas(self):
+        """Los filtros y el usuario forman parte de la clave"""
+        otro = User.objects.create_user(username='otro', password='testpass123')
+        Proyecto.objects.create(nombre='Proyecto Ajeno', usuario=otro)
+        
+        url = reverse('proyectos:proyecto_list')
+        self.assertContains(self.client.get(url), 'Proyecto Cacheado')
+        self.assertNotContains(self.client.get(url, {'nombre': 'inexistente'}), 'Proyecto Cacheado')
+        
+        self.client.login(username='otro', password='testpass123')
+        response = self.client.get(url)
+        self.assertContains(response, 'Proyecto Ajeno')
+        self.assertNotContains(response, 'Proyecto Cacheado')
+
+
+class EventosEnVivoTest(TestCase):
+    """Pruebas del bus de eventos y del stream SSE del dashboard"""
+    
+    def setUp(self):
+        from .eventos import _bus
+        _bus.cache_clear()
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Enero', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 1, 31),
+            horas_objetivo=100, horas_max_dia=8, usuario=self.user, activo=True
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto Eventos', usuario=self.user)
+    
+    def test_bus_local_reenvia_al_reconectar(self):
+        """Los eventos van solo al usuario y se reenvían desde Last-Event-ID"""
+        from .eventos import BusLocal, RESINCRONIZAR
+        bus = BusLocal()
+        suscripcion = bus.suscribir(self.user.pk)
+        bus.publicar(self.user.pk, 'hora_creada', {'id': 1})
+        bus.publicar(self.user.pk + 1, 'hora_creada', {'id': 2})
+        
+        eventos = suscripcion.esperar(0.1)
+        self.assertEqual([evento['datos'] for evento in eventos], [{'id': 1}])
+        self.assertEqual(suscripcion.esperar(0.01), [])
+        suscripcion.cerrar()
+        
+        bus.publicar(self.user.pk, 'hora_eliminada', {'id': 1})
+        reconexion = bus.suscribir(self.user.pk, desde=eventos[0]['id'])
+        self.assertEqual([evento['tipo'] for evento in reconexion.esperar(0.01)], ['hora_eliminada'])
+        
+        # Un id de otro proceso o anterior a un reinicio no se puede completar
+        desconocido = bus.suscribir(self.user.pk, desde=eventos[0]['id'] + 1000)
+        self.assertEqual([evento['tipo'] for evento in desconocido.esperar(0.01)], [RESINCRONIZAR])
+    
+    def test_bus_cache(self):
+        """El bus sobre el cache numera por usuario y reenvía lo pendiente"""
+        from .eventos import BusCache, RESINCRONIZAR
+        bus = BusCache()
+        bus.publicar(self.user.pk, 'periodo_actualizado', {'id': 1})
+        bus.publicar(self.user.pk, 'periodo_eliminado', {'id': 1})
+        
+        reconexion = bus.suscribir(self.user.pk, desde=1)
+        self.assertEqual([evento['tipo'] for evento in reconexion.esperar(0.01)], ['periodo_eliminado'])
+        
+        nueva = bus.suscribir(self.user.pk)
+        self.assertEqual(nueva.esperar(0.01), [])
+        bus.publicar(self.user.pk, 'hora_creada', {'id': 5})
+        self.assertEqual([evento['id'] for evento in nueva.esperar(0.1)], [3])
+        
+        self.assertEqual(
+            [evento['tipo'] for evento in bus.suscribir(self.user.pk, desde=99).esperar(0.01)],
+            [RESINCRONIZAR]
+        )
+    
+    def test_signals_publican_totales_del_dia(self):
+        """Altas, ediciones y bajas de horas publican el total de los días afectados"""
+        from decimal import Decimal
+        from .eventos import obtener_bus
+        suscripcion = obtener_bus().suscribir(self.user.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            registro = RegistroHora.objects.create(
+                fecha=date(2025, 1, 6), horas=Decimal('3.5'), proyecto=self.proyecto,
+                periodo=self.periodo, usuario=self.user
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            registro.fecha = date(2025, 1, 7)
+            registro.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            registro.delete()
+        
+        eventos = suscripcion.esperar(0.1)
+        self.assertEqual([evento['tipo'] for evento in eventos], ['hora_creada', 'hora_actualizada', 'hora_eliminada'])
+        self.assertEqual(eventos[0]['datos']['dias'], {'2025-01-06': 3.5})
+        self.assertEqual(eventos[1]['datos']['dias'], {'2025-01-06': 0.0, '2025-01-07': 3.5})
+        self.assertEqual(eventos[2]['datos'], {'id': eventos[0]['datos']['id'], 'periodo': self.periodo.pk, 'dias': {'2025-01-07': 0.0}})
+    
+    def test_transaccion_revertida_no_publica(self):
+        """Los eventos salen recién al confirmar la transacción"""
+        from django.db import transaction
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    DiaFeriado.objects.create(fecha=date(2025, 1, 8), nombre='Revertido', usuario=self.user)
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+    
+    def test_stream_sse(self):
+        """El stream reenvía lo pendiente desde Last-Event-ID y se cierra solo"""
+        from django.test import override_settings
+        from .eventos import obtener_bus
+        bus = obtener_bus()
+        bus.publicar(self.user.pk, 'feriado_actualizado', {'fecha': '2025-01-08'})
+        bus.publicar(self.user.pk, 'feriado_eliminado', {'fecha': '2025-01-08'})
+        primero = bus.suscribir(self.user.pk).posicion - 1
+        
+        url = reverse('api_eventos')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        
+        self.client.login(username='testuser', password='testpass123')
+        with override_settings(EVENTOS_DURACION_MAX=1, EVENTOS_KEEPALIVE=1):
+            response = self.client.get(url, HTTP_LAST_EVENT_ID=str(primero))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            contenido = b''.join(response.streaming_content).decode()
+        
+        self.assertTrue(contenido.startswith('retry: 3000\n'))
+        self.assertIn(f'id: {primero + 1}\nevent: feriado_eliminado\ndata: {{"fecha": "2025-01-08"}}\n\n', contenido)
+        self.assertNotIn('event: feriado_actualizado', contenido)
+
+    def test_limite_de_conexiones_por_usuario(self):
+        """Por encima del límite se responde 429; al cerrarse un stream se libera su lugar"""
+        from django.test import override_settings
+        url = reverse('api_eventos')
+        self.client.login(username='testuser', password='testpass123')
+        with override_settings(EVENTOS_MAX_CONEXIONES_USUARIO=1, EVENTOS_DURACION_MAX=0):
+            abierto = self.client.get(url)
+            self.assertEqual(abierto.status_code, 200)
+            rechazado = self.client.get(url)
+            self.assertEqual(rechazado.status_code, 429)
+            self.assertEqual(rechazado['Retry-After'], '0')
+            
+            b''.join(abierto.streaming_content)
+            self.assertEqual(self.client.get(url).status_code, 200)
+    
+    def test_chequeo_bus_entre_procesos(self):
+        """El bus por defecto pasa por el cache compartido; sin él no se arranca"""
+        from django.conf import settings
+        from django.test import override_settings
+        from .checks import bus_eventos
+        self.assertEqual(settings.EVENTOS_BUS, 'apps.core.eventos.BusCache')
+        self.assertEqual(bus_eventos(None), [])
+        for backend in ('locmem.LocMemCache', 'db.DatabaseCache'):
+            with override_settings(CACHES={'default': {'BACKEND': f'django.core.cache.backends.{backend}'}}):
+                self.assertEqual([error.id for error in bus_eventos(None)], ['core.E001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(bus_eventos(None), [])
+        with override_settings(EVENTOS_BUS='apps.core.eventos.BusLocal'):
+            self.assertEqual([aviso.id for aviso in bus_eventos(None)], ['core.W002'])
+    
+    def test_bus_cache_publicaciones_simultaneas(self):
+        """Con FileBasedCache las publicaciones concurrentes no comparten número"""
+        import threading
+        from .eventos import BusCache
+        bus = BusCache()
+        suscripcion = bus.suscribir(self.user.pk)
+        
+        def publicar_varios(hilo):
+            for numero in range(15):
+                bus.publicar(self.user.pk, 'hora_creada', {'hilo': hilo, 'numero': numero})
+        
+        hilos = [threading.Thread(target=publicar_varios, args=(hilo,)) for hilo in range(6)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        eventos = suscripcion.esperar(0.1)
+        self.assertEqual([evento['id'] for evento in eventos], list(range(1, 91)))
+        self.assertEqual(len({(evento['datos']['hilo'], evento['datos']['numero']) for evento in eventos}), 90)
+    
+    def test_dashboard_abre_el_stream(self):
+        """La página del dashboard conecta el cliente del stream"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'data-eventos-url="{reverse("api_eventos")}"')
+        self.assertContains(response, f'data-periodo-activo="{self.periodo.pk}"')
+        self.assertContains(response, 'js/dashboard.js')
@@ -0,0 +1,50 @@
+"""
+Versiones de datos para invalidar caches derivados.
+
+Cada ámbito (por ejemplo `('periodo', 3)` o `('usuario', 7)`) tiene un
+contador en el cache; los valores derivados se guardan bajo una clave que
+incluye las versiones de los ámbitos de los que dependen. Al modificarse
+los datos basta con incrementar la versión: las entradas anteriores dejan
+de leerse y expiran solas.
+"""
+import time
+
+from django.core.cache import cache
+
+
+TIMEOUT_DERIVADOS = 60 * 60 * 24
+
+
+def _clave_version(ambito, identificador):
+    return f'version:{ambito}:{identificador}'
+
+
+def obtener_version(ambito, identificador):
+    """Versión actual del ámbito"""
+    clave = _clave_version(ambito, identificador)
+    version = cache.get(clave)
+    if version is None:
+        # Semilla basada en el tiempo: si el contador se pierde del cache,
+        # la nueva versión no coincide con la de entradas viejas.
+        cache.add(clave, time.time_ns() // 1000, None)
+        version = cache.get(clave)
+    return version
+
+
+def incrementar_version(ambito, identificador):
+    """Invalida todo lo cacheado que dependa del ámbito"""
+    clave = _clave_version(ambito, identificador)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.add(clave, time.time_ns() // 1000, None)
+
+
+def clave_versionada(prefijo, *ambitos, extra=''):
+    """Clave de cache que cambia cuando cambia la versión de algún ámbito"""
+    partes = [prefijo]
+    for ambito, identificador in ambitos:
+        partes.append(f'{ambito}{identificador}v{obtener_version(ambito, identificador)}')
+    if extra:
+        partes.append(str(extra))
+    return ':'.join(partes)
@@ -2,7 +2,8 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DetailView
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.conf import settings
 from django.contrib import messages
 from django.urls import reverse_lazy
 from rest_framework.views import APIView
@@ -11,8 +12,13 @@ from rest_framework.permissions import IsAuthenticated
 from datetime import datetime, date
 import calendar
 from .models import Periodo, DiaFeriado, ConfiguracionSistema
+from .metricas import registro as registro_metricas
+from .burndown import obtener_burndown
+from .eventos import obtener_bus, flujo_sse, reservar_conexion
+from .fragmentos import contexto_perezoso
 from .forms import PeriodoForm, DiaFeriadoForm, CalendarioFiltroForm, RangoFechasForm
 from apps.horas.models import RegistroHora
+from apps.horas.resumenes import obtener_resumen, resumenes_de
 from apps.proyectos.models import Proyecto
 
 
@@ -69,38 +75,45 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     """Vista principal del dashboard"""
     template_name = 'dashboard/dashboard_working.html'
     
+    CLAVES_ESTADISTICAS = (
+        'total_horas', 'horas_objetivo', 'porcentaje_completacion', 'horas_faltantes',
+        'dias_trabajados', 'dias_laborables', 'dias_laborables_transcurridos', 'horas_capacidad',
+    )
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Obtener período activo
-        try:
-            periodo_activo = Periodo.objects.get(usuario=self.request.user, activo=True)
-            context['periodo_activo'] = periodo_activo
-            
-            # Obtener estadísticas del período
-            horas_periodo = RegistroHora.objects.filter(
-                usuario=self.request.user,
-                periodo=periodo_activo
-            )
-            
-            total_horas = sum(h.horas for h in horas_periodo)
-            context['total_horas'] = total_horas
-            context['horas_objetivo'] = periodo_activo.horas_objetivo
-            context['porcentaje_completacion'] = (total_horas / periodo_activo.horas_objetivo * 100) if periodo_activo.horas_objetivo > 0 else 0
-            context['horas_faltantes'] = max(0, periodo_activo.horas_objetivo - total_horas)
-            
-            # Días con registros
-            fechas_unicas = set(h.fecha for h in horas_periodo)
-            context['dias_trabajados'] = len(fechas_unicas)
-            
-        except Periodo.DoesNotExist:
-            context['periodo_activo'] = None
-            context['total_horas'] = 0
-            context['porcentaje_completacion'] = 0
-            context['horas_faltantes'] = 0
-            context['dias_trabajados'] = 0
+        # Período activo desde la configuración ya resuelta de la petición
+        periodo_activo = self.request.configuracion.periodo_activo
+        context['periodo_activo'] = periodo_activo
+        context['hoy'] = date.today()
         
+        # Las estadísticas solo se calculan si sus fragmentos no están en cache
+        context.update(contexto_perezoso(
+            lambda: self._estadisticas(periodo_activo), self.CLAVES_ESTADISTICAS
+        ))
         return context
+    
+    def _estadisticas(self, periodo_activo):
+        if periodo_activo is None:
+            return dict.fromkeys(self.CLAVES_ESTADISTICAS, 0)
+        
+        # Totales desde el resumen precalculado del período
+        periodo = Periodo.objects.select_related('resumen').get(pk=periodo_activo.id)
+        resumen = obtener_resumen(periodo)
+        total_horas = resumen.total_horas
+        objetivo = periodo.horas_objetivo
+        return {
+            'total_horas': total_horas,
+            'horas_objetivo': objetivo,
+            'porcentaje_completacion': (total_horas / objetivo * 100) if objetivo > 0 else 0,
+            'horas_faltantes': max(0, objetivo - total_horas),
+            'dias_trabajados': resumen.dias_trabajados,
+            # Capacidad en días laborables (sin fines de semana ni feriados)
+            'dias_laborables': periodo.dias_laborables,
+            'dias_laborables_transcurridos': periodo.dias_laborables_transcurridos,
+            'horas_capacidad': periodo.horas_capacidad,
+        }
 
 
 class PeriodoListView(LoginRequiredMixin, ListView):
@@ -111,6 +124,12 @@ class PeriodoListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         return Periodo.objects.filter(usuario=self.request.user).order_by('-fecha_inicio')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Horas registradas de cada período desde su resumen precalculado
+        context['periodos'] = resumenes_de(context['periodos'])
+        return context
 
 
 class PeriodoCreateView(LoginRequiredMixin, CreateView):
@@ -120,6 +139,11 @@ class PeriodoCreateView(LoginRequiredMixin, CreateView):
     template_name = 'core/periodo_form.html'
     success_url = reverse_lazy('core:periodo_list')
     
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+    
     def form_valid(self, form):
         form.instance.usuario = self.request.user
         messages.success(self.request, 'Período creado exitosamente')
@@ -142,6 +166,11 @@ class PeriodoUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'core/periodo_form.html'
     success_url = reverse_lazy('core:periodo_list')
     
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+    
     def get_queryset(self):
         return Periodo.objects.filter(usuario=self.request.user)
     
@@ -220,6 +249,49 @@ class FeriadoDeleteView(LoginRequiredMixin, View):
             return JsonResponse({'success': False, 'error': str(e)})
 
 
+class MetricasView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Métricas de peticiones en formato Prometheus (solo administradores)"""
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return HttpResponse(
+            registro_metricas.exportar_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class EventosView(LoginRequiredMixin, View):
+    """
+    Stream SSE con los cambios de datos del usuario (ver apps.core.eventos).
+
+    Se cierra a los EVENTOS_DURACION_MAX segundos y el navegador reconecta
+    enviando `Last-Event-ID`, así no queda un worker ocupado indefinidamente.
+    Cada stream retiene un hilo: por encima de EVENTOS_MAX_CONEXIONES_USUARIO
+    pestañas se responde 429 y esa pestaña queda sin actualización en vivo.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        ranura = reservar_conexion(request.user.pk)
+        if ranura is None:
+            response = HttpResponse('Demasiadas conexiones abiertas', status=429, content_type='text/plain')
+            response['Retry-After'] = str(settings.EVENTOS_DURACION_MAX)
+            return response
+        try:
+            desde = int(request.headers.get('Last-Event-ID', ''))
+        except ValueError:
+            desde = None
+        suscripcion = obtener_bus().suscribir(request.user.pk, desde=desde)
+        response = StreamingHttpResponse(flujo_sse(suscripcion, ranura), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Sin buffer en nginx: cada evento sale en cuanto se genera
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 # API Views
 class DashboardAPIView(APIView):
     """API del dashboard"""
@@ -227,32 +299,20 @@ class DashboardAPIView(APIView):
     
     def get(self, request):
         try:
-            periodo_activo = Periodo.objects.get(usuario=request.user, activo=True)
+            periodo_activo = Periodo.objects.select_related('resumen').get(usuario=request.user, activo=True)
             
-            # Obtener horas del período
-            horas_periodo = RegistroHora.objects.filter(
-                usuario=request.user,
-                periodo=periodo_activo
-            ).select_related('proyecto')
-            
-            total_horas = sum(float(h.horas) for h in horas_periodo)
-            
-            # Agrupar por proyecto
-            horas_por_proyecto = {}
-            for hora in horas_periodo:
-                proyecto_nombre = hora.proyecto.nombre
-                if proyecto_nombre not in horas_por_proyecto:
-                    horas_por_proyecto[proyecto_nombre] = 0
-                horas_por_proyecto[proyecto_nombre] += float(hora.horas)
-            
-            # Agrupar por tipo de tarea
+            # Totales y desgloses desde el resumen precalculado del período
+            resumen = obtener_resumen(periodo_activo)
+            total_horas = float(resumen.total_horas)
+            horas_por_proyecto = {
+                nombre: float(horas)
+                for nombre, horas in periodo_activo.resumen_proyectos.values_list('proyecto__nombre', 'total_horas')
+            }
             horas_por_tipo = {'tarea': 0, 'reunion': 0}
-            for hora in horas_periodo:
-                horas_por_tipo[hora.tipo_tarea] += float(hora.horas)
-            
-            # Días con registros
-            fechas_unicas = set(h.fecha for h in horas_periodo)
-            dias_trabajados = len(fechas_unicas)
+            horas_por_tipo.update(
+                (tipo, float(horas)) for tipo, horas in periodo_activo.resumen_tipos.values_list('tipo_tarea', 'total_horas')
+            )
+            dias_trabajados = resumen.dias_trabajados
             
             # Calcular porcentajes
             porcentaje_completacion = (total_horas / periodo_activo.horas_objetivo * 100) if periodo_activo.horas_objetivo > 0 else 0
@@ -264,6 +324,9 @@ class DashboardAPIView(APIView):
                 'porcentaje_completacion': round(porcentaje_completacion, 1),
                 'horas_faltantes': horas_faltantes,
                 'dias_trabajados': dias_trabajados,
+                'dias_laborables': periodo_activo.dias_laborables,
+                'dias_laborables_transcurridos': periodo_activo.dias_laborables_transcurridos,
+                'horas_capacidad': float(periodo_activo.horas_capacidad),
                 'horas_por_proyecto': horas_por_proyecto,
                 'horas_por_tipo': horas_por_tipo,
                 'periodo': {
@@ -291,9 +354,8 @@ class CalendarioAPIView(APIView):
             # Obtener días del mes
             cal = calendar.monthcalendar(year, month)
             
-            # Obtener feriados
-            feriados = DiaFeriado.objects.filter(usuario=request.user)
-            fechas_feriados = [f.fecha.strftime('%Y-%m-%d') for f in feriados]
+            # Feriados del usuario (búsqueda binaria, sin recorrer la lista por día)
+            calendario_laboral = periodo_activo.calendario_laboral
             
             # Obtener registros de horas del mes del período activo
             horas_mes = RegistroHora.objects.filter(
@@ -319,10 +381,11 @@ class CalendarioAPIView(APIView):
                     if dia == 0:
                         semana_data.append(None)
                     else:
+                        fecha = date(year, month, dia)
                         fecha_str = f"{year}-{month:02d}-{dia:02d}"
-                        es_feriado = fecha_str in fechas_feriados
+                        es_feriado = calendario_laboral.es_feriado(fecha)
                         horas_dia = horas_por_fecha.get(fecha_str, 0)
-                        es_fin_semana = date(year, month, dia).weekday() >= 5
+                        es_fin_semana = fecha.weekday() >= 5
                         
                         # Determinar estado
                         if es_fin_semana:
@@ -351,7 +414,10 @@ class CalendarioAPIView(APIView):
                 'calendario': calendario_data,
                 'mes': month,
                 'año': year,
-                'nombre_mes': calendar.month_name[month]
+                'nombre_mes': calendar.month_name[month],
+                'dias_laborables_mes': calendario_laboral.dias_laborables(
+                    date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+                ),
             })
             
         except Periodo.DoesNotExist:
@@ -379,6 +445,16 @@ class PeriodoAPIView(APIView):
         return Response(data)
 
 
+class PeriodoBurndownAPIView(APIView):
+    """API de avance (burn-down) de un período"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, pk):
+        periodo = get_object_or_404(Periodo, pk=pk, usuario=request.user)
+        datos = obtener_burndown(periodo)
+        return Response({'success': True, **datos})
+
+
 class PeriodoActivoAPIView(APIView):
     """API del período activo"""
     permission_classes = [IsAuthenticated]
@@ -395,7 +471,10 @@ class PeriodoActivoAPIView(APIView):
                     'fecha_fin': periodo.fecha_fin.strftime('%Y-%m-%d'),
                     'horas_objetivo': periodo.horas_objetivo,
                     'horas_max_dia': periodo.horas_max_dia,
-                    'activo': periodo.activo
+                    'activo': periodo.activo,
+                    'dias_laborables': periodo.dias_laborables,
+                    'dias_laborables_transcurridos': periodo.dias_laborables_transcurridos,
+                    'horas_capacidad': float(periodo.horas_capacidad),
                 }
             }
             return Response(data)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum
-from .models import RegistroHora
+from .models import RegistroHora, RegistroHoraArchivo
 
 
 @admin.register(RegistroHora)
@@ -136,3 +136,19 @@ class RegistroHoraAdmin(admin.ModelAdmin):
             pass
         
         return response
+
+
+@admin.register(RegistroHoraArchivo)
+class RegistroHoraArchivoAdmin(admin.ModelAdmin):
+    """Solo lectura: el archivo se administra con el comando archivar_horas"""
+    list_display = ('fecha', 'proyecto', 'horas', 'tipo_tarea', 'usuario', 'periodo', 'archivado_at')
+    list_filter = ('tipo_tarea', 'usuario', 'periodo')
+    search_fields = ('descripcion', 'proyecto__nombre', 'usuario__username')
+    date_hierarchy = 'fecha'
+    list_select_related = ('usuario', 'proyecto', 'periodo')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
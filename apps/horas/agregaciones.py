@@ -0,0 +1,141 @@
+"""
+Agregación de horas por intervalos de tiempo (día, semana, mes, trimestre, año).
+
+Los filtros de fecha se aplican como rangos (`fecha__gte`/`fecha__lte`) para
+que el motor pueda usar los índices `(proyecto, fecha)` y `(periodo, fecha)`;
+el agrupamiento usa las funciones `Trunc*` de Django, portables entre
+motores. Las series se completan con ceros en los intervalos sin registros,
+hasta SERIE_MAX_INTERVALOS intervalos.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+
+GRANULARIDADES = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'trimestre': TruncQuarter,
+    'año': TruncYear,
+}
+
+
+class RangoExcesivo(ValueError):
+    """La serie densa superaría SERIE_MAX_INTERVALOS intervalos"""
+
+
+def inicio_intervalo(fecha, granularidad):
+    """Primer día del intervalo que contiene `fecha` (igual que `Trunc*`)"""
+    if granularidad == 'dia':
+        return fecha
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    if granularidad == 'trimestre':
+        return date(fecha.year, 3 * ((fecha.month - 1) // 3) + 1, 1)
+    if granularidad == 'año':
+        return date(fecha.year, 1, 1)
+    raise ValueError(f"Granularidad no soportada: {granularidad}")
+
+
+def siguiente_intervalo(inicio, granularidad):
+    """Primer día del intervalo siguiente"""
+    if granularidad == 'dia':
+        return inicio + timedelta(days=1)
+    if granularidad == 'semana':
+        return inicio + timedelta(days=7)
+    if granularidad in ('mes', 'trimestre'):
+        meses = 1 if granularidad == 'mes' else 3
+        indice = inicio.month - 1 + meses
+        return date(inicio.year + indice // 12, indice % 12 + 1, 1)
+    if granularidad == 'año':
+        return date(inicio.year + 1, 1, 1)
+    raise ValueError(f"Granularidad no soportada: {granularidad}")
+
+
+def cantidad_intervalos(desde, hasta, granularidad):
+    """Intervalos entre dos fechas, ambas incluidas (sin recorrerlos)"""
+    inicio, fin = inicio_intervalo(desde, granularidad), inicio_intervalo(hasta, granularidad)
+    if fin < inicio:
+        return 0
+    if granularidad == 'dia':
+        return (fin - inicio).days + 1
+    if granularidad == 'semana':
+        return (fin - inicio).days // 7 + 1
+    meses = (fin.year - inicio.year) * 12 + fin.month - inicio.month
+    if granularidad == 'mes':
+        return meses + 1
+    if granularidad == 'trimestre':
+        return meses // 3 + 1
+    return fin.year - inicio.year + 1
+
+
+def _verificar_rango(desde, hasta, granularidad):
+    if cantidad_intervalos(desde, hasta, granularidad) > settings.SERIE_MAX_INTERVALOS:
+        raise RangoExcesivo(
+            f"El rango supera {settings.SERIE_MAX_INTERVALOS} intervalos; "
+            f"use una granularidad mayor o acote las fechas"
+        )
+
+
+def rango_año(año):
+    """Rango de fechas de un año, para filtrar sin `fecha__year`"""
+    return date(año, 1, 1), date(año, 12, 31)
+
+
+def serie_temporal(queryset, granularidad='mes', fecha_desde=None, fecha_hasta=None, densa=True):
+    """
+    Suma horas y cuenta registros por intervalo.
+
+    Retorna una lista de dicts `{'periodo', 'total_horas', 'total_registros'}`
+    ordenada por `periodo` (fecha de inicio del intervalo). Con `densa=True`
+    se incluyen los intervalos vacíos entre `fecha_desde` y `fecha_hasta`
+    (o entre el primer y el último registro si no se indican); si serían
+    más de SERIE_MAX_INTERVALOS se lanza `RangoExcesivo`.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad no soportada: {granularidad}")
+    if densa and fecha_desde and fecha_hasta:
+        _verificar_rango(fecha_desde, fecha_hasta, granularidad)
+
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+
+    filas = queryset.annotate(
+        periodo_serie=GRANULARIDADES[granularidad]('fecha')
+    ).values('periodo_serie').annotate(
+        total_horas=Sum('horas'),
+        total_registros=Count('id')
+    ).order_by('periodo_serie')
+
+    por_intervalo = {
+        fila['periodo_serie']: (fila['total_horas'], fila['total_registros']) for fila in filas
+    }
+    if not densa:
+        return [
+            {'periodo': inicio, 'total_horas': horas, 'total_registros': registros}
+            for inicio, (horas, registros) in por_intervalo.items()
+        ]
+
+    if fecha_desde:
+        actual = inicio_intervalo(fecha_desde, granularidad)
+    elif por_intervalo:
+        actual = min(por_intervalo)
+    else:
+        return []
+    ultimo = inicio_intervalo(fecha_hasta, granularidad) if fecha_hasta else max(por_intervalo, default=actual)
+    _verificar_rango(actual, ultimo, granularidad)
+
+    serie = []
+    while actual <= ultimo:
+        horas, registros = por_intervalo.get(actual, (Decimal('0'), 0))
+        serie.append({'periodo': actual, 'total_horas': horas, 'total_registros': registros})
+        actual = siguiente_intervalo(actual, granularidad)
+    return serie
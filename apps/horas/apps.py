@@ -5,3 +5,6 @@ class HorasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.horas'
     verbose_name = 'Horas'
+
+    def ready(self):
+        import apps.horas.signals
@@ -0,0 +1,171 @@
+"""
+Archivo de registros de horas de períodos cerrados.
+
+Los registros de períodos inactivos cuya fecha de fin es anterior a
+ARCHIVO_ANTIGUEDAD_DIAS se mueven en lotes a `RegistroHoraArchivo`, de modo
+que la tabla activa y sus índices solo contienen lo que se consulta a diario
+(el formulario de horas ya rechaza fechas de más de un año).
+
+Los reportes y exportaciones leen con `registros_con_archivo`, que agrega
+los registros archivados cuando el rango de fechas alcanza el archivo. Los
+resúmenes por período (`apps.horas.resumenes`) siguen contando lo archivado.
+"""
+import heapq
+from datetime import date, timedelta
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.core.models import Periodo
+from .models import RegistroHora, RegistroHoraArchivo
+from .signals import registros_archivados, registros_creados_en_lote
+
+CAMPOS = (
+    'id', 'fecha', 'proyecto_id', 'horas', 'descripcion', 'tipo_tarea',
+    'periodo_id', 'usuario_id', 'created_at', 'updated_at',
+)
+
+
+def periodos_archivables(hoy=None):
+    """Períodos inactivos terminados hace más de ARCHIVO_ANTIGUEDAD_DIAS"""
+    hoy = hoy or date.today()
+    limite = hoy - timedelta(days=settings.ARCHIVO_ANTIGUEDAD_DIAS)
+    return Periodo.objects.filter(activo=False, fecha_fin__lt=limite).order_by('fecha_fin')
+
+
+def _copiar(origen, destino, ids):
+    """INSERT ... SELECT de las filas `ids`: conserva ids y fechas de creación"""
+    quote = connection.ops.quote_name
+    columnas = ', '.join(quote(origen._meta.get_field(campo).column) for campo in CAMPOS)
+    extra_destino = extra_origen = ''
+    parametros = []
+    if destino is RegistroHoraArchivo:
+        extra_destino, extra_origen = f', {quote("archivado_at")}', ', %s'
+        parametros.append(timezone.now())
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(destino._meta.db_table)} ({columnas}{extra_destino}) '
+            f'SELECT {columnas}{extra_origen} FROM {quote(origen._meta.db_table)} '
+            f'WHERE {quote("id")} IN ({marcadores})',
+            parametros + ids
+        )
+
+
+def _mover(origen, destino, periodo, tamaño_lote):
+    """
+    Mueve los registros del período en lotes, cada uno en su transacción.
+
+    Genera, por lote, instancias de `destino` con lo que necesitan los
+    receptores de las señales (id, descripción, período y usuario).
+    """
+    while True:
+        with transaction.atomic():
+            filas = list(
+                origen.objects.filter(periodo=periodo).order_by('pk').values_list('id', 'descripcion')[:tamaño_lote]
+            )
+            if not filas:
+                return
+            ids = [registro_id for registro_id, _ in filas]
+            _copiar(origen, destino, ids)
+            # Borrado directo, sin post_delete por fila: las señales se envían por lote
+            origen.objects.filter(pk__in=ids)._raw_delete(origen.objects.db)
+        yield [
+            destino(id=registro_id, descripcion=descripcion, periodo_id=periodo.pk, usuario_id=periodo.usuario_id)
+            for registro_id, descripcion in filas
+        ]
+
+
+def archivar_periodo(periodo, tamaño_lote=None):
+    """Mueve los registros del período al archivo; retorna cuántos se movieron"""
+    total = 0
+    for lote in _mover(RegistroHora, RegistroHoraArchivo, periodo, tamaño_lote or settings.ARCHIVO_TAMANO_LOTE):
+        registros_archivados.send(sender=RegistroHora, usuario=periodo.usuario, registros=lote)
+        total += len(lote)
+    return total
+
+
+def restaurar_periodo(periodo, tamaño_lote=None):
+    """Devuelve a la tabla activa los registros archivados del período"""
+    total = 0
+    for lote in _mover(RegistroHoraArchivo, RegistroHora, periodo, tamaño_lote or settings.ARCHIVO_TAMANO_LOTE):
+        registros_creados_en_lote.send(
+            sender=RegistroHora, usuario=periodo.usuario, registros=lote, restaurados=True
+        )
+        total += len(lote)
+    return total
+
+
+def horizonte_archivo(usuario_id):
+    """
+    Fecha más reciente archivada del usuario, o None si no tiene archivo.
+
+    Se lee siempre de la base (usa el índice usuario/fecha): un valor
+    cacheado dejaría afuera lo recién archivado por `archivar_horas`.
+    """
+    return RegistroHoraArchivo.objects.filter(usuario_id=usuario_id).aggregate(
+        fecha=Max('fecha')
+    )['fecha']
+
+
+class RegistrosConArchivo:
+    """
+    Registros activos y archivados que cumplen los mismos filtros.
+
+    Se comporta como un queryset de solo lectura (`count()`, slicing e
+    iteración); ambos orígenes se leen ordenados por `orden` y se intercalan,
+    así que un slice solo trae de cada tabla las filas que necesita.
+    """
+
+    def __init__(self, usuario, filtros, orden=('fecha', 'pk')):
+        self.filtros = filtros
+        self.orden = orden
+        self.activos = RegistroHora.objects.filter(usuario=usuario, **filtros)
+        self.archivados = RegistroHoraArchivo.objects.filter(usuario=usuario, **filtros)
+        self.usuario_id = usuario.pk
+
+    @cached_property
+    def usa_archivo(self):
+        """Si el rango alcanza lo archivado; se consulta recién al leer filas"""
+        horizonte = horizonte_archivo(self.usuario_id)
+        desde = self.filtros.get('fecha__gte')
+        return horizonte is not None and (desde is None or desde <= horizonte)
+
+    def _origenes(self):
+        origenes = [self.activos]
+        if self.usa_archivo:
+            origenes.append(self.archivados)
+        return [queryset.select_related('proyecto').order_by(*self.orden) for queryset in origenes]
+
+    def clave_orden(self):
+        """Clave de intercalado según `orden` (para combinar filas de ambas tablas)"""
+        campos = [campo.replace('__', '.') for campo in self.orden]
+        return attrgetter(*campos)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self._origenes())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return heapq.merge(*self._origenes(), key=self.clave_orden())
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            return self[indice:indice + 1][0]
+        inicio = indice.start or 0
+        origenes = self._origenes()
+        if indice.stop is not None:
+            origenes = [queryset[:indice.stop] for queryset in origenes]
+        filas = heapq.merge(*origenes, key=self.clave_orden())
+        return list(filas)[inicio:indice.stop]
+
+
+def registros_con_archivo(usuario, orden=('fecha', 'pk'), **filtros):
+    """Punto de entrada para reportes y exportaciones; ver `RegistrosConArchivo`"""
+    return RegistrosConArchivo(usuario, filtros, orden)
@@ -0,0 +1,242 @@
+"""
+Búsqueda de texto completo sobre RegistroHora.descripcion.
+
+- SQLite: tabla virtual FTS5 `horas_registrohora_fts` (rowid = id del registro)
+  mantenida por signals y reconstruible con `reconstruir_indice_busqueda`.
+- PostgreSQL: índice GIN sobre `to_tsvector('spanish', descripcion)`; el
+  índice se mantiene solo, por lo que los signals no hacen nada.
+"""
+import re
+
+from django.db import connection
+
+
+TABLA_FTS = 'horas_registrohora_fts'
+CONFIG_TSVECTOR = 'spanish'
+NOMBRE_INDICE_GIN = 'horas_registro_desc_fts_gin'
+
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+
+def usa_fts5(conexion=None):
+    return (conexion or connection).vendor == 'sqlite'
+
+
+def usa_tsvector(conexion=None):
+    return (conexion or connection).vendor == 'postgresql'
+
+
+def crear_indice(schema_editor):
+    """Crea la estructura de índice según el motor (usado por la migración)"""
+    conexion = schema_editor.connection
+    if usa_fts5(conexion):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+            f"descripcion, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif usa_tsvector(conexion):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {NOMBRE_INDICE_GIN} ON horas_registrohora "
+            f"USING GIN (to_tsvector('{CONFIG_TSVECTOR}'::regconfig, COALESCE(descripcion, '')))"
+        )
+
+
+def eliminar_indice(schema_editor):
+    conexion = schema_editor.connection
+    if usa_fts5(conexion):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLA_FTS}')
+    elif usa_tsvector(conexion):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {NOMBRE_INDICE_GIN}')
+
+
+def indexar_registro(registro):
+    """Inserta o reemplaza la descripción de un registro en el índice"""
+    if not usa_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [registro.pk])
+        if registro.descripcion:
+            cursor.execute(
+                f'INSERT INTO {TABLA_FTS} (rowid, descripcion) VALUES (%s, %s)',
+                [registro.pk, registro.descripcion]
+            )
+
+
+def indexar_registros(registros):
+    """Agrega al índice registros recién creados (p. ej. con `bulk_create`)"""
+    if not usa_fts5():
+        return
+    filas = [(registro.pk, registro.descripcion) for registro in registros if registro.descripcion]
+    if not filas:
+        return
+    if any(pk is None for pk, _ in filas):
+        # El motor no devolvió los ids del INSERT masivo
+        reconstruir_indice()
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {TABLA_FTS} (rowid, descripcion) VALUES (%s, %s)', filas)
+
+
+def desindexar_registro(registro_id):
+    if not usa_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [registro_id])
+
+
+def desindexar_registros(registro_ids):
+    if not usa_fts5() or not registro_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [[pk] for pk in registro_ids])
+
+
+def reconstruir_indice():
+    """Regenera el índice completo con una sola sentencia; retorna filas indexadas"""
+    if not usa_fts5():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS}')
+        cursor.execute(
+            f"INSERT INTO {TABLA_FTS} (rowid, descripcion) "
+            f"SELECT id, descripcion FROM horas_registrohora WHERE descripcion <> ''"
+        )
+        total = cursor.rowcount
+        cursor.execute(f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}) VALUES ('optimize')")
+    return total
+
+
+def _consulta_fts5(texto):
+    """Convierte el texto del usuario en una consulta FTS5 segura (prefijos con AND)"""
+    palabras = _PALABRA.findall(texto)
+    return ' AND '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+class ResultadosBusqueda:
+    """
+    Resultado perezoso compatible con `Paginator` (`count()` y slicing).
+
+    Solo la página solicitada se lee de la base de datos; cada elemento es
+    un RegistroHora con el atributo `rank` (mayor es más relevante).
+    """
+
+    def __init__(self, usuario, texto, fecha_desde=None, fecha_hasta=None, proyecto_id=None):
+        self.usuario = usuario
+        self.texto = texto
+        self.fecha_desde = fecha_desde
+        self.fecha_hasta = fecha_hasta
+        self.proyecto_id = proyecto_id
+        self._total = None
+
+    # -- SQLite / FTS5 -----------------------------------------------------
+    def _sql_fts5(self):
+        condiciones = [f'{TABLA_FTS} MATCH %s', 'r.usuario_id = %s']
+        parametros = [_consulta_fts5(self.texto), self.usuario.pk]
+        if self.fecha_desde:
+            condiciones.append('r.fecha >= %s')
+            parametros.append(self.fecha_desde)
+        if self.fecha_hasta:
+            condiciones.append('r.fecha <= %s')
+            parametros.append(self.fecha_hasta)
+        if self.proyecto_id:
+            condiciones.append('r.proyecto_id = %s')
+            parametros.append(self.proyecto_id)
+        desde = (
+            f'FROM {TABLA_FTS} JOIN horas_registrohora AS r ON r.id = {TABLA_FTS}.rowid '
+            f'WHERE ' + ' AND '.join(condiciones)
+        )
+        return desde, parametros
+
+    # -- PostgreSQL / ORM --------------------------------------------------
+    def _queryset_tsvector(self):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        from .models import RegistroHora
+
+        vector = SearchVector('descripcion', config=CONFIG_TSVECTOR)
+        consulta = SearchQuery(self.texto, config=CONFIG_TSVECTOR, search_type='websearch')
+        queryset = RegistroHora.objects.annotate(
+            documento=vector,
+            rank=SearchRank(vector, consulta),
+        ).filter(usuario=self.usuario, documento=consulta)
+        return self._filtrar(queryset).order_by('-rank', '-fecha')
+
+    # -- Otros motores (sin índice de texto) --------------------------------
+    def _queryset_generico(self):
+        from django.db.models import FloatField, Value
+        from .models import RegistroHora
+
+        queryset = RegistroHora.objects.filter(usuario=self.usuario)
+        for palabra in _PALABRA.findall(self.texto):
+            queryset = queryset.filter(descripcion__icontains=palabra)
+        return self._filtrar(queryset).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        ).order_by('-fecha')
+
+    def _filtrar(self, queryset):
+        if self.fecha_desde:
+            queryset = queryset.filter(fecha__gte=self.fecha_desde)
+        if self.fecha_hasta:
+            queryset = queryset.filter(fecha__lte=self.fecha_hasta)
+        if self.proyecto_id:
+            queryset = queryset.filter(proyecto_id=self.proyecto_id)
+        return queryset
+
+    def _queryset_orm(self):
+        if usa_tsvector():
+            return self._queryset_tsvector()
+        return self._queryset_generico()
+
+    def count(self):
+        if self._total is None:
+            if not _PALABRA.search(self.texto or ''):
+                self._total = 0
+            elif usa_fts5():
+                desde, parametros = self._sql_fts5()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) {desde}', parametros)
+                    self._total = cursor.fetchone()[0]
+            else:
+                self._total = self._queryset_orm().count()
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            return self[indice:indice + 1][0]
+        inicio = indice.start or 0
+        fin = indice.stop if indice.stop is not None else self.count()
+        if fin <= inicio or not _PALABRA.search(self.texto or ''):
+            return []
+
+        if not usa_fts5():
+            return list(self._queryset_orm().select_related('proyecto')[inicio:fin])
+
+        from .models import RegistroHora
+
+        desde, parametros = self._sql_fts5()
+        # bm25() es negativo: más bajo = más relevante
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT r.id, -bm25({TABLA_FTS}) AS rank {desde} '
+                f'ORDER BY bm25({TABLA_FTS}), r.fecha DESC LIMIT %s OFFSET %s',
+                parametros + [fin - inicio, inicio]
+            )
+            filas = cursor.fetchall()
+
+        ranking = dict(filas)
+        registros = RegistroHora.objects.filter(pk__in=ranking).select_related('proyecto')
+        por_id = {registro.pk: registro for registro in registros}
+        resultado = []
+        for registro_id, rank in filas:
+            registro = por_id.get(registro_id)
+            if registro is not None:
+                registro.rank = rank
+                resultado.append(registro)
+        return resultado
+
+
+def buscar_registros(usuario, texto, fecha_desde=None, fecha_hasta=None, proyecto_id=None):
+    """Punto de entrada de la búsqueda; ver `ResultadosBusqueda`"""
+    return ResultadosBusqueda(usuario, texto, fecha_desde, fecha_hasta, proyecto_id)
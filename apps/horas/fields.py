@@ -3,8 +3,8 @@ Campo personalizado simplificado para horas que funciona con Django
 """
 from django import forms
 from django.core.exceptions import ValidationError
-import re
-from decimal import Decimal, InvalidOperation
+
+from .parseo import INCREMENTO_DEFECTO, obtener_parser
 
 
 class HoursInput(forms.TextInput):
@@ -26,7 +26,7 @@ class HoursField(forms.DecimalField):
     
     widget = HoursInput
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, incremento=INCREMENTO_DEFECTO, **kwargs):
         kwargs.setdefault('max_digits', 4)
         kwargs.setdefault('decimal_places', 2)
         kwargs.setdefault('min_value', 0.5)
@@ -35,79 +35,29 @@ class HoursField(forms.DecimalField):
             'Ingrese horas en formato decimal (1.5) o tiempo (01:30). Incrementos de 30 minutos'
         )
         super().__init__(*args, **kwargs)
+        self.parser = obtener_parser(incremento)
     
     def to_python(self, value):
-        """Convierte el valor de entrada a decimal"""
-        if not value:
+        """Convierte el valor de entrada (decimal o HH:MM) a Decimal"""
+        if value in self.empty_values:
             return None
-        
-        value = str(value).strip()
-        
-        # Si es formato HH:MM, convertir a decimal
-        if self._is_time_format(value):
-            decimal_value = self._time_to_decimal(value)
-            return super().to_python(decimal_value)
-        
-        # Si es formato decimal, usar validación normal
-        return super().to_python(value)
+        return self.parser.parse(value)
     
     def validate(self, value):
         """Validaciones adicionales para horas"""
         super().validate(value)
         
-        if value is not None:
-            # Validar que sea múltiplo de 0.5
-            if (float(value) * 2) % 1 != 0:
-                raise ValidationError('Las horas deben ser múltiplos de 0.5 (30 minutos)')
-    
-    def _is_time_format(self, value):
-        """Verifica si el valor está en formato HH:MM"""
-        time_pattern = r'^\d{1,2}:\d{2}$'
-        return re.match(time_pattern, value) is not None
-    
-    def _time_to_decimal(self, time_str):
-        """Convierte formato HH:MM a decimal"""
-        try:
-            hours, minutes = map(int, time_str.split(':'))
-            
-            # Validar rangos
-            if hours < 0 or hours > 23:
-                raise ValidationError('Las horas deben estar entre 0 y 23')
-            
-            if minutes < 0 or minutes > 59:
-                raise ValidationError('Los minutos deben estar entre 0 y 59')
-            
-            # Convertir a decimal
-            decimal_hours = hours + (minutes / 60.0)
-            
-            # Redondear a incrementos de 0.5 (30 minutos)
-            return round(decimal_hours * 2) / 2
-            
-        except ValueError:
-            raise ValidationError('Formato de tiempo inválido')
+        if value is not None and value % self.parser.incremento:
+            raise ValidationError(
+                f'Las horas deben ser múltiplos de {self.parser.incremento} '
+                f'({int(self.parser.incremento * 60)} minutos)'
+            )
 
 
-def convert_hours_input(value):
-    """Función utilitaria para convertir entrada de horas"""
-    if not value:
-        return None
-    
-    value = str(value).strip()
-    
-    # Si es formato HH:MM
-    if re.match(r'^\d{1,2}:\d{2}$', value):
-        try:
-            hours, minutes = map(int, value.split(':'))
-            if 0 <= hours <= 23 and 0 <= minutes <= 59:
-                decimal_hours = hours + (minutes / 60.0)
-                return round(decimal_hours * 2) / 2
-        except ValueError:
-            pass
-    
-    # Si es formato decimal
+def convert_hours_input(value, incremento=INCREMENTO_DEFECTO):
+    """Función utilitaria para convertir entrada de horas a float; None si no es válida"""
     try:
-        return float(value)
-    except ValueError:
-        pass
-    
-    return None
+        horas = obtener_parser(incremento).parse(value)
+    except ValidationError:
+        return None
+    return None if horas is None else float(horas)
@@ -1,5 +1,7 @@
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.urls import reverse
 from django.utils import timezone
 from django.db import models
 from datetime import date, timedelta
@@ -9,11 +11,19 @@ from .models import RegistroHora
 from .fields import HoursField, HoursInput, convert_hours_input
 from apps.proyectos.models import Proyecto
 from apps.core.models import Periodo
+from apps.core.configuracion_usuario import configuracion_vigente, obtener_configuracion
 
 
 class ProyectoSelect2Widget(Select2Widget):
-    """Widget Select2 para proyectos con búsqueda"""
-    
+    """
+    Widget Select2 para proyectos con búsqueda AJAX.
+
+    Solo se renderiza la opción seleccionada; el resto se consulta a
+    `api_proyectos_buscar` mientras el usuario escribe. El queryset del
+    campo se sigue usando para validar el valor enviado.
+    """
+    data_view = 'api_proyectos_buscar'
+
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)
         attrs = kwargs.get('attrs', {})
@@ -25,6 +35,32 @@ class ProyectoSelect2Widget(Select2Widget):
         kwargs['attrs'] = attrs
         super().__init__(*args, **kwargs)
 
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.update({
+            'data-ajax--url': reverse(self.data_view),
+            'data-ajax--cache': 'true',
+            'data-ajax--delay': '250',
+            'data-minimum-input-length': '0',
+        })
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Limita las opciones a las seleccionadas (una consulta por pk)"""
+        seleccionados = {str(v) for v in value if v not in (None, '')}
+        opciones = []
+        if not self.allow_multiple_selected:
+            # Opción vacía para el placeholder de Select2
+            opciones.append(self.create_option(name, '', '', not seleccionados, 0))
+
+        queryset = getattr(self.choices, 'queryset', None)
+        if seleccionados and queryset is not None:
+            for indice, objeto in enumerate(queryset.filter(pk__in=seleccionados), start=1):
+                opciones.append(self.create_option(
+                    name, str(objeto.pk), str(objeto), True, indice
+                ))
+        return [(None, opciones, 0)]
+
 
 class RegistroHoraForm(forms.ModelForm):
     """Formulario para registro de horas con widgets apropiados"""
@@ -162,17 +198,8 @@ class RegistroHoraForm(forms.ModelForm):
                     total=models.Sum('horas')
                 )['total'] or 0
                 
-                # Obtener límite de horas del período activo o perfil
-                periodo_activo = Periodo.objects.filter(
-                    usuario=self.user,
-                    activo=True
-                ).first()
-                
-                horas_max = 8  # Default
-                if periodo_activo:
-                    horas_max = periodo_activo.horas_max_dia
-                elif hasattr(self.user, 'profile'):
-                    horas_max = self.user.profile.horas_max_dia
+                # Límite de horas del período activo o del perfil (leído de la base)
+                horas_max = configuracion_vigente(self.user).limite_diario
                 
                 # Convertir horas a Decimal para la comparación
                 horas_decimal = Decimal(str(horas))
@@ -403,15 +430,10 @@ class RegistroHoraBloqueForm(forms.Form):
             ).order_by('nombre')
             
             # Configurar parámetros de horas según el perfil del usuario
-            profile = getattr(self.user, 'profile', None)
-            if profile:
-                incremento = float(profile.incremento_horas)
-                minimo = float(profile.horas_minimas)
-                maximo = float(profile.horas_maximas)
-            else:
-                incremento = 0.5
-                minimo = 0.5
-                maximo = 12.0
+            configuracion = obtener_configuracion(self.user)
+            incremento = float(configuracion.incremento_horas)
+            minimo = float(configuracion.horas_minimas)
+            maximo = float(configuracion.horas_maximas)
             
             # Actualizar campo de horas con configuración del usuario
             self.fields['horas'].min_value = minimo
@@ -424,10 +446,9 @@ class RegistroHoraBloqueForm(forms.Form):
             })
             self.fields['horas'].help_text = f'Horas que se registrarán en cada fecha seleccionada (múltiplos de {incremento})'
             
-            # Obtener período activo para limitar fechas
-            try:
-                periodo_activo = Periodo.objects.get(usuario=self.user, activo=True)
-                # Configurar límites de fecha según el período activo
+            # Limitar fechas al período activo
+            periodo_activo = configuracion.periodo_activo
+            if periodo_activo:
                 self.fields['fecha_inicio'].widget.attrs.update({
                     'min': periodo_activo.fecha_inicio.isoformat(),
                     'max': periodo_activo.fecha_fin.isoformat()
@@ -436,18 +457,16 @@ class RegistroHoraBloqueForm(forms.Form):
                     'min': periodo_activo.fecha_inicio.isoformat(),
                     'max': periodo_activo.fecha_fin.isoformat()
                 })
-            except Periodo.DoesNotExist:
-                pass
     
     def clean(self):
         cleaned_data = super().clean()
         patron = cleaned_data.get('patron_repeticion')
         
-        # Validar que existe período activo
+        # Validar que existe período activo (leído de la base, no del cache)
         if self.user:
-            try:
-                periodo_activo = Periodo.objects.get(usuario=self.user, activo=True)
-            except Periodo.DoesNotExist:
+            self._configuracion_vigente = configuracion_vigente(self.user)
+            periodo_activo = self._configuracion_vigente.periodo_activo
+            if periodo_activo is None:
                 raise ValidationError('No hay un período activo configurado.')
         
         if patron == 'manual':
@@ -557,10 +576,8 @@ class RegistroHoraBloqueForm(forms.Form):
         periodo_activo = None
         
         if self.user:
-            try:
-                periodo_activo = Periodo.objects.get(usuario=self.user, activo=True)
-            except Periodo.DoesNotExist:
-                pass
+            configuracion = getattr(self, '_configuracion_vigente', None) or configuracion_vigente(self.user)
+            periodo_activo = configuracion.periodo_activo
         
         if self.cleaned_data.get('omitir_feriados') and self.user:
             feriados = set(
@@ -606,3 +623,66 @@ class VistaCompletaDiaForm(forms.Form):
         # Establecer fecha actual por defecto
         if not self.is_bound:
             self.fields['fecha'].initial = timezone.now().date()
+
+
+class HoraImportForm(forms.Form):
+    """Formulario para importar registros de horas desde CSV o Excel"""
+    
+    archivo = forms.FileField(
+        widget=forms.FileInput(
+            attrs={
+                'class': 'form-control',
+                'accept': '.csv,.xlsx'
+            }
+        ),
+        label='Archivo',
+        help_text='Archivo CSV o Excel (.xlsx) con una fila de encabezados'
+    )
+    
+    simular = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(
+            attrs={
+                'class': 'form-check-input'
+            }
+        ),
+        label='Solo previsualizar',
+        help_text='Valida el archivo y muestra el resultado sin guardar registros'
+    )
+    
+    # Mapeo opcional de columnas: encabezado del archivo para cada campo
+    columna_fecha = forms.CharField(required=False, label='Columna de fecha')
+    columna_proyecto = forms.CharField(required=False, label='Columna de proyecto')
+    columna_horas = forms.CharField(required=False, label='Columna de horas')
+    columna_descripcion = forms.CharField(required=False, label='Columna de descripción')
+    columna_tipo_tarea = forms.CharField(required=False, label='Columna de tipo de tarea')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for nombre, campo in self.fields.items():
+            if nombre.startswith('columna_'):
+                campo.widget.attrs.update({'class': 'form-control form-control-sm', 'placeholder': 'Automático'})
+    
+    def clean_archivo(self):
+        archivo = self.cleaned_data.get('archivo')
+        
+        if not archivo:
+            raise ValidationError("Debe seleccionar un archivo")
+        
+        if not archivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError("El archivo debe tener extensión .csv o .xlsx")
+        
+        max_mb = getattr(settings, 'HORAS_IMPORTACION_MAX_MB', 20)
+        if archivo.size > max_mb * 1024 * 1024:
+            raise ValidationError(f"El archivo no puede ser mayor a {max_mb}MB")
+        
+        return archivo
+    
+    def get_mapeo(self):
+        """Campos internos con el encabezado indicado por el usuario"""
+        return {
+            nombre[len('columna_'):]: valor
+            for nombre, valor in self.cleaned_data.items()
+            if nombre.startswith('columna_') and valor
+        }
@@ -0,0 +1,300 @@
+"""
+Importación masiva de registros de horas desde CSV o XLSX.
+
+Todo lo necesario para validar se precarga con pocas consultas: proyectos
+por nombre, períodos del usuario, calendario laboral, horas ya registradas
+por día y la configuración del usuario (incremento y rango de horas, fines
+de semana y feriados), así cada fila se valida con las mismas reglas que el
+formulario. La validación es en memoria contra esos datos (acumulando las
+horas aceptadas en el total diario) y los registros válidos se insertan con
+`bulk_create` por lotes dentro de una única transacción. Las filas cuya
+fecha no cae en ningún período del usuario se rechazan.
+
+Con `simular=True` se valida todo sin escribir, para previsualizar.
+"""
+import csv
+import io
+from bisect import bisect_right
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.core.configuracion_usuario import configuracion_vigente
+from apps.core.laborables import CalendarioLaboral
+from apps.core.models import Periodo
+from apps.proyectos.models import Proyecto
+from .models import RegistroHora
+from .parseo import obtener_parser
+from .signals import registros_creados_en_lote
+
+
+TAMAÑO_LOTE = getattr(settings, 'HORAS_IMPORTACION_LOTE', 1000)
+MUESTRA_PREVISUALIZACION = 50
+MAX_ERRORES_DETALLE = 1000
+
+# Campo interno -> encabezados reconocidos si no se indica un mapeo
+ALIAS_COLUMNAS = {
+    'fecha': ('fecha', 'date', 'dia', 'día'),
+    'proyecto': ('proyecto', 'project'),
+    'horas': ('horas', 'hours', 'duracion', 'duración'),
+    'descripcion': ('descripcion', 'descripción', 'detalle'),
+    'tipo_tarea': ('tipo_tarea', 'tipo', 'tipo de tarea'),
+}
+COLUMNAS_OBLIGATORIAS = ('fecha', 'proyecto', 'horas')
+TIPOS_TAREA = {
+    'tarea': 'tarea',
+    'reunion': 'reunion',
+    'reunión': 'reunion',
+}
+FORMATOS_FECHA = ('%d/%m/%Y', '%d-%m-%Y')
+
+
+class ResultadoImportacion:
+    """Totales de la importación, errores por fila y una muestra de filas válidas"""
+
+    def __init__(self, simulacion=False):
+        self.simulacion = simulacion
+        self.validos = 0
+        self.errores = 0
+        self.total_horas = Decimal('0')
+        self.detalle_errores = []
+        self.muestra = []
+
+    @property
+    def importados(self):
+        return 0 if self.simulacion else self.validos
+
+    @property
+    def procesadas(self):
+        return self.validos + self.errores
+
+    def registrar_error(self, fila, mensaje):
+        self.errores += 1
+        if len(self.detalle_errores) < MAX_ERRORES_DETALLE:
+            self.detalle_errores.append({'fila': fila, 'mensaje': mensaje})
+
+    def registrar_valido(self, fila, registro, proyecto):
+        self.validos += 1
+        self.total_horas += registro.horas
+        if len(self.muestra) < MUESTRA_PREVISUALIZACION:
+            self.muestra.append({
+                'fila': fila,
+                'fecha': registro.fecha,
+                'proyecto': proyecto,
+                'horas': registro.horas,
+                'tipo_tarea': registro.tipo_tarea,
+                'descripcion': registro.descripcion,
+            })
+
+
+def _resolver_columnas(encabezados, mapeo):
+    """Índice de cada campo interno dentro de la fila según el mapeo o los alias"""
+    normalizados = [str(encabezado or '').strip().lower() for encabezado in encabezados]
+    indices = {}
+    for campo, alias in ALIAS_COLUMNAS.items():
+        buscados = (mapeo[campo].strip().lower(),) if mapeo and mapeo.get(campo) else alias
+        for nombre in buscados:
+            if nombre in normalizados:
+                indices[campo] = normalizados.index(nombre)
+                break
+    faltantes = [campo for campo in COLUMNAS_OBLIGATORIAS if campo not in indices]
+    if faltantes:
+        raise ValidationError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+    return indices
+
+
+def _filas_csv(archivo):
+    muestra = archivo.read(4096)
+    archivo.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra.decode('utf-8-sig', errors='ignore'), delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(texto, dialect=dialecto)
+    finally:
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    import openpyxl
+
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, mapeo=None):
+    """Itera `(número_de_fila, dict)` con las columnas ya mapeadas a campos internos"""
+    filas = _filas_xlsx(archivo) if archivo.name.lower().endswith('.xlsx') else _filas_csv(archivo)
+    try:
+        encabezados = next(filas, None)
+        if not encabezados:
+            raise ValidationError("El archivo está vacío")
+        indices = _resolver_columnas(encabezados, mapeo)
+
+        for numero, fila in enumerate(filas, start=2):
+            if not any(valor not in (None, '') for valor in fila):
+                continue
+            yield numero, {
+                campo: fila[indice] if indice < len(fila) else None
+                for campo, indice in indices.items()
+            }
+    finally:
+        filas.close()
+
+
+def _parsear_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()
+    if not texto:
+        raise ValidationError("La fecha es obligatoria")
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        pass
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValidationError(f"Fecha inválida '{texto}' (use AAAA-MM-DD o DD/MM/AAAA)")
+
+
+def _parsear_horas(valor, parser):
+    # Excel entrega las celdas con formato de hora como `time`
+    if isinstance(valor, time):
+        valor = f'{valor.hour}:{valor.minute:02d}'
+    horas = parser.parse(valor)
+    if horas is None:
+        raise ValidationError("Las horas son obligatorias")
+    parser.validar(horas)
+    return horas
+
+
+class _Contexto:
+    """Datos precargados del usuario para validar las filas sin consultas"""
+
+    def __init__(self, usuario):
+        self.proyectos = {
+            nombre.casefold(): pk
+            for pk, nombre in Proyecto.objects.filter(usuario=usuario, activo=True).values_list('id', 'nombre')
+        }
+        self.periodos = list(
+            Periodo.objects.filter(usuario=usuario)
+            .order_by('fecha_inicio')
+            .values_list('fecha_inicio', 'fecha_fin', 'id', 'horas_max_dia', 'activo')
+        )
+        self.inicios = [periodo[0] for periodo in self.periodos]
+        self.calendario = CalendarioLaboral.para_usuario(usuario.pk)
+        self.totales_dia = dict(
+            RegistroHora.objects.filter(usuario=usuario)
+            .values_list('fecha')
+            .annotate(total=Sum('horas'))
+            .order_by()
+        )
+        # Leída de la base, como en las validaciones del formulario
+        self.configuracion = configuracion_vigente(usuario)
+        self.parser = obtener_parser(
+            self.configuracion.incremento_horas, self.configuracion.horas_minimas, self.configuracion.horas_maximas
+        )
+
+    def periodo_para(self, fecha):
+        """Período que contiene la fecha (el más reciente si se superponen) o None"""
+        indice = bisect_right(self.inicios, fecha)
+        while indice > 0:
+            indice -= 1
+            periodo = self.periodos[indice]
+            if periodo[1] >= fecha:
+                return periodo
+        return None
+
+
+def _validar_fila(fila, contexto, usuario, hoy):
+    fecha = _parsear_fecha(fila['fecha'])
+    if fecha > hoy:
+        raise ValidationError("No se pueden registrar horas en fechas futuras")
+    configuracion = contexto.configuracion
+    if fecha.weekday() >= 5 and not configuracion.permitir_fines_semana:
+        raise ValidationError("No se pueden registrar horas en fines de semana")
+    if configuracion.validar_feriados and contexto.calendario.es_feriado(fecha):
+        raise ValidationError("No se pueden registrar horas en días feriados")
+
+    nombre_proyecto = str(fila['proyecto'] or '').strip()
+    proyecto_id = contexto.proyectos.get(nombre_proyecto.casefold())
+    if proyecto_id is None:
+        raise ValidationError(f"Proyecto '{nombre_proyecto}' inexistente o inactivo")
+
+    horas = _parsear_horas(fila['horas'], contexto.parser)
+
+    tipo = str(fila.get('tipo_tarea') or '').strip().lower() or 'tarea'
+    if tipo not in TIPOS_TAREA:
+        raise ValidationError(f"Tipo de tarea inválido '{tipo}'")
+
+    # Sin período que la contenga se rechaza: asignarla a otro rompería sus
+    # resúmenes y el burndown
+    periodo = contexto.periodo_para(fecha)
+    if periodo is None:
+        raise ValidationError(f"Ningún período contiene la fecha {fecha:%d/%m/%Y}")
+
+    horas_max = Decimal(str(periodo[3])) if periodo[3] else configuracion.horas_max_dia_perfil
+    total_dia = contexto.totales_dia.get(fecha, Decimal('0'))
+    if total_dia + horas > horas_max:
+        raise ValidationError(
+            f"Excede el máximo de {horas_max} horas por día. Ya hay {total_dia}h registradas."
+        )
+    contexto.totales_dia[fecha] = total_dia + horas
+
+    registro = RegistroHora(
+        fecha=fecha,
+        proyecto_id=proyecto_id,
+        horas=horas,
+        descripcion=str(fila.get('descripcion') or '').strip(),
+        tipo_tarea=TIPOS_TAREA[tipo],
+        periodo_id=periodo[2],
+        usuario=usuario,
+    )
+    return registro, nombre_proyecto
+
+
+def _guardar_lote(usuario, lote):
+    creados = RegistroHora.objects.bulk_create(lote, batch_size=len(lote))
+    registros_creados_en_lote.send(sender=RegistroHora, usuario=usuario, registros=creados)
+
+
+def importar_horas(usuario, archivo, mapeo=None, simular=False, tamaño_lote=TAMAÑO_LOTE):
+    """Valida e importa las filas del archivo; retorna un `ResultadoImportacion`"""
+    resultado = ResultadoImportacion(simulacion=simular)
+    contexto = _Contexto(usuario)
+    hoy = date.today()
+
+    with transaction.atomic():
+        lote = []
+        for numero, fila in leer_filas(archivo, mapeo):
+            try:
+                registro, nombre_proyecto = _validar_fila(fila, contexto, usuario, hoy)
+            except ValidationError as error:
+                resultado.registrar_error(numero, ' '.join(error.messages))
+                continue
+            resultado.registrar_valido(numero, registro, nombre_proyecto)
+            if simular:
+                continue
+            lote.append(registro)
+            if len(lote) >= tamaño_lote:
+                _guardar_lote(usuario, lote)
+                lote = []
+        if lote:
+            _guardar_lote(usuario, lote)
+
+    return resultado
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Periodo
+from apps.horas.archivo import archivar_periodo, periodos_archivables, restaurar_periodo
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a la tabla de archivo los registros de horas de períodos cerrados '
+        '(inactivos y terminados hace más de ARCHIVO_ANTIGUEDAD_DIAS)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', type=int, action='append', help='Id de un período inactivo a procesar')
+        parser.add_argument('--lote', type=int, help='Registros por lote (por defecto ARCHIVO_TAMANO_LOTE)')
+        parser.add_argument('--restaurar', action='store_true', help='Devuelve los registros a la tabla activa')
+        parser.add_argument('--dry-run', action='store_true', help='Solo lista los períodos que se procesarían')
+
+    def handle(self, *args, **options):
+        if options['periodo']:
+            periodos = Periodo.objects.filter(pk__in=options['periodo'])
+            if not options['restaurar'] and periodos.filter(activo=True).exists():
+                raise CommandError('No se puede archivar el período activo')
+        elif options['restaurar']:
+            raise CommandError('--restaurar requiere --periodo')
+        else:
+            periodos = periodos_archivables()
+
+        lote = options['lote'] or settings.ARCHIVO_TAMANO_LOTE
+        accion = restaurar_periodo if options['restaurar'] else archivar_periodo
+        total = 0
+        for periodo in periodos.select_related('usuario'):
+            if options['dry_run']:
+                self.stdout.write(f'   {periodo} ({periodo.usuario.username})')
+                continue
+            movidos = accion(periodo, lote)
+            total += movidos
+            self.stdout.write(f'   {periodo} ({periodo.usuario.username}): {movidos} registro(s)')
+
+        if not options['dry_run']:
+            verbo = 'restaurados' if options['restaurar'] else 'archivados'
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} registro(s) {verbo}'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.horas import busqueda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de texto completo de las descripciones de horas'
+
+    def handle(self, *args, **options):
+        if busqueda.usa_tsvector():
+            self.stdout.write('PostgreSQL mantiene el índice GIN automáticamente; ejecutando REINDEX...')
+            with connection.cursor() as cursor:
+                cursor.execute(f'REINDEX INDEX {busqueda.NOMBRE_INDICE_GIN}')
+            self.stdout.write(self.style.SUCCESS('Índice reconstruido'))
+            return
+
+        if not busqueda.usa_fts5():
+            self.stdout.write(self.style.WARNING(
+                f'El motor {connection.vendor} no tiene índice de texto completo; nada que hacer'
+            ))
+            return
+
+        with transaction.atomic():
+            total = busqueda.reconstruir_indice()
+
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido: {total} registros indexados'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Periodo
+from apps.horas.resumenes import construir_resumen, verificar_resumen
+
+
+class Command(BaseCommand):
+    help = 'Verifica (por defecto) o reconstruye los resúmenes precalculados de los períodos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', type=int, action='append', help='Id de un período a procesar')
+        parser.add_argument('--reconstruir', action='store_true', help='Reconstruye todos los resúmenes')
+        parser.add_argument('--reparar', action='store_true', help='Reconstruye solo los que no coinciden')
+
+    def handle(self, *args, **options):
+        periodos = Periodo.objects.order_by('pk')
+        if options['periodo']:
+            periodos = periodos.filter(pk__in=options['periodo'])
+
+        if options['reconstruir']:
+            total = 0
+            for periodo_id in periodos.values_list('pk', flat=True):
+                construir_resumen(periodo_id)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} resumen(es) reconstruido(s)'))
+            return
+
+        pendientes = 0
+        for periodo in periodos:
+            diferencias = verificar_resumen(periodo.pk)
+            if not diferencias:
+                continue
+            self.stdout.write(f'   {periodo}: {"; ".join(diferencias)}')
+            if options['reparar']:
+                construir_resumen(periodo.pk)
+            else:
+                pendientes += 1
+
+        if pendientes:
+            raise CommandError(f'{pendientes} resumen(es) no coinciden; use --reparar para reconstruirlos')
+        self.stdout.write(self.style.SUCCESS('✅ Resúmenes verificados'))
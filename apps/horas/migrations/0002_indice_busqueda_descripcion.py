@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    from apps.horas.busqueda import crear_indice, reconstruir_indice
+    crear_indice(schema_editor)
+    if schema_editor.connection.vendor == 'sqlite':
+        reconstruir_indice()
+
+
+def eliminar_indice(apps, schema_editor):
+    from apps.horas.busqueda import eliminar_indice
+    eliminar_indice(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
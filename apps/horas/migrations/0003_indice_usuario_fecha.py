@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horas', '0002_indice_busqueda_descripcion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrohora',
+            index=models.Index(fields=['usuario', 'fecha'], name='horas_regis_usuario_ac558b_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horas', '0003_indice_usuario_fecha'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='registrohora',
+            name='horas_regis_fecha_c2fb57_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='registrohora',
+            name='horas_regis_usuario_ac558b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='registrohora',
+            index=models.Index(fields=['usuario', 'fecha'], include=('horas',), name='horas_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrohora',
+            index=models.Index(fields=['usuario', 'periodo', 'fecha'], include=('horas',), name='horas_usuario_periodo_idx'),
+        ),
+    ]
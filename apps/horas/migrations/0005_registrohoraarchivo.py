@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_indices_consultas'),
+        ('proyectos', '0003_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('horas', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroHoraArchivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('horas', models.DecimalField(decimal_places=1, max_digits=4)),
+                ('descripcion', models.TextField(blank=True)),
+                ('tipo_tarea', models.CharField(choices=[('tarea', 'Tarea'), ('reunion', 'Reunión')], default='tarea', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archivado_at', models.DateTimeField(auto_now_add=True)),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_archivados', to='core.periodo')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_archivados', to='proyectos.proyecto')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registros_archivados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Registro de Hora Archivado',
+                'verbose_name_plural': 'Registros de Horas Archivados',
+                'ordering': ['-fecha', '-created_at'],
+                'indexes': [models.Index(fields=['usuario', 'fecha'], name='archivo_usuario_fecha_idx'), models.Index(fields=['periodo', 'fecha'], name='archivo_periodo_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0003_indices_consultas'),
+        ('core', '0005_indices_consultas'),
+        ('horas', '0005_registrohoraarchivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPeriodoTipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_tarea', models.CharField(choices=[('tarea', 'Tarea'), ('reunion', 'Reunión')], max_length=10)),
+                ('total_horas', models.DecimalField(decimal_places=1, default=0, max_digits=8)),
+                ('registros', models.IntegerField(default=0)),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_tipos', to='core.periodo')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenPeriodoProyecto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_horas', models.DecimalField(decimal_places=1, default=0, max_digits=8)),
+                ('registros', models.IntegerField(default=0)),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_proyectos', to='core.periodo')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_periodos', to='proyectos.proyecto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenPeriodoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('total_horas', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('registros', models.IntegerField(default=0)),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_dias', to='core.periodo')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_horas', models.DecimalField(decimal_places=1, default=0, max_digits=8)),
+                ('registros', models.IntegerField(default=0)),
+                ('dias_trabajados', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('periodo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='core.periodo')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Período',
+                'verbose_name_plural': 'Resúmenes de Períodos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumenperiodotipo',
+            constraint=models.UniqueConstraint(fields=('periodo', 'tipo_tarea'), name='unique_resumen_periodo_tipo'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenperiodoproyecto',
+            constraint=models.UniqueConstraint(fields=('periodo', 'proyecto'), name='unique_resumen_periodo_proyecto'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenperiododia',
+            constraint=models.UniqueConstraint(fields=('periodo', 'fecha'), name='unique_resumen_periodo_dia'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('horas', '0006_resumen_periodo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrohora',
+            index=models.Index(fields=['fecha', 'usuario', 'proyecto'], include=('horas',), name='horas_equipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrohoraarchivo',
+            index=models.Index(fields=['fecha', 'usuario', 'proyecto'], name='archivo_equipo_idx'),
+        ),
+    ]
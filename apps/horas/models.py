@@ -58,10 +58,17 @@ class RegistroHora(models.Model):
         verbose_name = "Registro de Hora"
         verbose_name_plural = "Registros de Horas"
         ordering = ['-fecha', '-created_at']
+        # Todas las consultas del usuario filtran primero por `usuario`; `horas`
+        # va incluida (solo PostgreSQL) para sumar sin leer la tabla
         indexes = [
-            models.Index(fields=['fecha', 'usuario']),
+            # Lista paginada, totales por día, validación diaria y deduplicación en bloque
+            models.Index(fields=['usuario', 'fecha'], include=['horas'], name='horas_usuario_fecha_idx'),
+            # Dashboard y estadísticas del período del usuario
+            models.Index(fields=['usuario', 'periodo', 'fecha'], include=['horas'], name='horas_usuario_periodo_idx'),
             models.Index(fields=['proyecto', 'fecha']),
             models.Index(fields=['periodo', 'fecha']),
+            # Reportes de equipo: rango de fechas de todos los usuarios
+            models.Index(fields=['fecha', 'usuario', 'proyecto'], include=['horas'], name='horas_equipo_idx'),
         ]
 
     def __str__(self):
@@ -194,6 +201,22 @@ class RegistroHora(models.Model):
             total_registros=models.Count('id')
         ).order_by('tipo_tarea')
 
+    @classmethod
+    def get_serie_temporal(cls, usuario=None, granularidad='mes', fecha_inicio=None,
+                           fecha_fin=None, proyecto=None, periodo=None, densa=True):
+        """Horas por día/semana/mes/trimestre/año; ver `agregaciones.serie_temporal`"""
+        from .agregaciones import serie_temporal
+
+        queryset = cls.objects.all()
+        if usuario:
+            queryset = queryset.filter(usuario=usuario)
+        if proyecto:
+            queryset = queryset.filter(proyecto=proyecto)
+        if periodo:
+            queryset = queryset.filter(periodo=periodo)
+        
+        return serie_temporal(queryset, granularidad, fecha_inicio, fecha_fin, densa=densa)
+
     @classmethod
     def get_horas_por_fecha(cls, usuario, fecha):
         """Obtiene todas las horas de una fecha específica"""
@@ -209,3 +232,112 @@ class RegistroHora(models.Model):
             usuario=usuario,
             fecha=fecha
         ).aggregate(total=models.Sum('horas'))['total'] or Decimal('0')
+
+
+class RegistroHoraArchivo(models.Model):
+    """
+    Registro de horas de un período cerrado, movido fuera de la tabla activa.
+
+    Conserva el id original; lo llena y vacía `apps.horas.archivo`.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    fecha = models.DateField()
+    proyecto = models.ForeignKey(
+        Proyecto,
+        on_delete=models.CASCADE,
+        related_name='registros_archivados'
+    )
+    horas = models.DecimalField(max_digits=4, decimal_places=1)
+    descripcion = models.TextField(blank=True)
+    tipo_tarea = models.CharField(
+        max_length=10,
+        choices=RegistroHora.TIPO_TAREA_CHOICES,
+        default='tarea'
+    )
+    periodo = models.ForeignKey(
+        Periodo,
+        on_delete=models.CASCADE,
+        related_name='registros_archivados'
+    )
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='registros_archivados'
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archivado_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Registro de Hora Archivado"
+        verbose_name_plural = "Registros de Horas Archivados"
+        ordering = ['-fecha', '-created_at']
+        indexes = [
+            models.Index(fields=['usuario', 'fecha'], name='archivo_usuario_fecha_idx'),
+            models.Index(fields=['periodo', 'fecha'], name='archivo_periodo_fecha_idx'),
+            models.Index(fields=['fecha', 'usuario', 'proyecto'], name='archivo_equipo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.proyecto.nombre} - {self.horas}h (archivado)"
+
+
+class ResumenPeriodo(models.Model):
+    """
+    Totales precalculados de un período (incluye los registros archivados).
+
+    Se mantiene de forma incremental desde los signals de RegistroHora
+    (ver `apps.horas.resumenes`) junto con los detalles por proyecto, tipo
+    de tarea y día.
+    """
+    periodo = models.OneToOneField(Periodo, on_delete=models.CASCADE, related_name='resumen')
+    total_horas = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    registros = models.IntegerField(default=0)
+    dias_trabajados = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Período"
+        verbose_name_plural = "Resúmenes de Períodos"
+
+    def __str__(self):
+        return f"{self.periodo.nombre}: {self.total_horas}h en {self.dias_trabajados} días"
+
+
+class ResumenPeriodoProyecto(models.Model):
+    """Horas de un período por proyecto"""
+    periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name='resumen_proyectos')
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='resumen_periodos')
+    total_horas = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    registros = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['periodo', 'proyecto'], name='unique_resumen_periodo_proyecto'),
+        ]
+
+
+class ResumenPeriodoTipo(models.Model):
+    """Horas de un período por tipo de tarea"""
+    periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name='resumen_tipos')
+    tipo_tarea = models.CharField(max_length=10, choices=RegistroHora.TIPO_TAREA_CHOICES)
+    total_horas = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    registros = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['periodo', 'tipo_tarea'], name='unique_resumen_periodo_tipo'),
+        ]
+
+
+class ResumenPeriodoDia(models.Model):
+    """Horas de un período por día; la cantidad de filas son los días trabajados"""
+    periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name='resumen_dias')
+    fecha = models.DateField()
+    total_horas = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    registros = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['periodo', 'fecha'], name='unique_resumen_periodo_dia'),
+        ]
@@ -0,0 +1,189 @@
+"""
+Conversión de entradas de horas (decimal o HH:MM) a Decimal.
+
+Lo comparten `fields.HoursField`, `widgets.HoursField`, `convert_hours_input`
+y la importación masiva. Los patrones se compilan una sola vez y las
+entradas habituales ("1", "1.5", "01:30", ...) se resuelven con una
+búsqueda en un diccionario precalculado que devuelve Decimals compartidos
+(inmutables), sin pasar por float ni crear objetos por llamada.
+
+Las entradas HH:MM se redondean al incremento del usuario (mitades al par,
+como el `round()` que se usaba antes); las decimales se conservan exactas y
+`validar` exige que sean múltiplos del incremento.
+"""
+import re
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from django.core.exceptions import ValidationError
+
+
+INCREMENTO_DEFECTO = Decimal('0.5')
+HORAS_MINIMAS = Decimal('0.5')
+HORAS_MAXIMAS = Decimal('12')
+
+_DECIMAL = re.compile(r'(\d{1,3})(?:[.,](\d{1,4}))?')
+_TIEMPO = re.compile(r'(\d{1,2}):(\d{2})')
+_SESENTA = Decimal(60)
+_CERO = Decimal(0)
+
+MENSAJE_FORMATO = 'Formato de horas inválido. Use formato decimal (1.5) o tiempo (01:30)'
+
+
+def _minutos(horas):
+    return int(horas * _SESENTA)
+
+
+def cuantizar(horas, incremento=INCREMENTO_DEFECTO):
+    """Redondea `horas` al múltiplo más cercano de `incremento` (mitades al par)"""
+    pasos = (horas / incremento).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)
+    return (pasos * incremento).quantize(incremento)
+
+
+class ParserHoras:
+    """Conversor para un incremento y rango dados; reutilizable entre llamadas"""
+
+    def __init__(self, incremento=INCREMENTO_DEFECTO, minimo=HORAS_MINIMAS, maximo=HORAS_MAXIMAS):
+        self.incremento = Decimal(str(incremento))
+        self.minimo = Decimal(str(minimo))
+        self.maximo = Decimal(str(maximo))
+        self._comunes = self._precalcular()
+        # Resultado de la validación de cada valor precalculado
+        self._rango_comunes = {horas: self._error_rango(horas) for horas in set(self._comunes.values())}
+
+    def _precalcular(self):
+        """Formas escritas más frecuentes de cada cuarto de hora entre 0 y 24"""
+        comunes = {}
+        for cuartos in range(0, 24 * 4 + 1):
+            valor = Decimal(cuartos) / 4
+            horas, minutos = divmod(cuartos * 15, 60)
+            exacto = valor.normalize() if valor else _CERO
+            texto = format(exacto, 'f')
+            formas_decimales = {texto, texto.replace('.', ','), f'{valor:.2f}'}
+            if cuartos % 2 == 0:
+                formas_decimales.add(f'{valor:.1f}')
+            if cuartos % 4 == 0:
+                formas_decimales.add(f'{horas:02d}')
+            for forma in formas_decimales:
+                comunes[forma] = exacto
+            if horas < 24:
+                redondeado = cuantizar(valor, self.incremento)
+                comunes[f'{horas}:{minutos:02d}'] = redondeado
+                comunes[f'{horas:02d}:{minutos:02d}'] = redondeado
+        return comunes
+
+    def _convertir(self, valor):
+        """`(horas, error)` sin lanzar excepciones; ver `parse`"""
+        if valor.__class__ is str:
+            # Camino rápido: entradas habituales ya convertidas
+            comun = self._comunes.get(valor)
+            if comun is not None:
+                return comun, None
+            texto = valor.strip()
+        elif valor is None:
+            return None, None
+        elif isinstance(valor, Decimal):
+            return valor, None
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return Decimal(str(valor)), None
+        else:
+            texto = str(valor).strip()
+
+        if not texto:
+            return None, None
+        comun = self._comunes.get(texto)
+        if comun is not None:
+            return comun, None
+
+        coincidencia = _TIEMPO.fullmatch(texto)
+        if coincidencia:
+            horas, minutos = int(coincidencia[1]), int(coincidencia[2])
+            if horas > 23:
+                return None, 'Las horas deben estar entre 0 y 23'
+            if minutos > 59:
+                return None, 'Los minutos deben estar entre 0 y 59'
+            return cuantizar(horas + Decimal(minutos) / _SESENTA, self.incremento), None
+
+        coincidencia = _DECIMAL.fullmatch(texto)
+        if coincidencia:
+            entero, fraccion = coincidencia.groups()
+            return Decimal(f'{entero}.{fraccion}' if fraccion else entero), None
+
+        return None, MENSAJE_FORMATO
+
+    def _error_rango(self, horas):
+        if horas < self.minimo:
+            return f'El mínimo es {self.minimo} horas ({_minutos(self.minimo)} minutos)'
+        if horas > self.maximo:
+            return f'El máximo es {self.maximo} horas por registro'
+        if horas % self.incremento:
+            return f'Las horas deben ser múltiplos de {self.incremento} ({_minutos(self.incremento)} minutos)'
+        return None
+
+    def parse(self, valor):
+        """Convierte la entrada a Decimal; None si está vacía. No valida el rango"""
+        if valor.__class__ is str:
+            comun = self._comunes.get(valor)
+            if comun is not None:
+                return comun
+        horas, error = self._convertir(valor)
+        if error:
+            raise ValidationError(error)
+        return horas
+
+    def validar(self, horas):
+        """Verifica rango y múltiplo del incremento"""
+        error = self._error_rango(horas)
+        if error:
+            raise ValidationError(error)
+
+    def parse_validado(self, valor):
+        horas = self.parse(valor)
+        if horas is not None:
+            self.validar(horas)
+        return horas
+
+    def parse_many(self, valores, validar=True):
+        """
+        Convierte una secuencia de entradas.
+
+        Retorna `(horas, errores)`: la lista de resultados (None en las
+        entradas vacías o inválidas) y un dict `{índice: mensaje}`.
+        """
+        convertir = self._convertir
+        error_rango = self._error_rango
+        rango_comunes = self._rango_comunes
+        resultados = []
+        errores = {}
+        agregar = resultados.append
+        for indice, valor in enumerate(valores):
+            horas, error = convertir(valor)
+            if validar and horas is not None and error is None:
+                error = rango_comunes[horas] if horas in rango_comunes else error_rango(horas)
+            if error:
+                agregar(None)
+                errores[indice] = error
+            else:
+                agregar(horas)
+        return resultados, errores
+
+
+_PARSERS = {}
+
+
+def obtener_parser(incremento=INCREMENTO_DEFECTO, minimo=HORAS_MINIMAS, maximo=HORAS_MAXIMAS):
+    """Parser compartido por incremento y rango (se construye una vez por proceso)"""
+    clave = (incremento, minimo, maximo)
+    parser = _PARSERS.get(clave)
+    if parser is None:
+        normalizada = tuple(Decimal(str(valor)) for valor in clave)
+        parser = _PARSERS.get(normalizada) or ParserHoras(*normalizada)
+        _PARSERS[clave] = _PARSERS[normalizada] = parser
+    return parser
+
+
+def parse_hours(valor, incremento=INCREMENTO_DEFECTO):
+    return obtener_parser(incremento).parse(valor)
+
+
+def parse_many(valores, incremento=INCREMENTO_DEFECTO, validar=True):
+    return obtener_parser(incremento).parse_many(valores, validar=validar)
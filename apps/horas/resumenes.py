@@ -0,0 +1,206 @@
+"""
+Resúmenes precalculados por período.
+
+`ResumenPeriodo` guarda total de horas, registros y días trabajados, con
+detalle por proyecto, tipo de tarea y día. Se actualiza con deltas desde
+los signals de RegistroHora (alta, edición, baja y cargas en lote), así que
+el dashboard y la lista de períodos no recorren los registros de horas.
+
+Solo se mantienen los resúmenes que ya existen: `obtener_resumen` construye
+el de un período la primera vez que se lee. Los registros archivados siguen
+contando (el archivo no modifica resúmenes); `construir_resumen` suma ambas
+tablas y `verificar_resumen` compara lo guardado con un recálculo. Los
+archivados se borran en cascada sin signals: al eliminar un proyecto se
+reconstruyen los resúmenes de los períodos donde tenía horas archivadas
+(borrar un período ya borra su resumen).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import (
+    RegistroHora, RegistroHoraArchivo, ResumenPeriodo, ResumenPeriodoDia,
+    ResumenPeriodoProyecto, ResumenPeriodoTipo,
+)
+
+CAMPOS_REGISTRO = ('periodo_id', 'proyecto_id', 'tipo_tarea', 'fecha', 'horas')
+
+# Modelo de detalle -> campo que lo distingue dentro del período
+DETALLES = (
+    (ResumenPeriodoProyecto, 'proyecto_id'),
+    (ResumenPeriodoTipo, 'tipo_tarea'),
+    (ResumenPeriodoDia, 'fecha'),
+)
+
+
+def datos_registro(registro):
+    """Campos de un registro que afectan a los resúmenes"""
+    return {campo: getattr(registro, campo) for campo in CAMPOS_REGISTRO}
+
+
+class _Acumulado:
+    """Totales agrupados por período y por cada nivel de detalle"""
+
+    def __init__(self):
+        self.periodos = defaultdict(lambda: [Decimal('0'), 0])
+        self.detalles = {modelo: defaultdict(lambda: [Decimal('0'), 0]) for modelo, _ in DETALLES}
+
+    def agregar(self, datos, horas, registros):
+        periodo_id = datos['periodo_id']
+        for destino in [self.periodos[periodo_id]] + [
+            self.detalles[modelo][periodo_id, datos[campo]] for modelo, campo in DETALLES
+        ]:
+            destino[0] += horas
+            destino[1] += registros
+
+
+def _sumar_detalle(modelo, filtro, horas, registros):
+    """
+    Suma al detalle con un UPDATE relativo; si no existe lo crea. Si otra
+    transacción lo creó entre medio, la restricción única lo rechaza y se
+    vuelve a sumar sobre el que ya está.
+    """
+    def actualizar():
+        return modelo.objects.filter(**filtro).update(
+            total_horas=F('total_horas') + horas, registros=F('registros') + registros
+        )
+
+    if actualizar() or registros <= 0:
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**filtro, total_horas=horas, registros=registros)
+    except IntegrityError:
+        actualizar()
+
+
+def aplicar_cambios(cambios):
+    """
+    Aplica a los resúmenes existentes una lista de `(datos, signo)`, donde
+    `datos` viene de `datos_registro` y `signo` es 1 (alta) o -1 (baja).
+    """
+    acumulado = _Acumulado()
+    for datos, signo in cambios:
+        if datos['periodo_id'] and datos['horas'] is not None:
+            acumulado.agregar(datos, Decimal(str(datos['horas'])) * signo, signo)
+
+    existentes = set(
+        ResumenPeriodo.objects.filter(periodo_id__in=list(acumulado.periodos)).values_list('periodo_id', flat=True)
+    )
+    if not existentes:
+        return
+
+    with transaction.atomic():
+        for periodo_id in existentes:
+            horas, registros = acumulado.periodos[periodo_id]
+            ResumenPeriodo.objects.filter(periodo_id=periodo_id).update(
+                total_horas=F('total_horas') + horas, registros=F('registros') + registros
+            )
+
+        for modelo, campo in DETALLES:
+            for (periodo_id, valor), (horas, registros) in acumulado.detalles[modelo].items():
+                if periodo_id not in existentes or (not horas and not registros):
+                    continue
+                _sumar_detalle(modelo, {'periodo_id': periodo_id, campo: valor}, horas, registros)
+            modelo.objects.filter(periodo_id__in=existentes, registros__lte=0).delete()
+
+        for periodo_id in existentes:
+            ResumenPeriodo.objects.filter(periodo_id=periodo_id).update(
+                dias_trabajados=ResumenPeriodoDia.objects.filter(periodo_id=periodo_id).count()
+            )
+
+
+def calcular_resumen(periodo_id):
+    """Recalcula desde los registros activos y archivados (dos consultas agrupadas)"""
+    acumulado = _Acumulado()
+    for modelo in (RegistroHora, RegistroHoraArchivo):
+        filas = (
+            modelo.objects.filter(periodo_id=periodo_id)
+            .values('proyecto_id', 'tipo_tarea', 'fecha')
+            .annotate(total=Sum('horas'), cantidad=Count('id'))
+            .order_by()
+        )
+        for fila in filas:
+            acumulado.agregar({**fila, 'periodo_id': periodo_id}, fila['total'], fila['cantidad'])
+
+    horas, registros = acumulado.periodos.get(periodo_id, (Decimal('0'), 0))
+    return {
+        'total_horas': horas,
+        'registros': registros,
+        'dias_trabajados': len(acumulado.detalles[ResumenPeriodoDia]),
+        'detalles': {
+            modelo: {valor: tuple(totales) for (_, valor), totales in acumulado.detalles[modelo].items()}
+            for modelo, _ in DETALLES
+        },
+    }
+
+
+def construir_resumen(periodo_id):
+    """Reemplaza el resumen del período por uno recalculado"""
+    calculado = calcular_resumen(periodo_id)
+    with transaction.atomic():
+        resumen, _ = ResumenPeriodo.objects.update_or_create(
+            periodo_id=periodo_id,
+            defaults={campo: calculado[campo] for campo in ('total_horas', 'registros', 'dias_trabajados')},
+        )
+        for modelo, campo in DETALLES:
+            modelo.objects.filter(periodo_id=periodo_id).delete()
+            modelo.objects.bulk_create([
+                modelo(periodo_id=periodo_id, total_horas=horas, registros=registros, **{campo: valor})
+                for valor, (horas, registros) in calculado['detalles'][modelo].items()
+            ])
+    return resumen
+
+
+def reconstruir_existentes(periodo_ids):
+    """Reconstruye los resúmenes ya creados de esos períodos"""
+    for periodo_id in ResumenPeriodo.objects.filter(periodo_id__in=list(periodo_ids)).values_list(
+        'periodo_id', flat=True
+    ):
+        construir_resumen(periodo_id)
+
+
+def verificar_resumen(periodo_id):
+    """
+    Diferencias entre el resumen guardado y un recálculo (lista vacía si
+    coinciden o si el período aún no tiene resumen).
+    """
+    resumen = ResumenPeriodo.objects.filter(periodo_id=periodo_id).first()
+    if resumen is None:
+        return []
+    calculado = calcular_resumen(periodo_id)
+
+    diferencias = [
+        f'{campo}: {getattr(resumen, campo)} != {calculado[campo]}'
+        for campo in ('total_horas', 'registros', 'dias_trabajados')
+        if getattr(resumen, campo) != calculado[campo]
+    ]
+    for modelo, campo in DETALLES:
+        guardado = {
+            valor: (horas, registros)
+            for valor, horas, registros in modelo.objects.filter(periodo_id=periodo_id).values_list(
+                campo, 'total_horas', 'registros'
+            )
+        }
+        if guardado != calculado['detalles'][modelo]:
+            diferencias.append(f'{modelo._meta.verbose_name}: detalle por {campo} distinto')
+    return diferencias
+
+
+def obtener_resumen(periodo):
+    """Resumen del período, construyéndolo si todavía no existe"""
+    try:
+        return periodo.resumen
+    except ResumenPeriodo.DoesNotExist:
+        return construir_resumen(periodo.pk)
+
+
+def resumenes_de(periodos):
+    """Asigna `periodo.resumen_horas` a cada período, construyendo los que falten"""
+    periodos = list(periodos)
+    existentes = ResumenPeriodo.objects.in_bulk([periodo.pk for periodo in periodos], field_name='periodo_id')
+    for periodo in periodos:
+        periodo.resumen_horas = existentes.get(periodo.pk) or construir_resumen(periodo.pk)
+    return periodos
@@ -0,0 +1,167 @@
+"""
+Signals de RegistroHora (y del borrado de proyectos, por los resúmenes).
+
+Se registran desde HorasConfig.ready().
+"""
+from django.db.models import Sum
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver, Signal
+
+from apps.core.eventos import publicar
+from apps.core.versionado import incrementar_version
+from apps.proyectos.models import Proyecto
+from .models import RegistroHora, RegistroHoraArchivo
+from . import busqueda, resumenes
+
+
+# `bulk_create` no dispara post_save: las cargas masivas envían esta señal
+# con `usuario` y la lista `registros` ya creados. `restaurados=True` indica
+# que vuelven del archivo (ya están contados en los resúmenes).
+registros_creados_en_lote = Signal()
+
+# Registros movidos al archivo (`apps.horas.archivo`), por lote
+registros_archivados = Signal()
+
+
+@receiver(post_save, sender=RegistroHora)
+def indexar_descripcion(sender, instance, **kwargs):
+    """Mantiene sincronizado el índice de texto completo"""
+    busqueda.indexar_registro(instance)
+
+
+@receiver(post_delete, sender=RegistroHora)
+def desindexar_descripcion(sender, instance, **kwargs):
+    busqueda.desindexar_registro(instance.pk)
+
+
+@receiver(post_save, sender=RegistroHora)
+@receiver(post_delete, sender=RegistroHora)
+def invalidar_derivados(sender, instance, signal, **kwargs):
+    """Invalida los caches que dependen de las horas del período y del usuario"""
+    periodos = {instance.periodo_id}
+    # Registro movido de período: el anterior también cambió
+    previos = getattr(instance, '_datos_resumen_previos', None)
+    if signal is post_save and previos:
+        periodos.add(previos['periodo_id'])
+    for periodo_id in periodos - {None}:
+        incrementar_version('periodo', periodo_id)
+    incrementar_version('usuario', instance.usuario_id)
+
+
+@receiver(registros_creados_en_lote, sender=RegistroHora)
+def procesar_lote(sender, usuario, registros, **kwargs):
+    """Equivalente en lote de los receptores anteriores"""
+    busqueda.indexar_registros(registros)
+    for periodo_id in {registro.periodo_id for registro in registros}:
+        incrementar_version('periodo', periodo_id)
+    incrementar_version('usuario', usuario.pk)
+
+
+@receiver(registros_archivados, sender=RegistroHora)
+def procesar_archivado(sender, usuario, registros, **kwargs):
+    """Los registros archivados salen del índice y de los derivados"""
+    busqueda.desindexar_registros([registro.pk for registro in registros])
+    for periodo_id in {registro.periodo_id for registro in registros}:
+        incrementar_version('periodo', periodo_id)
+    incrementar_version('usuario', usuario.pk)
+
+
+@receiver(pre_save, sender=RegistroHora)
+def recordar_datos_resumen(sender, instance, **kwargs):
+    """Guarda los valores previos a una edición para restarlos del resumen"""
+    instance._datos_resumen_previos = None
+    if instance.pk and not instance._state.adding:
+        instance._datos_resumen_previos = (
+            RegistroHora.objects.filter(pk=instance.pk).values(*resumenes.CAMPOS_REGISTRO).first()
+        )
+
+
+@receiver(post_save, sender=RegistroHora)
+def actualizar_resumen(sender, instance, **kwargs):
+    cambios = [(resumenes.datos_registro(instance), 1)]
+    previos = getattr(instance, '_datos_resumen_previos', None)
+    if previos:
+        cambios.append((previos, -1))
+    resumenes.aplicar_cambios(cambios)
+
+
+@receiver(post_delete, sender=RegistroHora)
+def descontar_resumen(sender, instance, **kwargs):
+    resumenes.aplicar_cambios([(resumenes.datos_registro(instance), -1)])
+
+
+@receiver(pre_delete, sender=Proyecto)
+def recordar_periodos_archivados(sender, instance, **kwargs):
+    """Los archivados se borran en cascada sin signals: se anotan sus períodos"""
+    instance._periodos_archivados = set(
+        RegistroHoraArchivo.objects.filter(proyecto=instance).values_list('periodo_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Proyecto)
+def reconstruir_resumenes_proyecto(sender, instance, **kwargs):
+    periodos = getattr(instance, '_periodos_archivados', None)
+    if periodos:
+        resumenes.reconstruir_existentes(periodos)
+
+
+@receiver(registros_creados_en_lote, sender=RegistroHora)
+def actualizar_resumen_lote(sender, registros, restaurados=False, **kwargs):
+    if not restaurados:
+        resumenes.aplicar_cambios([(resumenes.datos_registro(registro), 1) for registro in registros])
+
+
+# Más días que esto en un lote: el evento pide recargar en lugar de listarlos
+EVENTOS_MAX_DIAS = 62
+
+
+def _totales_dias(usuario_id, periodo_id, fechas):
+    """Total de horas del período por día, para actualizar el calendario"""
+    totales = dict(
+        RegistroHora.objects.filter(usuario_id=usuario_id, periodo_id=periodo_id, fecha__in=fechas)
+        .values('fecha').annotate(total=Sum('horas')).values_list('fecha', 'total')
+    )
+    return {fecha.isoformat(): float(totales.get(fecha, 0)) for fecha in sorted(fechas)}
+
+
+@receiver(post_save, sender=RegistroHora)
+@receiver(post_delete, sender=RegistroHora)
+def publicar_cambio(sender, instance, signal, created=False, **kwargs):
+    """Avisa a las pestañas abiertas del usuario (stream SSE)"""
+    fechas = {instance.fecha}
+    if signal is post_delete:
+        tipo = 'hora_eliminada'
+    else:
+        tipo = 'hora_creada' if created else 'hora_actualizada'
+        # Si cambió la fecha también cambia el total del día anterior
+        previos = getattr(instance, '_datos_resumen_previos', None)
+        if previos and previos['periodo_id'] == instance.periodo_id:
+            fechas.add(previos['fecha'])
+    # Se evalúa al confirmar: el borrado ya habrá puesto pk en None
+    pk, usuario_id, periodo_id = instance.pk, instance.usuario_id, instance.periodo_id
+    publicar(usuario_id, tipo, lambda: {
+        'id': pk,
+        'periodo': periodo_id,
+        'dias': _totales_dias(usuario_id, periodo_id, fechas),
+    })
+
+
+@receiver(registros_creados_en_lote, sender=RegistroHora)
+def publicar_lote(sender, usuario, registros, restaurados=False, **kwargs):
+    if restaurados:
+        # Vienen del archivo con solo id, descripción, período y usuario
+        # (ver `archivo._mover`): sin fechas, se pide recargar el período
+        for periodo_id in {registro.periodo_id for registro in registros}:
+            publicar(usuario.pk, 'horas_actualizadas', {'periodo': periodo_id, 'recargar': True})
+        return
+    fechas_por_periodo = {}
+    for registro in registros:
+        fechas_por_periodo.setdefault(registro.periodo_id, set()).add(registro.fecha)
+    for periodo_id, fechas in fechas_por_periodo.items():
+        if len(fechas) > EVENTOS_MAX_DIAS:
+            publicar(usuario.pk, 'horas_actualizadas', {'periodo': periodo_id, 'recargar': True})
+        else:
+            publicar(usuario.pk, 'horas_actualizadas', lambda periodo_id=periodo_id, fechas=fechas: {
+                'periodo': periodo_id,
+                'dias': _totales_dias(usuario.pk, periodo_id, fechas),
+            })
@@ -1,4 +1,7 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models import Sum
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.exceptions import ValidationError
@@ -82,7 +85,6 @@ class HoraViewsTestCase(TestCase):
         self.assertContains(response, 'Registrar Horas de Trabajo')
         
         # Verificar que las variables de contexto están presentes
-        self.assertIn('proyectos', response.context)
         self.assertIn('incremento_horas', response.context)
         self.assertIn('horas_minimas', response.context)
         self.assertIn('horas_maximas', response.context)
@@ -92,6 +94,15 @@ class HoraViewsTestCase(TestCase):
         self.assertEqual(response.context['limite_diario'], 7.5)  # Del período activo
         self.assertEqual(response.context['incremento_horas'], 0.5)
 
+    def test_hora_create_multiple_sin_lista_proyectos(self):
+        """Los proyectos se buscan por AJAX: la página no los incluye"""
+        response = self.client.get(reverse('horas:hora_create_multiple'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('proyectos', response.context)
+        self.assertNotContains(response, self.proyecto.nombre)
+        self.assertContains(response, reverse('api_proyectos_buscar'))
+
     def test_hora_create_view_with_fecha_param(self):
         """Test GET con parámetro fecha"""
         url = reverse('horas:hora_create') + '?fecha=2025-08-13'
@@ -689,3 +700,835 @@ class HoraPermissionsTest(TestCase):
         data = response.json()
         self.assertEqual(len(data), 1)  # Solo su registro
         self.assertEqual(data[0]['proyecto'], 'User1 Project')
+
+
+class BusquedaHorasTest(TestCase):
+    """Pruebas para la búsqueda de texto completo en descripciones"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Test Periodo',
+            fecha_inicio=date(2025, 8, 1),
+            fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160,
+            activo=True,
+            usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        self.proyecto_b = Proyecto.objects.create(nombre='Proyecto B', usuario=self.user)
+        
+        self.reunion = RegistroHora.objects.create(
+            fecha=date(2025, 8, 4), proyecto=self.proyecto, horas=Decimal('1.0'),
+            descripcion='Reunión de planificación con el cliente',
+            periodo=self.periodo, usuario=self.user
+        )
+        self.migracion = RegistroHora.objects.create(
+            fecha=date(2025, 8, 5), proyecto=self.proyecto_b, horas=Decimal('2.0'),
+            descripcion='Migración de la base de datos de planificación',
+            periodo=self.periodo, usuario=self.user
+        )
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 6), proyecto=self.proyecto, horas=Decimal('2.0'),
+            descripcion='Desarrollo de reportes',
+            periodo=self.periodo, usuario=self.user
+        )
+        
+        periodo_otro = Periodo.objects.create(
+            nombre='Otro', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160, activo=True, usuario=self.otro
+        )
+        proyecto_otro = Proyecto.objects.create(nombre='Ajeno', usuario=self.otro)
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 4), proyecto=proyecto_otro, horas=Decimal('1.0'),
+            descripcion='Planificación ajena', periodo=periodo_otro, usuario=self.otro
+        )
+        
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_busqueda_requiere_q(self):
+        """Prueba que la búsqueda exige el parámetro q"""
+        response = self.client.get('/api/horas/buscar/')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_busqueda_por_prefijo_y_sin_acentos(self):
+        """Prueba que se busca por prefijo, sin acentos y solo en horas propias"""
+        response = self.client.get('/api/horas/buscar/', {'q': 'planificacion'})
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        ids = {r['id'] for r in data['results']}
+        self.assertEqual(ids, {self.reunion.id, self.migracion.id})
+        
+        response = self.client.get('/api/horas/buscar/', {'q': 'migra'})
+        self.assertEqual(response.json()['results'][0]['id'], self.migracion.id)
+    
+    def test_busqueda_filtros_y_paginacion(self):
+        """Prueba los filtros de proyecto y fecha y la paginación"""
+        response = self.client.get('/api/horas/buscar/', {
+            'q': 'planificación', 'proyecto': self.proyecto_b.id
+        })
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.migracion.id])
+        
+        response = self.client.get('/api/horas/buscar/', {
+            'q': 'planificación', 'fecha_fin': '2025-08-04'
+        })
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.reunion.id])
+        
+        response = self.client.get('/api/horas/buscar/', {'q': 'de', 'page_size': 1})
+        data = response.json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+    
+    def test_indice_sincronizado_con_cambios(self):
+        """Prueba que editar o eliminar un registro actualiza el índice"""
+        self.reunion.descripcion = 'Soporte técnico'
+        self.reunion.save()
+        response = self.client.get('/api/horas/buscar/', {'q': 'soporte'})
+        self.assertEqual(response.json()['count'], 1)
+        
+        self.reunion.delete()
+        response = self.client.get('/api/horas/buscar/', {'q': 'soporte'})
+        self.assertEqual(response.json()['count'], 0)
+    
+    def test_reconstruir_indice_command(self):
+        """Prueba el comando de reconstrucción del índice"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        salida = StringIO()
+        call_command('reconstruir_indice_busqueda', stdout=salida)
+        self.assertIn('4 registros indexados', salida.getvalue())
+        
+        response = self.client.get('/api/horas/buscar/', {'q': 'reportes'})
+        self.assertEqual(response.json()['count'], 1)
+
+
+class SerieTemporalTest(TestCase):
+    """Pruebas para la agregación de horas por intervalos de tiempo"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Año', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=1000, usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        for fecha, horas in [(date(2025, 1, 6), '2.0'), (date(2025, 1, 7), '3.0'),
+                             (date(2025, 3, 3), '4.0'), (date(2025, 7, 1), '1.5')]:
+            RegistroHora.objects.create(
+                fecha=fecha, proyecto=self.proyecto, horas=Decimal(horas),
+                periodo=self.periodo, usuario=self.user
+            )
+    
+    def test_serie_mensual_densa(self):
+        """Los meses sin registros aparecen con cero"""
+        serie = RegistroHora.get_serie_temporal(
+            self.user, 'mes', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 4, 30)
+        )
+        self.assertEqual([p['periodo'] for p in serie],
+                         [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1), date(2025, 4, 1)])
+        self.assertEqual([p['total_horas'] for p in serie],
+                         [Decimal('5.0'), Decimal('0'), Decimal('4.0'), Decimal('0')])
+        self.assertEqual(serie[0]['total_registros'], 2)
+    
+    def test_granularidades(self):
+        """Semanas comienzan en lunes; trimestres en el primer mes del trimestre"""
+        semanas = RegistroHora.get_serie_temporal(self.user, 'semana', densa=False)
+        self.assertEqual(semanas[0]['periodo'], date(2025, 1, 6))
+        trimestres = RegistroHora.get_serie_temporal(self.user, 'trimestre')
+        self.assertEqual([p['periodo'] for p in trimestres],
+                         [date(2025, 1, 1), date(2025, 4, 1), date(2025, 7, 1)])
+        self.assertEqual(trimestres[1]['total_horas'], Decimal('0'))
+    
+    def test_horas_por_mes_del_proyecto(self):
+        """get_horas_por_mes devuelve los doce meses del año indicado"""
+        meses = self.proyecto.get_horas_por_mes(2025)
+        self.assertEqual(len(meses), 12)
+        self.assertEqual(meses[0]['mes'], '01')
+        self.assertEqual(meses[6]['total_horas'], Decimal('1.5'))
+    
+    def test_api_serie(self):
+        """La API valida la granularidad y serializa la serie"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/api/horas/serie/', {'granularidad': 'hora'})
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.get('/api/horas/serie/', {
+            'granularidad': 'año', 'proyecto': self.proyecto.pk
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['serie'], [
+            {'periodo': '2025-01-01', 'total_horas': 10.5, 'total_registros': 4}
+        ])
+    
+    def test_rango_excesivo(self):
+        """Una serie densa de más de SERIE_MAX_INTERVALOS intervalos responde 400"""
+        from .agregaciones import RangoExcesivo, cantidad_intervalos
+        self.assertEqual(cantidad_intervalos(date(2025, 1, 1), date(2025, 12, 31), 'dia'), 365)
+        self.assertEqual(cantidad_intervalos(date(2025, 1, 1), date(2025, 12, 31), 'semana'), 53)
+        self.assertEqual(cantidad_intervalos(date(2024, 11, 15), date(2025, 2, 1), 'mes'), 4)
+        self.assertEqual(cantidad_intervalos(date(2025, 1, 1), date(2025, 12, 31), 'trimestre'), 4)
+        with self.assertRaises(RangoExcesivo):
+            RegistroHora.get_serie_temporal(self.user, 'dia', date(1, 1, 1), date(9999, 12, 31))
+        
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/api/horas/serie/', {
+            'granularidad': 'dia', 'fecha_inicio': '0001-01-01', 'fecha_fin': '9999-12-31'
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        
+        response = self.client.get('/api/horas/serie/', {
+            'granularidad': 'año', 'fecha_inicio': '0001-01-01', 'fecha_fin': '2025-12-31'
+        })
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.get('/api/horas/serie/', {
+            'granularidad': 'dia', 'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-12-31'
+        })
+        self.assertEqual(len(response.json()['serie']), 365)
+
+
+class ImportacionHorasTest(TestCase):
+    """Pruebas para la importación masiva de horas desde CSV/XLSX"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Año', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=1000, horas_max_dia=Decimal('8'), usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        DiaFeriado.objects.create(fecha=date(2025, 5, 1), nombre='Día del trabajador', usuario=self.user)
+        RegistroHora.objects.create(
+            fecha=date(2025, 3, 3), proyecto=self.proyecto, horas=Decimal('6.0'),
+            periodo=self.periodo, usuario=self.user
+        )
+        self.client.login(username='testuser', password='testpass123')
+    
+    def _archivo(self, contenido, nombre='horas.csv'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        if isinstance(contenido, str):
+            contenido = contenido.encode('utf-8')
+        return SimpleUploadedFile(nombre, contenido)
+    
+    def test_validaciones_por_fila(self):
+        """Fines de semana, feriados, proyectos, horas y máximo diario"""
+        from .importacion import importar_horas
+        
+        contenido = (
+            'fecha,proyecto,horas,descripcion\n'
+            '2025-03-03,proyecto a,2,Completa el día\n'
+            '2025-03-03,Proyecto A,0:30,Excede el máximo\n'
+            '2025-03-08,Proyecto A,1,Sábado\n'
+            '2025-05-01,Proyecto A,1,Feriado\n'
+            '2025-03-04,Inexistente,1,\n'
+            '2025-03-04,Proyecto A,1.3,\n'
+            '04/03/2025,Proyecto A,01:30,Formato de tiempo\n'
+        )
+        resultado = importar_horas(self.user, self._archivo(contenido))
+        self.assertEqual(resultado.validos, 2)
+        self.assertEqual(resultado.errores, 5)
+        self.assertEqual([e['fila'] for e in resultado.detalle_errores], [3, 4, 5, 6, 7])
+        self.assertEqual(resultado.total_horas, Decimal('3.5'))
+        registro = RegistroHora.objects.get(fecha=date(2025, 3, 4))
+        self.assertEqual(registro.horas, Decimal('1.5'))
+        self.assertEqual(registro.periodo, self.periodo)
+    
+    def test_simulacion_no_guarda(self):
+        """La previsualización valida sin crear registros"""
+        from .importacion import importar_horas
+        
+        resultado = importar_horas(
+            self.user, self._archivo('fecha,proyecto,horas\n2025-03-04,Proyecto A,2\n'), simular=True
+        )
+        self.assertEqual(resultado.validos, 1)
+        self.assertEqual(resultado.importados, 0)
+        self.assertEqual(len(resultado.muestra), 1)
+        self.assertEqual(RegistroHora.objects.count(), 1)
+
+    def test_fecha_fuera_de_periodos(self):
+        """Las fechas sin período que las contenga son errores aunque haya uno activo"""
+        from .importacion import importar_horas
+
+        activo = Periodo.objects.create(
+            nombre='Actual', fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 12, 31),
+            horas_objetivo=1000, usuario=self.user, activo=True
+        )
+        resultado = importar_horas(self.user, self._archivo('fecha,proyecto,horas\n2024-06-03,Proyecto A,2\n'))
+        self.assertEqual((resultado.validos, resultado.errores), (0, 1))
+        self.assertIn('03/06/2024', resultado.detalle_errores[0]['mensaje'])
+        self.assertFalse(RegistroHora.objects.filter(periodo=activo).exists())
+
+    def test_configuracion_del_usuario(self):
+        """Incremento, rango de horas y fines de semana según la configuración del usuario"""
+        from .importacion import importar_horas
+
+        UserProfile.objects.update_or_create(user=self.user, defaults={
+            'incremento_horas': Decimal('0.25'), 'horas_minimas': Decimal('0.25'), 'horas_maximas': Decimal('4'),
+        })
+        ConfiguracionSistema.objects.update_or_create(pk=1, defaults={'permitir_fines_semana': True})
+        contenido = (
+            'fecha,proyecto,horas\n'
+            '2025-03-04,Proyecto A,1.25\n'
+            '2025-03-05,Proyecto A,0:15\n'
+            '2025-03-06,Proyecto A,5\n'
+            '2025-03-08,Proyecto A,1\n'
+        )
+        resultado = importar_horas(self.user, self._archivo(contenido), simular=True)
+        self.assertEqual([e['fila'] for e in resultado.detalle_errores], [4])
+        self.assertEqual([fila['horas'] for fila in resultado.muestra], [Decimal('1.25'), Decimal('0.25'), Decimal('1')])
+
+    def test_mapeo_lotes_e_indice(self):
+        """Mapeo de columnas, inserción en lotes e índice de búsqueda actualizado"""
+        from .busqueda import buscar_registros
+        from .importacion import importar_horas
+        
+        filas = ''.join(f'2025-02-{dia:02d};Proyecto A;2;Soporte nocturno {dia}\n'
+                        for dia in (3, 4, 5, 6, 7, 10, 11))
+        archivo = self._archivo('Día;Cliente Proyecto;Duración;Notas\n' + filas)
+        mapeo = {'proyecto': 'Cliente Proyecto', 'descripcion': 'notas'}
+        resultado = importar_horas(self.user, archivo, mapeo=mapeo, tamaño_lote=3)
+        self.assertEqual(resultado.importados, 7)
+        self.assertEqual(RegistroHora.objects.filter(fecha__month=2).count(), 7)
+        self.assertEqual(buscar_registros(self.user, 'nocturno').count(), 7)
+    
+    def test_xlsx(self):
+        """Lee archivos Excel con celdas de fecha y hora nativas"""
+        import io
+        from datetime import time
+        import openpyxl
+        from .importacion import importar_horas
+        
+        libro = openpyxl.Workbook()
+        hoja = libro.active
+        hoja.append(['Fecha', 'Proyecto', 'Horas', 'Tipo'])
+        hoja.append([datetime(2025, 3, 5), 'Proyecto A', time(2, 30), 'Reunión'])
+        hoja.append([datetime(2025, 3, 6), 'Proyecto A', 4, None])
+        contenido = io.BytesIO()
+        libro.save(contenido)
+        
+        resultado = importar_horas(self.user, self._archivo(contenido.getvalue(), 'horas.xlsx'))
+        self.assertEqual(resultado.importados, 2)
+        reunion = RegistroHora.objects.get(fecha=date(2025, 3, 5))
+        self.assertEqual((reunion.horas, reunion.tipo_tarea), (Decimal('2.5'), 'reunion'))
+    
+    def test_columnas_obligatorias(self):
+        """Sin las columnas obligatorias el archivo se rechaza"""
+        from .importacion import importar_horas
+        
+        with self.assertRaises(ValidationError):
+            importar_horas(self.user, self._archivo('fecha,horas\n2025-03-04,2\n'))
+    
+    def test_vista_importacion(self):
+        """La vista previsualiza y luego importa"""
+        url = reverse('horas:hora_import')
+        contenido = 'fecha,proyecto,horas\n2025-03-04,Proyecto A,2\n'
+        response = self.client.post(url, {'archivo': self._archivo(contenido), 'simular': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['resultado'].simulacion)
+        self.assertEqual(RegistroHora.objects.count(), 1)
+        
+        response = self.client.post(url, {'archivo': self._archivo(contenido)})
+        self.assertEqual(response.context['resultado'].importados, 1)
+        self.assertEqual(RegistroHora.objects.count(), 2)
+
+
+class ParserHorasTest(TestCase):
+    """Pruebas para el conversor compartido de horas"""
+    
+    def test_formatos(self):
+        """Decimal, coma, HH:MM y H:MM se convierten a Decimal"""
+        from .parseo import parse_hours
+        
+        casos = [('1', '1'), ('1.5', '1.5'), ('1,5', '1.5'), ('01:30', '1.5'), ('2:00', '2.0'),
+                 (' 8.0 ', '8'), ('1.3333', '1.3333'), ('10:10', '10.0'), ('7:45', '8.0')]
+        for entrada, esperado in casos:
+            self.assertEqual(parse_hours(entrada), Decimal(esperado), entrada)
+        self.assertIsNone(parse_hours(''))
+        self.assertEqual(parse_hours(Decimal('2.5')), Decimal('2.5'))
+        for invalido in ('abc', '25:00', '01:70', '-1', '1e3'):
+            with self.assertRaises(ValidationError):
+                parse_hours(invalido)
+    
+    def test_incremento_del_usuario(self):
+        """HH:MM se redondea al incremento indicado"""
+        from .parseo import obtener_parser
+        
+        self.assertEqual(obtener_parser(Decimal('0.25')).parse('1:15'), Decimal('1.25'))
+        self.assertEqual(obtener_parser(0.5).parse('1:15'), Decimal('1.0'))
+        self.assertEqual(obtener_parser(1).parse('1:29'), Decimal('1'))
+        self.assertIs(obtener_parser(0.5), obtener_parser(Decimal('0.5')))
+    
+    def test_redondeo_al_par(self):
+        """Las mitades de incremento se redondean al par, como round()"""
+        from .parseo import parse_hours
+
+        for entrada in ('0:15', '0:45', '1:15', '1:45', '2:15', '7:45', '11:15'):
+            horas, minutos = map(int, entrada.split(':'))
+            esperado = round((horas + minutos / 60) * 2) / 2
+            self.assertEqual(parse_hours(entrada), Decimal(str(esperado)), entrada)
+        self.assertEqual(parse_hours('0:15'), Decimal('0'))
+
+    def test_parse_many(self):
+        """Convierte en lote y reporta los errores por índice"""
+        from .parseo import parse_many
+        
+        horas, errores = parse_many(['1.5', '0:10', 'x', '13', '1.3', '', '04:00'])
+        self.assertEqual(horas, [Decimal('1.5'), None, None, None, None, None, Decimal('4.0')])
+        self.assertEqual(sorted(errores), [1, 2, 3, 4])
+        self.assertIn('múltiplos de 0.5', errores[4])
+        
+        horas, errores = parse_many(['1.3', '13'], validar=False)
+        self.assertEqual((horas, errores), ([Decimal('1.3'), Decimal('13')], {}))
+    
+    def test_campos_de_formulario(self):
+        """fields.HoursField, widgets.HoursField y convert_hours_input comparten el parser"""
+        from .fields import HoursField, convert_hours_input
+        from .widgets import HoursField as HoursCharField
+        
+        self.assertEqual(HoursField().clean('01:30'), Decimal('1.5'))
+        self.assertEqual(HoursCharField().clean('2'), Decimal('2'))
+        with self.assertRaises(ValidationError):
+            HoursField().clean('1.3')
+        with self.assertRaises(ValidationError):
+            HoursCharField().clean('0.25')
+        self.assertEqual(convert_hours_input('00:30'), 0.5)
+        self.assertIs(type(convert_hours_input('1.5')), float)
+        self.assertIsNone(convert_hours_input('abc'))
+
+
+@override_settings(FRAGMENTOS_TIMEOUT=0)
+class PaginacionHorasTest(TestCase):
+    """Pruebas para la lista de horas paginada por cursor"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Año', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=1000, horas_max_dia=Decimal('8'), usuario=self.user
+        )
+        self.proyectos = [
+            Proyecto.objects.create(nombre=nombre, usuario=self.user) for nombre in ('Beta', 'Alfa')
+        ]
+        # 120 registros: varios por día para ejercitar el desempate por pk
+        RegistroHora.objects.bulk_create([
+            RegistroHora(
+                fecha=date(2025, 3, 3) + timedelta(days=i // 3),
+                proyecto=self.proyectos[i % 2],
+                horas=Decimal('0.5') * (i % 5 + 1),
+                periodo=self.periodo,
+                usuario=self.user,
+            )
+            for i in range(120)
+        ])
+        self.client.login(username='testuser', password='testpass123')
+    
+    def _recorrer(self, orden):
+        """Ids de todas las páginas siguiendo los cursores"""
+        ids, parametros = [], {'orden': orden}
+        while True:
+            response = self.client.get(reverse('horas:hora_list'), parametros)
+            pagina = response.context['page_obj']
+            ids.extend(hora.pk for hora in pagina)
+            if not pagina.has_next:
+                return ids, response
+            parametros = {'orden': orden, 'despues': pagina.cursor_siguiente}
+    
+    def test_recorrido_completo_por_orden(self):
+        """Cada orden recorre todos los registros sin repetir ni saltar"""
+        esperados = {
+            'fecha': ('fecha', 'pk'),
+            'proyecto': ('proyecto__nombre', 'fecha', 'pk'),
+            'horas': ('-horas', 'fecha', 'pk'),
+        }
+        for orden, campos in esperados.items():
+            with self.subTest(orden=orden):
+                ids, _ = self._recorrer(orden)
+                self.assertEqual(
+                    ids, list(RegistroHora.objects.order_by(*campos).values_list('pk', flat=True))
+                )
+    
+    def test_pagina_anterior(self):
+        """El cursor `antes` vuelve a la página previa"""
+        url = reverse('horas:hora_list')
+        primera = self.client.get(url).context['page_obj']
+        segunda = self.client.get(url, {'despues': primera.cursor_siguiente}).context['page_obj']
+        self.assertTrue(segunda.has_previous)
+        
+        anterior = self.client.get(url, {'antes': segunda.cursor_anterior}).context['page_obj']
+        self.assertEqual([h.pk for h in anterior], [h.pk for h in primera])
+        self.assertTrue(anterior.has_next)
+        self.assertFalse(anterior.has_previous)
+    
+    def test_totales_de_todo_el_filtro(self):
+        """Los totales cubren todos los registros filtrados, no solo la página"""
+        total = RegistroHora.objects.aggregate(total=Sum('horas'))['total']
+        primera = self.client.get(reverse('horas:hora_list'))
+        self.assertEqual(primera.context['total_horas'], total)
+        self.assertEqual(primera.context['total_registros'], 120)
+        
+        _, ultima = self._recorrer('fecha')
+        self.assertEqual(ultima.context['total_horas'], total)
+        self.assertEqual(len(ultima.context['horas']), 20)
+        
+        filtrada = self.client.get(reverse('horas:hora_list'), {'proyecto': self.proyectos[1].pk})
+        self.assertEqual(filtrada.context['total_registros'], 60)
+        self.assertTrue(filtrada.context['is_paginated'])
+        
+        un_dia = self.client.get(reverse('horas:hora_list'), {'fecha': '2025-03-03'})
+        self.assertEqual(un_dia.context['total_registros'], 3)
+        self.assertFalse(un_dia.context['is_paginated'])
+    
+    def test_consultas_constantes(self):
+        """La página N cuesta las mismas consultas que la siguiente"""
+        url = reverse('horas:hora_list')
+        segunda = self.client.get(url).context['page_obj'].cursor_siguiente
+        self.client.get(url, {'despues': segunda})
+        
+        with CaptureQueriesContext(connection) as segunda_pagina:
+            tercera = self.client.get(url, {'despues': segunda}).context['page_obj'].cursor_siguiente
+        with CaptureQueriesContext(connection) as tercera_pagina:
+            self.client.get(url, {'despues': tercera})
+        self.assertEqual(len(segunda_pagina), len(tercera_pagina))
+    
+    def test_contexto_de_list_view(self):
+        """Conserva extra_context y las claves de ListView sin consultar las horas"""
+        from django.test import RequestFactory
+        from .views import HoraListView
+        
+        request = RequestFactory().get(reverse('horas:hora_list'))
+        request.user = self.user
+        vista = HoraListView(extra_context={'titulo_extra': 'Mis horas'})
+        vista.setup(request)
+        vista.object_list = vista.get_queryset()
+        with CaptureQueriesContext(connection) as consultas:
+            context = vista.get_context_data()
+        
+        self.assertFalse([c for c in consultas if 'FROM "horas_registrohora"' in c['sql']])
+        self.assertEqual(context['titulo_extra'], 'Mis horas')
+        self.assertIs(context['view'], vista)
+        self.assertIn('paginator', context)
+        self.assertEqual(len(context['horas']), 50)
+        self.assertTrue(context['is_paginated'])
+    
+    def test_cursor_invalido(self):
+        """Un cursor corrupto muestra la primera página"""
+        response = self.client.get(reverse('horas:hora_list'), {'despues': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous)
+        self.assertEqual(len(response.context['horas']), 50)
+
+
+class ArchivoHorasTest(TestCase):
+    """Pruebas para el archivo de horas de períodos cerrados"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.cerrado = Periodo.objects.create(
+            nombre='2023', fecha_inicio=date(2023, 1, 1), fecha_fin=date(2023, 12, 31),
+            horas_objetivo=1000, usuario=self.user
+        )
+        self.activo = Periodo.objects.create(
+            nombre='2025', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=1000, usuario=self.user, activo=True
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        self.viejos = [
+            RegistroHora.objects.create(
+                fecha=date(2023, 3, dia), proyecto=self.proyecto, horas=Decimal('2.0'),
+                descripcion=f'Migración legado {dia}', periodo=self.cerrado, usuario=self.user
+            )
+            for dia in (6, 7, 8)
+        ]
+        self.nuevo = RegistroHora.objects.create(
+            fecha=date(2025, 3, 3), proyecto=self.proyecto, horas=Decimal('4.0'),
+            descripcion='Migración nueva', periodo=self.activo, usuario=self.user
+        )
+    
+    def test_periodos_archivables(self):
+        """Solo períodos inactivos terminados antes de la antigüedad mínima"""
+        from .archivo import periodos_archivables
+        
+        self.assertEqual(list(periodos_archivables(hoy=date(2025, 6, 1))), [self.cerrado])
+        self.assertEqual(list(periodos_archivables(hoy=date(2024, 6, 1))), [])
+    
+    def test_archivar_y_restaurar(self):
+        """Mueve los registros en lotes conservando ids y fechas de creación"""
+        from .archivo import archivar_periodo, restaurar_periodo
+        from .busqueda import buscar_registros
+        from .models import RegistroHoraArchivo
+        
+        creados = {registro.pk: registro.created_at for registro in self.viejos}
+        self.assertEqual(archivar_periodo(self.cerrado, tamaño_lote=2), 3)
+        
+        self.assertEqual(list(RegistroHora.objects.values_list('pk', flat=True)), [self.nuevo.pk])
+        archivados = RegistroHoraArchivo.objects.all()
+        self.assertEqual({a.pk: a.created_at for a in archivados}, creados)
+        self.assertEqual(buscar_registros(self.user, 'legado').count(), 0)
+        self.assertEqual(self.proyecto.total_horas_registradas, Decimal('10.0'))
+        
+        self.assertEqual(restaurar_periodo(self.cerrado), 3)
+        self.assertFalse(RegistroHoraArchivo.objects.exists())
+        self.assertEqual(
+            dict(RegistroHora.objects.filter(periodo=self.cerrado).values_list('pk', 'created_at')), creados
+        )
+        self.assertEqual(buscar_registros(self.user, 'legado').count(), 3)
+    
+    def test_registros_con_archivo(self):
+        """Los reportes intercalan los archivados cuando el rango los alcanza"""
+        from .archivo import archivar_periodo, registros_con_archivo
+        
+        archivar_periodo(self.cerrado)
+        
+        todos = registros_con_archivo(self.user)
+        self.assertEqual(todos.count(), 4)
+        self.assertEqual([r.pk for r in todos], [r.pk for r in self.viejos] + [self.nuevo.pk])
+        self.assertEqual([r.pk for r in todos[1:3]], [self.viejos[1].pk, self.viejos[2].pk])
+        self.assertEqual(todos[3].proyecto.nombre, 'Proyecto A')
+        
+        recientes = registros_con_archivo(self.user, fecha__gte=date(2024, 1, 1))
+        self.assertFalse(recientes.usa_archivo)
+        with self.assertNumQueries(1):
+            self.assertEqual(recientes.count(), 1)
+        
+        rango = registros_con_archivo(self.user, fecha__gte=date(2023, 3, 7), fecha__lte=date(2023, 3, 31))
+        self.assertEqual([r.pk for r in rango], [self.viejos[1].pk, self.viejos[2].pk])
+
+    def test_horizonte_sin_invalidacion(self):
+        """Lo archivado en otro proceso se ve aunque este no reciba la invalidación"""
+        from unittest import mock
+        from .archivo import archivar_periodo, registros_con_archivo
+
+        self.assertFalse(registros_con_archivo(self.user).usa_archivo)
+        with mock.patch('apps.horas.signals.incrementar_version'):
+            archivar_periodo(self.cerrado)
+
+        todos = registros_con_archivo(self.user)
+        self.assertTrue(todos.usa_archivo)
+        self.assertEqual(todos.count(), 4)
+
+    def test_restaurar_publica_recarga(self):
+        """Restaurar con eventos activos pide recargar el período en lugar de listar días"""
+        from apps.core.eventos import obtener_bus
+        from .archivo import archivar_periodo, restaurar_periodo
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archivar_periodo(self.cerrado)
+        suscripcion = obtener_bus().suscribir(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restaurar_periodo(self.cerrado, tamaño_lote=2), 3)
+
+        eventos = suscripcion.esperar(0.1)
+        self.assertEqual(
+            [(evento['tipo'], evento['datos']) for evento in eventos],
+            [('horas_actualizadas', {'periodo': self.cerrado.pk, 'recargar': True})] * 2
+        )
+
+    def test_comando(self):
+        """El comando archiva los períodos cerrados y protege el activo"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .models import RegistroHoraArchivo
+        
+        with self.assertRaises(CommandError):
+            call_command('archivar_horas', periodo=[self.activo.pk], stdout=StringIO())
+        
+        call_command('archivar_horas', stdout=StringIO())
+        self.assertEqual(RegistroHoraArchivo.objects.count(), 3)
+        self.assertEqual(RegistroHora.objects.count(), 1)
+
+
+class ResumenPeriodoTest(TestCase):
+    """Pruebas para los resúmenes precalculados por período"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='2025', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=1000, usuario=self.user, activo=True
+        )
+        self.otro_periodo = Periodo.objects.create(
+            nombre='2024', fecha_inicio=date(2024, 1, 1), fecha_fin=date(2024, 12, 31),
+            horas_objetivo=1000, usuario=self.user
+        )
+        self.proyecto_a = Proyecto.objects.create(nombre='Proyecto A', usuario=self.user)
+        self.proyecto_b = Proyecto.objects.create(nombre='Proyecto B', usuario=self.user)
+        self.registro = self._registrar(date(2025, 3, 3), self.proyecto_a, '2.0')
+        self._registrar(date(2025, 3, 3), self.proyecto_b, '1.5', tipo_tarea='reunion')
+    
+    def _registrar(self, fecha, proyecto, horas, **extra):
+        return RegistroHora.objects.create(
+            fecha=fecha, proyecto=proyecto, horas=Decimal(horas),
+            periodo=extra.pop('periodo', self.periodo), usuario=self.user, **extra
+        )
+    
+    def _resumen(self):
+        from .models import ResumenPeriodo
+        return ResumenPeriodo.objects.get(periodo=self.periodo)
+    
+    def _verificar(self):
+        from .resumenes import verificar_resumen
+        self.assertEqual(verificar_resumen(self.periodo.pk), [])
+        self.assertEqual(verificar_resumen(self.otro_periodo.pk), [])
+    
+    def test_construccion_perezosa(self):
+        """El resumen se construye al leerlo por primera vez"""
+        from .models import ResumenPeriodo
+        from .resumenes import obtener_resumen
+        
+        self.assertFalse(ResumenPeriodo.objects.exists())
+        resumen = obtener_resumen(self.periodo)
+        self.assertEqual(
+            (resumen.total_horas, resumen.registros, resumen.dias_trabajados), (Decimal('3.5'), 2, 1)
+        )
+        self.assertEqual(
+            dict(self.periodo.resumen_tipos.values_list('tipo_tarea', 'total_horas')),
+            {'tarea': Decimal('2.0'), 'reunion': Decimal('1.5')}
+        )
+    
+    def test_mantenimiento_incremental(self):
+        """Altas, ediciones y bajas ajustan el resumen sin recalcularlo"""
+        from .resumenes import construir_resumen, obtener_resumen
+        
+        obtener_resumen(self.periodo)
+        construir_resumen(self.otro_periodo.pk)
+        
+        nuevo = self._registrar(date(2025, 3, 4), self.proyecto_a, '4.0')
+        self.assertEqual(self._resumen().dias_trabajados, 2)
+        self._verificar()
+        
+        # Cambio de horas, proyecto y tipo en una sola edición
+        nuevo.horas = Decimal('3.0')
+        nuevo.proyecto = self.proyecto_b
+        nuevo.tipo_tarea = 'reunion'
+        nuevo.save()
+        self._verificar()
+        
+        # Cambio de período
+        self.registro.periodo = self.otro_periodo
+        self.registro.save()
+        self._verificar()
+        
+        nuevo.delete()
+        resumen = self._resumen()
+        self.assertEqual((resumen.total_horas, resumen.dias_trabajados), (Decimal('1.5'), 1))
+        self.assertFalse(self.periodo.resumen_proyectos.filter(proyecto=self.proyecto_a).exists())
+        self._verificar()
+    
+    def test_lotes_y_archivo(self):
+        """Las cargas en lote suman; archivar y restaurar no cambian los totales"""
+        from .archivo import archivar_periodo, restaurar_periodo
+        from .resumenes import obtener_resumen
+        from .signals import registros_creados_en_lote
+        
+        obtener_resumen(self.periodo)
+        creados = RegistroHora.objects.bulk_create([
+            RegistroHora(fecha=date(2025, 3, 5), proyecto=self.proyecto_a, horas=Decimal('1.0'),
+                         periodo=self.periodo, usuario=self.user),
+            RegistroHora(fecha=date(2025, 3, 6), proyecto=self.proyecto_a, horas=Decimal('1.0'),
+                         periodo=self.periodo, usuario=self.user),
+        ])
+        registros_creados_en_lote.send(sender=RegistroHora, usuario=self.user, registros=creados)
+        self.assertEqual(self._resumen().total_horas, Decimal('5.5'))
+        self._verificar()
+        
+        archivar_periodo(self.periodo)
+        self.assertEqual(self._resumen().total_horas, Decimal('5.5'))
+        self._verificar()
+        
+        restaurar_periodo(self.periodo)
+        self.assertEqual(self._resumen().total_horas, Decimal('5.5'))
+        self._verificar()
+
+    def test_detalle_creado_por_otra_transaccion(self):
+        """Si el detalle aparece entre el UPDATE y el INSERT, se suma sobre el existente"""
+        from unittest import mock
+        from django.db.models.query import QuerySet
+        from .models import ResumenPeriodoProyecto
+        from .resumenes import _sumar_detalle, obtener_resumen
+
+        obtener_resumen(self.periodo)
+        update = QuerySet.update
+        llamadas = []
+
+        def update_concurrente(queryset, **campos):
+            # El primer UPDATE no ve la fila que otra transacción está creando
+            llamadas.append(campos)
+            return 0 if len(llamadas) == 1 else update(queryset, **campos)
+
+        with mock.patch.object(QuerySet, 'update', update_concurrente):
+            _sumar_detalle(
+                ResumenPeriodoProyecto, {'periodo_id': self.periodo.pk, 'proyecto_id': self.proyecto_a.pk},
+                Decimal('1.0'), 1
+            )
+        detalle = ResumenPeriodoProyecto.objects.get(periodo=self.periodo, proyecto=self.proyecto_a)
+        self.assertEqual((detalle.total_horas, detalle.registros), (Decimal('3.0'), 2))
+        self.assertEqual(len(llamadas), 2)
+
+    def test_borrar_proyecto_con_archivados(self):
+        """Borrar un proyecto descuenta también sus horas archivadas"""
+        from .archivo import archivar_periodo
+        from .models import ResumenPeriodo
+        from .resumenes import obtener_resumen
+
+        self._registrar(date(2024, 5, 6), self.proyecto_a, '3.0', periodo=self.otro_periodo)
+        obtener_resumen(self.periodo)
+        obtener_resumen(self.otro_periodo)
+        archivar_periodo(self.periodo)
+
+        self.proyecto_a.delete()
+        resumen = self._resumen()
+        self.assertEqual(
+            (resumen.total_horas, resumen.registros, resumen.dias_trabajados), (Decimal('1.5'), 1, 1)
+        )
+        self.assertEqual(ResumenPeriodo.objects.get(periodo=self.otro_periodo).total_horas, Decimal('0'))
+        self._verificar()
+
+    def test_comando(self):
+        """El comando detecta diferencias y las repara"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .models import ResumenPeriodo
+        from .resumenes import obtener_resumen
+        
+        obtener_resumen(self.periodo)
+        ResumenPeriodo.objects.filter(periodo=self.periodo).update(total_horas=Decimal('99'))
+        
+        with self.assertRaises(CommandError):
+            call_command('resumenes_periodo', stdout=StringIO())
+        call_command('resumenes_periodo', reparar=True, stdout=StringIO())
+        self.assertEqual(self._resumen().total_horas, Decimal('3.5'))
+        call_command('resumenes_periodo', stdout=StringIO())
+    
+    def test_dashboard_lee_resumen(self):
+        """La API del dashboard usa el resumen del período activo"""
+        from .resumenes import obtener_resumen
+        
+        obtener_resumen(self.periodo)
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as consultas:
+            data = self.client.get(reverse('api_dashboard')).json()
+        self.assertEqual(data['total_horas'], 3.5)
+        self.assertEqual(data['horas_por_proyecto'], {'Proyecto A': 2.0, 'Proyecto B': 1.5})
+        self.assertEqual(data['horas_por_tipo'], {'tarea': 2.0, 'reunion': 1.5})
+        self.assertEqual(data['dias_trabajados'], 1)
+        self.assertFalse(any('horas_registrohora' in q['sql'] for q in consultas.captured_queries))
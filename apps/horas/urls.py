@@ -19,6 +19,7 @@ urlpatterns = [
     
     # Nuevas funcionalidades
     path('bloque/', views.RegistroHoraBloqueView.as_view(), name='hora_bloque'),
+    path('importar/', views.HoraImportView.as_view(), name='hora_import'),
     
     # Página de prueba del calendario
     path('test-calendar/', views.TestCalendarView.as_view(), name='test_calendar'),
@@ -31,6 +32,7 @@ urlpatterns = [
     # API endpoints (solo cuando se accede desde /api/horas/)
     path('api/', views.HoraAPIView.as_view(), name='api_list'),
     path('api/<int:pk>/', views.HoraDetailAPIView.as_view(), name='api_detail'),
+    path('api/serie/', views.HoraSerieAPIView.as_view(), name='api_serie'),
     path('api/resumen/', views.HoraResumenAPIView.as_view(), name='api_resumen'),
     path('api/fecha/<str:fecha>/', views.HoraPorFechaAPIView.as_view(), name='api_por_fecha'),
     path('api/validar/', views.ValidarHorasAPIView.as_view(), name='api_validar'),
@@ -1,20 +1,29 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView, TemplateView
+from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView, TemplateView, FormView
 from django.views import View
 from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Sum
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Sum, Window
 from django.utils import timezone
 from datetime import date, timedelta
+import csv
+import zipfile
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
 from .models import RegistroHora
-from .forms import RegistroHoraForm, FiltroHorasForm, RegistroHoraBloqueForm, VistaCompletaDiaForm
+from .busqueda import buscar_registros
+from .agregaciones import GRANULARIDADES, RangoExcesivo
+from .importacion import ALIAS_COLUMNAS, importar_horas
+from .forms import RegistroHoraForm, FiltroHorasForm, RegistroHoraBloqueForm, VistaCompletaDiaForm, HoraImportForm
 from apps.proyectos.models import Proyecto
 from apps.core.models import Periodo, DiaFeriado
+from apps.core.fragmentos import contexto_perezoso
+from apps.core.paginacion import PaginadorCursor
 
 
 class TestCalendarView(TemplateView):
@@ -28,12 +37,20 @@ class TestHoursWidgetView(TemplateView):
 
 
 class HoraListView(LoginRequiredMixin, ListView):
-    """Lista de horas con filtros y ordenamiento"""
+    """Lista de horas con filtros, ordenamiento y paginación por cursor"""
     model = RegistroHora
     template_name = 'horas/hora_list.html'
     context_object_name = 'horas'
     paginate_by = 50
     
+    # Orden de cada opción; `pk` desempata para que el cursor sea único.
+    # El orden por fecha recorre el índice (usuario, fecha).
+    ORDENAMIENTOS = {
+        'fecha': ('fecha', 'pk'),
+        'proyecto': ('proyecto__nombre', 'fecha', 'pk'),
+        'horas': ('-horas', 'fecha', 'pk'),
+    }
+    
     def get_queryset(self):
         queryset = RegistroHora.objects.filter(usuario=self.request.user).select_related('proyecto')
         
@@ -47,19 +64,28 @@ class HoraListView(LoginRequiredMixin, ListView):
         if fecha:
             queryset = queryset.filter(fecha=fecha)
         
-        # Ordenamiento (por defecto: fecha ascendente)
-        orden = self.request.GET.get('orden', 'fecha')
-        if orden == 'proyecto':
-            queryset = queryset.order_by('proyecto__nombre', 'fecha')
-        else:  # fecha (default)
-            queryset = queryset.order_by('fecha', 'created_at')
-        
+        # El ordenamiento lo aplica el paginador
         return queryset
     
+    def get_orden(self):
+        orden = self.request.GET.get('orden', 'fecha')
+        return orden if orden in self.ORDENAMIENTOS else 'fecha'
+    
+    def get_paginate_by(self, queryset):
+        # La página por cursor la arma `_tabla` (perezosa); ListView no pagina
+        return None
+    
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        queryset = kwargs.pop('object_list', self.object_list)
+        context = super().get_context_data(object_list=queryset, **kwargs)
+        
+        # Página y totales se calculan solo si el fragmento de la tabla no está en cache
+        context.update(contexto_perezoso(
+            lambda: self._tabla(queryset),
+            ('page_obj', 'is_paginated', 'object_list', 'horas', 'total_horas', 'total_registros'),
+        ))
         
-        # Proyectos para el filtro
+        # Proyectos para el filtro (queryset perezoso)
         context['proyectos'] = Proyecto.objects.filter(
             usuario=self.request.user, 
             activo=True
@@ -68,14 +94,52 @@ class HoraListView(LoginRequiredMixin, ListView):
         # Valores actuales de filtros
         context['filtro_proyecto'] = self.request.GET.get('proyecto', '')
         context['filtro_fecha'] = self.request.GET.get('fecha', '')
-        context['orden_actual'] = self.request.GET.get('orden', 'fecha')
+        context['orden_actual'] = self.get_orden()
         
-        # Total de horas de los registros mostrados
-        context['total_horas'] = self.get_queryset().aggregate(
-            total=Sum('horas')
-        )['total'] or 0
+        # Filtros y orden a conservar en los enlaces de paginación
+        parametros = self.request.GET.copy()
+        for cursor in ('despues', 'antes', 'page'):
+            parametros.pop(cursor, None)
+        context['parametros_filtro'] = parametros.urlencode()
         
         return context
+    
+    def _tabla(self, queryset):
+        despues = self.request.GET.get('despues')
+        antes = self.request.GET.get('antes')
+        primera = not (despues or antes)
+        
+        # En la primera página los totales viajan como ventana en la misma
+        # consulta (se evalúan antes del LIMIT, sobre todo el filtro)
+        consulta = queryset
+        if primera:
+            consulta = queryset.annotate(
+                total_filtro=Window(Sum('horas')),
+                registros_filtro=Window(Count('id')),
+            )
+        
+        paginador = PaginadorCursor(self.ORDENAMIENTOS[self.get_orden()], self.paginate_by)
+        pagina = paginador.paginar(consulta, despues=despues, antes=antes)
+        
+        if primera:
+            fila = pagina[0] if len(pagina) else None
+            totales = {
+                'total': fila.total_filtro if fila else 0,
+                'registros': fila.registros_filtro if fila else 0,
+            }
+        else:
+            # Con cursor la ventana solo vería las filas posteriores a él
+            totales = queryset.aggregate(total=Sum('horas'), registros=Count('id'))
+        
+        return {
+            'page_obj': pagina,
+            'is_paginated': pagina.has_other_pages(),
+            'object_list': pagina.object_list,
+            'horas': pagina.object_list,
+            # Total de horas de todos los registros filtrados
+            'total_horas': totales['total'] or 0,
+            'total_registros': totales['registros'],
+        }
 
 
 class HoraCreateSimpleView(LoginRequiredMixin, CreateView):
@@ -96,16 +160,8 @@ class HoraCreateSimpleView(LoginRequiredMixin, CreateView):
         # Fecha actual
         context['today'] = date.today().isoformat()
         
-        # Configuración de horas del usuario
-        profile = getattr(self.request.user, 'profile', None)
-        if profile:
-            context['incremento_horas'] = float(profile.incremento_horas)
-            context['horas_minimas'] = float(profile.horas_minimas)
-            context['horas_maximas'] = float(profile.horas_maximas)
-        else:
-            context['incremento_horas'] = 0.5
-            context['horas_minimas'] = 0.5
-            context['horas_maximas'] = 12.0
+        # Configuración de horas del usuario y límite diario
+        context.update(self.request.configuracion.contexto_horas())
         
         return context
     
@@ -129,32 +185,13 @@ class HoraCreateView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Agregar proyectos activos para el JavaScript
-        context['proyectos'] = Proyecto.objects.filter(
-            usuario=self.request.user,
-            activo=True
-        ).order_by('nombre')
+        # Los proyectos se buscan por AJAX (api_proyectos_buscar)
         
         # Fecha actual
         context['today'] = date.today().isoformat()
         
-        # Configuración de horas del usuario
-        profile = getattr(self.request.user, 'profile', None)
-        if profile:
-            context['incremento_horas'] = float(profile.incremento_horas)
-            context['horas_minimas'] = float(profile.horas_minimas)
-            context['horas_maximas'] = float(profile.horas_maximas)
-        else:
-            context['incremento_horas'] = 0.5
-            context['horas_minimas'] = 0.5
-            context['horas_maximas'] = 12.0
-        
-        # Límite diario del período activo
-        try:
-            periodo_activo = Periodo.objects.get(usuario=self.request.user, activo=True)
-            context['limite_diario'] = float(periodo_activo.horas_max_dia)
-        except Periodo.DoesNotExist:
-            context['limite_diario'] = 8.0
+        # Configuración de horas del usuario y límite diario
+        context.update(self.request.configuracion.contexto_horas())
         
         return context
     
@@ -163,6 +200,52 @@ class HoraCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
+class HoraImportView(LoginRequiredMixin, FormView):
+    """Importar registros de horas desde CSV o Excel, con previsualización"""
+    form_class = HoraImportForm
+    template_name = 'horas/hora_import.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['columnas'] = ALIAS_COLUMNAS
+        return context
+    
+    def form_valid(self, form):
+        simular = form.cleaned_data['simular']
+        try:
+            resultado = importar_horas(
+                self.request.user,
+                form.cleaned_data['archivo'],
+                mapeo=form.get_mapeo(),
+                simular=simular
+            )
+        except ValidationError as e:
+            form.add_error('archivo', e)
+            return self.form_invalid(form)
+        except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+            form.add_error('archivo', f'No se pudo leer el archivo: {e}')
+            return self.form_invalid(form)
+        
+        if simular:
+            messages.info(
+                self.request,
+                f'Previsualización: {resultado.validos} filas válidas '
+                f'({resultado.total_horas}h) y {resultado.errores} con errores. No se guardó nada.'
+            )
+        else:
+            messages.success(
+                self.request,
+                f'Importación finalizada: {resultado.importados} registros '
+                f'({resultado.total_horas}h), {resultado.errores} filas con errores'
+            )
+        # Se conserva el mapeo para volver a subir el archivo
+        inicial = {nombre: valor for nombre, valor in form.cleaned_data.items() if nombre.startswith('columna_')}
+        inicial['simular'] = False
+        return self.render_to_response(
+            self.get_context_data(form=self.form_class(initial=inicial), resultado=resultado)
+        )
+
+
 class HoraDetailView(LoginRequiredMixin, DetailView):
     """Detalle de registro de horas"""
     model = RegistroHora
@@ -190,32 +273,13 @@ class HoraUpdateView(LoginRequiredMixin, UpdateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Agregar proyectos activos para el JavaScript
-        context['proyectos'] = Proyecto.objects.filter(
-            usuario=self.request.user,
-            activo=True
-        ).order_by('nombre')
+        # Los proyectos se buscan por AJAX (api_proyectos_buscar)
         
         # Fecha actual
         context['today'] = date.today().isoformat()
         
-        # Configuración de horas del usuario
-        profile = getattr(self.request.user, 'profile', None)
-        if profile:
-            context['incremento_horas'] = float(profile.incremento_horas)
-            context['horas_minimas'] = float(profile.horas_minimas)
-            context['horas_maximas'] = float(profile.horas_maximas)
-        else:
-            context['incremento_horas'] = 0.5
-            context['horas_minimas'] = 0.5
-            context['horas_maximas'] = 12.0
-        
-        # Límite diario del período activo
-        try:
-            periodo_activo = Periodo.objects.get(usuario=self.request.user, activo=True)
-            context['limite_diario'] = float(periodo_activo.horas_max_dia)
-        except Periodo.DoesNotExist:
-            context['limite_diario'] = 8.0
+        # Configuración de horas del usuario y límite diario
+        context.update(self.request.configuracion.contexto_horas())
         
         return context
 
@@ -242,7 +306,7 @@ class HoraAPIView(APIView):
         proyecto_id = request.GET.get('proyecto')
         
         # Filtrar horas del usuario
-        horas = RegistroHora.objects.filter(usuario=request.user).select_related('proyecto')
+        horas = RegistroHora.objects.filter(usuario=request.user)
         
         # Aplicar filtros de fecha si se proporcionan
         if fecha_inicio:
@@ -255,22 +319,15 @@ class HoraAPIView(APIView):
         # Ordenar por fecha
         horas = horas.order_by('fecha', 'created_at')
         
-        # Serializar datos con más detalles para FullCalendar
-        data = []
-        for h in horas:
-            data.append({
-                'id': h.id,
-                'fecha': h.fecha.strftime('%Y-%m-%d'),
-                'proyecto_id': h.proyecto.id,
-                'proyecto_nombre': h.proyecto.nombre,
-                'proyecto_color': h.proyecto.color_hex,
-                'horas': float(h.horas),
-                'descripcion': h.descripcion,
-                'tipo_tarea': h.tipo_tarea,
-                'tipo_tarea_display': h.get_tipo_tarea_display(),
-                'created_at': h.created_at.isoformat(),
-                'updated_at': h.updated_at.isoformat()
-            })
+        # Fechas y Decimal van tal cual: el renderer JSON los serializa
+        tipos_tarea = dict(RegistroHora.TIPO_TAREA_CHOICES)
+        data = list(horas.values(
+            'id', 'fecha', 'proyecto_id', 'horas', 'descripcion', 'tipo_tarea', 'created_at', 'updated_at',
+            proyecto_nombre=F('proyecto__nombre'),
+            proyecto_color=F('proyecto__color_hex'),
+        ))
+        for fila in data:
+            fila['tipo_tarea_display'] = tipos_tarea.get(fila['tipo_tarea'], fila['tipo_tarea'])
         
         return Response(data)
     
@@ -340,6 +397,116 @@ class HoraAPIView(APIView):
             }, status=500)
 
 
+class BusquedaPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class BusquedaHorasAPIView(APIView):
+    """API de búsqueda de texto completo en las descripciones de horas"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        texto = request.GET.get('q', '').strip()
+        if not texto:
+            return Response({
+                'success': False,
+                'error': 'El parámetro q es requerido'
+            }, status=400)
+        
+        try:
+            fecha_desde = date.fromisoformat(request.GET['fecha_inicio']) if request.GET.get('fecha_inicio') else None
+            fecha_hasta = date.fromisoformat(request.GET['fecha_fin']) if request.GET.get('fecha_fin') else None
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Formato de fecha inválido. Use YYYY-MM-DD'
+            }, status=400)
+        
+        proyecto_id = request.GET.get('proyecto')
+        if proyecto_id and not proyecto_id.isdigit():
+            return Response({
+                'success': False,
+                'error': 'Proyecto inválido'
+            }, status=400)
+        
+        resultados = buscar_registros(
+            request.user,
+            texto,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            proyecto_id=proyecto_id
+        )
+        
+        paginador = BusquedaPagination()
+        pagina = paginador.paginate_queryset(resultados, request, view=self)
+        data = [{
+            'id': h.id,
+            'fecha': h.fecha.strftime('%Y-%m-%d'),
+            'proyecto_id': h.proyecto_id,
+            'proyecto_nombre': h.proyecto.nombre,
+            'proyecto_color': h.proyecto.color_hex,
+            'horas': float(h.horas),
+            'descripcion': h.descripcion,
+            'tipo_tarea': h.tipo_tarea,
+            'rank': round(float(h.rank), 4)
+        } for h in pagina]
+        
+        return paginador.get_paginated_response(data)
+
+
+class HoraSerieAPIView(APIView):
+    """API de horas agregadas por día, semana, mes, trimestre o año"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        granularidad = request.GET.get('granularidad', 'mes')
+        if granularidad not in GRANULARIDADES:
+            return Response({
+                'success': False,
+                'error': f"Granularidad inválida. Opciones: {', '.join(GRANULARIDADES)}"
+            }, status=400)
+        
+        try:
+            fecha_inicio = date.fromisoformat(request.GET['fecha_inicio']) if request.GET.get('fecha_inicio') else None
+            fecha_fin = date.fromisoformat(request.GET['fecha_fin']) if request.GET.get('fecha_fin') else None
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Formato de fecha inválido. Use YYYY-MM-DD'
+            }, status=400)
+        
+        proyecto_id = request.GET.get('proyecto')
+        periodo_id = request.GET.get('periodo')
+        if (proyecto_id and not proyecto_id.isdigit()) or (periodo_id and not periodo_id.isdigit()):
+            return Response({
+                'success': False,
+                'error': 'Proyecto o período inválido'
+            }, status=400)
+        
+        try:
+            serie = RegistroHora.get_serie_temporal(
+                request.user,
+                granularidad=granularidad,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                proyecto=proyecto_id,
+                periodo=periodo_id
+            )
+        except RangoExcesivo as e:
+            return Response({'success': False, 'error': str(e)}, status=400)
+        return Response({
+            'success': True,
+            'granularidad': granularidad,
+            'serie': [{
+                'periodo': punto['periodo'].strftime('%Y-%m-%d'),
+                'total_horas': float(punto['total_horas']),
+                'total_registros': punto['total_registros']
+            } for punto in serie]
+        })
+
+
 class HoraDetailAPIView(APIView):
     """API detalle de horas"""
     permission_classes = [IsAuthenticated]
@@ -404,10 +571,8 @@ class RegistroHoraBloqueView(LoginRequiredMixin, View):
         form = RegistroHoraBloqueForm(user=request.user)
         
         # Obtener información del período activo para el contexto
-        periodo_activo = None
-        try:
-            periodo_activo = Periodo.objects.get(usuario=request.user, activo=True)
-        except Periodo.DoesNotExist:
+        periodo_activo = request.configuracion.periodo_activo
+        if periodo_activo is None:
             messages.warning(request, 'No hay un período activo configurado. Configure un período antes de continuar.')
         
         # Obtener feriados del usuario para el JavaScript
@@ -421,7 +586,7 @@ class RegistroHoraBloqueView(LoginRequiredMixin, View):
             'subtitle': 'Registre la misma tarea en múltiples fechas',
             'periodo_activo': periodo_activo,
             'feriados': [f.isoformat() for f in feriados],
-            'limite_diario': float(periodo_activo.horas_max_dia) if periodo_activo else 8.0
+            'limite_diario': float(request.configuracion.limite_diario)
         })
     
     def post(self, request):
@@ -587,14 +752,11 @@ class VistaCompletaDiaView(LoginRequiredMixin, View):
         # Calcular estadísticas
         total_horas = registros.aggregate(total=Sum('horas'))['total'] or 0
         
-        # Obtener período activo para calcular porcentajes
-        try:
-            periodo_activo = Periodo.objects.get(usuario=request.user, activo=True)
-            horas_max_dia = float(periodo_activo.horas_max_dia)
-            porcentaje_cumplido = min((float(total_horas) / horas_max_dia) * 100, 100)
-        except Periodo.DoesNotExist:
-            horas_max_dia = 8.0
-            porcentaje_cumplido = (float(total_horas) / horas_max_dia) * 100
+        # Límite diario del período activo para calcular porcentajes
+        horas_max_dia = float(request.configuracion.limite_diario)
+        porcentaje_cumplido = (float(total_horas) / horas_max_dia) * 100
+        if request.configuracion.periodo_activo:
+            porcentaje_cumplido = min(porcentaje_cumplido, 100)
         
         # Agrupar por proyecto
         registros_por_proyecto = {}
@@ -2,9 +2,8 @@
 Widgets personalizados para el manejo de horas
 """
 from django import forms
-from django.core.exceptions import ValidationError
-import re
-from decimal import Decimal, InvalidOperation
+
+from .parseo import INCREMENTO_DEFECTO, obtener_parser
 
 
 class HoursWidget(forms.TextInput):
@@ -40,98 +39,26 @@ class HoursField(forms.CharField):
     
     widget = HoursWidget
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, incremento=INCREMENTO_DEFECTO, **kwargs):
         kwargs.setdefault('help_text', 
             'Ingrese horas en formato decimal (1.5) o tiempo (01:30). '
             'Incrementos de 30 minutos (0.5h)'
         )
         super().__init__(*args, **kwargs)
+        self.parser = obtener_parser(incremento)
     
     def to_python(self, value):
-        """Convierte el valor de entrada a decimal"""
-        if not value:
+        """Convierte el valor de entrada a Decimal"""
+        if value in self.empty_values:
             return None
-        
-        value = str(value).strip()
-        
-        # Si ya es formato decimal, validar y retornar
-        if self._is_decimal_format(value):
-            try:
-                decimal_value = float(Decimal(value))
-                self._validate_hours_value(decimal_value)
-                return decimal_value
-            except (ValueError, InvalidOperation):
-                raise ValidationError('Formato de horas inválido')
-        
-        # Si es formato HH:MM, convertir a decimal
-        if self._is_time_format(value):
-            decimal_value = self._time_to_decimal(value)
-            self._validate_hours_value(decimal_value)
-            return decimal_value
-        
-        # Formato no reconocido
-        raise ValidationError(
-            'Formato de horas inválido. Use formato decimal (1.5) o tiempo (01:30)'
-        )
-    
-    def _validate_hours_value(self, value):
-        """Validar el valor de horas convertido"""
-        if value < 0.5:
-            raise ValidationError('El mínimo es 0.5 horas (30 minutos)')
-        
-        if value > 12:
-            raise ValidationError('El máximo es 12 horas por registro')
-        
-        # Validar que sea múltiplo de 0.5
-        if (value * 2) % 1 != 0:
-            raise ValidationError('Las horas deben ser múltiplos de 0.5 (30 minutos)')
-    
-    def _is_decimal_format(self, value):
-        """Verifica si el valor está en formato decimal"""
-        decimal_pattern = r'^\d+(\.\d+)?$'
-        return re.match(decimal_pattern, value) is not None
-    
-    def _is_time_format(self, value):
-        """Verifica si el valor está en formato HH:MM"""
-        time_pattern = r'^\d{1,2}:\d{2}$'
-        return re.match(time_pattern, value) is not None
-    
-    def _time_to_decimal(self, time_str):
-        """Convierte formato HH:MM a decimal"""
-        try:
-            hours, minutes = map(int, time_str.split(':'))
-            
-            # Validar rangos
-            if hours < 0 or hours > 23:
-                raise ValidationError('Las horas deben estar entre 0 y 23')
-            
-            if minutes < 0 or minutes > 59:
-                raise ValidationError('Los minutos deben estar entre 0 y 59')
-            
-            # Convertir a decimal
-            decimal_hours = hours + (minutes / 60.0)
-            
-            # Redondear a incrementos de 0.5 (30 minutos)
-            return round(decimal_hours * 2) / 2
-            
-        except ValueError:
-            raise ValidationError('Formato de tiempo inválido')
+        return self.parser.parse(value)
     
     def validate(self, value):
         """Validaciones adicionales para horas"""
         super().validate(value)
         
         if value is not None:
-            # Validar rango mínimo y máximo
-            if value < 0.5:
-                raise ValidationError('El mínimo es 0.5 horas (30 minutos)')
-            
-            if value > 12:
-                raise ValidationError('El máximo es 12 horas por registro')
-            
-            # Validar que sea múltiplo de 0.5
-            if (value * 2) % 1 != 0:
-                raise ValidationError('Las horas deben ser múltiplos de 0.5 (30 minutos)')
+            self.parser.validar(value)
 
 
 def decimal_to_time_format(decimal_hours):
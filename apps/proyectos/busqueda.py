@@ -0,0 +1,92 @@
+"""
+Búsqueda incremental (typeahead) de proyectos.
+
+Se apoya en la columna `Proyecto.nombre_busqueda` (nombre en minúsculas y
+sin acentos) indexada junto con el usuario, de modo que la búsqueda por
+prefijo se resuelve como un rango sobre el índice en cualquier motor.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db.models import Q
+
+
+LIMITE_RESULTADOS = getattr(settings, 'PROYECTOS_BUSQUEDA_LIMITE', 20)
+
+_MAX_CODIGO = 0x10FFFF
+_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sin acentos y con espacios simples"""
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(' ', sin_acentos).strip().lower()
+
+
+def _sucesor(prefijo):
+    """
+    Menor texto mayor que todos los que empiezan con `prefijo` (se incrementa
+    el último carácter), o None si no hay. No depende de que el motor ordene
+    un carácter centinela después de los demás, cosa que en PostgreSQL
+    varía con la collation.
+    """
+    while prefijo and ord(prefijo[-1]) == _MAX_CODIGO:
+        prefijo = prefijo[:-1]
+    if not prefijo:
+        return None
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def filtro_prefijo(campo, prefijo):
+    """`campo` empieza con `prefijo`, expresado como rango para usar el índice"""
+    sucesor = _sucesor(prefijo)
+    filtro = Q(**{f'{campo}__gte': prefijo})
+    if sucesor is not None:
+        filtro &= Q(**{f'{campo}__lt': sucesor})
+    return filtro
+
+
+def buscar_proyectos(usuario, texto, limite=LIMITE_RESULTADOS, solo_activos=True, desplazamiento=0):
+    """
+    Retorna hasta `limite` proyectos ordenados por relevancia, salteando los
+    primeros `desplazamiento` (páginas del typeahead).
+
+    1. El nombre empieza con el texto (rango sobre el índice).
+    2. Alguna palabra del nombre empieza con el texto, o coincide el cliente.
+
+    Retorna una tupla `(proyectos, hay_mas)`.
+    """
+    from .models import Proyecto
+
+    base = Proyecto.objects.filter(usuario=usuario)
+    if solo_activos:
+        base = base.filter(activo=True)
+
+    fin = desplazamiento + limite + 1
+    termino = normalizar_texto(texto)
+    if not termino:
+        proyectos = list(base.order_by('nombre_busqueda')[desplazamiento:fin])
+        return proyectos[:limite], len(proyectos) > limite
+
+    por_prefijo = base.filter(filtro_prefijo('nombre_busqueda', termino)).order_by('nombre_busqueda')
+    proyectos = list(por_prefijo[desplazamiento:fin])
+    if len(proyectos) <= limite:
+        # La segunda parte arranca donde terminan los que empiezan con el texto
+        if proyectos or not desplazamiento:
+            desde = 0
+        else:
+            desde = desplazamiento - por_prefijo.count()
+        restantes = limite + 1 - len(proyectos)
+        proyectos += list(
+            base.filter(
+                Q(nombre_busqueda__contains=' ' + termino) | Q(cliente__icontains=texto.strip())
+            ).exclude(
+                filtro_prefijo('nombre_busqueda', termino)
+            ).order_by('nombre_busqueda')[desde:desde + restantes]
+        )
+
+    return proyectos[:limite], len(proyectos) > limite
@@ -0,0 +1,81 @@
+"""
+Ranking de proyectos favoritos.
+
+Una sola consulta anota cada proyecto activo con su uso en la ventana
+reciente y la fecha del último registro; el puntaje combina ambos:
+
+    puntaje = usos + FAVORITOS_PESO_RECENCIA * (1 - días_desde_último_uso / ventana)
+
+El resultado se cachea por usuario y se invalida con cada registro de horas.
+Los ajustes `FAVORITOS_*` se leen en cada llamada y forman parte de la clave,
+así un cambio en tiempo de ejecución no devuelve rankings calculados con los
+valores anteriores.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from apps.core.versionado import clave_versionada, TIMEOUT_DERIVADOS
+
+
+def _ajustes():
+    """`(ventana_dias, peso_recencia, cantidad)` vigentes"""
+    return (
+        getattr(settings, 'FAVORITOS_VENTANA_DIAS', 30),
+        getattr(settings, 'FAVORITOS_PESO_RECENCIA', 5.0),
+        getattr(settings, 'FAVORITOS_CANTIDAD', 5),
+    )
+
+
+def calcular_puntaje(usos, ultimo_uso, hoy, ventana=None, peso_recencia=None):
+    """Puntaje de un proyecto; 0 si no se usó dentro de la ventana"""
+    if not usos or ultimo_uso is None:
+        return 0.0
+    if ventana is None or peso_recencia is None:
+        ventana_defecto, peso_defecto, _ = _ajustes()
+        ventana = ventana_defecto if ventana is None else ventana
+        peso_recencia = peso_defecto if peso_recencia is None else peso_recencia
+    antiguedad = min(max((hoy - ultimo_uso).days, 0), ventana)
+    return usos + peso_recencia * (1 - antiguedad / ventana)
+
+
+def calcular_favoritos(usuario, hoy=None):
+    """Proyectos activos serializados y los ids favoritos ordenados por puntaje"""
+    hoy = hoy or date.today()
+    ventana, peso_recencia, cantidad = _ajustes()
+    reciente = Q(registros_horas__fecha__gte=hoy - timedelta(days=ventana))
+
+    proyectos = usuario.proyectos.filter(activo=True).annotate(
+        usos=Count('registros_horas', filter=reciente),
+        ultimo_uso=Max('registros_horas__fecha', filter=reciente),
+    ).order_by('nombre')
+
+    todos = []
+    puntajes = []
+    for proyecto in proyectos:
+        todos.append({
+            'id': proyecto.id,
+            'nombre': proyecto.nombre,
+            'cliente': proyecto.cliente,
+            'color': proyecto.color_hex,
+        })
+        puntaje = calcular_puntaje(proyecto.usos, proyecto.ultimo_uso, hoy, ventana, peso_recencia)
+        if puntaje > 0:
+            puntajes.append((-puntaje, proyecto.nombre, len(todos) - 1))
+
+    favoritos = [todos[indice] for _, _, indice in sorted(puntajes)[:cantidad]]
+    return {'favoritos': favoritos, 'todos': todos}
+
+
+def obtener_favoritos(usuario):
+    """Versión cacheada por usuario"""
+    hoy = date.today()
+    ajustes = ':'.join(str(valor) for valor in _ajustes())
+    clave = clave_versionada('favoritos', ('usuario', usuario.pk), extra=f'{hoy.isoformat()}:{ajustes}')
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular_favoritos(usuario, hoy)
+        cache.set(clave, datos, TIMEOUT_DERIVADOS)
+    return datos
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from datetime import date, timedelta
 import re
@@ -292,10 +293,12 @@ class ProyectoImportForm(forms.Form):
         if not archivo:
             raise ValidationError("Debe seleccionar un archivo")
         
-        if not archivo.name.endswith('.csv'):
+        if not archivo.name.lower().endswith('.csv'):
             raise ValidationError("El archivo debe tener extensión .csv")
         
-        if archivo.size > 1024 * 1024:  # 1MB
-            raise ValidationError("El archivo no puede ser mayor a 1MB")
+        # El archivo se procesa en lotes, por lo que admite tamaños grandes
+        max_mb = getattr(settings, 'PROYECTOS_IMPORTACION_MAX_MB', 20)
+        if archivo.size > max_mb * 1024 * 1024:
+            raise ValidationError(f"El archivo no puede ser mayor a {max_mb}MB")
         
         return archivo
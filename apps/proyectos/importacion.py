@@ -0,0 +1,182 @@
+"""
+Importación masiva de proyectos desde CSV.
+
+El archivo se lee fila a fila (sin cargarlo completo en memoria) y se
+procesa en lotes: los nombres existentes del usuario se cargan una sola vez
+en un diccionario sin distinción de mayúsculas, cada lote se resuelve en
+memoria como altas o actualizaciones y se aplica con `bulk_create` /
+`bulk_update`. Todo ocurre en una única transacción.
+"""
+import copy
+import csv
+import io
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versionado import incrementar_version
+from .busqueda import normalizar_texto
+from .models import Proyecto
+
+
+TAMAÑO_LOTE = getattr(settings, 'PROYECTOS_IMPORTACION_LOTE', 1000)
+
+COLUMNAS = ('nombre', 'cliente', 'descripcion', 'fecha_inicio', 'fecha_fin', 'activo', 'color_hex')
+CAMPOS_ACTUALIZABLES = ['cliente', 'descripcion', 'fecha_inicio', 'fecha_fin', 'activo',
+                        'color_hex', 'año', 'updated_at']
+VALORES_VERDADEROS = {'1', 'si', 'sí', 'true', 'verdadero', 'x', 'activo'}
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y')
+
+
+class ResultadoImportacion:
+    """Resumen de la importación con el detalle por fila"""
+
+    def __init__(self):
+        self.creados = 0
+        self.actualizados = 0
+        self.omitidos = 0
+        self.errores = 0
+        self.filas = []
+
+    def registrar(self, fila, nombre, estado, mensaje=''):
+        self.filas.append({'fila': fila, 'nombre': nombre, 'estado': estado, 'mensaje': mensaje})
+        contador = {'creado': 'creados', 'actualizado': 'actualizados',
+                    'omitido': 'omitidos', 'error': 'errores'}[estado]
+        setattr(self, contador, getattr(self, contador) + 1)
+
+    @property
+    def procesadas(self):
+        return len(self.filas)
+
+
+def _parsear_fecha(valor):
+    valor = (valor or '').strip()
+    if not valor:
+        return None
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValidationError(f"Fecha inválida '{valor}' (use AAAA-MM-DD o DD/MM/AAAA)")
+
+
+def _leer_filas(archivo):
+    """Itera `(número_de_fila, dict)` decodificando el archivo de forma incremental"""
+    muestra = archivo.read(4096)
+    archivo.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra.decode('utf-8-sig', errors='ignore'), delimiters=',;')
+    except csv.Error:
+        dialecto = csv.excel
+
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        lector = csv.DictReader(texto, dialect=dialecto)
+        lector.fieldnames = [
+            (campo or '').strip().lower() for campo in (lector.fieldnames or [])
+        ]
+        if 'nombre' not in lector.fieldnames:
+            raise ValidationError("El archivo debe tener una columna 'nombre'")
+        for numero, fila in enumerate(lector, start=2):
+            yield numero, fila
+    finally:
+        texto.detach()
+
+
+def _lotes(filas, tamaño):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamaño:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _aplicar_fila(proyecto, fila):
+    """Copia los valores presentes en la fila al proyecto y lo valida"""
+    for campo in ('cliente', 'descripcion', 'color_hex'):
+        valor = (fila.get(campo) or '').strip()
+        if valor:
+            setattr(proyecto, campo, valor)
+    if (fila.get('fecha_inicio') or '').strip():
+        proyecto.fecha_inicio = _parsear_fecha(fila['fecha_inicio'])
+    if (fila.get('fecha_fin') or '').strip():
+        proyecto.fecha_fin = _parsear_fecha(fila['fecha_fin'])
+    if (fila.get('activo') or '').strip():
+        proyecto.activo = fila['activo'].strip().lower() in VALORES_VERDADEROS
+
+    if proyecto.fecha_inicio and proyecto.fecha_fin and proyecto.fecha_fin < proyecto.fecha_inicio:
+        raise ValidationError("La fecha de fin no puede ser anterior a la de inicio")
+
+    # bulk_create/bulk_update no llaman a save(): se replican sus cálculos
+    proyecto.año = proyecto.fecha_inicio.year if proyecto.fecha_inicio else (proyecto.año or date.today().year)
+    proyecto.nombre_busqueda = normalizar_texto(proyecto.nombre)
+    proyecto.clean_fields(exclude=['usuario'])
+
+
+def _mensaje_error(error):
+    if hasattr(error, 'message_dict'):
+        return '; '.join(f"{campo}: {' '.join(mensajes)}" for campo, mensajes in error.message_dict.items())
+    return ' '.join(error.messages)
+
+
+def importar_proyectos(usuario, archivo, sobrescribir=False, tamaño_lote=TAMAÑO_LOTE):
+    """Importa proyectos del CSV para `usuario` y retorna un `ResultadoImportacion`"""
+    resultado = ResultadoImportacion()
+    ahora = timezone.now()
+    existentes = {
+        proyecto.nombre.casefold(): proyecto
+        for proyecto in Proyecto.objects.filter(usuario=usuario)
+    }
+
+    with transaction.atomic():
+        for lote in _lotes(_leer_filas(archivo), tamaño_lote):
+            nuevos = {}
+            modificados = {}
+            for numero, fila in lote:
+                nombre = (fila.get('nombre') or '').strip()
+                if not nombre:
+                    resultado.registrar(numero, '', 'error', 'El nombre es obligatorio')
+                    continue
+
+                clave = nombre.casefold()
+                pendiente = clave in nuevos
+                actual = nuevos.get(clave) or existentes.get(clave)
+                if actual is not None and not sobrescribir:
+                    resultado.registrar(numero, nombre, 'omitido', 'Ya existe un proyecto con ese nombre')
+                    continue
+
+                # Se trabaja sobre una copia para no dejar cambios a medias si la fila es inválida
+                proyecto = copy.copy(actual) if actual is not None else Proyecto(nombre=nombre, usuario=usuario)
+                try:
+                    _aplicar_fila(proyecto, fila)
+                except ValidationError as error:
+                    resultado.registrar(numero, nombre, 'error', _mensaje_error(error))
+                    continue
+
+                if actual is None or pendiente:
+                    nuevos[clave] = proyecto
+                    resultado.registrar(numero, nombre, 'actualizado' if pendiente else 'creado')
+                else:
+                    proyecto.updated_at = ahora
+                    existentes[clave] = modificados[proyecto.pk] = proyecto
+                    resultado.registrar(numero, nombre, 'actualizado')
+
+            if nuevos:
+                Proyecto.objects.bulk_create(nuevos.values(), batch_size=tamaño_lote)
+                existentes.update(nuevos)
+            if modificados:
+                Proyecto.objects.bulk_update(
+                    modificados.values(), CAMPOS_ACTUALIZABLES, batch_size=tamaño_lote
+                )
+
+    # Los signals no se disparan con operaciones masivas
+    if resultado.creados or resultado.actualizados:
+        incrementar_version('usuario', usuario.pk)
+    return resultado
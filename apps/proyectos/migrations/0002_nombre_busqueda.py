@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+def completar_nombre_busqueda(apps, schema_editor):
+    from apps.proyectos.busqueda import normalizar_texto
+    Proyecto = apps.get_model('proyectos', 'Proyecto')
+    proyectos = list(Proyecto.objects.only('id', 'nombre'))
+    for proyecto in proyectos:
+        proyecto.nombre_busqueda = normalizar_texto(proyecto.nombre)
+    Proyecto.objects.bulk_update(proyectos, ['nombre_busqueda'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='nombre_busqueda',
+            field=models.CharField(default='', editable=False, help_text='Nombre normalizado (minúsculas, sin acentos) para búsquedas', max_length=200),
+        ),
+        migrations.RunPython(completar_nombre_busqueda, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['usuario', 'nombre_busqueda'], name='proyecto_usuario_busq_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0002_nombre_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['usuario', 'nombre'], name='proyecto_activos_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.core.validators import RegexValidator
 from django.urls import reverse
 from datetime import datetime
 
+from .busqueda import normalizar_texto
+
 
 class Proyecto(models.Model):
     """Proyectos para la gestión de horas"""
@@ -13,6 +15,12 @@ class Proyecto(models.Model):
     fecha_inicio = models.DateField(null=True, blank=True)
     fecha_fin = models.DateField(null=True, blank=True)
     activo = models.BooleanField(default=True)
+    nombre_busqueda = models.CharField(
+        max_length=200,
+        editable=False,
+        default='',
+        help_text="Nombre normalizado (minúsculas, sin acentos) para búsquedas"
+    )
     año = models.IntegerField(editable=False, null=True, blank=True)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proyectos')
     color_hex = models.CharField(
@@ -39,6 +47,13 @@ class Proyecto(models.Model):
                 name='unique_project_name_per_user'
             )
         ]
+        indexes = [
+            models.Index(fields=['usuario', 'nombre_busqueda'], name='proyecto_usuario_busq_idx'),
+            # Selectores de proyectos activos (formularios, filtros, importación)
+            models.Index(
+                fields=['usuario', 'nombre'], condition=models.Q(activo=True), name='proyecto_activos_idx'
+            ),
+        ]
 
     def __str__(self):
         if self.cliente:
@@ -55,6 +70,8 @@ class Proyecto(models.Model):
             self.año = self.fecha_inicio.year
         elif not self.año:
             self.año = datetime.now().year
+
+        self.nombre_busqueda = normalizar_texto(self.nombre)
         
         super().save(*args, **kwargs)
 
@@ -93,10 +110,10 @@ class Proyecto(models.Model):
 
     @property
     def total_horas_registradas(self):
-        """Total de horas registradas en este proyecto"""
-        return self.registros_horas.aggregate(
-            total=models.Sum('horas')
-        )['total'] or 0
+        """Total de horas registradas en este proyecto (incluye las archivadas)"""
+        activas = self.registros_horas.aggregate(total=models.Sum('horas'))['total'] or 0
+        archivadas = self.registros_archivados.aggregate(total=models.Sum('horas'))['total'] or 0
+        return activas + archivadas
 
     def get_horas_por_tipo(self):
         """Retorna las horas agrupadas por tipo de tarea"""
@@ -107,13 +124,14 @@ class Proyecto(models.Model):
         ).order_by('tipo_tarea')
 
     def get_horas_por_mes(self, año=None):
-        """Retorna las horas agrupadas por mes"""
-        queryset = self.registros_horas.all()
-        if año:
-            queryset = queryset.filter(fecha__year=año)
-        
-        return queryset.extra(
-            select={'mes': 'strftime("%%m", fecha)'}
-        ).values('mes').annotate(
-            total_horas=models.Sum('horas')
-        ).order_by('mes')
+        """Retorna las horas agrupadas por mes (meses sin registros en cero)"""
+        from apps.horas.agregaciones import rango_año, serie_temporal
+
+        fecha_inicio, fecha_fin = rango_año(año) if año else (None, None)
+        serie = serie_temporal(self.registros_horas.all(), 'mes', fecha_inicio, fecha_fin)
+        return [{
+            'mes': f"{punto['periodo'].month:02d}",
+            'periodo': punto['periodo'],
+            'total_horas': punto['total_horas'],
+            'total_registros': punto['total_registros'],
+        } for punto in serie]
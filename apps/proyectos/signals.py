@@ -0,0 +1,17 @@
+"""
+Signals de Proyecto.
+
+Se registran desde ProyectosConfig.ready().
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.versionado import incrementar_version
+from .models import Proyecto
+
+
+@receiver(post_save, sender=Proyecto)
+@receiver(post_delete, sender=Proyecto)
+def invalidar_derivados(sender, instance, **kwargs):
+    """Nombre, color o estado cambiados: descarta los datos cacheados del usuario"""
+    incrementar_version('usuario', instance.usuario_id)
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.exceptions import ValidationError
@@ -404,3 +404,302 @@ class ProyectoPermissionsTest(TestCase):
         data = response.json()
         self.assertEqual(len(data), 1)  # Solo su proyecto
         self.assertEqual(data[0]['nombre'], 'User1 Project')
+
+
+class ProyectoBusquedaTest(TestCase):
+    """Pruebas para la búsqueda incremental de proyectos"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='testpass123')
+        self.gestion = Proyecto.objects.create(
+            nombre='Gestión Interna', cliente='Acme', usuario=self.user
+        )
+        self.migracion = Proyecto.objects.create(
+            nombre='Migración de Gestores', cliente='Beta', usuario=self.user
+        )
+        Proyecto.objects.create(nombre='Soporte', cliente='Gestamp', usuario=self.user)
+        Proyecto.objects.create(nombre='Gestión Ajena', usuario=self.otro)
+        Proyecto.objects.create(nombre='Gestión Vieja', activo=False, usuario=self.user)
+
+    def test_nombre_busqueda_normalizado(self):
+        """El nombre se guarda en minúsculas y sin acentos"""
+        self.assertEqual(self.gestion.nombre_busqueda, 'gestion interna')
+
+    def test_ranking_prefijo_primero(self):
+        """Primero los que empiezan con el texto, luego palabras y cliente"""
+        from .busqueda import buscar_proyectos
+
+        proyectos, hay_mas = buscar_proyectos(self.user, 'Gest')
+        self.assertEqual(proyectos[0], self.gestion)
+        self.assertEqual([p.nombre for p in proyectos[1:]], ['Migración de Gestores', 'Soporte'])
+        self.assertFalse(hay_mas)
+
+        proyectos, hay_mas = buscar_proyectos(self.user, 'gest', limite=1)
+        self.assertEqual(proyectos, [self.gestion])
+        self.assertTrue(hay_mas)
+
+    def test_api_formato_select2(self):
+        """La API responde en el formato de resultados de Select2"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/api/proyectos/buscar/', {'q': 'migra'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([r['id'] for r in data['results']], [self.migracion.id])
+        self.assertEqual(data['results'][0]['text'], str(self.migracion))
+        self.assertFalse(data['pagination']['more'])
+
+    def test_api_paginas_sin_repetidos(self):
+        """Cada página de Select2 continúa donde terminó la anterior"""
+        self.client.login(username='testuser', password='testpass123')
+        paginas = [
+            self.client.get('/api/proyectos/buscar/', {'q': 'gest', 'limite': 1, 'page': pagina}).json()
+            for pagina in (1, 2, 3)
+        ]
+        self.assertEqual(
+            [[r['nombre'] for r in data['results']] for data in paginas],
+            [['Gestión Interna'], ['Migración de Gestores'], ['Soporte']]
+        )
+        self.assertEqual([data['pagination']['more'] for data in paginas], [True, True, False])
+
+    def test_filtro_prefijo_con_sucesor(self):
+        """El rango del prefijo termina en el texto siguiente, sin carácter centinela"""
+        from .busqueda import _sucesor, filtro_prefijo
+
+        self.assertEqual(_sucesor('gest'), 'gesu')
+        self.assertEqual(_sucesor('a' + chr(0x10FFFF)), 'b')
+        self.assertIsNone(_sucesor(chr(0x10FFFF)))
+        self.assertEqual(
+            list(Proyecto.objects.filter(filtro_prefijo('nombre_busqueda', 'gestion')).order_by('nombre_busqueda')
+                 .values_list('nombre', flat=True)),
+            ['Gestión Ajena', 'Gestión Interna', 'Gestión Vieja']
+        )
+
+    def test_widget_renderiza_solo_seleccionado(self):
+        """El formulario no embebe todos los proyectos como opciones"""
+        from apps.horas.forms import RegistroHoraForm
+
+        form = RegistroHoraForm(user=self.user, initial={'proyecto': self.gestion.pk})
+        html = str(form['proyecto'])
+        self.assertIn('data-ajax--url="/api/proyectos/buscar/"', html)
+        self.assertIn('Gestión Interna', html)
+        self.assertNotIn('Soporte', html)
+
+    def test_filtro_lista_sin_acentos(self):
+        """El filtro por nombre de la lista ignora acentos y mayúsculas"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('proyectos:proyecto_list'), {'nombre': 'MIGRACION'})
+        self.assertEqual(list(response.context['proyectos']), [self.migracion])
+
+
+class ProyectoFavoritosTest(TestCase):
+    """Pruebas para el ranking de proyectos favoritos"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.frecuente = Proyecto.objects.create(nombre='Frecuente', usuario=self.user)
+        self.reciente = Proyecto.objects.create(nombre='Reciente', usuario=self.user)
+        self.sin_uso = Proyecto.objects.create(nombre='Sin uso', usuario=self.user)
+
+    def _registrar(self, proyecto, dias_atras, horas=1):
+        from datetime import timedelta
+        from apps.horas.models import RegistroHora
+        from apps.core.models import Periodo
+
+        periodo, _ = Periodo.objects.get_or_create(
+            usuario=self.user, nombre='P',
+            defaults={'fecha_inicio': date(2020, 1, 1), 'fecha_fin': date(2030, 1, 1),
+                      'horas_objetivo': 100}
+        )
+        return RegistroHora.objects.create(
+            fecha=date.today() - timedelta(days=dias_atras), horas=horas,
+            proyecto=proyecto, periodo=periodo, usuario=self.user
+        )
+
+    def test_puntaje_pondera_recencia(self):
+        """Con igual uso gana el más reciente; fuera de la ventana no puntúa"""
+        from .favoritos import calcular_puntaje
+
+        hoy = date(2025, 8, 31)
+        self.assertGreater(
+            calcular_puntaje(3, date(2025, 8, 30), hoy),
+            calcular_puntaje(3, date(2025, 8, 5), hoy)
+        )
+        self.assertEqual(calcular_puntaje(0, None, hoy), 0.0)
+
+    def test_api_una_consulta_y_cache(self):
+        """El ranking se resuelve en una consulta y se cachea hasta el próximo registro"""
+        from .favoritos import calcular_favoritos
+
+        for dias in (20, 21, 22):
+            self._registrar(self.frecuente, dias)
+        self._registrar(self.reciente, 0)
+
+        with self.assertNumQueries(1):
+            datos = calcular_favoritos(self.user)
+        self.assertEqual([p['id'] for p in datos['favoritos']], [self.reciente.id, self.frecuente.id])
+        self.assertEqual(len(datos['todos']), 3)
+
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get('/proyectos/api/favoritos/')
+        self._registrar(self.sin_uso, 0)
+        response = self.client.get('/proyectos/api/favoritos/')
+        self.assertIn(self.sin_uso.id, [p['id'] for p in response.json()['favoritos']])
+
+    def test_ajustes_en_tiempo_de_ejecucion(self):
+        """Los ajustes FAVORITOS_* se respetan con override_settings, también en cache"""
+        from .favoritos import obtener_favoritos
+
+        self._registrar(self.frecuente, 20)
+        self._registrar(self.reciente, 0)
+        self.assertEqual(len(obtener_favoritos(self.user)['favoritos']), 2)
+
+        with override_settings(FAVORITOS_CANTIDAD=1):
+            self.assertEqual([p['id'] for p in obtener_favoritos(self.user)['favoritos']], [self.reciente.id])
+        with override_settings(FAVORITOS_VENTANA_DIAS=10):
+            self.assertEqual([p['id'] for p in obtener_favoritos(self.user)['favoritos']], [self.reciente.id])
+
+
+class ProyectoListPaginadaTest(TestCase):
+    """Pruebas para la lista de proyectos paginada y anotada"""
+
+    def setUp(self):
+        from apps.core.models import Periodo
+        from apps.horas.models import RegistroHora
+
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        periodo = Periodo.objects.create(
+            nombre='P', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            horas_objetivo=100, usuario=self.user
+        )
+        for i in range(15):
+            Proyecto.objects.create(nombre=f'Proyecto {i:02d}', usuario=self.user)
+        for i in range(3):
+            Proyecto.objects.create(nombre=f'Inactivo {i}', activo=False, usuario=self.user)
+        self.destacado = Proyecto.objects.get(nombre='Proyecto 14')
+        for dia in (6, 7):
+            RegistroHora.objects.create(
+                fecha=date(2025, 1, dia), horas=4, proyecto=self.destacado,
+                periodo=periodo, usuario=self.user
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_paginacion_por_estado(self):
+        """Cada estado se pagina por separado con sus totales"""
+        response = self.client.get(reverse('proyectos:proyecto_list'), {'pagina_activos': 2})
+        self.assertEqual(response.context['total_activos'], 15)
+        self.assertEqual(response.context['total_inactivos'], 3)
+        self.assertEqual(len(response.context['proyectos_activos']), 3)
+        self.assertEqual(response.context['proyectos_activos'].number, 2)
+        self.assertEqual(len(response.context['proyectos_inactivos']), 3)
+
+    def test_orden_por_horas_y_anotaciones(self):
+        """Ordena por las anotaciones y expone totales por proyecto"""
+        response = self.client.get(reverse('proyectos:proyecto_list'), {'orden': 'horas'})
+        primero = response.context['proyectos_activos'][0]
+        self.assertEqual(primero, self.destacado)
+        self.assertEqual(primero.total_horas, 8)
+        self.assertEqual(primero.registros, 2)
+        self.assertEqual(primero.ultimo_registro, date(2025, 1, 7))
+
+    @override_settings(FRAGMENTOS_TIMEOUT=0)
+    def test_consultas_constantes(self):
+        """La cantidad de consultas no depende de la cantidad de proyectos"""
+        # Sin cache de fragmentos: se miden las consultas del renderizado completo
+        url = reverse('proyectos:proyecto_list')
+        self.client.get(url)
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as antes:
+            self.client.get(url)
+        for i in range(20):
+            Proyecto.objects.create(nombre=f'Extra {i}', usuario=self.user)
+        with CaptureQueriesContext(connection) as despues:
+            self.client.get(url)
+        self.assertEqual(len(antes), len(despues))
+
+
+class ProyectoImportTest(TestCase):
+    """Pruebas para la importación masiva de proyectos desde CSV"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        Proyecto.objects.create(nombre='Existente', cliente='Original', usuario=self.user)
+        self.client.login(username='testuser', password='testpass123')
+
+    def _archivo(self, contenido, nombre='proyectos.csv'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return SimpleUploadedFile(nombre, contenido.encode('utf-8'), content_type='text/csv')
+
+    def test_importacion_en_lotes(self):
+        """Crea proyectos en varios lotes y calcula los campos derivados"""
+        from .importacion import importar_proyectos
+
+        filas = '\n'.join(f'Importado {i},Cliente {i},2025-03-01' for i in range(7))
+        archivo = self._archivo('nombre,cliente,fecha_inicio\n' + filas + '\n')
+        resultado = importar_proyectos(self.user, archivo, tamaño_lote=3)
+
+        self.assertEqual(resultado.creados, 7)
+        self.assertEqual(resultado.procesadas, 7)
+        proyecto = Proyecto.objects.get(nombre='Importado 3')
+        self.assertEqual(proyecto.año, 2025)
+        self.assertEqual(proyecto.nombre_busqueda, 'importado 3')
+
+    def test_duplicados_y_sobrescribir(self):
+        """Los nombres existentes se omiten, o se actualizan con sobrescribir"""
+        from .importacion import importar_proyectos
+
+        contenido = 'Nombre;Cliente\nEXISTENTE;Nuevo cliente\nOtro;ACME\n'
+        resultado = importar_proyectos(self.user, self._archivo(contenido))
+        self.assertEqual((resultado.creados, resultado.omitidos), (1, 1))
+        self.assertEqual(Proyecto.objects.get(nombre='Existente').cliente, 'Original')
+
+        resultado = importar_proyectos(self.user, self._archivo(contenido), sobrescribir=True)
+        self.assertEqual(resultado.actualizados, 2)
+        self.assertEqual(Proyecto.objects.get(nombre='Existente').cliente, 'Nuevo cliente')
+        self.assertEqual(Proyecto.objects.filter(usuario=self.user).count(), 2)
+
+    def test_errores_por_fila(self):
+        """Las filas inválidas se reportan sin detener la importación"""
+        from .importacion import importar_proyectos
+
+        contenido = (
+            'nombre,color_hex,fecha_inicio,fecha_fin\n'
+            'Color malo,rojo,,\n'
+            'Fecha mala,,31-31-2025,\n'
+            'Fechas invertidas,,2025-05-01,2025-01-01\n'
+            ',,,\n'
+            'Correcto,#112233,01/02/2025,\n'
+        )
+        resultado = importar_proyectos(self.user, self._archivo(contenido))
+        self.assertEqual(resultado.errores, 4)
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(Proyecto.objects.get(nombre='Correcto').fecha_inicio, date(2025, 2, 1))
+
+    def test_columna_nombre_obligatoria(self):
+        """Sin columna 'nombre' el archivo se rechaza"""
+        from .importacion import importar_proyectos
+
+        with self.assertRaises(ValidationError):
+            importar_proyectos(self.user, self._archivo('cliente\nACME\n'))
+
+    def test_vista_importacion(self):
+        """La vista procesa el archivo y muestra el resultado"""
+        response = self.client.post(reverse('proyectos:proyecto_import'), {
+            'archivo_csv': self._archivo('nombre\nDesde vista\n'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resultado'].creados, 1)
+        self.assertTrue(Proyecto.objects.filter(nombre='Desde vista', usuario=self.user).exists())
+
+        response = self.client.post(reverse('proyectos:proyecto_import'), {
+            'archivo_csv': self._archivo('nombre\nX\n', nombre='proyectos.txt'),
+        })
+        self.assertFalse(response.context['form'].is_valid())
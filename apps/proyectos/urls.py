@@ -7,6 +7,7 @@ urlpatterns = [
     # Vistas web
     path('', views.ProyectoListView.as_view(), name='proyecto_list'),
     path('crear/', views.ProyectoCreateView.as_view(), name='proyecto_create'),
+    path('importar/', views.ProyectoImportView.as_view(), name='proyecto_import'),
     path('<int:pk>/', views.ProyectoDetailView.as_view(), name='proyecto_detail'),
     path('<int:pk>/editar/', views.ProyectoUpdateView.as_view(), name='proyecto_update'),
     path('<int:pk>/eliminar/', views.ProyectoDeleteView.as_view(), name='proyecto_delete'),
@@ -17,5 +18,6 @@ urlpatterns = [
     path('api/<int:pk>/', views.ProyectoDetailAPIView.as_view(), name='api_detail'),
     path('api/años/', views.ProyectoAñosAPIView.as_view(), name='api_años'),
     path('api/activos/', views.ProyectoActivosAPIView.as_view(), name='api_activos'),
+    path('api/buscar/', views.ProyectoBusquedaAPIView.as_view(), name='api_buscar'),
     path('api/favoritos/', views.ProyectoFavoritosAPIView.as_view(), name='api_favoritos'),
 ]
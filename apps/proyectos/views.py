@@ -1,6 +1,6 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView
+from django.views.generic import ListView, CreateView, UpdateView, DetailView, DeleteView, FormView
 from django.views import View
 from django.http import JsonResponse
 from django.contrib import messages
@@ -8,18 +8,38 @@ from django.urls import reverse_lazy
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+import csv
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Max, Q, Sum
+from datetime import date
+from apps.core.fragmentos import contexto_perezoso
+from apps.horas.agregaciones import serie_temporal
 from .models import Proyecto
-from .forms import ProyectoForm, ProyectoFiltroForm, ProyectoRapidoForm
+from .busqueda import LIMITE_RESULTADOS, buscar_proyectos, normalizar_texto
+from .favoritos import obtener_favoritos
+from .forms import ProyectoForm, ProyectoFiltroForm, ProyectoRapidoForm, ProyectoImportForm
+from .importacion import COLUMNAS, importar_proyectos
 
 
 class ProyectoListView(LoginRequiredMixin, ListView):
-    """Lista de proyectos con filtros y separación por estado"""
+    """Lista de proyectos con filtros, paginada por estado"""
     model = Proyecto
     template_name = 'proyectos/proyecto_list.html'
     context_object_name = 'proyectos'
+    # Proyectos por página; activos e inactivos se paginan por separado
+    por_pagina = 12
+    
+    # Ordenamientos permitidos: valor del parámetro -> expresiones de order_by
+    ORDENAMIENTOS = {
+        'nombre': ('nombre_busqueda',),
+        'horas': (F('total_horas').desc(nulls_last=True), 'nombre_busqueda'),
+        'reciente': (F('ultimo_registro').desc(nulls_last=True), 'nombre_busqueda'),
+        'registros': ('-registros', 'nombre_busqueda'),
+    }
     
     def get_queryset(self):
-        queryset = Proyecto.objects.filter(usuario=self.request.user).order_by('-activo', 'nombre')
+        queryset = Proyecto.objects.filter(usuario=self.request.user)
         
         # Filtros
         nombre = self.request.GET.get('nombre', '').strip()
@@ -27,7 +47,7 @@ class ProyectoListView(LoginRequiredMixin, ListView):
         estado = self.request.GET.get('estado', '').strip()
         
         if nombre:
-            queryset = queryset.filter(nombre__icontains=nombre)
+            queryset = queryset.filter(nombre_busqueda__contains=normalizar_texto(nombre))
         
         if cliente:
             queryset = queryset.filter(cliente__icontains=cliente)
@@ -39,13 +59,31 @@ class ProyectoListView(LoginRequiredMixin, ListView):
         
         return queryset
     
+    def get_orden(self):
+        orden = self.request.GET.get('orden', 'nombre')
+        return orden if orden in self.ORDENAMIENTOS else 'nombre'
+    
+    def _paginar(self, queryset, parametro, total):
+        """Página de `queryset` según el parámetro GET indicado"""
+        paginator = Paginator(queryset, self.por_pagina)
+        paginator.count = total  # ya conocido: evita un COUNT sobre la consulta agrupada
+        pagina = paginator.get_page(self.request.GET.get(parametro))
+        
+        parametros = self.request.GET.copy()
+        parametros.pop(parametro, None)
+        return pagina, parametros.urlencode()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        orden = self.get_orden()
+        context['orden'] = orden
         
-        # Separar proyectos por estado
-        all_projects = list(context['proyectos'])
-        context['proyectos_activos'] = [p for p in all_projects if p.activo]
-        context['proyectos_inactivos'] = [p for p in all_projects if not p.activo]
+        # Conteos y páginas se calculan solo si los fragmentos no están en cache
+        context.update(contexto_perezoso(
+            lambda: self._resumen(self.object_list, orden),
+            ('total_proyectos', 'total_activos', 'total_inactivos', 'proyectos_activos',
+             'querystring_activos', 'proyectos_inactivos', 'querystring_inactivos'),
+        ))
         
         # Información de filtros
         context['filtros_aplicados'] = bool(
@@ -55,6 +93,34 @@ class ProyectoListView(LoginRequiredMixin, ListView):
         )
         
         return context
+    
+    def _resumen(self, queryset, orden):
+        """Totales por estado y la página pedida de cada estado"""
+        # Conteos por estado en una sola consulta
+        conteos = queryset.aggregate(
+            total=Count('id'),
+            activos=Count('id', filter=Q(activo=True)),
+        )
+        resumen = {
+            'total_proyectos': conteos['total'],
+            'total_activos': conteos['activos'],
+            'total_inactivos': conteos['total'] - conteos['activos'],
+        }
+        
+        # Totales de horas por proyecto en la misma consulta de cada página
+        anotado = queryset.annotate(
+            total_horas=Sum('registros_horas__horas'),
+            ultimo_registro=Max('registros_horas__fecha'),
+            registros=Count('registros_horas'),
+        ).order_by(*self.ORDENAMIENTOS[orden], 'pk')
+        
+        resumen['proyectos_activos'], resumen['querystring_activos'] = self._paginar(
+            anotado.filter(activo=True), 'pagina_activos', resumen['total_activos']
+        )
+        resumen['proyectos_inactivos'], resumen['querystring_inactivos'] = self._paginar(
+            anotado.filter(activo=False), 'pagina_inactivos', resumen['total_inactivos']
+        )
+        return resumen
 
 
 class ProyectoCreateView(LoginRequiredMixin, CreateView):
@@ -70,6 +136,39 @@ class ProyectoCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
+class ProyectoImportView(LoginRequiredMixin, FormView):
+    """Importar proyectos desde un archivo CSV"""
+    form_class = ProyectoImportForm
+    template_name = 'proyectos/proyecto_import.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['columnas'] = COLUMNAS
+        return context
+    
+    def form_valid(self, form):
+        try:
+            resultado = importar_proyectos(
+                self.request.user,
+                form.cleaned_data['archivo_csv'],
+                sobrescribir=form.cleaned_data['sobrescribir']
+            )
+        except ValidationError as e:
+            form.add_error('archivo_csv', e)
+            return self.form_invalid(form)
+        except (UnicodeDecodeError, csv.Error) as e:
+            form.add_error('archivo_csv', f'No se pudo leer el archivo: {e}')
+            return self.form_invalid(form)
+        
+        messages.success(
+            self.request,
+            f'Importación finalizada: {resultado.creados} creados, '
+            f'{resultado.actualizados} actualizados, {resultado.omitidos} omitidos, '
+            f'{resultado.errores} con errores'
+        )
+        return self.render_to_response(self.get_context_data(form=self.form_class(), resultado=resultado))
+
+
 class ProyectoDetailView(LoginRequiredMixin, DetailView):
     """Detalle de proyecto"""
     model = Proyecto
@@ -77,6 +176,30 @@ class ProyectoDetailView(LoginRequiredMixin, DetailView):
     
     def get_queryset(self):
         return Proyecto.objects.filter(usuario=self.request.user)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        registros = self.object.registros_horas.all()
+        
+        estadisticas = registros.aggregate(
+            total_horas=Sum('horas'),
+            total_registros=Count('id'),
+            ultimo_registro=Max('fecha')
+        )
+        context.update(estadisticas)
+        context['registros_recientes'] = registros.order_by('-fecha', '-created_at')[:10]
+        
+        # Últimos 12 meses, incluyendo los meses sin horas
+        hoy = date.today()
+        indice_mes = hoy.year * 12 + hoy.month - 1 - 11
+        desde = date(indice_mes // 12, indice_mes % 12 + 1, 1)
+        horas_por_mes = serie_temporal(registros, 'mes', desde, hoy)
+        maximo = max((punto['total_horas'] for punto in horas_por_mes), default=0)
+        for punto in horas_por_mes:
+            punto['porcentaje'] = float(punto['total_horas'] / maximo * 100) if maximo else 0
+        context['horas_por_mes'] = horas_por_mes
+        
+        return context
 
 
 class ProyectoUpdateView(LoginRequiredMixin, UpdateView):
@@ -201,46 +324,37 @@ class ProyectoFavoritosAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from django.db.models import Count
-        from apps.horas.models import RegistroHora
-        from datetime import date, timedelta
-        
-        # Obtener todos los proyectos activos
-        proyectos = Proyecto.objects.filter(
-            usuario=request.user,
-            activo=True
-        ).order_by('nombre')
-        
-        # Calcular favoritos basado en uso frecuente (últimos 30 días)
-        fecha_limite = date.today() - timedelta(days=30)
-        
-        favoritos_ids = RegistroHora.objects.filter(
-            usuario=request.user,
-            fecha__gte=fecha_limite
-        ).values('proyecto').annotate(
-            uso_count=Count('id')
-        ).order_by('-uso_count')[:5].values_list('proyecto', flat=True)
-        
-        # Serializar datos
-        todos_data = []
-        favoritos_data = []
-        
-        for proyecto in proyectos:
-            proyecto_data = {
-                'id': proyecto.id,
-                'nombre': proyecto.nombre,
-                'cliente': proyecto.cliente,
-                'color': proyecto.color_hex
-            }
-            todos_data.append(proyecto_data)
-            
-            if proyecto.id in favoritos_ids:
-                favoritos_data.append(proyecto_data)
-        
-        # Ordenar favoritos por frecuencia de uso
-        favoritos_data.sort(key=lambda x: list(favoritos_ids).index(x['id']))
-        
+        return Response(obtener_favoritos(request.user))
+
+
+class ProyectoBusquedaAPIView(APIView):
+    """API de búsqueda incremental de proyectos (formato Select2)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        texto = request.GET.get('q', request.GET.get('term', ''))
+        try:
+            limite = max(min(int(request.GET.get('limite', LIMITE_RESULTADOS)), 50), 1)
+        except ValueError:
+            limite = LIMITE_RESULTADOS
+        # Select2 pide la página siguiente al llegar al final de la lista
+        try:
+            pagina = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            pagina = 1
+        incluir_inactivos = request.GET.get('inactivos') == '1'
+
+        proyectos, hay_mas = buscar_proyectos(
+            request.user, texto, limite=limite, solo_activos=not incluir_inactivos,
+            desplazamiento=(pagina - 1) * limite
+        )
         return Response({
-            'favoritos': favoritos_data,
-            'todos': todos_data
+            'results': [{
+                'id': p.id,
+                'text': str(p),
+                'nombre': p.nombre,
+                'cliente': p.cliente,
+                'color': p.color_hex,
+            } for p in proyectos],
+            'pagination': {'more': hay_mas},
         })
@@ -0,0 +1,140 @@
+"""
+Cache en disco de archivos exportados.
+
+Cada exportación se guarda en EXPORTACIONES_CACHE_DIR (bajo MEDIA_ROOT)
+con un nombre derivado del usuario, los parámetros normalizados, el formato
+y una versión de los datos del usuario leída de la base (cantidad y última
+modificación de sus horas, archivadas y proyectos): al cambiar sus horas o
+proyectos, en cualquier proceso, el nombre cambia y el archivo anterior
+deja de usarse. Los archivos están en disco compartido, así que la versión
+no puede depender de contadores de un solo proceso. Los aciertos se envían
+con `FileResponse`, que el servidor WSGI entrega con `sendfile` sin copiar
+el contenido por Python; CSV y JSON guardan además una variante `.gz` para
+clientes que aceptan gzip.
+
+Al superar EXPORTACIONES_CACHE_MAX_MB se borran los archivos usados hace
+más tiempo (cada acierto actualiza la fecha de modificación).
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+from apps.core.middleware import CompresionMiddleware
+from apps.horas.models import RegistroHora, RegistroHoraArchivo
+from apps.proyectos.models import Proyecto
+
+from .escritores import CONTENT_TYPES
+
+COMPRIMIBLES = ('csv', 'json')
+
+
+def directorio():
+    ruta = Path(settings.EXPORTACIONES_CACHE_DIR)
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def version_datos(usuario_id):
+    """Cantidad y última modificación de lo exportable del usuario (una consulta por tabla)"""
+    partes = []
+    for modelo in (RegistroHora, RegistroHoraArchivo, Proyecto):
+        fila = modelo.objects.filter(usuario_id=usuario_id).aggregate(
+            cantidad=Count('pk'), ultima=Max('updated_at')
+        )
+        partes.append(f"{fila['cantidad']}@{fila['ultima'].isoformat() if fila['ultima'] else '-'}")
+    return '|'.join(partes)
+
+
+def ruta_exportacion(usuario, parametros, formato):
+    """Ruta del archivo para `parametros` normalizados (serializables a JSON)"""
+    huella = hashlib.md5(json.dumps(parametros, sort_keys=True, default=str).encode()).hexdigest()
+    clave = f'reportes:exportacion:{usuario.pk}:{version_datos(usuario.pk)}:{formato}:{huella}'
+    return directorio() / f'{usuario.pk}-{hashlib.sha256(clave.encode()).hexdigest()}.{formato}'
+
+
+def obtener_exportacion(ruta):
+    """True si el archivo está en cache (y lo marca como usado recientemente)"""
+    try:
+        os.utime(ruta)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def guardar_exportacion(ruta, escribir):
+    """
+    Escribe el archivo con `escribir(archivo)` en un temporal y lo mueve a
+    `ruta`; retorna lo que devuelva `escribir`.
+    """
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            resultado = escribir(archivo)
+        if ruta.suffix[1:] in COMPRIMIBLES:
+            with open(temporal, 'rb') as origen, gzip.open(temporal + '.gz', 'wb', compresslevel=6) as destino:
+                shutil.copyfileobj(origen, destino)
+            os.replace(temporal + '.gz', ruta.with_name(ruta.name + '.gz'))
+        os.replace(temporal, ruta)
+    finally:
+        for resto in (temporal, temporal + '.gz'):
+            if os.path.exists(resto):
+                os.remove(resto)
+    desalojar(conservar=ruta)
+    return resultado
+
+
+def desalojar(limite_bytes=None, conservar=None):
+    """Borra los archivos usados hace más tiempo hasta quedar bajo el límite"""
+    if limite_bytes is None:
+        limite_bytes = settings.EXPORTACIONES_CACHE_MAX_MB * 1024 * 1024
+
+    # Cada exportación cuenta junto con su variante .gz
+    grupos = {}
+    for entrada in os.scandir(directorio()):
+        if entrada.name.startswith('.tmp-') or not entrada.is_file():
+            continue
+        base = entrada.name[:-3] if entrada.name.endswith('.gz') else entrada.name
+        estado = entrada.stat()
+        tamaño, uso = grupos.get(base, (0, 0))
+        grupos[base] = (tamaño + estado.st_size, max(uso, estado.st_mtime))
+
+    total = sum(tamaño for tamaño, _ in grupos.values())
+    for base, (tamaño, _) in sorted(grupos.items(), key=lambda item: item[1][1]):
+        if total <= limite_bytes:
+            break
+        if conservar is not None and base == conservar.name:
+            continue
+        for nombre in (base, base + '.gz'):
+            try:
+                os.remove(directorio() / nombre)
+            except FileNotFoundError:
+                pass
+        total -= tamaño
+
+
+def respuesta_exportacion(request, ruta, nombre_archivo):
+    """`FileResponse` del archivo, o de su variante .gz si el cliente la acepta"""
+    formato = ruta.suffix[1:]
+    servida, codificacion = ruta, None
+    variante = ruta.with_name(ruta.name + '.gz')
+    if formato in COMPRIMIBLES and CompresionMiddleware.ACEPTA_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        if variante.exists():
+            servida, codificacion = variante, 'gzip'
+
+    response = FileResponse(
+        open(servida, 'rb'), as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPES[formato]
+    )
+    if codificacion:
+        response['Content-Encoding'] = codificacion
+    if formato in COMPRIMIBLES:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,115 @@
+"""
+Reportes de equipo: horas de todos los usuarios agrupadas (solo staff).
+
+Cada reporte es una consulta agrupada por las dimensiones pedidas (usuario,
+proyecto e intervalo de tiempo) sobre el rango de fechas, apoyada en el
+índice `(fecha, usuario, proyecto)`; si el rango alcanza registros
+archivados se agrupa también el archivo y se suman ambos resultados.
+
+El resultado completo se guarda en cache EQUIPO_CACHE_TIMEOUT segundos, así
+que recorrer sus páginas no repite la consulta.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from apps.horas.agregaciones import GRANULARIDADES
+from apps.horas.models import RegistroHora, RegistroHoraArchivo
+
+# Dimensión -> campos agrupados (el primero identifica el grupo)
+DIMENSIONES = {
+    'usuario': ('usuario_id', 'usuario__username'),
+    'proyecto': ('proyecto_id', 'proyecto__nombre', 'proyecto__cliente'),
+    'intervalo': ('intervalo',),
+}
+
+# Dimensión -> campos por los que se ordena (el id desempata nombres repetidos)
+ORDEN = {
+    'usuario': ('usuario__username', 'usuario_id'),
+    'proyecto': ('proyecto__nombre', 'proyecto_id'),
+    'intervalo': ('intervalo',),
+}
+
+# Nombres de los campos en la respuesta
+NOMBRES = {
+    'usuario__username': 'usuario',
+    'proyecto__nombre': 'proyecto',
+    'proyecto__cliente': 'cliente',
+}
+
+
+def _agrupar(modelo, fecha_inicio, fecha_fin, granularidad, agrupar, proyectos, usuarios):
+    queryset = modelo.objects.filter(fecha__gte=fecha_inicio, fecha__lte=fecha_fin)
+    if proyectos:
+        queryset = queryset.filter(proyecto_id__in=proyectos)
+    if usuarios:
+        queryset = queryset.filter(usuario_id__in=usuarios)
+    if 'intervalo' in agrupar:
+        queryset = queryset.annotate(intervalo=GRANULARIDADES[granularidad]('fecha'))
+    campos = [campo for dimension in agrupar for campo in DIMENSIONES[dimension]]
+    return queryset.values(*campos).annotate(
+        total_horas=Sum('horas'), total_registros=Count('id')
+    ).order_by()
+
+
+def _orden(fila, agrupar):
+    # Valores crudos (no texto) con los vacíos al final, como `pivote._orden`
+    valores = [fila[campo] for dimension in agrupar for campo in ORDEN[dimension]]
+    return tuple((valor is None, valor if valor is not None else '') for valor in valores)
+
+
+def agregar_horas_equipo(fecha_inicio, fecha_fin, granularidad='semana',
+                         agrupar=('usuario', 'proyecto', 'intervalo'), proyectos=(), usuarios=()):
+    """
+    Filas `{dimensiones..., total_horas, total_registros}` ordenadas por las
+    dimensiones en el orden de `agrupar` (usuarios y proyectos por nombre,
+    intervalos por fecha), más los totales generales.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad no soportada: {granularidad}")
+    invalidas = set(agrupar) - set(DIMENSIONES)
+    if invalidas or not agrupar:
+        raise ValueError(f"Agrupación no soportada: {', '.join(sorted(invalidas)) or 'vacía'}")
+
+    modelos = [RegistroHora]
+    if RegistroHoraArchivo.objects.filter(fecha__gte=fecha_inicio, fecha__lte=fecha_fin).exists():
+        modelos.append(RegistroHoraArchivo)
+
+    grupos = {}
+    totales = defaultdict(lambda: [Decimal('0'), 0])
+    for modelo in modelos:
+        for fila in _agrupar(modelo, fecha_inicio, fecha_fin, granularidad, agrupar, proyectos, usuarios):
+            clave = tuple(fila[DIMENSIONES[dimension][0]] for dimension in agrupar)
+            grupos.setdefault(clave, fila)
+            totales[clave][0] += fila['total_horas']
+            totales[clave][1] += fila['total_registros']
+
+    filas = []
+    for clave in sorted(grupos, key=lambda clave: _orden(grupos[clave], agrupar)):
+        fila = {NOMBRES.get(campo, campo): valor for campo, valor in grupos[clave].items()}
+        fila['total_horas'], fila['total_registros'] = totales[clave]
+        if 'intervalo' in fila:
+            fila['intervalo'] = fila['intervalo'].isoformat()
+        filas.append(fila)
+
+    return {
+        'filas': filas,
+        'total_horas': sum((fila['total_horas'] for fila in filas), Decimal('0')),
+        'total_registros': sum(fila['total_registros'] for fila in filas),
+    }
+
+
+def reporte_equipo(**parametros):
+    """`agregar_horas_equipo` con cache de corta duración por parámetros"""
+    huella = hashlib.md5(json.dumps(parametros, sort_keys=True, default=str).encode()).hexdigest()
+    clave = f'reportes:equipo:{huella}'
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = agregar_horas_equipo(**parametros)
+        cache.set(clave, resultado, settings.EQUIPO_CACHE_TIMEOUT)
+    return resultado
@@ -0,0 +1,92 @@
+"""
+Escritores de reportes en CSV, XLSX y JSON.
+
+Reciben un archivo binario, los encabezados y un iterable de
+`(tipo, valores)` (el de `TablaPivote.recorrer` o el detalle de registros),
+escriben fila a fila sin armar el reporte en memoria (XLSX con un libro de
+solo escritura de openpyxl) y devuelven la cantidad de filas de datos.
+"""
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+from apps.core.renderers import serializar_json
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def escribir_csv(archivo, encabezados, filas, separador=',', separador_decimal='.'):
+    def texto(valor):
+        if valor is None:
+            return ''
+        if isinstance(valor, (Decimal, float)):
+            return str(valor).replace('.', separador_decimal)
+        return valor
+
+    salida = io.TextIOWrapper(archivo, encoding='utf-8', newline='')
+    writer = csv.writer(salida, delimiter=separador)
+    if encabezados:
+        writer.writerow(encabezados)
+    total = 0
+    for tipo, valores in filas:
+        writer.writerow([texto(valor) for valor in valores])
+        total += tipo == 'dato'
+    salida.flush()
+    salida.detach()
+    return total
+
+
+def escribir_json(archivo, encabezados, filas):
+    archivo.write(b'{"encabezados":' + serializar_json(encabezados or []) + b',"filas":[')
+    total = 0
+    for indice, (tipo, valores) in enumerate(filas):
+        archivo.write((b',' if indice else b'') + serializar_json({'tipo': tipo, 'valores': valores}))
+        total += tipo == 'dato'
+    archivo.write(b']}')
+    return total
+
+
+def escribir_xlsx(archivo, encabezados, filas, titulo='Reporte de Horas'):
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    negrita = Font(bold=True)
+
+    def celdas(valores, resaltar):
+        for valor in valores:
+            if isinstance(valor, Decimal):
+                valor = float(valor)
+            if not resaltar:
+                yield valor
+                continue
+            celda = WriteOnlyCell(ws, value=valor)
+            celda.font = negrita
+            yield celda
+
+    if encabezados:
+        ws.append(list(celdas(encabezados, True)))
+    total = 0
+    for tipo, valores in filas:
+        ws.append(list(celdas(valores, tipo != 'dato')))
+        total += tipo == 'dato'
+    wb.save(archivo)
+    return total
+
+
+ESCRITORES = {
+    'csv': escribir_csv,
+    'xlsx': escribir_xlsx,
+    'json': escribir_json,
+}
+
+
+def nombre_reporte(extension, prefijo='reporte_horas'):
+    return f'{prefijo}_{datetime.date.today().strftime("%Y-%m-%d")}.{extension}'
@@ -4,6 +4,7 @@ from datetime import date, timedelta
 from apps.proyectos.models import Proyecto
 from apps.core.models import Periodo
 from .models import ConfiguracionReporte
+from .pivote import DIMENSIONES
 
 
 class ExportarReporteForm(forms.Form):
@@ -12,9 +13,17 @@ class ExportarReporteForm(forms.Form):
     FORMATO_CHOICES = [
         ('csv', 'CSV (Comma Separated Values)'),
         ('xlsx', 'Excel (XLSX)'),
+        ('json', 'JSON'),
         ('pdf', 'PDF')
     ]
     
+    DIMENSION_CHOICES = [(clave, etiqueta) for clave, (etiqueta, _) in DIMENSIONES.items()]
+    MEDIDA_CHOICES = [
+        ('suma', 'Suma de horas'),
+        ('cantidad', 'Cantidad de registros'),
+        ('promedio', 'Promedio de horas')
+    ]
+    
     SEPARADOR_CHOICES = [
         (',', 'Coma (,)'),
         (';', 'Punto y coma (;)'),
@@ -128,6 +137,43 @@ class ExportarReporteForm(forms.Form):
         ),
         label='Incluir descripciones'
     )
+    
+    # Tabla dinámica (si se eligen filas se exporta agrupado en lugar del detalle)
+    filas = forms.MultipleChoiceField(
+        choices=DIMENSION_CHOICES,
+        required=False,
+        widget=forms.SelectMultiple(
+            attrs={
+                'class': 'form-select',
+                'size': '4'
+            }
+        ),
+        label='Agrupar filas por'
+    )
+    
+    columnas = forms.MultipleChoiceField(
+        choices=DIMENSION_CHOICES,
+        required=False,
+        widget=forms.SelectMultiple(
+            attrs={
+                'class': 'form-select',
+                'size': '4'
+            }
+        ),
+        label='Agrupar columnas por'
+    )
+    
+    medida = forms.ChoiceField(
+        choices=MEDIDA_CHOICES,
+        initial='suma',
+        required=False,
+        widget=forms.Select(
+            attrs={
+                'class': 'form-select'
+            }
+        ),
+        label='Medida'
+    )
 
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
@@ -169,6 +215,19 @@ class ExportarReporteForm(forms.Form):
         if not periodo and not (fecha_inicio and fecha_fin):
             raise ValidationError("Debe seleccionar un período o especificar un rango de fechas")
         
+        # Agrupar por fecha sin otras filas: fechas en filas, proyectos en columnas
+        filas = cleaned_data.get('filas') or []
+        columnas = cleaned_data.get('columnas') or []
+        if not filas and cleaned_data.get('agrupar_por_fecha'):
+            filas = cleaned_data['filas'] = ['fecha']
+            if not columnas:
+                columnas = cleaned_data['columnas'] = ['proyecto']
+        if columnas and not filas:
+            raise ValidationError("Para agrupar por columnas debe elegir al menos una dimensión de filas")
+        if set(filas) & set(columnas):
+            raise ValidationError("Una dimensión no puede estar en filas y columnas a la vez")
+        cleaned_data['medida'] = cleaned_data.get('medida') or 'suma'
+        
         return cleaned_data
 
 
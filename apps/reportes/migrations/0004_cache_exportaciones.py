@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0003_configuracionreporte_separador_decimal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reporteexportacion',
+            name='archivo_cache',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='reporteexportacion',
+            name='desde_cache',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -21,6 +21,9 @@ class ReporteExportacion(models.Model):
     filtros_aplicados = models.JSONField(default=dict, blank=True)
     total_registros = models.IntegerField(default=0)
     tamaño_archivo = models.IntegerField(default=0, help_text="Tamaño en bytes")
+    # Cache en disco: archivo usado y si se sirvió sin regenerarlo
+    archivo_cache = models.CharField(max_length=100, blank=True, db_index=True)
+    desde_cache = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
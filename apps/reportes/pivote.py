@@ -0,0 +1,161 @@
+"""
+Motor de tablas dinámicas (pivote) para exportaciones.
+
+Las dimensiones de filas y columnas se agrupan en la base de datos con una
+sola consulta por tabla (activa y, si el rango llega, archivo); de cada
+grupo se traen suma y cantidad de horas, así que cualquier medida (suma,
+cantidad, promedio) sale del mismo resultado. Las celdas agrupadas se
+guardan en cache por usuario, versión de datos y un hash de los filtros
+normalizados, de modo que repetir una descarga no vuelve a consultar.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from apps.core.versionado import TIMEOUT_DERIVADOS, clave_versionada
+
+# Dimensión -> (etiqueta, expresión de agrupación)
+DIMENSIONES = {
+    'fecha': ('Fecha', 'fecha'),
+    'semana': ('Semana', TruncWeek('fecha')),
+    'mes': ('Mes', TruncMonth('fecha')),
+    'proyecto': ('Proyecto', 'proyecto__nombre'),
+    'cliente': ('Cliente', 'proyecto__cliente'),
+    'tipo_tarea': ('Tipo Tarea', 'tipo_tarea'),
+    'usuario': ('Usuario', 'usuario__username'),
+}
+
+_SIN_GRUPO = object()
+
+MEDIDAS = {
+    'suma': 'Horas',
+    'cantidad': 'Registros',
+    'promedio': 'Promedio',
+}
+
+
+def _valor_medida(medida, horas, registros):
+    if not registros:
+        return None
+    if medida == 'suma':
+        return horas
+    if medida == 'cantidad':
+        return registros
+    return (horas / registros).quantize(Decimal('0.01'))
+
+
+def _orden(clave):
+    # Ordena tuplas de valores heterogéneos dejando los vacíos al final
+    return tuple((valor is None, valor if valor is not None else '') for valor in clave)
+
+
+def _agrupar(registros, filas, columnas):
+    """Celdas `{(fila, columna): [horas, registros]}` de activos y archivados"""
+    alias = [f'd_{dimension}' for dimension in list(filas) + list(columnas)]
+    expresiones = {
+        nombre: F(expresion) if isinstance(expresion, str) else expresion
+        for nombre, (_, expresion) in zip(alias, (DIMENSIONES[d] for d in list(filas) + list(columnas)))
+    }
+    origenes = [registros.activos] + ([registros.archivados] if registros.usa_archivo else [])
+
+    celdas = defaultdict(lambda: [Decimal('0.0'), 0])
+    for queryset in origenes:
+        grupos = (
+            queryset.annotate(**expresiones).values(*alias)
+            .annotate(total=Sum('horas'), cantidad=Count('id'))
+            .order_by()
+        )
+        for grupo in grupos:
+            valores = [grupo[nombre] for nombre in alias]
+            celda = celdas[tuple(valores[:len(filas)]), tuple(valores[len(filas):])]
+            celda[0] += grupo['total']
+            celda[1] += grupo['cantidad']
+    return dict(celdas)
+
+
+def calcular_pivote(usuario, registros, filas, columnas=(), filtros=None):
+    """
+    Celdas agrupadas de `registros` (un `RegistrosConArchivo`), cacheadas
+    por usuario, versión de datos y `filtros` normalizados.
+    """
+    filas, columnas = tuple(filas), tuple(columnas)
+    invalidas = set(filas + columnas) - set(DIMENSIONES)
+    if invalidas or not filas:
+        raise ValueError(f"Dimensiones no soportadas: {', '.join(sorted(invalidas)) or 'sin filas'}")
+    if set(filas) & set(columnas):
+        raise ValueError('Una dimensión no puede estar en filas y columnas a la vez')
+
+    huella = hashlib.md5(json.dumps(
+        {'filtros': filtros or {}, 'filas': filas, 'columnas': columnas}, sort_keys=True, default=str
+    ).encode()).hexdigest()
+    clave = clave_versionada('reportes:pivote', ('usuario', usuario.pk), extra=huella)
+    celdas = cache.get(clave)
+    if celdas is None:
+        celdas = _agrupar(registros, filas, columnas)
+        cache.set(clave, celdas, TIMEOUT_DERIVADOS)
+    return TablaPivote(filas, columnas, celdas)
+
+
+class TablaPivote:
+    """Celdas agrupadas listas para recorrer como filas de un reporte"""
+
+    def __init__(self, filas, columnas, celdas):
+        self.filas = filas
+        self.columnas = columnas
+        self.celdas = celdas
+        self.claves_filas = sorted({fila for fila, _ in celdas}, key=_orden)
+        self.claves_columnas = sorted({columna for _, columna in celdas}, key=_orden)
+
+    def encabezados(self, medida='suma'):
+        etiquetas = [DIMENSIONES[d][0] for d in self.filas]
+        if not self.columnas:
+            return etiquetas + [MEDIDAS[medida]]
+        return etiquetas + [
+            ' / '.join('' if valor is None else str(valor) for valor in clave) for clave in self.claves_columnas
+        ] + ['Total']
+
+    def _fila(self, etiquetas, acumulado, medida):
+        valores = [_valor_medida(medida, *acumulado[columna]) for columna in self.claves_columnas]
+        if self.columnas:
+            horas = sum((acumulado[columna][0] for columna in self.claves_columnas), Decimal('0.0'))
+            registros = sum(acumulado[columna][1] for columna in self.claves_columnas)
+            valores.append(_valor_medida(medida, horas, registros))
+        return list(etiquetas) + valores
+
+    def recorrer(self, medida='suma', subtotales=True, total=True):
+        """
+        Genera `(tipo, valores)` con tipo 'dato', 'subtotal' (al cambiar el
+        primer nivel de filas, si hay más de uno) o 'total'.
+        """
+        if medida not in MEDIDAS:
+            raise ValueError(f"Medida no soportada: {medida}")
+        vacio = lambda: defaultdict(lambda: [Decimal('0.0'), 0])
+        subtotal, general = vacio(), vacio()
+        grupo_actual = _SIN_GRUPO
+        con_subtotales = subtotales and len(self.filas) > 1
+
+        for clave_fila in self.claves_filas:
+            if con_subtotales and grupo_actual is not _SIN_GRUPO and clave_fila[0] != grupo_actual:
+                yield 'subtotal', self._fila([grupo_actual, 'Subtotal'] + [''] * (len(self.filas) - 2),
+                                             subtotal, medida)
+                subtotal = vacio()
+            grupo_actual = clave_fila[0]
+
+            acumulado = vacio()
+            for columna in self.claves_columnas:
+                celda = self.celdas.get((clave_fila, columna))
+                if celda:
+                    for destino in (acumulado[columna], subtotal[columna], general[columna]):
+                        destino[0] += celda[0]
+                        destino[1] += celda[1]
+            yield 'dato', self._fila(clave_fila, acumulado, medida)
+
+        if con_subtotales and grupo_actual is not _SIN_GRUPO:
+            yield 'subtotal', self._fila([grupo_actual, 'Subtotal'] + [''] * (len(self.filas) - 2), subtotal, medida)
+        if total and self.claves_filas:
+            yield 'total', self._fila(['Total'] + [''] * (len(self.filas) - 1), general, medida)
@@ -0,0 +1,56 @@
+"""
+Vista previa de exportaciones: primeras filas y total en una sola consulta.
+
+El total viaja como `COUNT(*) OVER ()` en la misma consulta que trae las
+primeras filas (la ventana se evalúa antes del LIMIT). Si el motor no
+soporta ventanas se cuenta aparte. En PostgreSQL, cuando la estimación del
+planificador supera EXPORTACION_PREVIEW_UMBRAL_EXACTO filas, se informa la
+estimación (`aproximado`) en lugar de contar todas las filas.
+"""
+import heapq
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Window
+
+_FILAS_ESTIMADAS = re.compile(r'rows=(\d+)')
+
+
+def estimar_filas(queryset):
+    """Filas estimadas por el planificador (None si el motor no lo permite)"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    coincidencia = _FILAS_ESTIMADAS.search(queryset.order_by().explain())
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def _primeras(queryset, orden, cantidad):
+    """`(filas, total)` de un queryset; total None si hay que estimarlo aparte"""
+    queryset = queryset.select_related('proyecto').order_by(*orden)
+    if not connections[queryset.db].features.supports_over_clause:
+        filas = list(queryset[:cantidad])
+        return filas, queryset.count()
+    filas = list(queryset.annotate(total_filtro=Window(Count('id')))[:cantidad])
+    return filas, filas[0].total_filtro if filas else 0
+
+
+def previsualizar(registros, cantidad=10):
+    """
+    Primeras `cantidad` filas de un `RegistrosConArchivo` en su orden, más
+    `(total, aproximado)`.
+    """
+    origenes = [registros.activos] + ([registros.archivados] if registros.usa_archivo else [])
+
+    estimado = sum(estimar_filas(queryset) or 0 for queryset in origenes)
+    if estimado > settings.EXPORTACION_PREVIEW_UMBRAL_EXACTO:
+        listas = [list(queryset.select_related('proyecto').order_by(*registros.orden)[:cantidad])
+                  for queryset in origenes]
+        total, aproximado = estimado, True
+    else:
+        resultados = [_primeras(queryset, registros.orden, cantidad) for queryset in origenes]
+        listas = [filas for filas, _ in resultados]
+        total, aproximado = sum(total for _, total in resultados), False
+
+    intercaladas = heapq.merge(*listas, key=registros.clave_orden())
+    return [registro for registro, _ in zip(intercaladas, range(cantidad))], total, aproximado
@@ -1,3 +1,4 @@
+import json
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -479,3 +480,356 @@ class ReporteIntegrationTest(TestCase):
         self.assertIn('Client B', content)
         self.assertNotIn('Development work', content)
         self.assertNotIn('Client meeting', content)
+
+
+class EquipoAPITest(TestCase):
+    """Pruebas del reporte de horas de equipo"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.staff = User.objects.create_user(username='jefe', password='testpass123', is_staff=True)
+        self.usuarios = []
+        for indice in range(3):
+            usuario = User.objects.create_user(username=f'persona{indice}', password='testpass123')
+            periodo = Periodo.objects.create(
+                nombre='Agosto', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+                horas_objetivo=160, activo=True, usuario=usuario
+            )
+            proyecto = Proyecto.objects.create(nombre=f'Proyecto {indice}', cliente='Cliente', usuario=usuario)
+            for dia in (4, 5, 12):
+                RegistroHora.objects.create(
+                    fecha=date(2025, 8, dia), proyecto=proyecto, horas=Decimal('2.0'),
+                    descripcion='Trabajo', tipo_tarea='tarea', periodo=periodo, usuario=usuario
+                )
+            self.usuarios.append(usuario)
+        self.url = '/api/reportes/api/equipo/'
+        self.rango = {'fecha_inicio': '2025-08-01', 'fecha_fin': '2025-08-31'}
+    
+    def test_solo_staff(self):
+        """Prueba que los usuarios sin staff no acceden al reporte"""
+        self.client.login(username='persona0', password='testpass123')
+        self.assertEqual(self.client.get(self.url, self.rango).status_code, 403)
+    
+    def test_agrupa_por_usuario_proyecto_y_semana(self):
+        """Prueba la agrupación por usuario, proyecto e intervalo"""
+        self.client.login(username='jefe', password='testpass123')
+        data = self.client.get(self.url, self.rango).json()
+        
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(data['total_horas'], 18.0)
+        self.assertEqual(data['total_registros'], 9)
+        primera = data['results'][0]
+        self.assertEqual(primera['usuario'], 'persona0')
+        self.assertEqual(primera['intervalo'], '2025-08-04')
+        self.assertEqual(primera['total_horas'], 4.0)
+        self.assertEqual(primera['total_registros'], 2)
+    
+    def test_orden_por_nombre(self):
+        """Prueba que los usuarios se ordenan por nombre y no por el texto del id"""
+        from apps.reportes.equipo import agregar_horas_equipo
+
+        zeta = User.objects.create_user(pk=10, username='zeta', password='testpass123')
+        periodo = Periodo.objects.create(
+            nombre='Agosto', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160, activo=True, usuario=zeta
+        )
+        proyecto = Proyecto.objects.create(nombre='Proyecto Z', usuario=zeta)
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 4), proyecto=proyecto, horas=Decimal('1.0'),
+            periodo=periodo, usuario=zeta
+        )
+
+        filas = agregar_horas_equipo(date(2025, 8, 1), date(2025, 8, 31), agrupar=('usuario', 'intervalo'))['filas']
+        self.assertEqual(
+            [(fila['usuario'], fila['intervalo']) for fila in filas][-3:],
+            [('persona2', '2025-08-04'), ('persona2', '2025-08-11'), ('zeta', '2025-08-04')]
+        )
+
+    def test_filtros_y_paginacion(self):
+        """Prueba el filtro por usuario y la paginación del resultado"""
+        self.client.login(username='jefe', password='testpass123')
+        data = self.client.get(self.url, {**self.rango, 'agrupar': 'usuario', 'page_size': 2}).json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+        
+        usuario = self.usuarios[1]
+        data = self.client.get(self.url, {**self.rango, 'agrupar': 'proyecto', 'usuario': usuario.pk}).json()
+        self.assertEqual([fila['proyecto'] for fila in data['results']], ['Proyecto 1'])
+        self.assertEqual(data['total_horas'], 6.0)
+    
+    def test_resultado_en_cache(self):
+        """Prueba que las páginas siguientes no repiten la consulta agrupada"""
+        self.client.login(username='jefe', password='testpass123')
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.get(self.url, {**self.rango, 'page_size': 2})
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {**self.rango, 'page_size': 2, 'page': 2})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertFalse([c for c in consultas.captured_queries if 'horas_registrohora' in c['sql']])
+    
+    def test_parametros_invalidos(self):
+        """Prueba las respuestas 400 ante parámetros inválidos"""
+        self.client.login(username='jefe', password='testpass123')
+        for parametros in ({'granularidad': 'hora'}, {'agrupar': 'cliente'}, {'fecha_inicio': '2025-13-01'},
+                           {'fecha_inicio': '2025-09-01', 'fecha_fin': '2025-08-01'}, {'usuario': 'x'}):
+            response = self.client.get(self.url, parametros)
+            self.assertEqual(response.status_code, 400, parametros)
+            self.assertFalse(response.json()['success'])
+
+
+def directorio_exportaciones(test):
+    """Directorio temporal para la cache de exportaciones durante la prueba"""
+    import shutil
+    import tempfile
+    from django.test import override_settings
+    directorio = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directorio, True)
+    ajuste = override_settings(EXPORTACIONES_CACHE_DIR=directorio)
+    ajuste.enable()
+    test.addCleanup(ajuste.disable)
+    return directorio
+
+
+class PivoteReporteTest(TestCase):
+    """Pruebas del motor de tablas dinámicas y la exportación agrupada"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        directorio_exportaciones(self)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Agosto', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160, activo=True, usuario=self.user
+        )
+        self.alfa = Proyecto.objects.create(nombre='Alfa', cliente='ACME', usuario=self.user)
+        self.beta = Proyecto.objects.create(nombre='Beta', cliente='ACME', usuario=self.user)
+        for fecha, proyecto, horas, tipo in (
+            (date(2025, 8, 4), self.alfa, '2.0', 'tarea'),
+            (date(2025, 8, 4), self.beta, '3.0', 'reunion'),
+            (date(2025, 8, 5), self.alfa, '4.0', 'tarea'),
+        ):
+            RegistroHora.objects.create(
+                fecha=fecha, proyecto=proyecto, horas=Decimal(horas), descripcion='Trabajo',
+                tipo_tarea=tipo, periodo=self.periodo, usuario=self.user
+            )
+        self.client.login(username='testuser', password='testpass123')
+        self.datos = {'fecha_inicio': '2025-08-01', 'fecha_fin': '2025-08-31', 'separador': ','}
+    
+    def _tabla(self, filas, columnas=()):
+        from apps.horas.archivo import registros_con_archivo
+        from .pivote import calcular_pivote
+        registros = registros_con_archivo(self.user, fecha__gte=date(2025, 8, 1))
+        return calcular_pivote(self.user, registros, filas, columnas, filtros={'fecha__gte': '2025-08-01'})
+    
+    def test_pivote_filas_por_columnas(self):
+        """Prueba celdas, totales de fila y fila de total general"""
+        tabla = self._tabla(['fecha'], ['proyecto'])
+        self.assertEqual(tabla.encabezados(), ['Fecha', 'Alfa', 'Beta', 'Total'])
+        filas = list(tabla.recorrer())
+        self.assertEqual(filas[0], ('dato', [date(2025, 8, 4), Decimal('2.0'), Decimal('3.0'), Decimal('5.0')]))
+        self.assertEqual(filas[1], ('dato', [date(2025, 8, 5), Decimal('4.0'), None, Decimal('4.0')]))
+        self.assertEqual(filas[2], ('total', ['Total', Decimal('6.0'), Decimal('3.0'), Decimal('9.0')]))
+    
+    def test_subtotales_y_medidas(self):
+        """Prueba subtotales por el primer nivel y las medidas cantidad/promedio"""
+        tabla = self._tabla(['proyecto', 'tipo_tarea'])
+        tipos = [tipo for tipo, _ in tabla.recorrer('cantidad')]
+        self.assertEqual(tipos, ['dato', 'subtotal', 'dato', 'subtotal', 'total'])
+        subtotal_alfa = list(tabla.recorrer('promedio'))[1]
+        self.assertEqual(subtotal_alfa, ('subtotal', ['Alfa', 'Subtotal', Decimal('3.00')]))
+    
+    def test_pivote_en_cache(self):
+        """Prueba que la misma tabla no vuelve a consultar mientras no cambien los datos"""
+        self._tabla(['mes'], ['proyecto'])
+        with self.assertNumQueries(0):
+            self._tabla(['mes'], ['proyecto'])
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 6), proyecto=self.beta, horas=Decimal('1.0'),
+            tipo_tarea='tarea', periodo=self.periodo, usuario=self.user
+        )
+        self.assertEqual(list(self._tabla(['mes'], ['proyecto']).recorrer())[-1][1][-1], Decimal('10.0'))
+    
+    def test_exportar_csv_agrupado(self):
+        """Prueba la exportación CSV agrupada por fecha con totales"""
+        response = self.client.post(reverse('reportes:exportar'), {
+            **self.datos, 'formato': 'csv', 'agrupar_por_fecha': 'on', 'incluir_totales': 'on'
+        })
+        contenido = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(contenido[0], 'Fecha,Alfa,Beta,Total')
+        self.assertEqual(contenido[1], '2025-08-04,2.0,3.0,5.0')
+        self.assertEqual(contenido[-1], 'Total,6.0,3.0,9.0')
+        
+        import io
+        import openpyxl
+        response = self.client.post(reverse('reportes:exportar'), {
+            **self.datos, 'formato': 'xlsx', 'agrupar_por_fecha': 'on', 'incluir_totales': 'on'
+        })
+        hoja = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual([celda.value for celda in hoja[4]], ['Total', 6, 3, 9])
+    
+    def test_exportar_json_y_columnas_configuradas(self):
+        """Prueba la exportación JSON y las columnas de la configuración del usuario"""
+        response = self.client.post(reverse('reportes:exportar'), {
+            **self.datos, 'formato': 'json', 'filas': ['proyecto'], 'medida': 'cantidad'
+        })
+        datos = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(datos['encabezados'], ['Proyecto', 'Registros'])
+        self.assertEqual(datos['filas'], [{'tipo': 'dato', 'valores': ['Alfa', 2]},
+                                          {'tipo': 'dato', 'valores': ['Beta', 1]}])
+        
+        config = ConfiguracionReporte.objects.get(usuario=self.user)
+        config.columnas = ['fecha', 'proyecto', 'horas']
+        config.save()
+        response = self.client.post(reverse('reportes:exportar'), {
+            **self.datos, 'formato': 'csv', 'incluir_totales': 'on'
+        })
+        contenido = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(contenido[0], 'Fecha,Proyecto,Horas')
+        self.assertEqual(contenido[1], '2025-08-04,Alfa,2.0')
+        self.assertIn('Total,Alfa,6.0', contenido)
+        self.assertEqual(contenido[-1], ',Total,9.0')
+
+
+class CacheExportacionesTest(TestCase):
+    """Pruebas de la cache en disco de exportaciones"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.directorio = directorio_exportaciones(self)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Agosto', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160, activo=True, usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='Alfa', cliente='ACME', usuario=self.user)
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 4), proyecto=self.proyecto, horas=Decimal('2.0'),
+            tipo_tarea='tarea', periodo=self.periodo, usuario=self.user
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.datos = {'fecha_inicio': '2025-08-01', 'fecha_fin': '2025-08-31', 'formato': 'csv', 'separador': ','}
+    
+    def _exportar(self, **extra):
+        response = self.client.post(reverse('reportes:exportar'), {**self.datos, **extra})
+        return b''.join(response.streaming_content)
+    
+    def test_acierto_y_registro(self):
+        """Prueba que la segunda exportación igual se sirve del disco y queda registrada"""
+        primero = self._exportar()
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as consultas:
+            segundo = self.client.post(reverse('reportes:exportar'), self.datos)
+        # Solo la versión de los datos (agregados), sin leer los registros
+        lecturas = [c['sql'] for c in consultas.captured_queries if 'horas_registrohora' in c['sql']]
+        self.assertTrue(lecturas)
+        self.assertTrue(all('COUNT(' in sql and 'MAX(' in sql for sql in lecturas))
+        self.assertEqual(b''.join(segundo.streaming_content), primero)
+        
+        fallo, acierto = ReporteExportacion.objects.filter(usuario=self.user).order_by('created_at', 'pk')
+        self.assertFalse(fallo.desde_cache)
+        self.assertTrue(acierto.desde_cache)
+        self.assertEqual(fallo.total_registros, 1)
+        self.assertEqual(acierto.total_registros, 1)
+        self.assertEqual(acierto.archivo_cache, fallo.archivo_cache)
+        self.assertEqual(acierto.tamaño_archivo, len(primero))
+    
+    def test_invalidacion_por_version(self):
+        """Prueba que un cambio en las horas genera un archivo nuevo"""
+        self._exportar()
+        RegistroHora.objects.create(
+            fecha=date(2025, 8, 5), proyecto=self.proyecto, horas=Decimal('3.0'),
+            tipo_tarea='tarea', periodo=self.periodo, usuario=self.user
+        )
+        contenido = self._exportar().decode('utf-8')
+        self.assertIn('2025-08-05', contenido)
+        self.assertFalse(ReporteExportacion.objects.order_by('-created_at', '-pk').first().desde_cache)
+
+    def test_version_leida_de_la_base(self):
+        """Prueba que un cambio hecho en otro proceso (sin invalidar este) no sirve el archivo viejo"""
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        self._exportar()
+        with mock.patch('apps.horas.signals.incrementar_version'):
+            RegistroHora.objects.filter(proyecto=self.proyecto).update(
+                horas=Decimal('6.5'), updated_at=timezone.now() + timedelta(seconds=1)
+            )
+        contenido = self._exportar().decode('utf-8')
+        self.assertIn('6.5', contenido)
+        self.assertFalse(ReporteExportacion.objects.order_by('-created_at', '-pk').first().desde_cache)
+    
+    def test_variante_gzip(self):
+        """Prueba que los clientes que aceptan gzip reciben la variante precomprimida"""
+        import gzip
+        plano = self._exportar()
+        response = self.client.post(reverse('reportes:exportar'), self.datos, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plano)
+    
+    def test_desalojo_lru(self):
+        """Prueba que al superar el límite se borran los archivos menos usados"""
+        import os
+        import time
+        from .cache_exportaciones import desalojar
+        self._exportar()
+        antiguo = set(os.listdir(self.directorio))
+        pasado = time.time() - 3600
+        for nombre in antiguo:
+            os.utime(os.path.join(self.directorio, nombre), (pasado, pasado))
+        self._exportar(formato='json')
+        
+        nuevos = set(os.listdir(self.directorio)) - antiguo
+        tamaño_nuevos = sum(os.path.getsize(os.path.join(self.directorio, nombre)) for nombre in nuevos)
+        desalojar(limite_bytes=tamaño_nuevos)
+        self.assertEqual(set(os.listdir(self.directorio)), nuevos)
+
+
+class PrevisualizacionExportarTest(TestCase):
+    """Pruebas de la vista previa de exportación"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.periodo = Periodo.objects.create(
+            nombre='Agosto', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 8, 31),
+            horas_objetivo=160, activo=True, usuario=self.user
+        )
+        self.proyecto = Proyecto.objects.create(nombre='<b>Alfa</b>', usuario=self.user)
+        for dia in range(1, 16):
+            RegistroHora.objects.create(
+                fecha=date(2025, 8, dia), proyecto=self.proyecto, horas=Decimal('1.5'),
+                tipo_tarea='tarea', periodo=self.periodo, usuario=self.user
+            )
+        self.client.login(username='testuser', password='testpass123')
+        self.datos = {'fecha_inicio': '2025-08-01', 'fecha_fin': '2025-08-31', 'formato': 'csv', 'separador': ',', 'preview': 'true'}
+    
+    def test_filas_y_total_en_una_consulta(self):
+        """Prueba que las primeras filas y el total salen de una sola consulta"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as consultas:
+            data = self.client.post(reverse('reportes:exportar'), self.datos).json()
+        
+        self.assertEqual(len([c for c in consultas.captured_queries if 'FROM "horas_registrohora"' in c['sql']]), 1)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total_records'], 15)
+        self.assertFalse(data['aproximado'])
+        self.assertEqual(len(data['filas']), 10)
+        self.assertEqual(data['filas'][0], {
+            'fecha': '2025-08-01', 'proyecto': '<b>Alfa</b>', 'horas': 1.5, 'tipo_tarea': 'Tarea'
+        })
+    
+    def test_sin_resultados(self):
+        """Prueba la vista previa de un filtro sin registros"""
+        data = self.client.post(reverse('reportes:exportar'), {
+            **self.datos, 'fecha_inicio': '2025-09-01', 'fecha_fin': '2025-09-30'
+        }).json()
+        self.assertEqual(data['filas'], [])
+        self.assertEqual(data['total_records'], 0)
@@ -13,4 +13,5 @@ urlpatterns = [
     path('api/exportar/csv/', views.ExportarCSVAPIView.as_view(), name='api_exportar_csv'),
     path('api/exportar/xlsx/', views.ExportarXLSXAPIView.as_view(), name='api_exportar_xlsx'),
     path('api/historial/', views.HistorialExportacionAPIView.as_view(), name='api_historial'),
+    path('api/equipo/', views.EquipoAPIView.as_view(), name='api_equipo'),
 ]
@@ -6,13 +6,33 @@ from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 import csv
 import json
+from datetime import date, timedelta
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
 from .models import ReporteExportacion, ConfiguracionReporte
 from .forms import ConfiguracionReporteForm
 from apps.core.models import Periodo
 from apps.proyectos.models import Proyecto
+from apps.horas.agregaciones import GRANULARIDADES
+from .equipo import DIMENSIONES, reporte_equipo
+from .cache_exportaciones import guardar_exportacion, obtener_exportacion, respuesta_exportacion, ruta_exportacion
+from .escritores import ESCRITORES, nombre_reporte
+from .pivote import calcular_pivote
+from .previsualizacion import previsualizar
+
+
+# Columnas del detalle: clave -> (encabezado, valor del registro)
+COLUMNAS_DETALLE = {
+    'fecha': ('Fecha', lambda registro: registro.fecha),
+    'proyecto': ('Proyecto', lambda registro: registro.proyecto.nombre),
+    'cliente': ('Cliente', lambda registro: registro.proyecto.cliente or ''),
+    'horas': ('Horas', lambda registro: registro.horas),
+    'tipo_tarea': ('Tipo Tarea', lambda registro: registro.tipo_tarea),
+    'descripcion': ('Descripcion', lambda registro: registro.descripcion or ''),
+}
 
 
 class ReporteListView(LoginRequiredMixin, ListView):
@@ -28,6 +48,7 @@ class ReporteListView(LoginRequiredMixin, ListView):
 class ExportarView(LoginRequiredMixin, View):
     """Vista de exportación"""
     template_name = 'reportes/exportar.html'
+    preview_filas = 10
     
     def get(self, request):
         from .forms import ExportarReporteForm
@@ -65,13 +86,19 @@ class ExportarView(LoginRequiredMixin, View):
         # Si es preview
         if request.POST.get('preview'):
             if form.is_valid():
-                # Obtener datos filtrados
+                # Primeras filas y total en una sola consulta; el cliente arma la tabla
                 registros = self.get_filtered_data(request.user, form.cleaned_data)
-                preview_html = self.generate_preview_html(registros[:10])  # Solo primeros 10
+                filas, total, aproximado = previsualizar(registros, self.preview_filas)
                 return JsonResponse({
                     'success': True,
-                    'preview_html': preview_html,
-                    'total_records': registros.count()
+                    'filas': [{
+                        'fecha': registro.fecha.isoformat(),
+                        'proyecto': registro.proyecto.nombre,
+                        'horas': float(registro.horas),
+                        'tipo_tarea': registro.get_tipo_tarea_display()
+                    } for registro in filas],
+                    'total_records': total,
+                    'aproximado': aproximado
                 })
             else:
                 return JsonResponse({
@@ -83,112 +110,116 @@ class ExportarView(LoginRequiredMixin, View):
         if form.is_valid():
             registros = self.get_filtered_data(request.user, form.cleaned_data)
             formato = form.cleaned_data.get('formato', 'csv')
+            config = ConfiguracionReporte.objects.filter(usuario=request.user).first()
             
-            if formato == 'csv':
-                return self.export_csv(registros, form.cleaned_data)
-            elif formato == 'xlsx':
-                return self.export_xlsx(registros, form.cleaned_data)
+            if formato in ESCRITORES:
+                return self.exportar(formato, registros, form.cleaned_data, config)
             
         return JsonResponse({'success': False, 'message': 'Error en el formulario'})
     
-    def get_filtered_data(self, user, data):
-        from apps.horas.models import RegistroHora
-        
-        queryset = RegistroHora.objects.filter(usuario=user)
-        
-        if data.get('fecha_inicio'):
-            queryset = queryset.filter(fecha__gte=data['fecha_inicio'])
-        if data.get('fecha_fin'):
-            queryset = queryset.filter(fecha__lte=data['fecha_fin'])
-        if data.get('periodo'):
-            queryset = queryset.filter(fecha__range=[data['periodo'].fecha_inicio, data['periodo'].fecha_fin])
+    def get_filtros(self, data):
+        """Filtros de `data` normalizados (también forman la clave de cache)"""
+        # Rango efectivo: el más estrecho entre fechas y período
+        inicios = [data.get('fecha_inicio'), data['periodo'].fecha_inicio if data.get('periodo') else None]
+        fines = [data.get('fecha_fin'), data['periodo'].fecha_fin if data.get('periodo') else None]
+        filtros = {}
+        if any(inicios):
+            filtros['fecha__gte'] = max(fecha for fecha in inicios if fecha)
+        if any(fines):
+            filtros['fecha__lte'] = min(fecha for fecha in fines if fecha)
         if data.get('proyectos'):
-            queryset = queryset.filter(proyecto__in=data['proyectos'])
-            
-        return queryset.select_related('proyecto').order_by('fecha', 'proyecto__nombre')
+            filtros['proyecto__in'] = sorted(proyecto.pk for proyecto in data['proyectos'])
+        return filtros
     
-    def generate_preview_html(self, registros):
-        if not registros:
-            return '<div class="alert alert-info">No se encontraron registros</div>'
-        
-        html = '<div class="table-responsive"><table class="table table-sm">'
-        html += '<thead><tr><th>Fecha</th><th>Proyecto</th><th>Horas</th><th>Tipo</th></tr></thead><tbody>'
-        
-        for registro in registros:
-            html += f'<tr><td>{registro.fecha}</td><td>{registro.proyecto.nombre}</td><td>{registro.horas}</td><td>{registro.tipo_tarea}</td></tr>'
+    def get_filtered_data(self, user, data):
+        from apps.horas.archivo import registros_con_archivo
         
-        html += '</tbody></table></div>'
-        return html
+        # Incluye los registros archivados si el rango llega a ellos
+        return registros_con_archivo(user, orden=('fecha', 'proyecto__nombre', 'pk'), **self.get_filtros(data))
     
-    def export_csv(self, registros, data):
-        from datetime import date
-        
-        response = HttpResponse(content_type='text/csv')
-        fecha_actual = date.today().strftime('%Y-%m-%d')
-        response['Content-Disposition'] = f'attachment; filename="reporte_horas_{fecha_actual}.csv"'
-        
-        separador = data.get('separador', ',')
-        writer = csv.writer(response, delimiter=separador)
-        
-        # Obtener configuración del usuario
-        try:
-            config = ConfiguracionReporte.objects.get(usuario=self.request.user)
-            separador_decimal = getattr(config, 'separador_decimal', '.')
-        except ConfiguracionReporte.DoesNotExist:
-            separador_decimal = '.'
-        
-        # Encabezados
-        writer.writerow(['Fecha', 'Proyecto', 'Cliente', 'Horas', 'Tipo Tarea', 'Descripcion'])
-        
-        # Datos
-        for registro in registros:
-            horas_str = str(registro.horas).replace('.', separador_decimal)
-            writer.writerow([
-                registro.fecha,
-                registro.proyecto.nombre,
-                registro.proyecto.cliente or '',
-                horas_str,
-                registro.tipo_tarea,
-                registro.descripcion or ''
-            ])
-        
-        return response
+    def get_tabla_pivote(self, registros, data):
+        tabla = calcular_pivote(
+            self.request.user, registros, data['filas'], data.get('columnas') or (),
+            filtros=self.get_filtros(data)
+        )
+        medida = data['medida']
+        return tabla.encabezados(medida), tabla.recorrer(medida, total=data.get('incluir_totales', False))
     
-    def export_xlsx(self, registros, data):
-        from datetime import date
+    def get_tabla_detalle(self, registros, data, config):
+        # Columnas configuradas por el usuario (todas si no configuró ninguna)
+        columnas = [c for c in COLUMNAS_DETALLE if not config or not config.columnas or c in config.columnas]
+        if not data.get('incluir_descripcion'):
+            columnas = [c for c in columnas if c != 'descripcion'] or ['fecha']
         
-        try:
-            import openpyxl
-            from openpyxl.utils import get_column_letter
-        except ImportError:
-            return JsonResponse({'success': False, 'message': 'openpyxl no está instalado'})
+        def filas():
+            for registro in registros:
+                yield 'dato', [COLUMNAS_DETALLE[c][1](registro) for c in columnas]
+            if data.get('incluir_totales'):
+                # Totales por proyecto agrupados en la base de datos
+                tabla = calcular_pivote(self.request.user, registros, ['proyecto'], filtros=self.get_filtros(data))
+                for tipo, (proyecto, horas) in tabla.recorrer('suma'):
+                    tipo = 'subtotal' if tipo == 'dato' else tipo
+                    valores = {'fecha': 'Total' if tipo == 'subtotal' else '', 'proyecto': proyecto, 'horas': horas}
+                    yield tipo, [valores.get(c, '') for c in columnas]
         
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Reporte de Horas"
-        
-        # Encabezados
-        headers = ['Fecha', 'Proyecto', 'Cliente', 'Horas', 'Tipo Tarea', 'Descripcion']
-        for col, header in enumerate(headers, 1):
-            ws.cell(row=1, column=col, value=header)
+        return [COLUMNAS_DETALLE[c][0] for c in columnas], filas()
+    
+    def get_parametros(self, formato, data, config):
+        """Todo lo que determina el contenido del archivo, normalizado"""
+        parametros = {
+            'filtros': self.get_filtros(data),
+            'filas': data.get('filas') or [],
+            'columnas': data.get('columnas') or [],
+            'medida': data.get('medida'),
+            'incluir_totales': bool(data.get('incluir_totales')),
+            'incluir_descripcion': bool(data.get('incluir_descripcion')),
+            'incluir_encabezados': config.incluir_encabezados if config else True,
+            'columnas_configuradas': config.columnas if config else [],
+        }
+        if formato == 'csv':
+            parametros['separador'] = data.get('separador', ',')
+            parametros['separador_decimal'] = getattr(config, 'separador_decimal', '.') if config else '.'
+        return parametros
+    
+    def exportar(self, formato, registros, data, config):
+        parametros = self.get_parametros(formato, data, config)
+        ruta = ruta_exportacion(self.request.user, parametros, formato)
         
-        # Datos
-        for row, registro in enumerate(registros, 2):
-            ws.cell(row=row, column=1, value=registro.fecha)
-            ws.cell(row=row, column=2, value=registro.proyecto.nombre)
-            ws.cell(row=row, column=3, value=registro.proyecto.cliente or '')
-            ws.cell(row=row, column=4, value=float(registro.horas))
-            ws.cell(row=row, column=5, value=registro.tipo_tarea)
-            ws.cell(row=row, column=6, value=registro.descripcion or '')
+        desde_cache = obtener_exportacion(ruta)
+        if desde_cache:
+            anterior = ReporteExportacion.objects.filter(
+                usuario=self.request.user, archivo_cache=ruta.name
+            ).order_by('-created_at').first()
+            total_registros = anterior.total_registros if anterior else 0
+        else:
+            if data.get('filas'):
+                encabezados, filas = self.get_tabla_pivote(registros, data)
+            else:
+                encabezados, filas = self.get_tabla_detalle(registros, data, config)
+            if not parametros['incluir_encabezados']:
+                encabezados = None
+            opciones = {}
+            if formato == 'csv':
+                opciones = {'separador': parametros['separador'], 'separador_decimal': parametros['separador_decimal']}
+            total_registros = guardar_exportacion(
+                ruta, lambda archivo: ESCRITORES[formato](archivo, encabezados, filas, **opciones)
+            )
         
-        fecha_actual = date.today().strftime('%Y-%m-%d')
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        nombre_archivo = nombre_reporte(formato)
+        filtros = parametros['filtros']
+        ReporteExportacion.objects.create(
+            usuario=self.request.user,
+            nombre_archivo=nombre_archivo,
+            formato=formato,
+            fecha_inicio=filtros.get('fecha__gte'),
+            fecha_fin=filtros.get('fecha__lte'),
+            filtros_aplicados=json.loads(json.dumps(parametros, default=str)),
+            total_registros=total_registros,
+            tamaño_archivo=ruta.stat().st_size,
+            archivo_cache=ruta.name,
+            desde_cache=desde_cache
         )
-        response['Content-Disposition'] = f'attachment; filename="reporte_horas_{fecha_actual}.xlsx"'
-        wb.save(response)
-        
-        return response
+        return respuesta_exportacion(self.request, ruta, nombre_archivo)
 
 
 class ConfiguracionView(LoginRequiredMixin, FormView):
@@ -248,3 +279,80 @@ class HistorialExportacionAPIView(APIView):
             'created_at': e.created_at
         } for e in exportaciones]
         return Response(data)
+
+
+class EquipoPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class EquipoAPIView(APIView):
+    """API de horas de todos los usuarios agrupadas (solo staff)"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        granularidad = request.GET.get('granularidad', 'semana')
+        if granularidad not in GRANULARIDADES:
+            return Response({
+                'success': False,
+                'error': f"Granularidad inválida. Opciones: {', '.join(GRANULARIDADES)}"
+            }, status=400)
+        
+        agrupar = [d for d in request.GET.get('agrupar', 'usuario,proyecto,intervalo').split(',') if d]
+        if not agrupar or set(agrupar) - set(DIMENSIONES) or len(set(agrupar)) != len(agrupar):
+            return Response({
+                'success': False,
+                'error': f"Agrupación inválida. Opciones: {', '.join(DIMENSIONES)}"
+            }, status=400)
+        
+        try:
+            fecha_fin = date.fromisoformat(request.GET['fecha_fin']) if request.GET.get('fecha_fin') else date.today()
+            fecha_inicio = (
+                date.fromisoformat(request.GET['fecha_inicio']) if request.GET.get('fecha_inicio')
+                else fecha_fin - timedelta(days=settings.EQUIPO_RANGO_DIAS - 1)
+            )
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Formato de fecha inválido. Use YYYY-MM-DD'
+            }, status=400)
+        if fecha_inicio > fecha_fin:
+            return Response({
+                'success': False,
+                'error': 'La fecha de inicio no puede ser posterior a la fecha de fin'
+            }, status=400)
+        
+        ids = {}
+        for parametro in ('proyecto', 'usuario'):
+            valores = [v for v in request.GET.get(parametro, '').split(',') if v]
+            if not all(v.isdigit() for v in valores):
+                return Response({
+                    'success': False,
+                    'error': 'Proyecto o usuario inválido'
+                }, status=400)
+            ids[parametro] = sorted(int(v) for v in valores)
+        
+        reporte = reporte_equipo(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            granularidad=granularidad,
+            agrupar=agrupar,
+            proyectos=ids['proyecto'],
+            usuarios=ids['usuario']
+        )
+        
+        paginador = EquipoPagination()
+        pagina = paginador.paginate_queryset(reporte['filas'], request, view=self)
+        respuesta = paginador.get_paginated_response([
+            {**fila, 'total_horas': float(fila['total_horas'])} for fila in pagina
+        ])
+        respuesta.data.update({
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat(),
+            'granularidad': granularidad,
+            'agrupar': agrupar,
+            'total_horas': float(reporte['total_horas']),
+            'total_registros': reporte['total_registros'],
+        })
+        return respuesta
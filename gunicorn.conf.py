@@ -1,7 +1,16 @@
 # Configuración de Gunicorn para producción
+import os
+
 bind = "0.0.0.0:8000"
-workers = 3
-worker_class = "sync"
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+# Hilos por worker: los streams de /api/eventos/ quedan abiertos hasta
+# EVENTOS_DURACION_MAX segundos y con workers "sync" bloquearían el proceso
+# (y el timeout lo reiniciaría). Cada pestaña del dashboard retiene un hilo,
+# así que workers x threads es el total de streams y peticiones simultáneas;
+# cada usuario abre a lo sumo EVENTOS_MAX_CONEXIONES_USUARIO streams. Los
+# hilos en espera de eventos casi no consumen CPU.
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -18,3 +27,26 @@ secure_scheme_headers = {
     'X-FORWARDED-SSL': 'on'
 }
 forwarded_allow_ips = '*'
+
+
+def when_ready(server):
+    """
+    Con preload_app Django ya está cargado: no se arranca si los chequeos
+    de sistema fallan (p. ej. bus de eventos sobre un cache por proceso) o
+    si hay varios workers con un bus de eventos en memoria.
+    """
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.core.management.base import SystemCheckError
+    from django.utils.module_loading import import_string
+    from apps.core.eventos import BusLocal
+
+    try:
+        call_command('check')
+    except SystemCheckError as error:
+        raise RuntimeError(str(error))
+    if server.num_workers > 1 and issubclass(import_string(settings.EVENTOS_BUS), BusLocal):
+        raise RuntimeError(
+            'EVENTOS_BUS=BusLocal no reparte eventos entre workers: usar '
+            'apps.core.eventos.BusCache o GUNICORN_WORKERS=1'
+        )
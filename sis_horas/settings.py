@@ -47,6 +47,10 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.EstaticosMiddleware',
+    'apps.core.middleware.ContextoPeticionMiddleware',
+    'apps.core.middleware.MetricasMiddleware',
+    'apps.core.middleware.CompresionMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -54,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ConfiguracionUsuarioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +91,29 @@ DATABASES = {
     }
 }
 
+# Cache compartido entre procesos: los workers de gunicorn y los comandos de
+# manage.py tienen que ver los mismos contadores de versión (ver
+# apps.core.versionado), derivados y eventos. Por defecto en archivos del
+# servidor; con varios servidores, Redis:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    }
+}
+
+# Las pruebas usan un cache propio en un directorio temporal
+TEST_RUNNER = 'apps.core.pruebas.PruebasRunner'
+
+# Las columnas incluidas (INCLUDE) de los índices de horas solo se usan en
+# PostgreSQL; en SQLite el índice se crea igual sin ellas
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -115,6 +143,31 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Nombres con hash del contenido y variantes .gz/.br (ver apps.core.estaticos)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'apps.core.estaticos.AlmacenamientoEstaticos',
+    },
+}
+
+# Paquetes de CSS/JS: `python manage.py construir_estaticos` los agrupa y
+# minifica en static/paquetes/ y luego ejecuta collectstatic
+ESTATICOS_PAQUETES = {
+    'base.css': ['css/styles.css', 'css/form-widgets.css'],
+    'base.js': ['js/app.js', 'js/form-widgets.js'],
+    'dashboard.css': ['css/dashboard.css'],
+    'dashboard.js': ['js/dashboard.js'],
+    'hora-bloque.css': ['css/multi-date-calendar.css', 'css/hora-bloque.css'],
+    'hora-bloque.js': ['js/multi-date-calendar.js', 'js/hora-bloque.js'],
+}
+ESTATICOS_DIR_PAQUETES = BASE_DIR / 'static' / 'paquetes'
+ESTATICOS_USAR_PAQUETES = config('ESTATICOS_USAR_PAQUETES', default=not DEBUG, cast=bool)
+ESTATICOS_PRECOMPRIMIR = config('ESTATICOS_PRECOMPRIMIR', default=True, cast=bool)
+ESTATICOS_MAX_AGE_SIN_VERSION = config('ESTATICOS_MAX_AGE_SIN_VERSION', default=60, cast=int)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -130,6 +183,11 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON con orjson si está instalado (misma salida con la librería estándar)
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50
 }
@@ -156,26 +214,107 @@ LOGOUT_REDIRECT_URL = '/auth/login/'
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Métricas de peticiones (expuestas en /metrics/ para administradores)
+METRICAS_UMBRAL_LENTO_MS = config('METRICAS_UMBRAL_LENTO_MS', default=1000, cast=int)
+
+# Compresión de respuestas JSON/CSV (brotli si está instalado, si no gzip)
+COMPRESION_UMBRAL_BYTES = config('COMPRESION_UMBRAL_BYTES', default=1024, cast=int)
+COMPRESION_BROTLI_CALIDAD = config('COMPRESION_BROTLI_CALIDAD', default=5, cast=int)
+
+# Cache de fragmentos de template por usuario (segundos; 0 lo desactiva).
+# Las entradas se invalidan solas al cambiar los datos del usuario.
+FRAGMENTOS_TIMEOUT = config('FRAGMENTOS_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Proyectos favoritos: usos en la ventana + bonificación por uso reciente
+FAVORITOS_VENTANA_DIAS = config('FAVORITOS_VENTANA_DIAS', default=30, cast=int)
+FAVORITOS_PESO_RECENCIA = config('FAVORITOS_PESO_RECENCIA', default=5.0, cast=float)
+FAVORITOS_CANTIDAD = config('FAVORITOS_CANTIDAD', default=5, cast=int)
+
+# Series de horas por intervalo: máximo de intervalos de una serie densa
+# (los rangos mayores responden 400)
+SERIE_MAX_INTERVALOS = config('SERIE_MAX_INTERVALOS', default=1000, cast=int)
+
+# Importación de proyectos desde CSV (procesada en lotes)
+PROYECTOS_IMPORTACION_MAX_MB = config('PROYECTOS_IMPORTACION_MAX_MB', default=20, cast=int)
+PROYECTOS_IMPORTACION_LOTE = config('PROYECTOS_IMPORTACION_LOTE', default=1000, cast=int)
+
+# Importación de horas desde CSV/XLSX (validada en memoria, insertada en lotes)
+HORAS_IMPORTACION_MAX_MB = config('HORAS_IMPORTACION_MAX_MB', default=20, cast=int)
+HORAS_IMPORTACION_LOTE = config('HORAS_IMPORTACION_LOTE', default=1000, cast=int)
+
+# Archivo de horas de períodos cerrados (comando archivar_horas)
+ARCHIVO_ANTIGUEDAD_DIAS = config('ARCHIVO_ANTIGUEDAD_DIAS', default=365, cast=int)
+ARCHIVO_TAMANO_LOTE = config('ARCHIVO_TAMANO_LOTE', default=1000, cast=int)
+
+# Reportes de equipo (solo staff): cache del resultado (segundos) y rango por
+# defecto cuando no se indican fechas (días hasta hoy)
+EQUIPO_CACHE_TIMEOUT = config('EQUIPO_CACHE_TIMEOUT', default=60, cast=int)
+EQUIPO_RANGO_DIAS = config('EQUIPO_RANGO_DIAS', default=28, cast=int)
+
+# Cache en disco de exportaciones (LRU hasta EXPORTACIONES_CACHE_MAX_MB)
+EXPORTACIONES_CACHE_DIR = config('EXPORTACIONES_CACHE_DIR', default=str(MEDIA_ROOT / 'exportaciones'))
+EXPORTACIONES_CACHE_MAX_MB = config('EXPORTACIONES_CACHE_MAX_MB', default=200, cast=int)
+
+# Vista previa de exportaciones: por encima de esta estimación de filas
+# (solo PostgreSQL) se muestra el total aproximado en lugar de contarlo
+EXPORTACION_PREVIEW_UMBRAL_EXACTO = config('EXPORTACION_PREVIEW_UMBRAL_EXACTO', default=100000, cast=int)
+
+# Eventos en vivo (stream SSE en /api/eventos/): bus de publicación
+# (BusCache reparte entre workers a través del cache compartido; BusLocal
+# solo sirve con un proceso), duración máxima de cada conexión, streams
+# simultáneos por usuario (cada uno ocupa un hilo de gunicorn), intervalo
+# de keepalive y eventos pendientes por usuario que se conservan para
+# reenviar al reconectar
+EVENTOS_BUS = config('EVENTOS_BUS', default='apps.core.eventos.BusCache')
+EVENTOS_DURACION_MAX = config('EVENTOS_DURACION_MAX', default=300, cast=int)
+EVENTOS_MAX_CONEXIONES_USUARIO = config('EVENTOS_MAX_CONEXIONES_USUARIO', default=3, cast=int)
+EVENTOS_KEEPALIVE = config('EVENTOS_KEEPALIVE', default=15, cast=int)
+EVENTOS_REINTENTO_MS = config('EVENTOS_REINTENTO_MS', default=3000, cast=int)
+EVENTOS_MAX_PENDIENTES = config('EVENTOS_MAX_PENDIENTES', default=100, cast=int)
+EVENTOS_RETENCION = config('EVENTOS_RETENCION', default=600, cast=int)
+EVENTOS_INTERVALO_CACHE = config('EVENTOS_INTERVALO_CACHE', default=0.5, cast=float)
+
 # Logging
+# Los handlers solo encolan; un hilo por proceso escribe líneas JSON con
+# rotación. Usar '{pid}' en LOG_FILE para un archivo por worker de gunicorn.
+LOG_FILE = config('LOG_FILE', default=str(BASE_DIR / 'django.log'))
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=5, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'django.log',
+    'filters': {
+        'contexto_peticion': {
+            '()': 'apps.core.log.ContextoPeticionFilter',
         },
-        'console': {
+    },
+    'handlers': {
+        'cola': {
             'level': 'INFO',
-            'class': 'logging.StreamHandler',
+            'class': 'apps.core.log.ColaHandler',
+            'filters': ['contexto_peticion'],
+            'filename': LOG_FILE,
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'consola': True,
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['cola'],
             'level': 'INFO',
             'propagate': True,
         },
+        'apps': {
+            'handlers': ['cola'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'apps.core.metricas': {
+            'handlers': ['cola'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
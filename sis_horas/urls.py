@@ -16,6 +16,7 @@ urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     path('select2/', include('django_select2.urls')),
+    path('metrics/', core_views.MetricasView.as_view(), name='metricas'),
     
     # Autenticación
     path('auth/', include('apps.authentication.urls')),
@@ -33,18 +34,24 @@ urlpatterns = [
     path('api/calendario/<int:year>/<int:month>/', core_views.CalendarioAPIView.as_view(), name='api_calendario'),
     path('api/periodos/', core_views.PeriodoAPIView.as_view(), name='api_periodos'),
     path('api/periodos/activo/', core_views.PeriodoActivoAPIView.as_view(), name='api_periodo_activo'),
+    path('api/periodos/<int:pk>/burndown/', core_views.PeriodoBurndownAPIView.as_view(), name='api_periodo_burndown'),
     path('api/feriados/', core_views.FeriadoAPIView.as_view(), name='api_feriados'),
+    path('api/eventos/', core_views.EventosView.as_view(), name='api_eventos'),
     
     # APIs de proyectos
     path('api/proyectos/', proyecto_views.ProyectoAPIView.as_view(), name='api_proyectos'),
     path('api/proyectos/activos/', proyecto_views.ProyectoActivosAPIView.as_view(), name='api_proyectos_activos'),
+    path('api/proyectos/buscar/', proyecto_views.ProyectoBusquedaAPIView.as_view(), name='api_proyectos_buscar'),
     
     # APIs de horas
     path('api/horas/', hora_views.HoraAPIView.as_view(), name='api_horas'),
+    path('api/horas/buscar/', hora_views.BusquedaHorasAPIView.as_view(), name='api_horas_buscar'),
+    path('api/horas/serie/', hora_views.HoraSerieAPIView.as_view(), name='api_horas_serie'),
     
     # APIs de reportes
     path('api/reportes/api/exportar/csv/', reporte_views.ExportarCSVAPIView.as_view(), name='api_reportes_exportar_csv'),
     path('api/reportes/api/historial/', reporte_views.HistorialExportacionAPIView.as_view(), name='api_reportes_historial'),
+    path('api/reportes/api/equipo/', reporte_views.EquipoAPIView.as_view(), name='api_reportes_equipo'),
     
     # API de autenticación
     path('api/auth/', include('rest_framework.urls')),
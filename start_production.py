@@ -25,9 +25,9 @@ def main():
         print("   Ejecuta: source venv/bin/activate")
         return
     
-    # Recolectar archivos estáticos
-    print("📦 Recolectando archivos estáticos...")
-    subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput'], check=True)
+    # Paquetes minificados + collectstatic (nombres con hash, .gz/.br)
+    print("📦 Construyendo y recolectando archivos estáticos...")
+    subprocess.run([sys.executable, 'manage.py', 'construir_estaticos'], check=True)
     
     # Aplicar migraciones
     print("🔄 Aplicando migraciones...")
@@ -0,0 +1,248 @@
+/**
+ * Dashboard - Calendario mensual de horas
+ *
+ * El límite diario llega en el atributo data-limite-diario de #calendario-horas;
+ * el período activo y la URL del stream de eventos en data-periodo-activo y
+ * data-eventos-url.
+ */
+
+// Variables globales
+let fechaActual = new Date();
+let limiteDiario = 8;
+let periodoActivoId = null;
+// Días del mes mostrado, para aplicar los eventos sin volver a pedirlo
+let calendarioActual = null;
+
+document.addEventListener('DOMContentLoaded', function() {
+    const contenedor = document.getElementById('calendario-horas');
+    if (!contenedor) {
+        return;
+    }
+    limiteDiario = parseFloat(contenedor.dataset.limiteDiario) || 8;
+    periodoActivoId = parseInt(contenedor.dataset.periodoActivo, 10) || null;
+    console.log('Dashboard iniciado. Límite diario:', limiteDiario);
+    cargarCalendario();
+    iniciarEventosEnVivo(contenedor.dataset.eventosUrl);
+});
+
+// Eventos en vivo (SSE): los cambios hechos en otras pestañas o por importaciones
+// se aplican sobre el calendario sin volver a descargar el mes
+function iniciarEventosEnVivo(url) {
+    if (!url || !window.EventSource) return;
+    
+    const fuente = new EventSource(url);
+    const alRecibir = (tipo, manejar) => fuente.addEventListener(tipo, e => manejar(JSON.parse(e.data)));
+    ['hora_creada', 'hora_actualizada', 'hora_eliminada', 'horas_actualizadas'].forEach(tipo => alRecibir(tipo, actualizarDias));
+    // Otro período activo: cambian el límite y las estadísticas de la página
+    alRecibir('periodo_actualizado', datos => {
+        if ((datos.activo && datos.id !== periodoActivoId) || (!datos.activo && datos.id === periodoActivoId)) {
+            window.location.reload();
+        }
+    });
+    alRecibir('periodo_eliminado', datos => {
+        if (datos.id === periodoActivoId) window.location.reload();
+    });
+    alRecibir('feriado_actualizado', datos => actualizarFeriado(datos, true));
+    alRecibir('feriado_eliminado', datos => actualizarFeriado(datos, false));
+    // Eventos perdidos (reconexión tardía o cliente lento): recargar el mes
+    alRecibir('resincronizar', () => cargarCalendario());
+}
+
+// Aplica `cambiar(dia)` a los días del mes mostrado cuya fecha está en `fechas`
+function modificarDias(fechas, cambiar) {
+    if (!calendarioActual) return;
+    let modificado = false;
+    calendarioActual.forEach(semana => semana.forEach(dia => {
+        if (dia !== null && fechas.includes(dia.fecha)) {
+            cambiar(dia);
+            modificado = true;
+        }
+    }));
+    if (modificado) mostrarCalendario(calendarioActual);
+}
+
+function actualizarDias(datos) {
+    if (datos.periodo !== periodoActivoId) return;
+    if (datos.recargar) {
+        cargarCalendario();
+        return;
+    }
+    modificarDias(Object.keys(datos.dias), dia => { dia.horas = datos.dias[dia.fecha]; });
+}
+
+function actualizarFeriado(datos, activo) {
+    if (datos.fecha_anterior) {
+        modificarDias([datos.fecha_anterior], dia => { dia.es_feriado = false; });
+    }
+    modificarDias([datos.fecha], dia => { dia.es_feriado = activo; });
+}
+
+function cambiarMes(direccion) {
+    fechaActual.setMonth(fechaActual.getMonth() + direccion);
+    cargarCalendario();
+}
+
+async function cargarCalendario() {
+    const year = fechaActual.getFullYear();
+    const month = fechaActual.getMonth() + 1;
+    
+    // Actualizar título
+    const meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                   'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'];
+    document.getElementById('mes-actual').textContent = `${meses[month-1]} ${year}`;
+    
+    // Mostrar loading
+    document.getElementById('calendario-loading').style.display = 'block';
+    document.getElementById('calendario-content').style.display = 'none';
+    document.getElementById('calendario-error').style.display = 'none';
+    
+    try {
+        const response = await fetch(`/api/calendario/${year}/${month}/`);
+        const data = await response.json();
+        
+        if (data.success) {
+            calendarioActual = data.calendario;
+            mostrarCalendario(data.calendario);
+        } else {
+            throw new Error(data.error || 'Error desconocido');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        document.getElementById('calendario-loading').style.display = 'none';
+        document.getElementById('calendario-error').style.display = 'block';
+    }
+}
+
+function mostrarCalendario(calendario) {
+    const content = document.getElementById('calendario-content');
+    
+    let html = '<table class="table table-bordered mb-0">';
+    html += '<thead class="table-light"><tr>';
+    html += '<th class="text-center">Lun</th><th class="text-center">Mar</th><th class="text-center">Mié</th>';
+    html += '<th class="text-center">Jue</th><th class="text-center">Vie</th><th class="text-center">Sáb</th><th class="text-center">Dom</th>';
+    html += '</tr></thead><tbody>';
+    
+    calendario.forEach(semana => {
+        html += '<tr>';
+        semana.forEach(dia => {
+            if (dia === null) {
+                html += '<td></td>';
+            } else {
+                let clase = 'calendar-day';
+                
+                if (dia.es_feriado) {
+                    clase += ' feriado';
+                } else if (dia.es_fin_semana) {
+                    clase += ' fin-semana';
+                } else if (dia.horas >= limiteDiario) {
+                    clase += ' completo';
+                } else if (dia.horas > 0) {
+                    clase += ' parcial';
+                } else {
+                    clase += ' sin-horas';
+                }
+                
+                html += `<td class="text-center p-1">`;
+                if (dia.es_feriado) {
+                    html += `<div class="${clase}" title="Día feriado - No se pueden registrar horas">`;
+                    html += `<div><strong>${dia.dia}</strong></div>`;
+                    html += `<div style="font-size: 0.7rem;"><i class="fas fa-ban"></i></div>`;
+                    if (dia.horas > 0) {
+                        html += `<div style="font-size: 0.6rem;">${dia.horas}h</div>`;
+                    }
+                } else if (dia.es_fin_semana) {
+                    html += `<div class="${clase}" title="Fin de semana">`;
+                    html += `<div><strong>${dia.dia}</strong></div>`;
+                    if (dia.horas > 0) {
+                        html += `<div style="font-size: 0.7rem;">${dia.horas}h</div>`;
+                    }
+                } else {
+                    html += `<div class="${clase}" style="cursor: pointer;" onclick="verHorasDia('${dia.fecha}')">`;
+                    html += `<div><strong>${dia.dia}</strong></div>`;
+                    if (dia.horas > 0) {
+                        html += `<div style="font-size: 0.7rem;">${dia.horas}h</div>`;
+                    }
+                }
+                html += '</div></td>';
+            }
+        });
+        html += '</tr>';
+    });
+    
+    html += '</tbody></table>';
+    
+    content.innerHTML = html;
+    document.getElementById('calendario-loading').style.display = 'none';
+    document.getElementById('calendario-content').style.display = 'block';
+}
+
+async function verHorasDia(fecha) {
+    // Verificar si es día válido para registros
+    const fechaObj = new Date(fecha + 'T00:00:00');
+    const diaSemana = fechaObj.getDay();
+    
+    // Verificar si es fin de semana
+    if (diaSemana === 0 || diaSemana === 6) {
+        alert('No se pueden registrar horas en fines de semana.');
+        return;
+    }
+    
+    // Actualizar título del modal
+    document.getElementById('fechaSeleccionada').textContent = fecha;
+    
+    // Actualizar enlace de registrar horas
+    document.getElementById('btnRegistrarHoras').href = `/horas/registrar/?fecha=${fecha}`;
+    
+    // Mostrar modal
+    const modal = new bootstrap.Modal(document.getElementById('modalHorasDia'));
+    modal.show();
+    
+    // Mostrar loading
+    document.getElementById('horasDiaLoading').style.display = 'block';
+    document.getElementById('horasDiaContent').style.display = 'none';
+    document.getElementById('horasDiaError').style.display = 'none';
+    
+    try {
+        const response = await fetch(`/horas/api/fecha/${fecha}/`);
+        const data = await response.json();
+        
+        if (data.length > 0) {
+            mostrarHorasDia(data);
+        } else {
+            document.getElementById('horasDiaLoading').style.display = 'none';
+            document.getElementById('horasDiaError').style.display = 'block';
+        }
+    } catch (error) {
+        console.error('Error cargando horas del día:', error);
+        document.getElementById('horasDiaLoading').style.display = 'none';
+        document.getElementById('horasDiaError').style.display = 'block';
+    }
+}
+
+function mostrarHorasDia(horas) {
+    const content = document.getElementById('horasDiaContent');
+    
+    let html = '<div class="table-responsive">';
+    html += '<table class="table table-sm table-hover" style="font-size: 1rem;">';
+    html += '<thead class="table-light"><tr style="font-weight: 600;"><th>Proyecto</th><th>Horas</th><th>Tipo</th><th>Descripción</th></tr></thead>';
+    html += '<tbody>';
+    
+    let totalHoras = 0;
+    horas.forEach(hora => {
+        totalHoras += parseFloat(hora.horas);
+        html += '<tr>';
+        html += `<td><strong>${hora.proyecto}</strong></td>`;
+        html += `<td>${hora.horas}h</td>`;
+        html += `<td><span class="badge ${hora.tipo_tarea === 'tarea' ? 'bg-primary' : 'bg-info'} fs-6 px-2 py-1">${hora.tipo_tarea === 'tarea' ? 'Tarea' : 'Reunión'}</span></td>`;
+        html += `<td style="font-size: 0.95rem; line-height: 1.4;">${hora.descripcion || '-'}</td>`;
+        html += '</tr>';
+    });
+    
+    html += '</tbody></table>';
+    html += `<div class="text-end mt-3"><h5 class="text-success mb-0">Total: ${totalHoras}h</h5></div>`;
+    html += '</div>';
+    
+    content.innerHTML = html;
+    document.getElementById('horasDiaLoading').style.display = 'none';
+    document.getElementById('horasDiaContent').style.display = 'block';
+}
@@ -0,0 +1,323 @@
+/**
+ * Registro de horas en bloque: patrones de repetición, previsualización
+ * y calendario multi-fecha.
+ *
+ * Datos de la página: data-preview-url en #bloqueForm, data-periodo-inicio /
+ * data-periodo-fin en #multiDateCalendar y los feriados en #feriados-bloque
+ * (json_script).
+ */
+document.addEventListener('DOMContentLoaded', function() {
+    // Aplicar clases CSS a los campos del formulario
+    const fields = {
+        'proyecto': 'form-select',
+        'horas': 'form-control',
+        'tipo_tarea': 'form-select',
+        'descripcion': 'form-control',
+        'fecha_inicio': 'form-control',
+        'fecha_fin': 'form-control',
+        'dia_semana': 'form-select',
+        'dia_mes': 'form-control',
+        'omitir_feriados': 'form-check-input',
+        'omitir_fines_semana': 'form-check-input'
+    };
+    
+    Object.keys(fields).forEach(fieldName => {
+        const field = document.querySelector(`[name="${fieldName}"]`);
+        if (field) {
+            field.className = fields[fieldName];
+        }
+    });
+    
+    // Configurar atributos específicos
+    const horasField = document.querySelector('[name="horas"]');
+    if (horasField) {
+        horasField.step = '0.25';
+        horasField.min = '0.25';
+        horasField.max = '24';
+        horasField.placeholder = 'Ej: 0.5, 1.0, 2.0';
+    }
+    
+    const descripcionField = document.querySelector('[name="descripcion"]');
+    if (descripcionField) {
+        descripcionField.rows = 3;
+        descripcionField.placeholder = 'Ej: Reunión semanal de seguimiento del proyecto...';
+    }
+    
+    const fechaInicioField = document.querySelector('[name="fecha_inicio"]');
+    const fechaFinField = document.querySelector('[name="fecha_fin"]');
+    if (fechaInicioField) fechaInicioField.type = 'date';
+    if (fechaFinField) fechaFinField.type = 'date';
+    
+    // Manejar cambios en el patrón de repetición
+    const patronRadios = document.querySelectorAll('input[name="patron_repeticion"]');
+    
+    function updatePatronConfig() {
+        const selectedPatron = document.querySelector('input[name="patron_repeticion"]:checked')?.value;
+        
+        // Actualizar estilos de las opciones
+        document.querySelectorAll('.patron-option').forEach(option => {
+            option.classList.remove('active');
+        });
+        
+        if (selectedPatron) {
+            const activeOption = document.querySelector(`[data-patron="${selectedPatron}"]`);
+            if (activeOption) {
+                activeOption.classList.add('active');
+            }
+        }
+        
+        // Mostrar/ocultar secciones de configuración
+        document.getElementById('config-manual').style.display = selectedPatron === 'manual' ? 'block' : 'none';
+        document.getElementById('config-automatico').style.display = selectedPatron !== 'manual' ? 'block' : 'none';
+        
+        // Mostrar/ocultar subsecciones
+        document.getElementById('config-semanal').style.display = selectedPatron === 'semanal' ? 'block' : 'none';
+        document.getElementById('config-mensual').style.display = selectedPatron === 'mensual' ? 'block' : 'none';
+    }
+    
+    patronRadios.forEach(radio => {
+        radio.addEventListener('change', updatePatronConfig);
+    });
+    
+    // Inicializar configuración
+    updatePatronConfig();
+    
+    // Manejar previsualización
+    document.getElementById('previewBtn').addEventListener('click', function() {
+        const formData = new FormData(document.getElementById('bloqueForm'));
+        
+        fetch(document.getElementById('bloqueForm').dataset.previewUrl, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            const previewContent = document.getElementById('preview-content');
+            
+            if (data.success) {
+                let html = `
+                    <div class="mb-3">
+                        <div class="d-flex justify-content-between">
+                            <span><strong>Total:</strong> ${data.total}</span>
+                            <span><strong>Nuevos:</strong> ${data.nuevos}</span>
+                        </div>
+                        ${data.existentes > 0 ? `<small class="text-warning">Existentes: ${data.existentes}</small>` : ''}
+                    </div>
+                    <div class="preview-container">
+                `;
+                
+                data.fechas.forEach(fecha => {
+                    const clase = fecha.existe ? 'existe' : 'nueva';
+                    const icono = fecha.existe ? 'fas fa-exclamation-triangle' : 'fas fa-plus';
+                    
+                    html += `
+                        <div class="fecha-item ${clase}">
+                            <div>
+                                <i class="${icono} me-2"></i>
+                                <strong>${fecha.fecha_display}</strong>
+                                <small class="text-muted d-block">${fecha.dia_semana}</small>
+                            </div>
+                            ${fecha.existe ? '<small>Ya existe</small>' : '<small>Nuevo</small>'}
+                        </div>
+                    `;
+                });
+                
+                html += '</div>';
+                previewContent.innerHTML = html;
+            } else {
+                previewContent.innerHTML = `
+                    <div class="alert alert-danger">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        Error: ${data.error || 'No se pudo generar la previsualización'}
+                    </div>
+                `;
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            document.getElementById('preview-content').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error de conexión
+                </div>
+            `;
+        });
+    });
+    
+    // ============================================================================
+    // WIDGET DE CALENDARIO MULTI-FECHA
+    // ============================================================================
+    
+    // Inicializar calendario multi-fecha cuando se selecciona patrón manual
+    let multiDateCalendar = null;
+    
+    function initMultiDateCalendar() {
+        if (multiDateCalendar) {
+            console.log('Calendario ya inicializado');
+            return; // Ya inicializado
+        }
+        
+        console.log('Inicializando calendario multi-fecha...');
+        
+        // Verificar que el contenedor existe
+        const container = document.getElementById('multiDateCalendar');
+        if (!container) {
+            console.error('Contenedor multiDateCalendar no encontrado');
+            return;
+        }
+        
+        // Verificar que la clase MultiDateCalendar está disponible
+        if (typeof MultiDateCalendar === 'undefined') {
+            console.error('Clase MultiDateCalendar no está disponible');
+            return;
+        }
+        
+        // Obtener feriados del usuario (si están disponibles)
+        const feriadosData = document.getElementById('feriados-bloque');
+        const holidays = feriadosData ? JSON.parse(feriadosData.textContent) : [];
+        
+        // Obtener período activo
+        const periodoActivo = {
+            fechaInicio: container.dataset.periodoInicio || null,
+            fechaFin: container.dataset.periodoFin || null
+        };
+        
+        try {
+            multiDateCalendar = new MultiDateCalendar('multiDateCalendar', {
+                minDate: periodoActivo.fechaInicio ? new Date(periodoActivo.fechaInicio) : new Date(),
+                maxDate: periodoActivo.fechaFin ? new Date(periodoActivo.fechaFin) : new Date(new Date().getFullYear() + 2, 11, 31),
+                disableWeekends: false, // Permitir fines de semana por defecto
+                holidays: holidays,
+                onChange: function(selectedDates) {
+                    console.log('Fechas seleccionadas:', selectedDates);
+                    
+                    // Actualizar campo oculto
+                    const fechasManualesField = document.querySelector('[name="fechas_manuales"]');
+                    if (fechasManualesField) {
+                        fechasManualesField.value = selectedDates.join(',');
+                        console.log('Campo actualizado:', fechasManualesField.value);
+                    }
+                    
+                    // Actualizar lista visual
+                    updateSelectedDatesList(selectedDates);
+                }
+            });
+            
+            console.log('Calendario inicializado exitosamente');
+            
+            // Cargar fechas existentes si las hay
+            const fechasManualesField = document.querySelector('[name="fechas_manuales"]');
+            if (fechasManualesField && fechasManualesField.value) {
+                const existingDates = fechasManualesField.value.split(',').filter(d => d.trim());
+                multiDateCalendar.setSelectedDates(existingDates);
+                console.log('Fechas existentes cargadas:', existingDates);
+            }
+            
+        } catch (error) {
+            console.error('Error al inicializar calendario:', error);
+        }
+    }
+    
+    function updateSelectedDatesList(selectedDates) {
+        const container = document.getElementById('selectedDatesList');
+        
+        if (selectedDates.length === 0) {
+            container.innerHTML = `
+                <p class="text-muted text-center mb-0">
+                    <i class="fas fa-hand-pointer me-2"></i>
+                    Seleccione fechas en el calendario para verlas aquí
+                </p>
+            `;
+            return;
+        }
+        
+        // Ordenar fechas
+        const sortedDates = selectedDates.sort();
+        
+        let html = `
+            <div class="d-flex justify-content-between align-items-center mb-2">
+                <strong>${sortedDates.length} fecha${sortedDates.length !== 1 ? 's' : ''} seleccionada${sortedDates.length !== 1 ? 's' : ''}</strong>
+                <button type="button" class="btn btn-sm btn-outline-danger" onclick="clearAllSelectedDates()">
+                    <i class="fas fa-trash me-1"></i>Limpiar
+                </button>
+            </div>
+            <div class="selected-dates-grid">
+        `;
+        
+        sortedDates.forEach((dateStr, index) => {
+            const date = new Date(dateStr + 'T00:00:00');
+            const formattedDate = date.toLocaleDateString('es-ES', {
+                weekday: 'short',
+                day: 'numeric',
+                month: 'short',
+                year: 'numeric'
+            });
+            
+            html += `
+                <div class="selected-date-item">
+                    <span class="date-text">${formattedDate}</span>
+                    <button type="button" class="btn btn-sm btn-outline-danger" 
+                            onclick="removeSelectedDate('${dateStr}')" 
+                            title="Eliminar fecha">
+                        <i class="fas fa-times"></i>
+                    </button>
+                </div>
+            `;
+        });
+        
+        html += '</div>';
+        container.innerHTML = html;
+    }
+    
+    function clearAllSelectedDates() {
+        if (multiDateCalendar) {
+            multiDateCalendar.clearAllDates();
+        }
+    }
+    
+    function removeSelectedDate(dateStr) {
+        if (multiDateCalendar) {
+            multiDateCalendar.removeDate(dateStr);
+        }
+    }
+    
+    // Modificar la función updatePatronConfig para inicializar el calendario
+    const originalUpdatePatronConfig = updatePatronConfig;
+    updatePatronConfig = function() {
+        originalUpdatePatronConfig();
+        
+        const selectedPatron = document.querySelector('input[name="patron_repeticion"]:checked')?.value;
+        
+        if (selectedPatron === 'manual') {
+            // Mostrar sección manual
+            document.getElementById('config-manual').style.display = 'block';
+            
+            // Inicializar calendario inmediatamente
+            setTimeout(() => {
+                initMultiDateCalendar();
+            }, 100);
+        } else {
+            // Ocultar sección manual
+            document.getElementById('config-manual').style.display = 'none';
+        }
+    };
+    
+    // Inicializar configuración al cargar la página
+    updatePatronConfig();
+});
+
+// Funciones globales para los botones
+function clearAllSelectedDates() {
+    if (window.multiDateCalendar) {
+        window.multiDateCalendar.clearAllDates();
+    }
+}
+
+function removeSelectedDate(dateStr) {
+    if (window.multiDateCalendar) {
+        window.multiDateCalendar.removeDate(dateStr);
+    }
+}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Benchmark de los índices de consultas (horas, períodos, proyectos y feriados)
+
+Crea una base de pruebas con datos sintéticos y, para cada consulta
+frecuente, muestra el plan (`EXPLAIN`) y el tiempo con los índices actuales
+y con los anteriores (fecha+usuario en horas, sin índices en períodos,
+proyectos activos ni feriados por usuario).
+Uso: python test/benchmark_indices.py [usuarios] [registros_por_usuario]
+"""
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sis_horas.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, models
+from django.db.models import Sum
+
+from apps.core.models import DiaFeriado, Periodo
+from apps.horas.models import RegistroHora
+from apps.proyectos.models import Proyecto
+
+# Índices agregados por la revisión, por modelo
+INDICES_NUEVOS = {
+    RegistroHora: ['horas_usuario_fecha_idx', 'horas_usuario_periodo_idx'],
+    Periodo: ['periodo_usuario_inicio_idx'],
+    Proyecto: ['proyecto_activos_idx'],
+    DiaFeriado: ['feriado_usuario_fecha_idx'],
+}
+INDICES_ANTERIORES = {
+    RegistroHora: [models.Index(fields=['fecha', 'usuario'], name='bench_fecha_usuario_idx')],
+}
+
+
+def poblar(usuarios, registros):
+    inicio = date(2024, 1, 1)
+    for numero in range(usuarios):
+        usuario = User.objects.create_user(username=f'bench{numero}')
+        periodos = [
+            Periodo.objects.create(
+                nombre=f'P{año}', fecha_inicio=date(año, 1, 1), fecha_fin=date(año, 12, 31),
+                horas_objetivo=1500, usuario=usuario, activo=(año == 2025),
+            )
+            for año in (2024, 2025)
+        ]
+        proyectos = Proyecto.objects.bulk_create([
+            Proyecto(nombre=f'Proyecto {i}', usuario=usuario, activo=i % 3 != 0) for i in range(20)
+        ])
+        DiaFeriado.objects.bulk_create([
+            DiaFeriado(fecha=inicio + timedelta(days=i * 30), nombre=f'F{i}', usuario=usuario) for i in range(20)
+        ])
+        RegistroHora.objects.bulk_create([
+            RegistroHora(
+                fecha=inicio + timedelta(days=i // 4),
+                proyecto=proyectos[i % len(proyectos)],
+                horas=Decimal('0.5') * (i % 8 + 1),
+                periodo=periodos[(i // 4) // 366],
+                usuario=usuario,
+            )
+            for i in range(registros)
+        ], batch_size=500)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def consultas():
+    usuario = User.objects.order_by('pk').last()
+    periodo = Periodo.objects.filter(usuario=usuario, activo=True).first()
+    dia = date(2025, 3, 3)
+    return [
+        ('lista por fecha (página 20)', lambda: RegistroHora.objects.filter(
+            usuario=usuario, fecha__gte=dia).order_by('fecha', 'pk')[:51]),
+        ('total del día', lambda: RegistroHora.objects.filter(
+            usuario=usuario, fecha=dia).values('usuario').annotate(total=Sum('horas'))),
+        ('totales por día (rango)', lambda: RegistroHora.objects.filter(
+            usuario=usuario, fecha__range=(dia, dia + timedelta(days=30))
+        ).values('fecha').annotate(total=Sum('horas')).order_by()),
+        ('horas del período', lambda: RegistroHora.objects.filter(
+            usuario=usuario, periodo=periodo).values('usuario').annotate(total=Sum('horas'))),
+        ('deduplicación en bloque', lambda: RegistroHora.objects.filter(
+            usuario=usuario, fecha=dia, proyecto_id=usuario.proyectos.values('pk')[:1], descripcion='')),
+        ('períodos del usuario', lambda: Periodo.objects.filter(usuario=usuario).order_by('-fecha_inicio')),
+        ('proyectos activos', lambda: Proyecto.objects.filter(usuario=usuario, activo=True).order_by('nombre')),
+        ('feriados del usuario', lambda: DiaFeriado.objects.filter(
+            usuario=usuario, fecha__gte=dia).values_list('fecha', flat=True)),
+    ]
+
+
+def medir(titulo, casos):
+    print(f'\n=== {titulo} ===')
+    for nombre, queryset in casos:
+        mejor = min(timeit.repeat(lambda: list(queryset()), number=20, repeat=5)) / 20
+        print(f'\n{nombre}: {mejor * 1000:.3f} ms')
+        for linea in queryset().explain().splitlines():
+            print(f'    {linea}')
+
+
+def cambiar_indices(nuevos):
+    """Deja solo los índices nuevos (`nuevos=True`) o solo los anteriores"""
+    with connection.schema_editor() as editor:
+        for modelo, nombres in INDICES_NUEVOS.items():
+            for indice in modelo._meta.indexes:
+                if indice.name in nombres:
+                    (editor.add_index if nuevos else editor.remove_index)(modelo, indice)
+        for modelo, indices in INDICES_ANTERIORES.items():
+            for indice in indices:
+                (editor.remove_index if nuevos else editor.add_index)(modelo, indice)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def main():
+    usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    registros = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        poblar(usuarios, registros)
+        print(f'{usuarios} usuarios x {registros} registros ({connection.vendor})')
+        casos = consultas()
+        cambiar_indices(nuevos=False)
+        medir('Antes (índices anteriores)', casos)
+        cambiar_indices(nuevos=True)
+        medir('Después (índices actuales)', casos)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark del conversor de horas (apps/horas/parseo.py)
+
+Compara la conversión anterior (regex sin compilar + float) con
+`parse_hours` y `parse_many` sobre una mezcla de entradas habituales y poco
+habituales. Uso: python test/benchmark_parseo_horas.py [repeticiones]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sis_horas.settings')
+
+import django
+django.setup()
+
+from apps.horas.parseo import obtener_parser, parse_hours, parse_many
+
+
+def conversion_anterior(value):
+    """Implementación previa de convert_hours_input, como referencia"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if re.match(r'^\d{1,2}:\d{2}$', value):
+        try:
+            hours, minutes = map(int, value.split(':'))
+            if 0 <= hours <= 23 and 0 <= minutes <= 59:
+                decimal_hours = hours + (minutes / 60.0)
+                return round(decimal_hours * 2) / 2
+        except ValueError:
+            pass
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return None
+
+
+ENTRADAS = ['1', '1.5', '01:30', '2:00', '8', '0.5', ' 4.0 ', '7:45', '3,5', '1.3333', '10:10', 'abc']
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    datos = ENTRADAS * (repeticiones // len(ENTRADAS))
+    parser = obtener_parser()
+
+    casos = [
+        ('anterior (float)', lambda: [conversion_anterior(v) for v in datos]),
+        ('parse_hours', lambda: [parse_hours(v) if v != 'abc' else None for v in datos]),
+        ('parse_many', lambda: parse_many(datos, validar=False)),
+        ('parse_many + validar', lambda: parser.parse_many(datos)),
+    ]
+
+    print(f"Entradas por corrida: {len(datos)}")
+    for nombre, funcion in casos:
+        mejor = min(timeit.repeat(funcion, number=1, repeat=5))
+        print(f"  {nombre:<22} {mejor * 1000:8.1f} ms  ({mejor / len(datos) * 1e9:6.0f} ns/entrada)")
+
+
+if __name__ == '__main__':
+    main()